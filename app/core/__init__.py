@@ -5,9 +5,24 @@
 
 from .database import (
     Base, db_session, get_redis, get_database_status,
-    init_db, init_redis, create_tables
+    init_db, init_redis, create_tables, migrate_database,
+    init_read_replica, read_session, replica_tolerant, ReadOnlySessionError
 )
 
+# سرویس‌ها هنگام ایمپورت فقط ثبت می‌شوند و در اولین استفاده ساخته می‌شوند
+from .service_registry import ServiceRegistry, LazyService, service_registry
+from .startup import StartupProfiler, BackendWarmup
+from .query_stats import (
+    query_stats, track_queries, assert_max_queries, install_query_instrumentation
+)
+from .slow_query_log import SlowQuery, SlowQueryRecorder, slow_query_recorder
+from .pagination import (
+    Keyset, Page, InvalidCursorError, paginate, encode_cursor, decode_cursor
+)
+from .unit_of_work import UnitOfWork, unit_of_work, current_unit_of_work
+from .transactions import (
+    RetryPolicy, run_in_transaction, transactional, is_transient_error, retry_stats
+)
 from .sync_manager import SyncManager, sync_manager
 from .payment_processor import PaymentProcessor, payment_processor
 from .audit_trail import (
@@ -16,18 +31,36 @@ from .audit_trail import (
 )
 
 # ایمپورت سایر ماژول‌های core
-#try:
-    from .notification_service import NotificationService, notification_service
-#    from .housekeeping_manager import HousekeepingManager, housekeeping_manager
-#    from .maintenance_manager import MaintenanceManager, maintenance_manager
-#except ImportError:
-    # برای محیط‌های توسعه که این ماژول‌ها هنوز ایجاد نشده‌اند
-#    pass
+from .notification_service import NotificationService, notification_service
+from .housekeeping_manager import HousekeepingManager, housekeeping_manager
+from .maintenance_manager import MaintenanceManager, maintenance_manager
+from .guest_key_backfill import GuestKeyBackfill, guest_key_backfill
+from .guest_profile_cache import (
+    GuestProfileCache, guest_profile_cache, install_profile_invalidation, invalidate_after_commit
+)
+from .archival import HistoryArchiver, history_archiver, history_entity, archive_cutoff
+from .partitioning import PartitionManager, partition_manager, is_partitioned
 
 __all__ = [
     # Database
     'Base', 'db_session', 'get_redis', 'get_database_status',
-    'init_db', 'init_redis', 'create_tables',
+    'init_db', 'init_redis', 'create_tables', 'migrate_database',
+    'init_read_replica', 'read_session', 'replica_tolerant', 'ReadOnlySessionError',
+
+    # Service lifecycle
+    'ServiceRegistry', 'LazyService', 'service_registry',
+    'StartupProfiler', 'BackendWarmup',
+
+    # Query instrumentation
+    'query_stats', 'track_queries', 'assert_max_queries', 'install_query_instrumentation',
+    'SlowQuery', 'SlowQueryRecorder', 'slow_query_recorder',
+
+    # Pagination
+    'Keyset', 'Page', 'InvalidCursorError', 'paginate', 'encode_cursor', 'decode_cursor',
+
+    # Transactions
+    'UnitOfWork', 'unit_of_work', 'current_unit_of_work',
+    'RetryPolicy', 'run_in_transaction', 'transactional', 'is_transient_error', 'retry_stats',
 
     # Sync
     'SyncManager', 'sync_manager',
@@ -40,7 +73,11 @@ __all__ = [
     'audit_manager', 'audit_log', 'log_audit_event',
 
     # Other core modules
-    'NotificationService', 'notification_service'
-#    'HousekeepingManager', 'housekeeping_manager',
-#    'MaintenanceManager', 'maintenance_manager'
+    'NotificationService', 'notification_service',
+    'HousekeepingManager', 'housekeeping_manager',
+    'MaintenanceManager', 'maintenance_manager',
+    'GuestKeyBackfill', 'guest_key_backfill',
+    'GuestProfileCache', 'guest_profile_cache', 'install_profile_invalidation', 'invalidate_after_commit',
+    'HistoryArchiver', 'history_archiver', 'history_entity', 'archive_cutoff',
+    'PartitionManager', 'partition_manager', 'is_partitioned'
 ]
@@ -0,0 +1,318 @@
+# app/core/archival.py
+"""
+بایگانی سوابق بسته شده قدیمی برای کوچک نگه داشتن جداول پرکاربرد
+
+اقامت‌های بسته شده (checked_out، no_show، cancelled) که خروج آن‌ها از افق
+بایگانی (archive_horizon_days) قدیمی‌تر است و صورت‌حساب باز یا مورد اختلاف
+ندارند، همراه تخصیص اتاق‌ها، تغییرات وضعیت همان تخصیص‌ها، صورت‌حساب‌ها،
+تراکنش‌های صورت‌حساب، پرداخت‌ها و ارتباط همراهان به جداول بایگانی
+(archive_models) منتقل می‌شوند. سپس تغییرات وضعیت قدیمی بدون تخصیص
+(خانه‌داری، تعمیرات) بایگانی می‌شوند.
+
+هر دسته (حداکثر archive_batch_size اقامت) در یک تراکنش کپی و حذف
+می‌شود؛ توقف یا خطا در میانه کار هیچ سطری را نیمه‌کاره نمی‌گذارد و اجرای
+بعدی از سطرهای باقی‌مانده ادامه می‌دهد. بین دسته‌ها archive_pause مکث
+می‌شود و کار پس‌زمینه فقط در بازه archive_window (شیفت شب) اجرا می‌شود.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, delete, exists, func, insert, literal, or_, select
+
+from app.core.database import db_session
+from app.core.service_registry import service_registry, LazyService
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# وضعیت‌های نهایی اقامت
+CLOSED_STAY_STATUSES = ('checked_out', 'no_show', 'cancelled')
+
+# فاصله بررسی بازه اجرا در کار پس‌زمینه (ثانیه)
+WINDOW_CHECK_INTERVAL = 60
+
+
+def archive_cutoff(horizon_days: int = None) -> datetime:
+    """مرز بایگانی: سوابق بسته شده پیش از این زمان بایگانی می‌شوند"""
+    horizon_days = config.database.archive_horizon_days if horizon_days is None else horizon_days
+    return datetime.combine(date.today(), day_time.min) - timedelta(days=horizon_days)
+
+
+def history_entity(session, model, since=None):
+    """
+    مدل یا موجودیت یکپارچه (اصلی + بایگانی) برای queryهای سابقه
+
+    اگر بازه query (since) بعد از جدیدترین created_at موجود در بایگانی
+    همان مدل باشد (یا بایگانی خالی باشد) فقط جدول اصلی خوانده می‌شود؛ در
+    غیر این صورت اجتماع جدول اصلی و بایگانی. مرز واقعی بایگانی به جای افق
+    تنظیمات استفاده می‌شود چون پرداخت‌ها و تراکنش‌های اقامت‌های بایگانی شده
+    ممکن است پس از افق ثبت شده باشند و HistoryArchiver ممکن است با افق
+    دیگری اجرا شده باشد.
+    """
+    from app.models.reception.archive_models import ARCHIVE_TABLES, unified_entity
+
+    archive = ARCHIVE_TABLES[model]
+    if since is not None and 'created_at' in archive.c:
+        since = since if isinstance(since, datetime) else datetime.combine(since, day_time.min)
+        newest = session.execute(select(func.max(archive.c.created_at))).scalar()
+        if newest is None or since > newest:
+            return model
+    return unified_entity(model)
+
+
+def parse_window(window: str) -> Optional[Tuple[day_time, day_time]]:
+    """بازه 'HH:MM-HH:MM' (ممکن است از نیمه‌شب بگذرد)؛ None یعنی همیشه"""
+    if not window:
+        return None
+    start, end = (day_time.fromisoformat(part.strip()) for part in window.split('-'))
+    return start, end
+
+
+class HistoryArchiver:
+    """کار پس‌زمینه بایگانی سوابق قدیمی"""
+
+    def __init__(self, horizon_days: int = None, batch_size: int = None,
+                 pause: float = None, window: str = None):
+        self.horizon_days = config.database.archive_horizon_days if horizon_days is None else horizon_days
+        self.batch_size = batch_size or config.database.archive_batch_size
+        self.pause = config.database.archive_pause if pause is None else pause
+        self.window = parse_window(config.database.archive_window if window is None else window)
+
+        self.phase = 'stays'
+        self.last_stay_id = 0
+        self.last_change_id = 0
+        self.archived: Counter = Counter()
+        self.batches = 0
+        self.finished = False
+        self.last_error: Optional[str] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def in_window(self, now: datetime = None) -> bool:
+        """آیا زمان now در بازه اجرای بایگانی است"""
+        if self.window is None:
+            return True
+        current = (now or datetime.now()).time()
+        start, end = self.window
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    def _eligible_stays(self, cutoff: datetime):
+        """شرط اقامت‌های قابل بایگانی"""
+        from app.models.reception.guest_models import Stay
+        from app.models.reception.payment_models import GuestFolio
+        stays, folios = Stay.__table__, GuestFolio.__table__
+
+        unsettled = exists().where(
+            folios.c.stay_id == stays.c.id,
+            or_(folios.c.folio_status == 'disputed', func.coalesce(folios.c.current_balance, 0) != 0)
+        )
+        return [
+            stays.c.status.in_(CLOSED_STAY_STATUSES),
+            func.coalesce(stays.c.actual_check_out, stays.c.planned_check_out) < cutoff,
+            ~unsettled
+        ]
+
+    @staticmethod
+    def _stay_plan(stay_ids: List[int]) -> List[Tuple[type, Any]]:
+        """جداول و شرط سطرهای یک دسته اقامت؛ فرزندان پیش از والدها"""
+        from app.models.reception.guest_models import Stay, CompanionStay
+        from app.models.reception.room_status_models import RoomAssignment, RoomStatusChange
+        from app.models.reception.payment_models import Payment, GuestFolio, FolioTransaction
+
+        assignments, folios = RoomAssignment.__table__, GuestFolio.__table__
+        assignment_ids = select(assignments.c.id).where(assignments.c.stay_id.in_(stay_ids))
+        folio_ids = select(folios.c.id).where(folios.c.stay_id.in_(stay_ids))
+
+        return [
+            (RoomStatusChange, RoomStatusChange.__table__.c.room_assignment_id.in_(assignment_ids)),
+            (FolioTransaction, FolioTransaction.__table__.c.folio_id.in_(folio_ids)),
+            (GuestFolio, folios.c.stay_id.in_(stay_ids)),
+            (Payment, Payment.__table__.c.stay_id.in_(stay_ids)),
+            (RoomAssignment, assignments.c.stay_id.in_(stay_ids)),
+            (CompanionStay, CompanionStay.__table__.c.stay_id.in_(stay_ids)),
+            (Stay, Stay.__table__.c.id.in_(stay_ids)),
+        ]
+
+    def _move(self, session, model, condition, archived_at: datetime) -> int:
+        """کپی سطرهای شرط به بایگانی و حذف از جدول اصلی (در تراکنش جاری)"""
+        from app.models.reception.archive_models import ARCHIVE_TABLES
+
+        source, archive = model.__table__, ARCHIVE_TABLES[model]
+        names = [column.name for column in source.columns]
+        session.execute(
+            insert(archive).from_select(
+                names + ['archived_at'],
+                select(*source.columns, literal(archived_at, DateTime)).where(condition)
+            )
+        )
+        moved = session.execute(delete(source).where(condition)).rowcount
+        self.archived[source.name] += moved
+        return moved
+
+    def _archive_stays(self, session, cutoff: datetime, archived_at: datetime) -> int:
+        from app.models.reception.guest_models import Stay
+        stays = Stay.__table__
+
+        stay_ids = session.execute(
+            select(stays.c.id)
+            .where(stays.c.id > self.last_stay_id, *self._eligible_stays(cutoff))
+            .order_by(stays.c.id)
+            .limit(self.batch_size)
+        ).scalars().all()
+        if not stay_ids:
+            return 0
+
+        for model, condition in self._stay_plan(stay_ids):
+            self._move(session, model, condition, archived_at)
+        self.last_stay_id = stay_ids[-1]
+        return len(stay_ids)
+
+    def _archive_status_changes(self, session, cutoff: datetime, archived_at: datetime) -> int:
+        """
+        تغییرات وضعیت قدیمی بدون تخصیص اتاق
+
+        روی جدول پارتیشن‌بندی شده هم اجرا می‌شود؛ سطرهای باقی‌مانده
+        پارتیشن‌های منقضی (مثلاً تخصیص‌های اقامت‌های بایگانی نشده) هنگام
+        حذف پارتیشن به بایگانی کپی می‌شوند (partitioning.drop_expired_partitions).
+        """
+        from app.models.reception.room_status_models import RoomStatusChange
+        changes = RoomStatusChange.__table__
+
+        change_ids = session.execute(
+            select(changes.c.id)
+            .where(changes.c.id > self.last_change_id, changes.c.room_assignment_id.is_(None),
+                   changes.c.created_at < cutoff)
+            .order_by(changes.c.id)
+            .limit(self.batch_size)
+        ).scalars().all()
+        if not change_ids:
+            return 0
+
+        self._move(session, RoomStatusChange, changes.c.id.in_(change_ids), archived_at)
+        self.last_change_id = change_ids[-1]
+        return len(change_ids)
+
+    def run_batch(self) -> int:
+        """
+        بایگانی یک دسته در یک تراکنش
+
+        Returns:
+            int: تعداد سطرهای اصلی دسته (اقامت یا تغییر وضعیت)؛ 0 یعنی کار تمام است
+        """
+        cutoff = archive_cutoff(self.horizon_days)
+        archived_at = datetime.now()
+
+        with db_session() as session:
+            count = 0
+            if self.phase == 'stays':
+                count = self._archive_stays(session, cutoff, archived_at)
+                if not count:
+                    self.phase = 'status_changes'
+            if self.phase == 'status_changes':
+                count = self._archive_status_changes(session, cutoff, archived_at)
+            session.commit()
+
+        if count:
+            self.batches += 1
+        return count
+
+    def _reset(self):
+        """شروع یک دور کامل جدید"""
+        self.phase = 'stays'
+        self.last_stay_id = self.last_change_id = 0
+        self.finished = False
+
+    def run(self, max_batches: int = None) -> Dict[str, Any]:
+        """
+        اجرای دسته‌ها تا پایان، توقف، پایان بازه اجرا یا رسیدن به max_batches
+
+        دور نیمه‌تمام از همان نقطه ادامه می‌یابد و پس از دور کامل، اجرای
+        بعدی دور جدیدی شروع می‌کند.
+        """
+        if self.finished:
+            self._reset()
+
+        started = time.perf_counter()
+        batches = 0
+
+        while not self._stop_event.is_set() and self.in_window():
+            if max_batches is not None and batches >= max_batches:
+                break
+            if not self.run_batch():
+                self.finished = True
+                break
+            batches += 1
+            if self.pause:
+                self._stop_event.wait(self.pause)
+
+        if self.finished:
+            logger.info(f"✅ بایگانی سوابق قدیمی: {dict(self.archived)} "
+                        f"({time.perf_counter() - started:.1f}s)")
+        return self.get_status()
+
+    def pending(self) -> int:
+        """تعداد اقامت‌های قابل بایگانی"""
+        from app.models.reception.guest_models import Stay
+
+        with db_session() as session:
+            return session.execute(
+                select(func.count()).select_from(Stay.__table__)
+                .where(*self._eligible_stays(archive_cutoff(self.horizon_days)))
+            ).scalar()
+
+    def start(self):
+        """شروع کار در پس‌زمینه (هوک چرخه حیات)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker, name='history-archiver', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """توقف کار پس از دسته جاری (هوک چرخه حیات)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _worker(self):
+        # یک دور کامل در هر بازه اجرا؛ دور ناتمام در بازه بعد ادامه می‌یابد
+        done_in_window = False
+        while not self._stop_event.is_set():
+            if not self.in_window():
+                done_in_window = False
+            elif not done_in_window:
+                try:
+                    self.run()
+                    done_in_window = self.finished
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.error(f"❌ خطا در بایگانی سوابق قدیمی: {e}")
+            self._stop_event.wait(WINDOW_CHECK_INTERVAL)
+
+    def get_status(self) -> Dict[str, Any]:
+        """وضعیت پیشرفت کار"""
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'finished': self.finished,
+            'phase': self.phase,
+            'archived': dict(self.archived),
+            'batches': self.batches,
+            'last_stay_id': self.last_stay_id,
+            'last_change_id': self.last_change_id,
+            'last_error': self.last_error
+        }
+
+
+# ثبت سرویس؛ کار فقط با service_registry.start_all شروع می‌شود
+service_registry.register('history_archiver', HistoryArchiver, autostart=True)
+history_archiver = LazyService('history_archiver')
@@ -4,14 +4,15 @@
 """
 
 import logging
-import json
-from datetime import datetime
-from typing import Dict, Any, List, Optional
-from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, ForeignKey
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from sqlalchemy import Column, String, Integer, DateTime, Text, JSON, ForeignKey, Index, func, select
 from sqlalchemy.orm import relationship
 from enum import Enum
 
-from app.core.database import Base, db_session
+from app.core.database import Base, db_session, replica_tolerant
+from app.core.pagination import Keyset, InvalidCursorError, paginate
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -118,17 +119,21 @@ class AuditTrail(Base):
     feature = Column(String(100))              # ویژگی مربوطه
     correlation_id = Column(String(100))       # ID برای ردیابی زنجیره‌ای
 
-    # ایندکس‌ها برای جستجوی سریع
+    # ایندکس‌ها برای جستجوی سریع (ترتیب صفحه‌بندی لاگ‌ها)
     __table_args__ = (
+        Index('ix_system_audit_trail_timestamp_id', 'timestamp', 'id'),
         {'schema': 'system'}
     )
 
 class AuditManager:
     """مدیریت پیشرفته سیستم Audit"""
 
+    # لیست لاگ‌ها: جدیدترین اول
+    AUDIT_KEYSET = Keyset('audit_by_timestamp', AuditTrail.timestamp.desc(), AuditTrail.id.desc())
+
     def __init__(self):
         self.enabled = config.security.audit_log_enabled
-        self.retention_days = 365  # مدت نگهداری رکوردها
+        self.retention_days = config.database.audit_retention_days  # مدت نگهداری رکوردها
         self.batch_size = 100      # سایز بچ برای پردازش دسته‌ای
 
     def log_activity(self,
@@ -247,6 +252,7 @@ class AuditManager:
 
         return changes
 
+    @replica_tolerant()
     def get_audit_logs(self,
                       start_date: datetime = None,
                       end_date: datetime = None,
@@ -257,9 +263,9 @@ class AuditManager:
                       severity: AuditSeverity = None,
                       module: str = None,
                       limit: int = 100,
-                      offset: int = 0) -> List[Dict[str, Any]]:
+                      cursor: str = None) -> Dict[str, Any]:
         """
-        دریافت لاگ‌های Audit با فیلترهای مختلف
+        دریافت یک صفحه از لاگ‌های Audit با فیلترهای مختلف (جدیدترین اول)
 
         Args:
             start_date: تاریخ شروع
@@ -270,11 +276,11 @@ class AuditManager:
             entity_id: فیلتر بر اساس ID موجودیت
             severity: فیلتر بر اساس سطح شدت
             module: فیلتر بر اساس ماژول
-            limit: تعداد رکوردها
-            offset: آفست برای صفحه‌بندی
+            limit: تعداد رکوردهای صفحه
+            cursor: توکن next_cursor صفحه قبل (None برای صفحه اول)
 
         Returns:
-            List[Dict]: لیست رکوردهای Audit
+            Dict: رکوردهای صفحه در logs و next_cursor برای صفحه بعد
         """
 
         try:
@@ -299,22 +305,30 @@ class AuditManager:
                 if module:
                     query = query.filter(AuditTrail.module == module)
 
-                # مرتب‌سازی و محدودیت
-                query = query.order_by(AuditTrail.timestamp.desc())
-                query = query.offset(offset).limit(limit)
-
-                results = query.all()
-
-                # تبدیل به دیکشنری
-                audit_logs = []
-                for record in results:
-                    audit_logs.append(self._serialize_audit_record(record))
+                # صفحه‌بندی keyset روی (timestamp, id)
+                page = paginate(query, self.AUDIT_KEYSET, cursor, limit)
+                audit_logs = [self._serialize_audit_record(record) for record in page.items]
 
-                return audit_logs
+                return {
+                    'success': True,
+                    'count': len(audit_logs),
+                    'logs': audit_logs,
+                    'next_cursor': page.next_cursor
+                }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
             logger.error(f"خطا در دریافت لاگ‌های Audit: {e}")
-            return []
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'AUDIT_LOGS_ERROR'
+            }
 
     def _serialize_audit_record(self, record: AuditTrail) -> Dict[str, Any]:
         """سریالایز کردن رکورد Audit"""
@@ -424,14 +438,29 @@ class AuditManager:
         """
         پاک کردن رکوردهای قدیمی بر اساس retention policy
 
+        اگر جدول پارتیشن‌بندی شده باشد (partitioning) پارتیشن‌های ماه‌های
+        کاملاً قدیمی جدا و حذف می‌شوند؛ در غیر این صورت DELETE سطر به سطر.
+
         Returns:
             int: تعداد رکوردهای پاک شده
         """
 
         try:
+            from app.core.partitioning import spec_for, is_partitioned, drop_expired_partitions
+
             cutoff_date = datetime.now() - timedelta(days=self.retention_days)
 
             with db_session() as session:
+                connection = session.connection()
+                if is_partitioned(connection, AuditTrail.__table__):
+                    dropped = drop_expired_partitions(connection, spec_for(AuditTrail.__table__),
+                                                      retention_days=self.retention_days)
+                    session.commit()
+
+                    logger.info(f"تعداد {dropped['rows']} رکورد Audit قدیمی با حذف "
+                                f"{len(dropped['partitions'])} پارتیشن پاک شد")
+                    return dropped['rows']
+
                 # شمارش رکوردهای قدیمی
                 old_records_count = session.query(AuditTrail).filter(
                     AuditTrail.timestamp < cutoff_date
@@ -451,51 +480,88 @@ class AuditManager:
             logger.error(f"خطا در پاک کردن رکوردهای قدیمی Audit: {e}")
             return 0
 
+    def _export_conditions(self, start_date: datetime, end_date: datetime) -> List[Any]:
+        """شرط بازه زمانی خروجی (روی جدول پارتیشن‌بندی شده فقط پارتیشن‌های بازه خوانده می‌شوند)"""
+        table = AuditTrail.__table__
+        conditions = []
+        if start_date:
+            conditions.append(table.c.timestamp >= start_date)
+        if end_date:
+            conditions.append(table.c.timestamp <= end_date)
+        return conditions
+
+    def iter_audit_records(self,
+                           start_date: datetime = None,
+                           end_date: datetime = None,
+                           batch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        رکوردهای سریالایز شده بازه به ترتیب زمان (قدیمی‌ترین اول) به صورت جریانی
+
+        سطرها با select ستونی و yield_per خوانده می‌شوند (در PostgreSQL
+        server-side cursor)؛ در هر لحظه فقط یک دسته batch_size سطری در
+        حافظه است و تعداد رکوردها سقفی ندارد.
+        """
+        table = AuditTrail.__table__
+        query = (
+            select(table)
+            .where(*self._export_conditions(start_date, end_date))
+            .order_by(table.c.timestamp, table.c.id)
+            .execution_options(yield_per=batch_size or config.database.export_batch_size)
+        )
+
+        with db_session() as session:
+            for row in session.execute(query):
+                yield self._serialize_audit_record(row)
+
+    @replica_tolerant()
     def export_audit_logs(self,
                          start_date: datetime,
                          end_date: datetime,
-                         export_format: str = 'json') -> Optional[str]:
+                         export_format: str = 'json',
+                         compress: bool = False,
+                         progress_callback: Callable[[int, Optional[int]], None] = None) -> Optional[str]:
         """
         خروجی گرفتن از لاگ‌های Audit
 
+        رکوردها مستقیماً از cursor دیتابیس در فایل نوشته می‌شوند
+        (export_utils.stream_export)؛ حافظه مصرفی به تعداد رکوردها بستگی ندارد.
+
         Args:
             start_date: تاریخ شروع
             end_date: تاریخ پایان
-            export_format: فرمت خروجی (json, csv)
+            export_format: فرمت خروجی (json, jsonl, csv)
+            compress: فشرده‌سازی gzip (پسوند .gz)
+            progress_callback: گزارش پیشرفت (written, total)
 
         Returns:
-            str: مسیر فایل خروجی یا None در صورت خطا
+            str: مسیر فایل خروجی یا None در صورت خطا یا نبود رکورد
         """
 
         try:
-            # دریافت لاگ‌ها
-            audit_logs = self.get_audit_logs(start_date=start_date, end_date=end_date, limit=10000)
+            from app.utils.export_utils import stream_export
 
-            if not audit_logs:
+            with db_session() as session:
+                total = session.execute(
+                    select(func.count()).select_from(AuditTrail.__table__)
+                    .where(*self._export_conditions(start_date, end_date))
+                ).scalar()
+            if not total:
                 return None
 
             # ایجاد فایل خروجی
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"audit_export_{timestamp}.{export_format}"
-            filepath = os.path.join(config.data_dir, 'exports', filename)
+            filename = f"audit_export_{timestamp}.{export_format}" + ('.gz' if compress else '')
+            filepath = os.path.join(config.app.export_dir, filename)
 
             # ایجاد پوشه اگر وجود ندارد
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-            if export_format == 'json':
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(audit_logs, f, ensure_ascii=False, indent=2)
-
-            elif export_format == 'csv':
-                import csv
-                with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                    if audit_logs:
-                        fieldnames = audit_logs[0].keys()
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        writer.writerows(audit_logs)
+            written = stream_export(
+                self.iter_audit_records(start_date, end_date), filepath, export_format,
+                total=total, progress_callback=progress_callback
+            )
 
-            logger.info(f"لاگ‌های Audit با موفقیت export شدند: {filepath}")
+            logger.info(f"تعداد {written} لاگ Audit با موفقیت export شدند: {filepath}")
             return filepath
 
         except Exception as e:
@@ -4,10 +4,18 @@
 """
 
 import logging
+import threading
+from contextvars import ContextVar
+from functools import wraps
 from sqlalchemy import create_engine, event, text
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import NullPool
+from app.core.db_pool import MeteredQueuePool, get_pool_status
+from app.core.query_stats import track_queries, caller_name, install_query_instrumentation, query_stats
+from app.core.transactions import retry_stats
+from app.core.unit_of_work import current_unit_of_work, join_unit_of_work
 from contextlib import contextmanager
 import redis
 import time
@@ -22,6 +30,36 @@ Base = declarative_base()
 engine = None
 SessionLocal = None
 redis_client = None
+read_engine = None
+ReadSessionLocal = None
+
+class ReplicaCall:
+    """وضعیت فراخوانی جاری replica_tolerant"""
+
+    __slots__ = ('max_staleness', 'replica_failed')
+
+    def __init__(self, max_staleness: float):
+        self.max_staleness = max_staleness
+        self.replica_failed = False
+
+# فراخوانی replica_tolerant در حال اجرا (ReplicaCall)
+_replica_tolerance: ContextVar = ContextVar('replica_tolerance', default=None)
+
+
+class ReadOnlySessionError(Exception):
+    """تلاش برای نوشتن ORM در session فقط‌خواندنی"""
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """آیا خطا از قطع یا نبود اتصال دیتابیس است (نه خطای خود کوئری)"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, DisconnectionError))
+
+
+def _reject_read_session_flush(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        raise ReadOnlySessionError("نوشتن در session فقط‌خواندنی (read_session یا replica_tolerant) مجاز نیست")
 
 class DatabaseManager:
     """مدیریت پیشرفته اتصال به دیتابیس"""
@@ -31,6 +69,14 @@ class DatabaseManager:
         self.retry_delay = 5
         self.is_connected = False
 
+        # وضعیت replica
+        self._replica_lock = threading.Lock()
+        self._replica_lag = None
+        self._replica_lag_checked_at = 0.0
+        self._replica_unhealthy_until = 0.0
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
     def init_database(self):
         """راه‌اندازی اتصال به دیتابیس"""
         global engine, SessionLocal
@@ -39,31 +85,32 @@ class DatabaseManager:
             try:
                 logger.info(f"🔗 تلاش برای اتصال به دیتابیس پذیرش (تلاش {attempt + 1})...")
 
-                # ایجاد engine با تنظیمات بهینه
-                engine = create_engine(
-                    config.database.url,
-                    poolclass=QueuePool,
-                    pool_size=20,
-                    max_overflow=30,
-                    pool_timeout=30,
-                    pool_recycle=3600,
-                    echo=config.debug,
-                    connect_args={
-                        'connect_timeout': 10,
-                        'application_name': f'hotel_reception_{config.version}'
-                    }
-                )
+                # ایجاد engine بر اساس تنظیمات DatabaseConfig
+                engine = self.build_engine(config.database.url)
+
+                if config.database.query_instrumentation:
+                    install_query_instrumentation()
+
+                if config.database.slow_query_log:
+                    from app.core.slow_query_log import slow_query_recorder
+                    slow_query_recorder.install(engine)
 
                 # تست اتصال
                 with engine.connect() as conn:
                     result = conn.execute(text("SELECT 1"))
                     result.fetchone()
 
-                SessionLocal = scoped_session(sessionmaker(
+                session_factory = sessionmaker(
                     autocommit=False,
                     autoflush=False,
                     bind=engine
-                ))
+                )
+
+                # در حالت transaction هیچ session بین تراکنش‌ها نگه داشته نمی‌شود
+                if config.database.pool_mode == 'transaction':
+                    SessionLocal = session_factory
+                else:
+                    SessionLocal = scoped_session(session_factory)
 
                 self.is_connected = True
                 logger.info("✅ اتصال به دیتابیس پذیرش با موفقیت برقرار شد")
@@ -78,6 +125,151 @@ class DatabaseManager:
         logger.error("❌ اتصال به دیتابیس پذیرش ناموفق بود")
         return False
 
+    @staticmethod
+    def build_engine(url: str, creator=None):
+        """
+        ساخت engine با تنظیمات pool از DatabaseConfig
+
+        در حالت small تعداد اتصالات هر ایستگاه کوچک نگه داشته می‌شود؛
+        pre-ping اتصالات قطع شده را قبل از استفاده جایگزین می‌کند و
+        statement_timeout هنگام برقراری هر اتصال از طریق options تنظیم می‌شود.
+
+        در حالت transaction (پشت PgBouncer) از NullPool یا pool بسیار کوچک
+        استفاده می‌شود، prepared statement سمت سرور غیرفعال است و
+        statement_timeout فقط با SET LOCAL در هر تراکنش اعمال می‌شود.
+        """
+        params = config.database.get_connection_params()
+        params['echo'] = params['echo'] or config.debug
+        params['connect_args']['application_name'] = f'hotel_reception_{config.version}'
+        transaction_mode = config.database.pool_mode == 'transaction'
+        is_postgres = url.startswith('postgresql')
+
+        if transaction_mode and url.startswith('postgresql+psycopg:'):
+            # psycopg 3 بعد از چند اجرا statement را prepare می‌کند
+            params['connect_args']['prepare_threshold'] = None
+
+        if not is_postgres or creator is not None:
+            # پارامترهای libpq برای درایورهای دیگر معتبر نیستند
+            params.pop('connect_args')
+        if creator is not None:
+            params['creator'] = creator
+
+        poolclass = MeteredQueuePool
+        if transaction_mode and params['pool_size'] == 0:
+            poolclass = NullPool
+            for key in ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping'):
+                params.pop(key)
+
+        new_engine = create_engine(url, poolclass=poolclass, **params)
+
+        if transaction_mode and is_postgres and config.database.statement_timeout:
+            install_transaction_statement_timeout(new_engine, config.database.statement_timeout)
+
+        return new_engine
+
+    def init_read_replica(self, read_url: str = None) -> bool:
+        """
+        راه‌اندازی اتصال replica فقط‌خواندنی
+
+        Args:
+            read_url: آدرس replica (پیش‌فرض: DatabaseConfig.read_url)
+
+        Returns:
+            bool: آیا replica در دسترس است
+        """
+        global read_engine, ReadSessionLocal
+
+        read_url = read_url or config.database.read_url
+        if not read_url:
+            return False
+
+        try:
+            new_engine = self.build_engine(read_url)
+            with new_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+            read_engine = new_engine
+            ReadSessionLocal = sessionmaker(autoflush=False, bind=read_engine)
+            self._replica_lag = None
+            self._replica_unhealthy_until = 0.0
+            logger.info("✅ اتصال به replica فقط‌خواندنی برقرار شد")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ خطا در اتصال به replica: {e}")
+            return False
+
+    def replica_lag_seconds(self) -> float:
+        """
+        تأخیر replica نسبت به primary (ثانیه)
+
+        نتیجه به مدت replica_lag_check_interval کش می‌شود تا هر خواندن
+        یک کوئری اضافه نداشته باشد.
+        """
+        now = time.monotonic()
+        with self._replica_lock:
+            if self._replica_lag is not None and \
+                    now - self._replica_lag_checked_at < config.database.replica_lag_check_interval:
+                return self._replica_lag
+
+        lag = 0.0
+        if read_engine.dialect.name == 'postgresql':
+            with read_engine.connect() as conn:
+                lag = conn.execute(text(
+                    "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                )).scalar() or 0.0
+
+        with self._replica_lock:
+            self._replica_lag = float(lag)
+            self._replica_lag_checked_at = now
+        return self._replica_lag
+
+    def choose_read_target(self, max_staleness: float = None) -> str:
+        """
+        انتخاب مقصد خواندن: 'replica' یا 'primary'
+
+        اگر replica تنظیم نشده، ناسالم یا عقب‌تر از max_staleness باشد
+        خواندن از primary انجام می‌شود.
+        """
+        if read_engine is None or time.monotonic() < self._replica_unhealthy_until:
+            return 'primary'
+
+        if max_staleness is None:
+            max_staleness = config.database.replica_max_staleness
+
+        try:
+            if self.replica_lag_seconds() <= max_staleness:
+                return 'replica'
+            logger.warning("⚠️ تأخیر replica بیش از حد مجاز است؛ خواندن از primary")
+        except Exception as e:
+            self.mark_replica_unhealthy(e)
+
+        return 'primary'
+
+    def mark_replica_unhealthy(self, error: Exception):
+        """غیرفعال کردن موقت replica پس از خطا"""
+        self._replica_unhealthy_until = time.monotonic() + config.database.replica_retry_after
+        with self._replica_lock:
+            self._replica_lag = None
+        logger.error(f"❌ replica در دسترس نیست، استفاده از primary: {error}")
+
+    def get_replica_status(self):
+        """وضعیت replica و آمار مسیریابی خواندن"""
+        if read_engine is None:
+            return {'status': 'Not configured'}
+
+        return {
+            'status': 'Unhealthy' if time.monotonic() < self._replica_unhealthy_until else 'Connected',
+            'lag_seconds': self._replica_lag,
+            'replica_reads': self.replica_reads,
+            'primary_fallbacks': self.primary_fallbacks,
+            'pool': get_pool_status(read_engine)
+        }
+
+    def get_pool_status(self):
+        """وضعیت و آمار connection pool"""
+        return get_pool_status(engine)
+
     def init_redis(self):
         """راه‌اندازی اتصال به Redis"""
         global redis_client
@@ -109,7 +301,7 @@ class DatabaseManager:
         """دریافت وضعیت اتصال"""
         try:
             with engine.connect() as conn:
-                result = conn.execute("SELECT version(), current_database(), current_user")
+                result = conn.execute(text("SELECT version(), current_database(), current_user"))
                 db_info = result.fetchone()
 
             redis_status = "Connected" if redis_client and redis_client.ping() else "Disconnected"
@@ -124,6 +316,10 @@ class DatabaseManager:
                 'redis': {
                     'status': redis_status
                 },
+                'pool': self.get_pool_status(),
+                'replica': self.get_replica_status(),
+                'transactions': retry_stats.snapshot(),
+                'queries': query_stats.snapshot(),
                 'reception_system': {
                     'is_connected': self.is_connected
                 }
@@ -132,9 +328,26 @@ class DatabaseManager:
             return {
                 'database': {'status': 'Disconnected', 'error': str(e)},
                 'redis': {'status': 'Disconnected'},
+                'pool': self.get_pool_status(),
+                'transactions': retry_stats.snapshot(),
                 'reception_system': {'is_connected': False}
             }
 
+def install_transaction_statement_timeout(target_engine, timeout_ms: int):
+    """
+    تنظیم statement_timeout در ابتدای هر تراکنش با SET LOCAL
+
+    SET LOCAL با پایان تراکنش از بین می‌رود و به اتصال سرور دیگری که
+    pooler در تراکنش بعدی اختصاص می‌دهد منتقل نمی‌شود.
+    """
+    statement = f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+    @event.listens_for(target_engine, 'begin')
+    def set_local_statement_timeout(conn):
+        conn.exec_driver_sql(statement)
+
+    return set_local_statement_timeout
+
 # ایجاد مدیر دیتابیس
 db_manager = DatabaseManager()
 
@@ -146,8 +359,12 @@ def init_redis():
     """راه‌اندازی اولیه Redis"""
     return db_manager.init_redis()
 
+def init_read_replica():
+    """راه‌اندازی replica فقط‌خواندنی در صورت تنظیم DB_READ_URL"""
+    return db_manager.init_read_replica()
+
 def create_tables():
-    """ایجاد جداول در دیتابیس"""
+    """ایجاد جداول در دیتابیس (بدون داده اولیه؛ برای تست و توسعه)"""
     if engine is None:
         if not init_db():
             raise Exception("اتصال به دیتابیس برقرار نشد")
@@ -156,55 +373,191 @@ def create_tables():
         # ایمپورت تمام مدل‌ها برای ایجاد جداول
         from app.models.reception import guest_models, room_status_models, payment_models
         from app.models.reception import housekeeping_models, maintenance_models, staff_models
-        from app.models.reception import notification_models, report_models
+        from app.models.reception import notification_models, report_models, archive_models
 
         Base.metadata.create_all(bind=engine)
         logger.info("✅ جداول سیستم پذیرش با موفقیت در دیتابیس ایجاد شدند")
 
-        # ایجاد داده‌های اولیه
-        create_initial_data()
-
     except Exception as e:
         logger.error(f"❌ خطا در ایجاد جداول: {e}")
         raise
 
-def create_initial_data():
-    """ایجاد داده‌های اولیه سیستم"""
+def migrate_database():
+    """
+    اعمال مهاجرت‌های معوق اسکیما
+
+    در حالت به‌روز فقط کوئری خواندن نسخه و بررسی data_seed اجرا می‌شوند.
+    """
+    if engine is None:
+        if not init_db():
+            raise Exception("اتصال به دیتابیس برقرار نشد")
+
+    from app.core.migrations import MigrationRunner
+
+    result = MigrationRunner(engine).upgrade()
+    if not result['success']:
+        raise Exception(f"خطا در مهاجرت اسکیما: {result['error']}")
+
+    if result['applied']:
+        logger.info(f"✅ اسکیما از نسخه {result['from_version']} به {result['to_version']} ارتقا یافت")
+    else:
+        logger.info(f"✅ اسکیما به‌روز است (نسخه {result['to_version']})")
+
+    # داده اولیه تا موفقیت در هر راه‌اندازی دوباره امتحان می‌شود
+    seed_initial_data()
+
+    return result
+
+def seed_initial_data() -> bool:
+    """
+    درج یک‌باره داده‌های اولیه سیستم
+
+    اجرای موفق در جدول data_seed ثبت می‌شود و پس از آن فقط یک کوئری
+    بررسی انجام می‌شود. خطا فقط ثبت می‌شود و مانع راه‌اندازی نمی‌شود؛
+    داده اولیه در راه‌اندازی بعدی دوباره امتحان می‌شود.
+
+    Returns:
+        bool: True اگر داده اولیه درج شده باشد (اکنون یا قبلاً)
+    """
+    from app.core.migrations import INITIAL_DATA_SEED, MigrationRunner
+
+    runner = MigrationRunner(engine)
+    if runner.is_seeded(INITIAL_DATA_SEED):
+        return True
+
     try:
-        from app.services.reception.initial_data_service import create_reception_initial_data
-        create_reception_initial_data()
-        logger.info("✅ داده‌های اولیه سیستم پذیرش ایجاد شدند")
+        from app.services.reception.initial_data_service import InitialDataService
+        runner.run_seed(INITIAL_DATA_SEED, InitialDataService.seed)
+        return True
     except Exception as e:
-        logger.error(f"⚠️ خطا در ایجاد داده‌های اولیه: {e}")
+        logger.error(f"⚠️ خطا در ایجاد داده‌های اولیه (در راه‌اندازی بعدی تکرار می‌شود): {e}")
+        return False
 
 @contextmanager
-def db_session():
-    """Context manager برای مدیریت session"""
-    if SessionLocal is None:
+def read_session(max_staleness: float = None):
+    """
+    Context manager برای session فقط‌خواندنی
+
+    در صورت وجود replica سالم با تأخیر کمتر از max_staleness از آن خوانده
+    می‌شود و در غیر این صورت از primary. تغییرات session هرگز commit
+    نمی‌شوند؛ flush یا پایان session با تغییرات ORM معلق
+    ReadOnlySessionError ایجاد می‌کند تا نوشتن بی‌صدا از بین نرود.
+
+    خطای اتصال replica آن را موقتاً ناسالم علامت می‌زند و دوباره raise
+    می‌شود؛ داخل replica_tolerant کل فراخوانی یک بار روی primary تکرار
+    می‌شود.
+
+    Args:
+        max_staleness: حداکثر تأخیر مجاز replica (ثانیه)؛ پیش‌فرض از تنظیمات
+    """
+    if engine is None:
         if not init_db():
             raise Exception("اتصال به دیتابیس در دسترس نیست")
 
-    session = SessionLocal()
+    target = db_manager.choose_read_target(max_staleness)
+    if target == 'replica':
+        session = ReadSessionLocal()
+        db_manager.replica_reads += 1
+    else:
+        session = Session(bind=engine, autoflush=False)
+        if read_engine is not None:
+            db_manager.primary_fallbacks += 1
+    event.listen(session, 'before_flush', _reject_read_session_flush)
+
     try:
-        yield session
-        session.commit()
+        with track_queries(caller_name(depth=3)):
+            yield session
+        if session.new or session.dirty or session.deleted:
+            raise ReadOnlySessionError("تغییرات session فقط‌خواندنی ذخیره نمی‌شوند")
     except Exception as e:
+        if target == 'replica' and is_connection_error(e):
+            db_manager.mark_replica_unhealthy(e)
+            call = _replica_tolerance.get()
+            if call is not None:
+                call.replica_failed = True
+        raise
+    finally:
         session.rollback()
-        logger.error(f"❌ خطا در session دیتابیس: {e}")
+        session.close()
+
+def replica_tolerant(max_staleness: float = None):
+    """
+    دکوریتور برای سرویس‌های فقط‌خواندنی که داده کمی قدیمی را تحمل می‌کنند
+
+    db_session() داخل تابع دکوریت شده به read_session() هدایت می‌شود.
+    فقط برای متدهایی استفاده شود که هیچ نوشتنی انجام نمی‌دهند؛ نوشتن ORM
+    در این مسیر ReadOnlySessionError ایجاد می‌کند.
+
+    اگر اتصال replica در حین فراخوانی قطع شود (حتی اگر تابع خطا را خودش
+    گرفته باشد)، فراخوانی یک بار دیگر اجرا می‌شود؛ replica در این زمان
+    ناسالم است و خواندن از primary انجام می‌شود.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            staleness = max_staleness if max_staleness is not None else config.database.replica_max_staleness
+            call = ReplicaCall(staleness)
+            token = _replica_tolerance.set(call)
+            try:
+                try:
+                    result = func(*args, **kwargs)
+                except Exception:
+                    if not call.replica_failed:
+                        raise
+                else:
+                    if not call.replica_failed:
+                        return result
+
+                logger.warning(f"⚠️ خطای اتصال replica در {func.__qualname__}؛ تکرار روی primary")
+                _replica_tolerance.set(ReplicaCall(staleness))
+                return func(*args, **kwargs)
+            finally:
+                _replica_tolerance.reset(token)
+        return wrapper
+    return decorator
+
+@contextmanager
+def db_session():
+    """
+    Context manager برای مدیریت session
+
+    در پایان موفق commit و در خطا rollback می‌شود و خطا دوباره raise
+    می‌شود. برای تکرار واحد کاری روی خطاهای گذرا از
+    app.core.transactions.run_in_transaction استفاده کنید.
+
+    داخل unit_of_work فعال، session مشترک واحد کاری برگردانده می‌شود و
+    commit آن با مالک واحد کاری است.
+    """
+    # آمار کوئری‌ها به نام سرویس فراخواننده ثبت می‌شود
+    with track_queries(caller_name(depth=3)):
+        unit = current_unit_of_work()
+        if unit is not None:
+            with join_unit_of_work(unit) as session:
+                yield session
+            return
 
-        # تلاش برای بازیابی اتصال در صورت قطعی
-        if "connection" in str(e).lower() or "closed" in str(e).lower():
-            logger.info("🔄 تلاش برای بازیابی اتصال...")
-            if init_db():
-                session = SessionLocal()
+        call = _replica_tolerance.get()
+        if call is not None:
+            # فراخوانی از داخل سرویس replica_tolerant
+            with read_session(call.max_staleness) as session:
                 yield session
-                session.commit()
-            else:
-                raise Exception("اتصال به دیتابیس قطع شده و بازیابی نشد")
-        else:
+            return
+
+        if SessionLocal is None:
+            if not init_db():
+                raise Exception("اتصال به دیتابیس در دسترس نیست")
+
+        session = SessionLocal()
+        try:
+            yield session
+            session.commit()
+        except Exception as e:
+            # تلاش مجدد در سطح کل واحد کاری با run_in_transaction انجام می‌شود
+            session.rollback()
+            logger.error(f"❌ خطا در session دیتابیس: {e}")
             raise
-    finally:
-        session.close()
+        finally:
+            session.close()
 
 def get_redis():
     """دریافت client Redis"""
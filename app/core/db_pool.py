@@ -0,0 +1,122 @@
+# app/core/db_pool.py
+"""
+Connection pool قابل مشاهده برای SQLAlchemy
+
+MeteredQueuePool همان QueuePool است که زمان انتظار برای گرفتن اتصال،
+تعداد انتظارها و timeoutها را ثبت می‌کند تا در get_connection_status
+نمایش داده شود.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """شمارنده‌های thread-safe مصرف pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """صفر کردن شمارنده‌ها"""
+        with self._lock:
+            self.checkouts = 0
+            self.waits = 0
+            self.timeouts = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+
+    def record_checkout(self, waited: bool, elapsed: float):
+        """ثبت یک checkout موفق"""
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time_total += elapsed
+                self.wait_time_max = max(self.wait_time_max, elapsed)
+
+    def record_timeout(self, elapsed: float):
+        """ثبت یک checkout ناموفق به دلیل timeout"""
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.wait_time_total += elapsed
+            self.wait_time_max = max(self.wait_time_max, elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """کپی شمارنده‌ها (زمان‌ها به میلی‌ثانیه)"""
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_time_total_ms': round(self.wait_time_total * 1000, 2),
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 2),
+                'wait_time_avg_ms': round(self.wait_time_total * 1000 / self.waits, 2) if self.waits else 0.0
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool با ثبت انتظار برای اتصال"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _is_exhausted(self) -> bool:
+        """آیا اتصال آزاد یا ظرفیت overflow باقی نمانده است"""
+        return self.checkedin() == 0 and (
+            self._max_overflow > -1 and self.overflow() >= self._max_overflow
+        )
+
+    def _do_get(self):
+        waited = self._is_exhausted()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+
+        self.metrics.record_checkout(waited, time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def get_pool_status(engine) -> Dict[str, Any]:
+    """
+    وضعیت pool یک engine
+
+    Returns:
+        dict: اندازه، اتصالات در حال استفاده، overflow و شمارنده‌های انتظار
+    """
+    if engine is None:
+        return {'status': 'Not initialized'}
+
+    pool = engine.pool
+    status: Dict[str, Any] = {'pool_class': type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout()
+        })
+
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+
+    return status
@@ -0,0 +1,141 @@
+# app/core/guest_key_backfill.py
+"""
+پر کردن کلیدهای جستجوی یکسان‌سازی شده برای مهمانان موجود
+
+ردیف‌هایی که پیش از افزودن ستون‌های *_key ثبت شده‌اند full_name_key خالی
+دارند (ردیف‌های جدید در درج و ویرایش کلید می‌گیرند). کار در دسته‌های کوچک
+با صفحه‌بندی keyset روی id اجرا می‌شود و هر دسته تراکنش جداگانه دارد؛
+قفل‌ها کوتاه می‌مانند و اجرای مجدد پس از توقف از ردیف‌های باقی‌مانده ادامه
+می‌یابد.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import bindparam, func, select, update
+
+from app.core.database import db_session
+from app.core.service_registry import service_registry, LazyService
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class GuestKeyBackfill:
+    """کار پس‌زمینه پر کردن کلیدهای جستجوی مهمانان"""
+
+    def __init__(self, batch_size: int = None, pause: float = None):
+        self.batch_size = batch_size or config.database.guest_key_backfill_batch_size
+        self.pause = config.database.guest_key_backfill_pause if pause is None else pause
+
+        self.processed = 0
+        self.batches = 0
+        self.last_id = 0
+        self.finished = False
+        self.last_error: Optional[str] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def run_batch(self) -> int:
+        """
+        پر کردن یک دسته
+
+        Returns:
+            int: تعداد ردیف‌های به‌روز شده (0 یعنی کار تمام است)
+        """
+        from app.models.reception.guest_models import Guest
+        table = Guest.__table__
+
+        with db_session() as session:
+            rows = session.execute(
+                select(table.c.id, *[table.c[name] for name in Guest.SEARCH_KEY_SOURCES])
+                .where(table.c.full_name_key.is_(None), table.c.id > self.last_id)
+                .order_by(table.c.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                return 0
+
+            # یک دستور executemany برای کل دسته؛ رویدادهای ORM اجرا نمی‌شوند
+            session.execute(
+                update(table).where(table.c.id == bindparam('guest_id')),
+                [{'guest_id': row[0], **Guest.search_keys(*row[1:])} for row in rows]
+            )
+            session.commit()
+
+        self.last_id = rows[-1][0]
+        self.processed += len(rows)
+        self.batches += 1
+        return len(rows)
+
+    def run(self, max_batches: int = None) -> Dict[str, Any]:
+        """اجرای دسته‌ها تا پایان، توقف یا رسیدن به max_batches"""
+        started = time.perf_counter()
+        batches = 0
+
+        while not self._stop_event.is_set():
+            if max_batches is not None and batches >= max_batches:
+                break
+            if not self.run_batch():
+                self.finished = True
+                break
+            batches += 1
+            if self.pause:
+                self._stop_event.wait(self.pause)
+
+        if self.finished:
+            logger.info(f"✅ کلیدهای جستجوی {self.processed} مهمان پر شد "
+                        f"({time.perf_counter() - started:.1f}s)")
+        return self.get_status()
+
+    def remaining(self) -> int:
+        """تعداد مهمانان بدون کلید جستجو"""
+        from app.models.reception.guest_models import Guest
+        table = Guest.__table__
+
+        with db_session() as session:
+            return session.execute(
+                select(func.count()).select_from(table).where(table.c.full_name_key.is_(None))
+            ).scalar()
+
+    def start(self):
+        """شروع کار در پس‌زمینه (هوک چرخه حیات)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker, name='guest-key-backfill', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """توقف کار پس از دسته جاری (هوک چرخه حیات)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _worker(self):
+        try:
+            self.run()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"❌ خطا در پر کردن کلیدهای جستجوی مهمانان: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """وضعیت پیشرفت کار"""
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'finished': self.finished,
+            'processed': self.processed,
+            'batches': self.batches,
+            'last_id': self.last_id,
+            'last_error': self.last_error
+        }
+
+
+# ثبت سرویس؛ کار فقط با service_registry.start_all شروع می‌شود
+service_registry.register('guest_key_backfill', GuestKeyBackfill, autostart=True)
+guest_key_backfill = LazyService('guest_key_backfill')
@@ -0,0 +1,468 @@
+# app/core/guest_profile_cache.py
+"""
+کش دو سطحی پروفایل مهمانان (GuestService.get_guest_details)
+
+    L1: دیکشنری LRU درون‌فرآیندی با عمر کوتاه (بدون رفت و برگشت شبکه)
+    L2: Redis مشترک بین ایستگاه‌های کاری
+
+هر پروفایل در Redis همراه با نسخه کلید ذخیره می‌شود. نوشتن روی مهمان،
+اقامت، همراه یا صورت‌حساب پس از commit نسخه را افزایش می‌دهد، داده را
+پاک می‌کند و پیام ابطال را منتشر می‌کند تا L1 سایر ایستگاه‌ها هم پاک شود.
+پروفایلی که همزمان با ابطال از دیتابیس خوانده شده با نسخه قدیمی ذخیره
+می‌شود و در خواندن بعدی نامعتبر است؛ اگر پیام pub/sub نرسد، عمر L1
+حداکثر کهنگی را محدود می‌کند.
+
+بدون Redis کش فقط با L1 کار می‌کند.
+"""
+
+import copy
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Mapper, Session
+
+from app.core.service_registry import service_registry, LazyService, LazyRedisMixin
+from config import config
+
+logger = logging.getLogger(__name__)
+
+ProfileLoader = Callable[[int], Optional[Dict[str, Any]]]
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'__dt__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__d__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__dec__': str(value)}
+    raise TypeError(f"نوع {type(value).__name__} قابل ذخیره در کش نیست")
+
+
+def _decode(value: Dict[str, Any]) -> Any:
+    if '__dt__' in value:
+        return datetime.fromisoformat(value['__dt__'])
+    if '__d__' in value:
+        return date.fromisoformat(value['__d__'])
+    if '__dec__' in value:
+        return Decimal(value['__dec__'])
+    return value
+
+
+class GuestProfileCache(LazyRedisMixin):
+    """کش read-through پروفایل مهمان با L1 محلی و L2 در Redis"""
+
+    KEY_PREFIX = 'guest_profile'
+    CHANNEL = 'guest_profile_invalidations'
+
+    def __init__(self, ttl: int = None, l1_ttl: float = None, l1_size: int = None,
+                 verify_rate: float = None):
+        self.ttl = ttl or config.redis.guest_profile_ttl
+        self.l1_ttl = config.redis.guest_profile_l1_ttl if l1_ttl is None else l1_ttl
+        self.l1_size = l1_size or config.redis.guest_profile_l1_size
+        self.verify_rate = config.redis.guest_profile_verify_rate if verify_rate is None else verify_rate
+
+        # شناسه این ایستگاه برای نادیده گرفتن پیام‌های ابطال خودی
+        self.instance_id = uuid.uuid4().hex
+
+        self._lock = threading.Lock()
+        self._local: 'OrderedDict[int, tuple]' = OrderedDict()  # guest_id -> (stored_at, cached_at, profile)
+        self._generation = 0
+        self._stats = Counter()
+        self._age_total = 0.0
+        self._age_max = 0.0
+
+        self._thread: Optional[threading.Thread] = None
+        self._pubsub = None
+        self._stop_event = threading.Event()
+
+    # کلیدهای Redis
+    def _data_key(self, guest_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{guest_id}"
+
+    def _version_key(self, guest_id: int) -> str:
+        return f"{self.KEY_PREFIX}:ver:{guest_id}"
+
+    def _client(self):
+        """client Redis یا None در صورت در دسترس نبودن"""
+        try:
+            return self.redis
+        except Exception as e:
+            logger.debug(f"Redis برای کش پروفایل در دسترس نیست: {e}")
+            return None
+
+    def get(self, guest_id: int, loader: ProfileLoader) -> Optional[Dict[str, Any]]:
+        """
+        دریافت پروفایل از L1، سپس L2 و در نهایت loader (دیتابیس)
+
+        Args:
+            guest_id: شناسه مهمان
+            loader: تابع ساخت پروفایل از دیتابیس (None برای مهمان ناموجود)
+
+        Returns:
+            کپی پروفایل یا None (نتیجه None کش نمی‌شود)
+        """
+        # L1
+        with self._lock:
+            entry = self._local.get(guest_id)
+            if entry is not None and time.monotonic() - entry[0] < self.l1_ttl:
+                self._local.move_to_end(guest_id)
+                self._stats['l1_hits'] += 1
+                self._record_age(entry[1])
+                profile = entry[2]
+            else:
+                if entry is not None:
+                    del self._local[guest_id]
+                profile = None
+            generation = self._generation
+
+        if profile is not None:
+            self._maybe_verify(guest_id, profile, loader)
+            return copy.deepcopy(profile)
+
+        # L2
+        client = self._client()
+        version = 0
+        if client is not None:
+            try:
+                data, stored_version = client.mget(self._data_key(guest_id), self._version_key(guest_id))
+                version = int(stored_version or 0)
+                if data:
+                    payload = json.loads(data, object_hook=_decode)
+                    if payload['v'] == version:
+                        with self._lock:
+                            self._stats['l2_hits'] += 1
+                            self._record_age(payload['at'])
+                        self._store_local(guest_id, payload['at'], payload['profile'], generation)
+                        self._maybe_verify(guest_id, payload['profile'], loader)
+                        return copy.deepcopy(payload['profile'])
+            except Exception as e:
+                self._count('errors')
+                logger.warning(f"⚠️ خطا در خواندن کش پروفایل مهمان {guest_id}: {e}")
+                client = None
+
+        # خواندن از دیتابیس
+        with self._lock:
+            self._stats['misses'] += 1
+        profile = loader(guest_id)
+        if profile is None:
+            return None
+
+        cached_at = time.time()
+        if client is not None:
+            try:
+                payload = json.dumps({'v': version, 'at': cached_at, 'profile': profile},
+                                     default=_encode, ensure_ascii=False)
+                client.set(self._data_key(guest_id), payload, ex=self.ttl)
+            except Exception as e:
+                self._count('errors')
+                logger.warning(f"⚠️ خطا در ذخیره کش پروفایل مهمان {guest_id}: {e}")
+
+        self._store_local(guest_id, cached_at, profile, generation)
+        return copy.deepcopy(profile)
+
+    def _store_local(self, guest_id: int, cached_at: float, profile: Dict[str, Any], generation: int):
+        """ذخیره در L1 اگر از زمان خواندن ابطالی رخ نداده باشد"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._local[guest_id] = (time.monotonic(), cached_at, profile)
+            self._local.move_to_end(guest_id)
+            while len(self._local) > self.l1_size:
+                self._local.popitem(last=False)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _record_age(self, cached_at: float):
+        age = max(0.0, time.time() - cached_at)
+        self._age_total += age
+        self._age_max = max(self._age_max, age)
+
+    def _maybe_verify(self, guest_id: int, profile: Dict[str, Any], loader: ProfileLoader):
+        """مقایسه نمونه‌ای پاسخ کش با دیتابیس برای اندازه‌گیری کهنگی"""
+        if not self.verify_rate or random.random() >= self.verify_rate:
+            return
+        fresh = loader(guest_id)
+        with self._lock:
+            self._stats['verified'] += 1
+            if fresh != profile:
+                self._stats['stale_hits'] += 1
+
+    def invalidate(self, guest_ids: Iterable[int]):
+        """ابطال پروفایل‌ها در L1 و L2 و اطلاع به سایر ایستگاه‌ها"""
+        guest_ids = sorted(set(guest_ids))
+        if not guest_ids:
+            return
+
+        self._drop_local(guest_ids)
+
+        client = self._client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            for guest_id in guest_ids:
+                pipe.incr(self._version_key(guest_id))
+                pipe.expire(self._version_key(guest_id), self.ttl * 2)
+                pipe.delete(self._data_key(guest_id))
+            pipe.publish(self.CHANNEL, json.dumps({'source': self.instance_id, 'ids': guest_ids}))
+            pipe.execute()
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"⚠️ خطا در ابطال کش پروفایل مهمانان {guest_ids}: {e}")
+
+    def _drop_local(self, guest_ids: Iterable[int]):
+        with self._lock:
+            self._generation += 1
+            for guest_id in guest_ids:
+                self._local.pop(guest_id, None)
+            self._stats['invalidations'] += 1
+
+    def handle_message(self, message: Dict[str, Any]):
+        """پردازش پیام ابطال دریافتی از سایر ایستگاه‌ها"""
+        if message.get('type') != 'message':
+            return
+        try:
+            data = json.loads(message['data'])
+        except (TypeError, ValueError):
+            return
+        if data.get('source') == self.instance_id:
+            return
+        self._drop_local(data.get('ids', []))
+
+    def clear(self):
+        """پاک کردن L1 (مثلاً پس از بازگردانی داده)"""
+        with self._lock:
+            self._generation += 1
+            self._local.clear()
+
+    def start(self):
+        """گوش دادن به پیام‌های ابطال سایر ایستگاه‌ها (هوک چرخه حیات)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        client = self._client()
+        if client is None:
+            return
+        try:
+            self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(self.CHANNEL)
+        except Exception as e:
+            logger.warning(f"⚠️ اشتراک پیام‌های ابطال کش پروفایل ممکن نشد: {e}")
+            self._pubsub = None
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._listener_worker, name='guest-profile-cache', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """توقف گوش دادن به پیام‌ها (هوک چرخه حیات)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    def _listener_worker(self):
+        while not self._stop_event.is_set():
+            try:
+                message = self._pubsub.get_message(timeout=config.redis.pubsub_timeout)
+                if message:
+                    self.handle_message(message)
+            except Exception as e:
+                logger.error(f"❌ خطا در دریافت پیام ابطال کش پروفایل: {e}")
+                # پیام‌های از دست رفته با عمر L1 محدود می‌شوند
+                self.clear()
+                self._stop_event.wait(5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """آمار نرخ برخورد و کهنگی کش"""
+        with self._lock:
+            l1_hits = self._stats['l1_hits']
+            l2_hits = self._stats['l2_hits']
+            misses = self._stats['misses']
+            lookups = l1_hits + l2_hits + misses
+            hits = l1_hits + l2_hits
+            verified = self._stats['verified']
+
+            return {
+                'lookups': lookups,
+                'l1_hits': l1_hits,
+                'l2_hits': l2_hits,
+                'misses': misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'l1_hit_ratio': round(l1_hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self._stats['invalidations'],
+                'errors': self._stats['errors'],
+                'verified': verified,
+                'stale_hits': self._stats['stale_hits'],
+                'stale_ratio': round(self._stats['stale_hits'] / verified, 4) if verified else 0.0,
+                'avg_age_seconds': round(self._age_total / hits, 3) if hits else 0.0,
+                'max_age_seconds': round(self._age_max, 3),
+                'l1_size': len(self._local)
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+            self._age_total = 0.0
+            self._age_max = 0.0
+
+
+# ابطال پس از commit: شناسه مهمانان تغییر یافته در session.info جمع می‌شوند
+_PENDING_KEY = 'guest_profile_pending'
+
+# اقامت‌های صورت‌حساب‌های تغییر یافته؛ در after_flush با یک کوئری به مهمان تبدیل می‌شوند
+_PENDING_STAYS_KEY = 'guest_profile_pending_stays'
+
+# جداول مؤثر بر پروفایل و ستون مالک هر کدام (برای جابجایی به مهمان یا اقامت دیگر)
+_GUESTS_TABLE = 'reception_guests'
+_OWNER_COLUMNS = {
+    'reception_stays': 'guest_id',
+    'reception_companions': 'guest_id',
+    'reception_guest_folios': 'stay_id',
+}
+
+
+def _pending(target) -> Optional[Set[int]]:
+    session = Session.object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+def _loaded_stay_guest(target, stay_id: int) -> Optional[int]:
+    """مهمان اقامت صورت‌حساب از رابطه stay، فقط اگر بدون کوئری در دسترس باشد"""
+    stay = inspect(target).dict.get('stay')
+    if stay is None:
+        return None
+    loaded = inspect(stay).dict
+    if loaded.get('id') != stay_id:
+        return None
+    return loaded.get('guest_id')
+
+
+def _add_owner(target, table: str, owner: Optional[int], current: bool = True):
+    """ثبت مالک سطر برای ابطال؛ اقامت صورت‌حساب‌ها پس از flush حل می‌شود"""
+    session = Session.object_session(target)
+    if session is None or owner is None:
+        return
+
+    if _OWNER_COLUMNS[table] == 'guest_id':
+        session.info.setdefault(_PENDING_KEY, set()).add(owner)
+        return
+
+    guest_id = _loaded_stay_guest(target, owner) if current else None
+    if guest_id is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(guest_id)
+    else:
+        session.info.setdefault(_PENDING_STAYS_KEY, set()).add(owner)
+
+
+def _profile_changed(mapper, connection, target):
+    """درج، ویرایش یا حذف مهمان، اقامت، همراه یا صورت‌حساب"""
+    table = mapper.local_table.name
+    if table == _GUESTS_TABLE:
+        pending = _pending(target)
+        if pending is not None and target.id is not None:
+            pending.add(target.id)
+    elif table in _OWNER_COLUMNS:
+        _add_owner(target, table, getattr(target, _OWNER_COLUMNS[table]))
+
+
+def _owner_changing(mapper, connection, target):
+    """
+    جابجایی اقامت، همراه یا صورت‌حساب به مالک دیگر: ابطال مالک قبلی
+
+    مقدار قبلی از تاریخچه ویژگی خوانده می‌شود و اگر بارگذاری نشده باشد
+    (مثلاً پس از expire) از سطر فعلی دیتابیس پیش از UPDATE.
+    """
+    table = mapper.local_table.name
+    column = _OWNER_COLUMNS.get(table)
+    if column is None:
+        return
+    history = inspect(target).attrs[column].history
+    if not history.added:
+        return
+
+    if history.deleted:
+        previous = history.deleted[0]
+    else:
+        source = mapper.local_table
+        previous = connection.execute(
+            select(source.c[column]).where(source.c.id == target.id)
+        ).scalar()
+    _add_owner(target, table, previous, current=False)
+
+
+def _resolve_pending_stays(session, flush_context):
+    """تبدیل اقامت‌های صورت‌حساب‌های تغییر یافته به مهمان با یک کوئری برای کل flush"""
+    from app.models.reception.guest_models import Stay
+
+    stay_ids = session.info.pop(_PENDING_STAYS_KEY, None)
+    if not stay_ids:
+        return
+    guest_ids = session.connection().execute(
+        select(Stay.guest_id).where(Stay.id.in_(stay_ids))
+    ).scalars()
+    session.info.setdefault(_PENDING_KEY, set()).update(
+        guest_id for guest_id in guest_ids if guest_id is not None
+    )
+
+
+def invalidate_after_commit(session, guest_ids: Iterable[int]):
+    """ابطال پس از commit برای دستورات Core گروهی که رویدادهای mapper را اجرا نمی‌کنند"""
+    session.info.setdefault(_PENDING_KEY, set()).update(guest_ids)
+
+
+def _apply_pending(session):
+    guest_ids = session.info.pop(_PENDING_KEY, None)
+    if guest_ids:
+        guest_profile_cache.invalidate(guest_ids)
+
+
+def _discard_pending(session, *args):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_STAYS_KEY, None)
+
+
+def install_profile_invalidation():
+    """
+    ثبت رویدادهای ابطال روی مسیرهای نوشتن مهمان، اقامت، همراه و صورت‌حساب (idempotent)
+
+    رویدادها روی همه mapperها ثبت و بر اساس نام جدول تفکیک می‌شوند تا بدون
+    import مدل‌ها هنگام import همین ماژول نصب شوند، نه در start کش.
+    """
+    if event.contains(Mapper, 'after_update', _profile_changed):
+        return
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(Mapper, name, _profile_changed)
+    event.listen(Mapper, 'before_update', _owner_changing)
+    event.listen(Session, 'after_flush', _resolve_pending_stays)
+    event.listen(Session, 'after_commit', _apply_pending)
+    event.listen(Session, 'after_soft_rollback', _discard_pending)
+
+
+install_profile_invalidation()
+
+# ثبت سرویس؛ ساخت در اولین استفاده
+service_registry.register('guest_profile_cache', GuestProfileCache, autostart=True)
+guest_profile_cache = LazyService('guest_profile_cache')
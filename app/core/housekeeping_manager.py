@@ -9,7 +9,8 @@ from datetime import datetime, timedelta, time
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from enum import Enum
-from app.core.database import db_session, get_redis
+from app.core.database import db_session
+from app.core.service_registry import service_registry, LazyService, LazyRedisMixin
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -36,11 +37,10 @@ class CleaningChecklist:
     amenities_items: List[str]
     common_area_items: List[str]
 
-class HousekeepingManager:
+class HousekeepingManager(LazyRedisMixin):
     """مدیریت هوشمند خانه‌داری"""
 
     def __init__(self):
-        self.redis = get_redis()
         self.auto_scheduling = config.housekeeping.auto_cleaning_schedule
         self.check_out_time = self._parse_time(config.housekeeping.check_out_time)
         self.cleaning_timeout = config.housekeeping.cleaning_timeout
@@ -122,9 +122,8 @@ class HousekeepingManager:
             )
         }
 
-        # شروع مانیتورینگ خودکار
-        if self.auto_scheduling:
-            self._start_auto_monitoring()
+        self.monitor_thread = None
+        self._stop_event = threading.Event()
 
     def _parse_time(self, time_str: str) -> time:
         """تبدیل رشته زمان به object زمان"""
@@ -134,15 +133,32 @@ class HousekeepingManager:
         except:
             return time(12, 0)  # پیش‌فرض ساعت 12
 
+    def start(self):
+        """شروع سرویس (هوک چرخه حیات)"""
+        if self.auto_scheduling:
+            self._start_auto_monitoring()
+
+    def stop(self):
+        """توقف سرویس (هوک چرخه حیات)"""
+        self._stop_event.set()
+        if self.monitor_thread:
+            self.monitor_thread.join(timeout=5)
+            self.monitor_thread = None
+        logger.info("⏹️ مانیتورینگ خودکار خانه‌داری متوقف شد")
+
     def _start_auto_monitoring(self):
         """شروع مانیتورینگ خودکار خانه‌داری"""
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            return
+
+        self._stop_event.clear()
         self.monitor_thread = threading.Thread(target=self._auto_monitor_worker, daemon=True)
         self.monitor_thread.start()
         logger.info("🚀 مانیتورینگ خودکار خانه‌داری شروع شد")
 
     def _auto_monitor_worker(self):
         """کارگر مانیتورینگ خودکار"""
-        while True:
+        while not self._stop_event.is_set():
             try:
                 # بررسی خروج‌های امروز
                 self._schedule_checkout_cleanings()
@@ -154,11 +170,11 @@ class HousekeepingManager:
                 self._generate_daily_housekeeping_report()
 
                 # خواب به مدت 5 دقیقه
-                threading.Event().wait(300)
+                self._stop_event.wait(300)
 
             except Exception as e:
                 logger.error(f"❌ خطا در مانیتورینگ خودکار خانه‌داری: {e}")
-                threading.Event().wait(60)  # خواب کوتاه در صورت خطا
+                self._stop_event.wait(60)  # خواب کوتاه در صورت خطا
 
     def _schedule_checkout_cleanings(self):
         """برنامه‌ریزی نظافت‌های پس از خروج"""
@@ -657,5 +673,6 @@ class HousekeepingManager:
         else:
             return "نیاز به بهبود"
 
-# ایجاد instance جهانی
-housekeeping_manager = HousekeepingManager()
+# ثبت سرویس؛ مانیتورینگ فقط با service_registry.start_all شروع می‌شود
+service_registry.register('housekeeping_manager', HousekeepingManager, autostart=True)
+housekeeping_manager = LazyService('housekeeping_manager')
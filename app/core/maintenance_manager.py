@@ -9,7 +9,8 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from enum import Enum
-from app.core.database import db_session, get_redis
+from app.core.database import db_session
+from app.core.service_registry import service_registry, LazyService, LazyRedisMixin
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -36,11 +37,10 @@ class MaintenanceCategory:
     required_skills: List[str]
     common_parts: List[str]
 
-class MaintenanceManager:
+class MaintenanceManager(LazyRedisMixin):
     """مدیریت هوشمند تاسیسات و تعمیرات"""
 
     def __init__(self):
-        self.redis = get_redis()
         self.categories = {
             'electrical': MaintenanceCategory(
                 name="برق",
@@ -74,18 +74,34 @@ class MaintenanceManager:
             )
         }
 
-        # شروع مانیتورینگ خودکار
+        self.pm_monitor_thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """شروع سرویس (هوک چرخه حیات)"""
         self._start_preventive_maintenance_monitor()
 
+    def stop(self):
+        """توقف سرویس (هوک چرخه حیات)"""
+        self._stop_event.set()
+        if self.pm_monitor_thread:
+            self.pm_monitor_thread.join(timeout=5)
+            self.pm_monitor_thread = None
+        logger.info("⏹️ مانیتورینگ تعمیرات پیشگیرانه متوقف شد")
+
     def _start_preventive_maintenance_monitor(self):
         """شروع مانیتورینگ تعمیرات پیشگیرانه"""
+        if self.pm_monitor_thread and self.pm_monitor_thread.is_alive():
+            return
+
+        self._stop_event.clear()
         self.pm_monitor_thread = threading.Thread(target=self._pm_monitor_worker, daemon=True)
         self.pm_monitor_thread.start()
         logger.info("🚀 مانیتورینگ تعمیرات پیشگیرانه شروع شد")
 
     def _pm_monitor_worker(self):
         """کارگر مانیتورینگ تعمیرات پیشگیرانه"""
-        while True:
+        while not self._stop_event.is_set():
             try:
                 # بررسی تعمیرات پیشگیرانه overdue
                 self._check_preventive_maintenance()
@@ -97,11 +113,11 @@ class MaintenanceManager:
                 self._generate_daily_maintenance_report()
 
                 # خواب به مدت 10 دقیقه
-                threading.Event().wait(600)
+                self._stop_event.wait(600)
 
             except Exception as e:
                 logger.error(f"❌ خطا در مانیتورینگ تعمیرات پیشگیرانه: {e}")
-                threading.Event().wait(60)
+                self._stop_event.wait(60)
 
     def _check_preventive_maintenance(self):
         """بررسی تعمیرات پیشگیرانه"""
@@ -665,5 +681,6 @@ class MaintenanceManager:
         else:
             return "نیاز به بهبود"
 
-# ایجاد instance جهانی
-maintenance_manager = MaintenanceManager()
+# ثبت سرویس؛ مانیتورینگ فقط با service_registry.start_all شروع می‌شود
+service_registry.register('maintenance_manager', MaintenanceManager, autostart=True)
+maintenance_manager = LazyService('maintenance_manager')
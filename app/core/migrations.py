@@ -0,0 +1,466 @@
+# app/core/migrations.py
+"""
+مهاجرت‌های نسخه‌دار اسکیمای دیتابیس
+
+نسخه اسکیمای هر دیتابیس در جدول schema_version ثبت می‌شود. در راه‌اندازی
+عادی فقط یک کوئری برای خواندن نسخه فعلی اجرا می‌شود و مهاجرت‌ها تنها
+زمانی اجرا می‌شوند که نسخه دیتابیس از آخرین مهاجرت کمتر باشد.
+
+برای افزودن مهاجرت جدید یک تابع upgrade(session) بنویسید و آن را با
+شماره نسخه بعدی به انتهای MIGRATIONS اضافه کنید. هر مهاجرت باید
+idempotent باشد تا اجرای مجدد آن روی دیتابیس‌های قدیمی بی‌خطر باشد.
+
+مهاجرت‌هایی که ایندکس را روی جداول پرکاربرد با CREATE INDEX CONCURRENTLY
+می‌سازند (transactional=False) خارج از تراکنش و در حالت autocommit اجرا
+می‌شوند تا جدول در طول ساخت ایندکس برای نوشتن قفل نشود.
+
+داده‌های اولیه جدا از نسخه اسکیما در جدول data_seed ثبت می‌شوند
+(MigrationRunner.run_seed): درج داده و ثبت آن در یک تراکنش انجام می‌شود و
+تا موفق نشود در هر راه‌اندازی دوباره اجرا می‌شود.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+from sqlalchemy import (MetaData, Table, Column, Integer, String, DateTime,
+                        select, func, insert, text, inspect)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# کلید قفل مشورتی PostgreSQL برای جلوگیری از اجرای همزمان مهاجرت‌ها
+MIGRATION_LOCK_KEY = 730120
+
+migration_metadata = MetaData()
+
+schema_version_table = Table(
+    'schema_version', migration_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Integer)
+)
+
+# مراحل داده اولیه اجرا شده (مستقل از نسخه اسکیما)
+data_seed_table = Table(
+    'data_seed', migration_metadata,
+    Column('name', String(100), primary_key=True),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Integer)
+)
+
+# مرحله داده اولیه سیستم پذیرش (database.seed_initial_data)
+INITIAL_DATA_SEED = 'reception_initial_data'
+
+
+@dataclass(frozen=True)
+class Migration:
+    """یک مرحله مهاجرت اسکیما"""
+    version: int
+    name: str
+    upgrade: Callable[[Session], None]
+    transactional: bool = True
+
+
+def _initial_schema(session: Session):
+    """ایجاد جداول پایه سیستم پذیرش"""
+    from app.core.database import Base
+    from app.models.reception import guest_models, room_status_models, payment_models
+    from app.models.reception import housekeeping_models, maintenance_models, staff_models
+    from app.models.reception import notification_models, report_models
+
+    # create_all روی دیتابیس‌های موجود فقط جداول نبود را ایجاد می‌کند
+    Base.metadata.create_all(bind=session.connection())
+
+
+def _slow_query_table(session: Session):
+    """جدول ثبت کوئری‌های کند"""
+    from app.core.slow_query_log import SlowQuery
+    SlowQuery.__table__.create(bind=session.connection(), checkfirst=True)
+
+
+def create_index_concurrently(connection, name: str, definition: str):
+    """
+    ساخت ایندکس PostgreSQL بدون قفل نوشتن جدول (خارج از تراکنش)
+
+    CREATE INDEX CONCURRENTLY ناموفق ایندکس INVALID باقی می‌گذارد که
+    IF NOT EXISTS آن را موجود فرض می‌کند؛ چنین ایندکسی ابتدا حذف می‌شود.
+    """
+    invalid = connection.execute(text(
+        "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+    ), {'name': name}).scalar()
+    if invalid:
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+
+
+def _guest_trigram_indexes(session: Session):
+    """
+    افزونه pg_trgm برای جستجوی مهمانان (فقط PostgreSQL)
+
+    ایندکس‌های GIN سه‌حرفی روی ستون‌های کلید در مهاجرت guest_search_keys
+    ساخته می‌شوند؛ ایندکس‌های ستون‌های خام که نسخه‌های قبلی این مهاجرت
+    می‌ساختند همان‌جا حذف می‌شوند. روی سایر دیتابیس‌ها جستجو از ایندکس
+    درون‌فرآیندی guest_search استفاده می‌کند.
+    """
+    connection = session.connection()
+    if connection.dialect.name != 'postgresql':
+        return
+
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+def _guest_search_keys(session: Session):
+    """
+    ستون‌های کلید جستجوی یکسان‌سازی شده مهمانان
+
+    روی دیتابیس‌های موجود ستون‌ها و ایندکس‌ها اضافه می‌شوند و پر کردن
+    مقادیر به GuestKeyBackfill سپرده می‌شود تا مهاجرت جدول را قفل نکند.
+    در PostgreSQL ایندکس text_pattern_ops جستجوی پیشوندی (LIKE 'x%') و
+    ایندکس GIN سه‌حرفی روی کلیدها جایگزین ایندکس‌های ستون‌های خام می‌شود.
+
+    مهاجرت خارج از تراکنش اجرا می‌شود (transactional=False) و در
+    PostgreSQL همه ایندکس‌ها با CONCURRENTLY ساخته و حذف می‌شوند.
+    """
+    from app.models.reception.guest_models import Guest
+
+    connection = session.connection()
+    table = Guest.__table__
+    existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+    key_columns = [column for column in table.columns if column.name.endswith('_key')]
+
+    postgres = connection.dialect.name == 'postgresql'
+
+    for column in key_columns:
+        if column.name not in existing:
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+        name = f"ix_{table.name}_{column.name}"
+        if postgres:
+            create_index_concurrently(connection, name, f"{table.name} ({column.name})")
+        else:
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table.name} ({column.name})"))
+
+    if not postgres:
+        return
+
+    for column in key_columns:
+        create_index_concurrently(connection, f"ix_{table.name}_{column.name}_pattern",
+                                  f"{table.name} ({column.name} text_pattern_ops)")
+        create_index_concurrently(connection, f"ix_{table.name}_{column.name}_trgm",
+                                  f"{table.name} USING gin ({column.name} gin_trgm_ops)")
+    for column in ('first_name', 'last_name', 'national_id', 'phone', 'passport_number'):
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table.name}_{column}_trgm"))
+
+
+def _keyset_pagination_indexes(session: Session):
+    """
+    ایندکس‌های ترتیب صفحه‌بندی keyset لیست‌ها
+
+    ایندکس‌ها در مدل‌ها تعریف شده‌اند و روی دیتابیس‌های ساخته شده پیش از
+    آن‌ها فقط موارد نبود ایجاد می‌شوند.
+    """
+    from app.core.audit_trail import AuditTrail
+    from app.models.reception.guest_models import Guest, Stay
+    from app.models.reception.payment_models import Payment
+    from app.models.reception.notification_models import Notification
+    from app.models.reception.housekeeping_models import HousekeepingTask
+    from app.models.reception.maintenance_models import MaintenanceRequest
+
+    connection = session.connection()
+    for model in (Guest, Stay, Payment, AuditTrail, Notification, HousekeepingTask, MaintenanceRequest):
+        for index in model.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def _guest_duplicate_detection(session: Session):
+    """جدول جفت‌های مهمانان تکراری و ایندکس بلوک نام و تاریخ تولد"""
+    from app.models.reception.guest_models import Guest, GuestDuplicateCandidate
+
+    connection = session.connection()
+    GuestDuplicateCandidate.__table__.create(bind=connection, checkfirst=True)
+    for index in Guest.__table__.indexes:
+        if index.name == 'ix_reception_guests_name_birth_block':
+            index.create(bind=connection, checkfirst=True)
+
+
+def _history_archive(session: Session):
+    """
+    جداول بایگانی سوابق قدیمی و viewهای یکپارچه <جدول>_all
+
+    ایندکس کلیدهای خارجی جداول اصلی (که انتخاب سوابق وابسته هر دسته
+    بایگانی و خواندن سوابق یک اقامت از آن‌ها استفاده می‌کنند) روی
+    دیتابیس‌های موجود ایجاد می‌شوند. view دوباره ساخته می‌شود تا با
+    ستون‌های فعلی جدول اصلی یکسان باشد.
+    """
+    from app.models.reception.archive_models import ARCHIVE_TABLES, history_union, history_view_name
+
+    connection = session.connection()
+    for model in ARCHIVE_TABLES:
+        for index in model.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+    for model, table in ARCHIVE_TABLES.items():
+        table.create(bind=connection, checkfirst=True)
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+        view = history_view_name(model)
+        body = history_union(model).compile(dialect=connection.dialect)
+        connection.execute(text(f"DROP VIEW IF EXISTS {view}"))
+        connection.execute(text(f"CREATE VIEW {view} AS {body}"))
+
+
+def _time_partitioning(session: Session):
+    """
+    پارتیشن‌بندی ماهانه تغییرات وضعیت اتاق و Audit (فقط PostgreSQL)
+
+    view یکپارچه تغییرات وضعیت به جدول وابسته است؛ پیش از تبدیل حذف و پس
+    از آن دوباره ساخته می‌شود. روی سایر دیتابیس‌ها فقط ایندکس‌ها ایجاد
+    می‌شوند.
+    """
+    from app.core.partitioning import partition_specs, is_partitioned, convert_to_partitioned
+    from app.models.reception.archive_models import ARCHIVE_TABLES, history_union, history_view_name
+    from app.models.reception.room_status_models import RoomStatusChange
+
+    connection = session.connection()
+    if connection.dialect.name != 'postgresql':
+        for index in RoomStatusChange.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+        return
+
+    view = history_view_name(RoomStatusChange)
+    connection.execute(text(f"DROP VIEW IF EXISTS {view}"))
+
+    inspector = inspect(connection)
+    for spec in partition_specs():
+        if spec.table.schema:
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {spec.table.schema}"))
+        if not inspector.has_table(spec.table.name, schema=spec.table.schema):
+            spec.table.create(bind=connection)
+        if not is_partitioned(connection, spec.table):
+            moved = convert_to_partitioned(connection, spec)
+            logger.info(f"🗂️ جدول {spec.qualified_name} پارتیشن‌بندی شد ({moved} سطر)")
+
+    if inspector.has_table(ARCHIVE_TABLES[RoomStatusChange].name):
+        body = history_union(RoomStatusChange).compile(dialect=connection.dialect)
+        connection.execute(text(f"CREATE VIEW {view} AS {body}"))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'initial_schema', _initial_schema),
+    Migration(3, 'slow_query_log', _slow_query_table),
+    Migration(4, 'guest_trigram_indexes', _guest_trigram_indexes),
+    Migration(5, 'guest_search_keys', _guest_search_keys, transactional=False),
+    Migration(6, 'keyset_pagination_indexes', _keyset_pagination_indexes),
+    Migration(7, 'guest_duplicate_detection', _guest_duplicate_detection),
+    Migration(8, 'history_archive', _history_archive),
+    Migration(9, 'time_partitioning', _time_partitioning),
+]
+
+
+class MigrationRunner:
+    """اجرای مهاجرت‌های معوق و ثبت نسخه اسکیما"""
+
+    def __init__(self, engine, migrations: Optional[List[Migration]] = None):
+        self.engine = engine
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS,
+                                 key=lambda migration: migration.version)
+
+    @property
+    def latest_version(self) -> int:
+        """آخرین نسخه تعریف شده"""
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self) -> int:
+        """نسخه فعلی دیتابیس (0 اگر جدول نسخه وجود نداشته باشد)"""
+        try:
+            with self.engine.connect() as conn:
+                return self._read_version(conn)
+        except SQLAlchemyError:
+            return 0
+
+    @staticmethod
+    def _read_version(conn) -> int:
+        return conn.execute(select(func.max(schema_version_table.c.version))).scalar() or 0
+
+    def pending(self, current: Optional[int] = None) -> List[Migration]:
+        """مهاجرت‌های اجرا نشده"""
+        if current is None:
+            current = self.current_version()
+        return [migration for migration in self.migrations if migration.version > current]
+
+    def _lock(self, conn):
+        """قفل تراکنشی برای جلوگیری از اجرای همزمان توسط چند ایستگاه"""
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+
+    @contextmanager
+    def _session_lock(self, conn):
+        """قفل سطح اتصال برای مهاجرت‌های خارج از تراکنش"""
+        if conn.dialect.name != 'postgresql':
+            yield
+            return
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_KEY})
+
+    @staticmethod
+    def _run_upgrade(migration: Migration, conn):
+        session = Session(bind=conn)
+        try:
+            migration.upgrade(session)
+            session.flush()
+        finally:
+            session.close()
+
+    def _record(self, conn, migration: Migration, started: float):
+        conn.execute(insert(schema_version_table).values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=datetime.now(),
+            duration_ms=int((time.perf_counter() - started) * 1000)
+        ))
+
+    def _apply_autocommit(self, migration: Migration, started: float) -> bool:
+        """
+        اجرای مهاجرت خارج از تراکنش (مثلاً CREATE INDEX CONCURRENTLY)
+
+        هر دستور جداگانه commit می‌شود؛ مهاجرت نیمه‌کاره با اجرای مجدد
+        (idempotent) کامل می‌شود و نسخه فقط پس از پایان موفق ثبت می‌شود.
+        """
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+            with self._session_lock(conn):
+                schema_version_table.create(conn, checkfirst=True)
+                if self._read_version(conn) >= migration.version:
+                    return False
+
+                self._run_upgrade(migration, conn)
+                self._record(conn, migration, started)
+        return True
+
+    def _apply_transaction(self, migration: Migration, started: float) -> bool:
+        """اجرای مهاجرت در تراکنش مستقل"""
+        with self.engine.begin() as conn:
+            self._lock(conn)
+            schema_version_table.create(conn, checkfirst=True)
+
+            # بررسی مجدد نسخه پس از گرفتن قفل
+            if self._read_version(conn) >= migration.version:
+                return False
+
+            self._run_upgrade(migration, conn)
+            self._record(conn, migration, started)
+        return True
+
+    def is_seeded(self, name: str) -> bool:
+        """آیا مرحله داده اولیه name با موفقیت اجرا شده است"""
+        try:
+            with self.engine.connect() as conn:
+                return self._read_seed(conn, name)
+        except SQLAlchemyError:
+            return False
+
+    @staticmethod
+    def _read_seed(conn, name: str) -> bool:
+        return conn.execute(
+            select(data_seed_table.c.name).where(data_seed_table.c.name == name)
+        ).first() is not None
+
+    def run_seed(self, name: str, seed: Callable[[Session], None]) -> bool:
+        """
+        اجرای یک‌باره مرحله داده اولیه
+
+        درج داده و ثبت آن در data_seed در یک تراکنش انجام می‌شوند؛ با شکست
+        هیچ‌کدام ثبت نمی‌شود و خطا raise می‌شود تا فراخواننده در راه‌اندازی
+        بعدی دوباره تلاش کند. تابع seed باید idempotent باشد.
+
+        Returns:
+            bool: False اگر قبلاً اجرا شده باشد
+        """
+        if self.is_seeded(name):
+            return False
+
+        started = time.perf_counter()
+        with self.engine.begin() as conn:
+            self._lock(conn)
+            data_seed_table.create(conn, checkfirst=True)
+            if self._read_seed(conn, name):
+                return False
+
+            session = Session(bind=conn)
+            try:
+                seed(session)
+                session.flush()
+            finally:
+                session.close()
+
+            conn.execute(insert(data_seed_table).values(
+                name=name,
+                applied_at=datetime.now(),
+                duration_ms=int((time.perf_counter() - started) * 1000)
+            ))
+
+        logger.info(f"✅ داده اولیه {name} درج شد")
+        return True
+
+    def _apply(self, migration: Migration) -> bool:
+        """اجرای یک مهاجرت؛ False اگر قبلاً اعمال شده باشد"""
+        started = time.perf_counter()
+
+        apply = self._apply_transaction if migration.transactional else self._apply_autocommit
+        if not apply(migration, started):
+            return False
+
+        logger.info(f"✅ مهاجرت {migration.version} ({migration.name}) اعمال شد")
+        return True
+
+    def upgrade(self, target: Optional[int] = None) -> Dict[str, Any]:
+        """
+        اعمال مهاجرت‌های معوق تا نسخه هدف
+
+        Args:
+            target: نسخه هدف (پیش‌فرض: آخرین نسخه)
+
+        Returns:
+            dict: نتیجه شامل نسخه قبل و بعد و مهاجرت‌های اعمال شده
+        """
+        try:
+            from_version = self.current_version()
+            target = self.latest_version if target is None else target
+            pending = [migration for migration in self.pending(from_version)
+                       if migration.version <= target]
+
+            if not pending:
+                return {
+                    'success': True,
+                    'from_version': from_version,
+                    'to_version': from_version,
+                    'applied': []
+                }
+
+            applied = [migration.name for migration in pending if self._apply(migration)]
+
+            return {
+                'success': True,
+                'from_version': from_version,
+                'to_version': self.current_version(),
+                'applied': applied
+            }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در اجرای مهاجرت‌ها: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'MIGRATION_ERROR'
+            }
@@ -10,49 +10,43 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from app.core.database import get_redis, db_session
+from app.core.database import db_session
+from app.core.pagination import Keyset, InvalidCursorError, paginate
+from app.core.unit_of_work import current_unit_of_work
+from app.core.service_registry import service_registry, LazyService, LazyRedisMixin
 from config import config
 
 logger = logging.getLogger(__name__)
 
-class NotificationService:
+class NotificationService(LazyRedisMixin):
     """سرویس اطلاع‌رسانی یکپارچه"""
 
     def __init__(self):
-        self.redis = get_redis()
         self.sms_enabled = config.notification.sms_enabled
         self.email_enabled = config.notification.email_enabled
         self.push_enabled = config.notification.push_enabled
 
     def send_notification(self, notification_data: Dict[str, Any]) -> Dict[str, Any]:
-        """ارسال اطلاع‌رسانی"""
-        try:
-            notification_type = notification_data.get('type', 'info')
-            priority = notification_data.get('priority', 'normal')
-            channels = notification_data.get('channels', ['push'])
+        """
+        ارسال اطلاع‌رسانی
 
+        داخل unit_of_work، اطلاع‌رسانی در همان تراکنش ذخیره می‌شود و ارسال
+        از کانال‌ها تا commit موفق واحد کاری به تعویق می‌افتد.
+        """
+        try:
             # ذخیره در دیتابیس
             notification_id = self._save_to_database(notification_data)
 
-            results = {}
-
-            # ارسال از طریق کانال‌های مختلف
-            if 'push' in channels and self.push_enabled:
-                results['push'] = self._send_push_notification(notification_data)
-
-            if 'sms' in channels and self.sms_enabled:
-                results['sms'] = self._send_sms_notification(notification_data)
-
-            if 'email' in channels and self.email_enabled:
-                results['email'] = self._send_email_notification(notification_data)
-
-            # ارسال از طریق Redis برای سیستم‌های دیگر
-            self._publish_to_redis(notification_data)
-
-            # به‌روزرسانی وضعیت در دیتابیس
-            self._update_notification_status(notification_id, 'sent', results)
+            unit = current_unit_of_work()
+            if unit is not None:
+                unit.on_commit(lambda: self._dispatch(notification_data, notification_id))
+                return {
+                    'success': True,
+                    'notification_id': notification_id,
+                    'deferred': True
+                }
 
-            logger.info(f"📢 اطلاع‌رسانی ارسال شد: {notification_data.get('title')}")
+            results = self._dispatch(notification_data, notification_id)
 
             return {
                 'success': True,
@@ -67,6 +61,31 @@ class NotificationService:
                 'error': str(e)
             }
 
+    def _dispatch(self, notification_data: Dict[str, Any], notification_id: int) -> Dict[str, Any]:
+        """ارسال اطلاع‌رسانی ذخیره شده از طریق کانال‌ها"""
+        channels = notification_data.get('channels', ['push'])
+        results = {}
+
+        # ارسال از طریق کانال‌های مختلف
+        if 'push' in channels and self.push_enabled:
+            results['push'] = self._send_push_notification(notification_data)
+
+        if 'sms' in channels and self.sms_enabled:
+            results['sms'] = self._send_sms_notification(notification_data)
+
+        if 'email' in channels and self.email_enabled:
+            results['email'] = self._send_email_notification(notification_data)
+
+        # ارسال از طریق Redis برای سیستم‌های دیگر
+        self._publish_to_redis(notification_data)
+
+        # به‌روزرسانی وضعیت در دیتابیس
+        self._update_notification_status(notification_id, 'sent', results)
+
+        logger.info(f"📢 اطلاع‌رسانی ارسال شد: {notification_data.get('title')}")
+
+        return results
+
     def send_to_user(self, user_id: int, title: str, message: str,
                     notification_type: str = 'info',
                     channels: List[str] = None) -> Dict[str, Any]:
@@ -411,18 +430,20 @@ class NotificationService:
             logger.error(f"❌ خطا در دریافت کاربران بخش: {e}")
             return []
 
-    def get_unread_notifications(self, user_id: int) -> List[Dict[str, Any]]:
-        """دریافت اطلاع‌رسانی‌های خوانده نشده کاربر"""
+    def get_unread_notifications(self, user_id: int, cursor: str = None, limit: int = 50) -> Dict[str, Any]:
+        """دریافت یک صفحه از اطلاع‌رسانی‌های خوانده نشده کاربر (جدیدترین اول)"""
         try:
             with db_session() as session:
                 from app.models.reception.notification_models import Notification
 
-                notifications = session.query(Notification).filter(
+                keyset = Keyset('notifications_by_created_at',
+                                Notification.created_at.desc(), Notification.id.desc())
+                page = paginate(session.query(Notification).filter(
                     Notification.to_user_id == user_id,
                     Notification.status == 'unread'
-                ).order_by(Notification.created_at.desc()).limit(50).all()
+                ), keyset, cursor, limit)
 
-                return [
+                notifications = [
                     {
                         'id': n.id,
                         'title': n.title,
@@ -435,12 +456,29 @@ class NotificationService:
                         'action_url': n.action_url,
                         'action_label': n.action_label
                     }
-                    for n in notifications
+                    for n in page.items
                 ]
 
+                return {
+                    'success': True,
+                    'count': len(notifications),
+                    'notifications': notifications,
+                    'next_cursor': page.next_cursor
+                }
+
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
             logger.error(f"❌ خطا در دریافت اطلاع‌رسانی‌های خوانده نشده: {e}")
-            return []
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'NOTIFICATIONS_RETRIEVAL_ERROR'
+            }
 
     def mark_as_read(self, notification_id: int, user_id: int) -> bool:
         """علامت‌گذاری اطلاع‌رسانی به عنوان خوانده شده"""
@@ -465,5 +503,6 @@ class NotificationService:
             logger.error(f"❌ خطا در علامت‌گذاری اطلاع‌رسانی: {e}")
             return False
 
-# ایجاد instance جهانی
-notification_service = NotificationService()
+# ثبت سرویس؛ instance در اولین استفاده ساخته می‌شود
+service_registry.register('notification_service', NotificationService)
+notification_service = LazyService('notification_service')
@@ -0,0 +1,213 @@
+# app/core/pagination.py
+"""
+صفحه‌بندی keyset (seek) برای لیست‌ها
+
+به جای OFFSET که برای صفحه n باید n×limit سطر را بخواند و دور بریزد،
+صفحه بعد با شرط «بعد از آخرین سطر صفحه قبل» روی ترتیبی پایدار و
+ایندکس‌دار خوانده می‌شود؛ هزینه هر صفحه مستقل از عمق آن است و درج یا
+حذف همزمان باعث تکرار یا جا افتادن سطر نمی‌شود.
+
+قرارداد مشترک سرویس‌ها:
+    - ورودی cursor (توکن رشته‌ای صفحه قبل یا None برای صفحه اول) و limit
+    - خروجی next_cursor (None یعنی صفحه آخر)
+
+مثال:
+    GUEST_PAGES = Keyset('guests_by_name', Guest.last_name, Guest.id)
+    page = paginate(session.query(Guest), GUEST_PAGES, cursor, limit=100)
+    page.items, page.next_cursor
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import and_, func, tuple_
+from sqlalchemy.sql import operators
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """توکن cursor نامعتبر یا متعلق به ترتیب دیگر"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+        raise InvalidCursorError("مقدار cursor نامعتبر است")
+    return value
+
+
+def encode_cursor(name: str, values: Sequence[Any]) -> str:
+    """توکن cursor برای مقادیر کلید آخرین سطر یک ترتیب"""
+    payload = json.dumps([name, [_encode_value(value) for value in values]],
+                         ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, name: str, size: int) -> List[Any]:
+    """
+    مقادیر کلید از توکن cursor
+
+    Raises:
+        InvalidCursorError: توکن خراب یا متعلق به ترتیب دیگر
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        token_name, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError, TypeError, AttributeError):
+        raise InvalidCursorError("توکن cursor قابل خواندن نیست")
+
+    if token_name != name or not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError(f"cursor متعلق به ترتیب {name} نیست")
+    return [_decode_value(value) for value in values]
+
+
+class Page(NamedTuple):
+    """یک صفحه از نتایج"""
+    items: List[Any]
+    next_cursor: Optional[str]
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+class Keyset:
+    """
+    ترتیب پایدار یک لیست و شرط seek متناظر با آن
+
+    ستون آخر باید یکتا باشد (معمولاً id) تا ترتیب کامل و پایدار شود.
+    ستون‌ها مانند order_by داده می‌شوند (ستون یا column.desc()) و جهت هر
+    ستون مستقل است. برای ستون‌های nullable مقدار جایگزین NULL در nulls
+    داده می‌شود؛ مرتب‌سازی روی coalesce انجام می‌شود و ایندکس باید روی
+    همان عبارت باشد.
+    """
+
+    def __init__(self, name: str, *columns, nulls: Dict[str, Any] = None):
+        if not columns:
+            raise ValueError("Keyset حداقل یک ستون لازم دارد")
+
+        self.name = name
+        self.nulls = nulls or {}
+        self._keys: List[Tuple[str, Any, bool]] = []
+        for entry in columns:
+            descending = getattr(entry, 'modifier', None) is operators.desc_op
+            column = entry.element if descending else entry
+            key = column.key
+            expression = func.coalesce(column, self.nulls[key]) if key in self.nulls else column
+            self._keys.append((key, expression, descending))
+
+    @property
+    def keys(self) -> List[str]:
+        return [key for key, _, _ in self._keys]
+
+    def order(self, query):
+        """اعمال ترتیب keyset روی query"""
+        return query.order_by(*[
+            expression.desc() if descending else expression.asc()
+            for _, expression, descending in self._keys
+        ])
+
+    def conditions_after(self, values: Sequence[Any]) -> List[Any]:
+        """
+        شرط‌های «بعد از سطر با مقادیر values» به ترتیب نتایج
+
+        شرط OR روی چند ستون از ایندکس به صورت بازه استفاده نمی‌کند و صفحه‌های
+        عمیق را دوباره کند می‌کند. اگر جهت همه ستون‌ها یکی باشد یک مقایسه
+        row value ساخته می‌شود: (a, b, id) > (x, y, z). در ترتیب با جهت‌های
+        مختلف، برای هر ستون یک شاخه «ستون‌های قبلی برابر و این ستون بعد»
+        ساخته می‌شود؛ هر شاخه یک بازه پیوسته ایندکس است و شاخه‌ها از ستون
+        آخر به اول به ترتیب نتایج می‌آیند.
+        """
+        expressions = [expression for _, expression, _ in self._keys]
+        directions = {descending for _, _, descending in self._keys}
+
+        if len(directions) == 1:
+            descending = directions.pop()
+            if len(expressions) == 1:
+                left, right = expressions[0], values[0]
+            else:
+                left, right = tuple_(*expressions), tuple_(*values)
+            return [left < right if descending else left > right]
+
+        branches = []
+        for position in reversed(range(len(self._keys))):
+            _, expression, descending = self._keys[position]
+            equal = [expressions[i] == values[i] for i in range(position)]
+            after = expression < values[position] if descending else expression > values[position]
+            branches.append(and_(*equal, after))
+        return branches
+
+    def values_of(self, row) -> List[Any]:
+        """مقادیر کلید یک سطر (موجودیت ORM، سطر نتیجه یا named tuple)"""
+        values = []
+        for key, _, _ in self._keys:
+            value = getattr(row, key)
+            if value is None and key in self.nulls:
+                value = self.nulls[key]
+            values.append(value)
+        return values
+
+    def encode(self, values: Sequence[Any]) -> str:
+        """توکن cursor برای مقادیر کلید"""
+        return encode_cursor(self.name, values)
+
+    def decode(self, token: str) -> List[Any]:
+        """مقادیر کلید از توکن cursor"""
+        return decode_cursor(token, self.name, len(self._keys))
+
+
+def paginate(query, keyset: Keyset, cursor: Optional[str] = None,
+             limit: int = DEFAULT_PAGE_SIZE, projection: Type[NamedTuple] = None) -> Page:
+    """
+    دریافت یک صفحه با keyset
+
+    Args:
+        query: query فیلتر شده (بدون order_by)
+        keyset: ترتیب صفحه‌بندی
+        cursor: توکن صفحه قبل یا None برای صفحه اول
+        limit: اندازه صفحه (حداکثر MAX_PAGE_SIZE)
+        projection: named tuple برای نگاشت سطرهای query ستونی
+
+    Raises:
+        InvalidCursorError: توکن نامعتبر
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+    # یک سطر اضافه برای تشخیص وجود صفحه بعد
+    if cursor:
+        rows = []
+        for condition in keyset.conditions_after(keyset.decode(cursor)):
+            rows.extend(keyset.order(query.filter(condition)).limit(limit + 1 - len(rows)).all())
+            if len(rows) > limit:
+                break
+    else:
+        rows = keyset.order(query).limit(limit + 1).all()
+
+    if projection is not None:
+        rows = [projection._make(row) for row in rows]
+
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    return Page(rows, keyset.encode(keyset.values_of(rows[-1])))
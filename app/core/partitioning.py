@@ -0,0 +1,402 @@
+# app/core/partitioning.py
+"""
+پارتیشن‌بندی ماهانه جداول زمانی پرحجم (فقط PostgreSQL)
+
+reception_room_status_changes (روی created_at) و system.system_audit_trail
+(روی timestamp) با مهاجرت time_partitioning به جدول‌های پارتیشن‌بندی شده
+RANGE تبدیل می‌شوند: یک پارتیشن برای هر ماه (<جدول>_pYYYYMM) و یک پارتیشن
+پیش‌فرض برای سطرهای خارج از بازه پارتیشن‌ها.
+
+    - queryهای دارای شرط بازه زمانی روی ستون پارتیشن فقط پارتیشن‌های همان
+      ماه‌ها را می‌خوانند (partition pruning)
+    - PartitionManager پارتیشن‌های ماه‌های آینده را از قبل می‌سازد
+    - نگهداری (retention) با جدا کردن (DETACH) و حذف (DROP) پارتیشن‌های
+      کاملاً قدیمی انجام می‌شود؛ بدون DELETE سطر به سطر، vacuum و WAL حجیم
+    - سطرهای پارتیشن‌های منقضی تغییرات وضعیت اتاق پیش از حذف به جدول
+      بایگانی کپی می‌شوند تا از reception_room_status_changes_all قابل
+      دسترسی بمانند
+    - اگر پیش از ساخت پارتیشن یک ماه سطرهایی از آن ماه در پارتیشن پیش‌فرض
+      نوشته شده باشد، این سطرها هنگام ساخت پارتیشن به آن منتقل می‌شوند
+
+روی سایر دیتابیس‌ها (SQLite در تست و توسعه) جداول عادی می‌مانند و
+نگهداری با DELETE انجام می‌شود.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Table, text
+
+from app.core.database import db_session
+from app.core.service_registry import service_registry, LazyService
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_SUFFIX_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """یک جدول پارتیشن‌بندی شده ماهانه"""
+    table: Table
+    column: str
+    retention_days: int
+    archive: Optional[Table] = None  # جدول بایگانی سطرهای پارتیشن‌های منقضی
+
+    @property
+    def qualified_name(self) -> str:
+        return qualified(self.table.schema, self.table.name)
+
+
+def partition_specs() -> List[PartitionSpec]:
+    """جداول پارتیشن‌بندی شده و مدت نگهداری هر کدام"""
+    from app.core.audit_trail import AuditTrail
+    from app.models.reception.archive_models import ARCHIVE_TABLES
+    from app.models.reception.room_status_models import RoomStatusChange
+
+    return [
+        PartitionSpec(RoomStatusChange.__table__, 'created_at', config.database.room_status_retention_days,
+                      archive=ARCHIVE_TABLES[RoomStatusChange]),
+        PartitionSpec(AuditTrail.__table__, 'timestamp', config.database.audit_retention_days),
+    ]
+
+
+def spec_for(table: Table) -> PartitionSpec:
+    return next(spec for spec in partition_specs() if spec.table is table)
+
+
+def qualified(schema: Optional[str], name: str) -> str:
+    return f"{schema}.{name}" if schema else name
+
+
+def month_start(value) -> date:
+    """اول ماه تاریخ value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: Table, month: date) -> str:
+    return f"{table.name}_p{month:%Y%m}"
+
+
+def default_partition_name(table: Table) -> str:
+    return f"{table.name}_default"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """ماه پارتیشن از نام آن (None برای پارتیشن پیش‌فرض)"""
+    match = _PARTITION_SUFFIX_RE.search(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def expired_months(months: List[date], retention_days: int, today: date = None) -> List[date]:
+    """
+    ماه‌هایی که همه سطرهای آن‌ها از مدت نگهداری قدیمی‌ترند
+
+    پارتیشن ماهی حذف می‌شود که پایان آن (اول ماه بعد) پیش از مرز نگهداری
+    باشد؛ بنابراین سطرها حداکثر یک ماه بیش از retention_days می‌مانند.
+    """
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    return sorted(month for month in months if add_months(month, 1) <= cutoff)
+
+
+def create_partition_sql(spec: PartitionSpec, month: date) -> str:
+    name = qualified(spec.table.schema, partition_name(spec.table, month))
+    return (f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {spec.qualified_name} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')")
+
+
+def is_partitioned(connection, table: Table) -> bool:
+    """آیا جدول در دیتابیس پارتیشن‌بندی شده است"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"),
+        {'name': qualified(table.schema, table.name)}
+    ).scalar()
+
+
+def list_partitions(connection, table: Table) -> Dict[date, str]:
+    """پارتیشن‌های ماهانه متصل به جدول: {ماه: نام}"""
+    rows = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:name)"
+    ), {'name': qualified(table.schema, table.name)}).scalars()
+
+    partitions = {}
+    for name in rows:
+        month = partition_month(name)
+        if month is not None:
+            partitions[month] = name
+    return partitions
+
+
+def default_partition(connection, table: Table) -> Optional[str]:
+    """نام پارتیشن پیش‌فرض متصل به جدول (None اگر وجود ندارد)"""
+    return connection.execute(text(
+        "SELECT child.relname FROM pg_partitioned_table "
+        "JOIN pg_class child ON child.oid = pg_partitioned_table.partdefid "
+        "WHERE pg_partitioned_table.partrelid = to_regclass(:name)"
+    ), {'name': qualified(table.schema, table.name)}).scalar()
+
+
+def create_partition(connection, spec: PartitionSpec, month: date, default: str = None) -> int:
+    """
+    ایجاد پارتیشن ماه month
+
+    PostgreSQL پارتیشن ماهی را که سطرهایش در پارتیشن پیش‌فرض است
+    نمی‌سازد؛ در این حالت پارتیشن پیش‌فرض جدا می‌شود، پارتیشن ماه ساخته
+    و سطرهای آن ماه از پارتیشن پیش‌فرض به آن منتقل می‌شوند و پارتیشن
+    پیش‌فرض دوباره متصل می‌شود (همه در تراکنش جاری).
+
+    Returns:
+        int: تعداد سطرهای منتقل شده از پارتیشن پیش‌فرض
+    """
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    in_month = f"{spec.column} >= :start AND {spec.column} < :end"
+    default = qualified(spec.table.schema, default) if default else None
+
+    if not default or not connection.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})"), bounds
+    ).scalar():
+        connection.execute(text(create_partition_sql(spec, month)))
+        return 0
+
+    name = qualified(spec.table.schema, partition_name(spec.table, month))
+    connection.execute(text(f"ALTER TABLE {spec.qualified_name} DETACH PARTITION {default}"))
+    connection.execute(text(create_partition_sql(spec, month)))
+    moved = connection.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_month}"), bounds).rowcount
+    connection.execute(text(f"DELETE FROM {default} WHERE {in_month}"), bounds)
+    connection.execute(text(f"ALTER TABLE {spec.qualified_name} ATTACH PARTITION {default} DEFAULT"))
+
+    logger.info(f"🗂️ {moved} سطر از پارتیشن پیش‌فرض به {name} منتقل شد")
+    return moved
+
+
+def ensure_partitions(connection, spec: PartitionSpec, months_ahead: int = None,
+                      first_month: date = None) -> List[str]:
+    """
+    ایجاد پارتیشن‌های نبود از first_month (پیش‌فرض ماه جاری) تا months_ahead ماه بعد
+
+    Returns:
+        List[str]: نام پارتیشن‌های ایجاد شده
+    """
+    months_ahead = config.database.partition_months_ahead if months_ahead is None else months_ahead
+    current = month_start(date.today())
+    month = first_month or current
+    existing = list_partitions(connection, spec.table)
+    default = default_partition(connection, spec.table)
+
+    created = []
+    while month <= add_months(current, months_ahead):
+        if month not in existing:
+            create_partition(connection, spec, month, default)
+            created.append(partition_name(spec.table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def archive_partition(connection, spec: PartitionSpec, name: str) -> int:
+    """کپی سطرهای پارتیشن (جدا شده) به جدول بایگانی جدول"""
+    names = ', '.join(column.name for column in spec.table.columns)
+    archive = qualified(spec.archive.schema, spec.archive.name)
+    return connection.execute(text(
+        f"INSERT INTO {archive} ({names}, archived_at) SELECT {names}, now() FROM {name}"
+    )).rowcount
+
+
+def drop_expired_partitions(connection, spec: PartitionSpec, retention_days: int = None,
+                            mode: str = None) -> Dict[str, Any]:
+    """
+    جدا کردن و حذف پارتیشن‌های قدیمی‌تر از مدت نگهداری
+
+    اگر جدول، جدول بایگانی داشته باشد (spec.archive) سطرهای پارتیشن پیش
+    از حذف به آن کپی می‌شوند.
+
+    Args:
+        mode: 'drop' (حذف پس از جدا کردن) یا 'detach' (فقط جدا کردن؛ جدول
+            برای پشتیبان‌گیری یا انتقال به بایگانی سرد باقی می‌ماند)
+
+    Returns:
+        Dict: partitions (نام‌ها)، rows (تعداد سطرهای پارتیشن‌ها) و archived
+            (تعداد سطرهای کپی شده به بایگانی)
+    """
+    retention_days = spec.retention_days if retention_days is None else retention_days
+    mode = mode or config.database.partition_retention_mode
+    partitions = list_partitions(connection, spec.table)
+
+    dropped, rows, archived = [], 0, 0
+    for month in expired_months(list(partitions), retention_days):
+        name = qualified(spec.table.schema, partitions[month])
+        rows += connection.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        connection.execute(text(f"ALTER TABLE {spec.qualified_name} DETACH PARTITION {name}"))
+        if mode == 'drop':
+            if spec.archive is not None:
+                archived += archive_partition(connection, spec, name)
+            connection.execute(text(f"DROP TABLE {name}"))
+        dropped.append(partitions[month])
+
+    return {'partitions': dropped, 'rows': rows, 'archived': archived}
+
+
+def convert_to_partitioned(connection, spec: PartitionSpec) -> int:
+    """
+    تبدیل جدول عادی موجود به جدول پارتیشن‌بندی شده ماهانه (مهاجرت)
+
+    جدول قدیمی تغییر نام می‌یابد، جدول پارتیشن‌بندی شده با همان ستون‌ها،
+    پیش‌فرض‌ها (از جمله sequence شناسه) و کلیدهای خارجی ساخته می‌شود،
+    پارتیشن‌های ماه‌های دارای داده ایجاد و سطرها یک بار کپی می‌شوند.
+    کلید اصلی (id، ستون پارتیشن) است؛ PostgreSQL کلید یکتای بدون ستون
+    پارتیشن را در جدول پارتیشن‌بندی شده نمی‌پذیرد و id همچنان از sequence
+    یکتا می‌آید.
+
+    Returns:
+        int: تعداد سطرهای منتقل شده
+    """
+    table, column = spec.table, spec.column
+    legacy_name = f"{table.name}_legacy"
+    legacy = qualified(table.schema, legacy_name)
+    parent = spec.qualified_name
+
+    connection.execute(text(f"ALTER TABLE {parent} RENAME TO {legacy_name}"))
+    connection.execute(text(
+        f"CREATE TABLE {parent} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({column})"
+    ))
+    connection.execute(text(f"ALTER TABLE {parent} ADD PRIMARY KEY (id, {column})"))
+
+    foreign_keys = connection.execute(text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+    ), {'name': legacy}).all()
+    for name, definition in foreign_keys:
+        connection.execute(text(f"ALTER TABLE {parent} ADD CONSTRAINT {name}_part {definition}"))
+
+    oldest = connection.execute(text(f"SELECT min({column}) FROM {legacy}")).scalar()
+    ensure_partitions(connection, spec, first_month=month_start(oldest) if oldest else None)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {qualified(table.schema, default_partition_name(table))} "
+        f"PARTITION OF {parent} DEFAULT"
+    ))
+
+    names = ', '.join(c.name for c in table.columns)
+    values = ', '.join(f"COALESCE({c.name}, now())" if c.name == column else c.name for c in table.columns)
+    moved = connection.execute(text(f"INSERT INTO {parent} ({names}) SELECT {values} FROM {legacy}")).rowcount
+
+    # sequence شناسه پیش از حذف جدول قدیمی به جدول جدید منتقل می‌شود
+    sequence = connection.execute(
+        text("SELECT pg_get_serial_sequence(:name, 'id')"), {'name': legacy}
+    ).scalar()
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {parent}.id"))
+    connection.execute(text(f"DROP TABLE {legacy}"))
+
+    for index in table.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+    connection.execute(text(f"ANALYZE {parent}"))
+    return moved
+
+
+class PartitionManager:
+    """کار پس‌زمینه ساخت پارتیشن‌های آینده و حذف پارتیشن‌های قدیمی"""
+
+    def __init__(self, interval: float = None):
+        self.interval = config.database.partition_maintenance_interval if interval is None else interval
+
+        self.runs = 0
+        self.created: List[str] = []
+        self.dropped: List[str] = []
+        self.last_run: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def run_maintenance(self, retention: bool = True) -> Dict[str, Any]:
+        """
+        ایجاد پارتیشن‌های ماه‌های آینده و (در صورت retention) حذف پارتیشن‌های قدیمی
+
+        هر جدول تراکنش جداگانه دارد و خطای یک جدول مانع نگهداری جدول‌های
+        دیگر نمی‌شود (خطا در نتیجه همان جدول و last_error ثبت می‌شود)؛
+        جدول‌های پارتیشن‌بندی نشده نادیده گرفته می‌شوند.
+        """
+        results = {}
+        for spec in partition_specs():
+            try:
+                with db_session() as session:
+                    connection = session.connection()
+                    if not is_partitioned(connection, spec.table):
+                        continue
+
+                    created = ensure_partitions(connection, spec)
+                    expired = drop_expired_partitions(connection, spec) if retention else \
+                        {'partitions': [], 'rows': 0, 'archived': 0}
+                    session.commit()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"❌ خطا در نگهداری پارتیشن‌های {spec.qualified_name}: {e}")
+                results[spec.qualified_name] = {'created': [], 'partitions': [], 'rows': 0,
+                                                'archived': 0, 'error': str(e)}
+                continue
+
+            self.created.extend(created)
+            self.dropped.extend(expired['partitions'])
+            results[spec.qualified_name] = {'created': created, **expired}
+
+        self.runs += 1
+        self.last_run = datetime.now()
+        if any(result['created'] or result['partitions'] or result.get('error') for result in results.values()):
+            logger.info(f"🗂️ نگهداری پارتیشن‌ها: {results}")
+        return results
+
+    def start(self):
+        """شروع کار در پس‌زمینه (هوک چرخه حیات)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker, name='partition-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """توقف کار (هوک چرخه حیات)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"❌ خطا در نگهداری پارتیشن‌ها: {e}")
+            self._stop_event.wait(self.interval)
+
+    def get_status(self) -> Dict[str, Any]:
+        """وضعیت کار"""
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'runs': self.runs,
+            'created': list(self.created),
+            'dropped': list(self.dropped),
+            'last_run': self.last_run,
+            'last_error': self.last_error
+        }
+
+
+# ثبت سرویس؛ کار فقط با service_registry.start_all شروع می‌شود
+service_registry.register('partition_manager', PartitionManager, autostart=True)
+partition_manager = LazyService('partition_manager')
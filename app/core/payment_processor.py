@@ -11,6 +11,7 @@ from typing import Dict, Any, Optional, Tuple
 from abc import ABC, abstractmethod
 import requests
 from config import config
+from app.core.service_registry import service_registry, LazyService
 
 logger = logging.getLogger(__name__)
 
@@ -344,5 +345,6 @@ class PaymentProcessor:
 
         return methods
 
-# ایجاد instance جهانی
-payment_processor = PaymentProcessor()
+# ثبت سرویس؛ instance در اولین استفاده ساخته می‌شود
+service_registry.register('payment_processor', PaymentProcessor)
+payment_processor = LazyService('payment_processor')
@@ -0,0 +1,204 @@
+# app/core/query_stats.py
+"""
+ابزار اندازه‌گیری کوئری‌های SQLAlchemy و تشخیص الگوی N+1
+
+رویدادهای before/after_cursor_execute روی همه engineها ثبت می‌شوند و هر
+دستور در «فراخوانی» جاری (محدوده track_queries) شمرده می‌شود: تعداد
+دستورات، زمان کل دیتابیس و اثرانگشت دستورات تکراری. دستوری که در یک
+فراخوانی بیش از حد آستانه با اثرانگشت یکسان تکرار شود به عنوان N+1
+احتمالی علامت‌گذاری می‌شود.
+"""
+
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# الگوهای نرمال‌سازی دستور برای اثرانگشت
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    اثرانگشت دستور SQL: مقادیر و پارامترها با ? جایگزین می‌شوند
+
+    دستوراتی که فقط در مقدار پارامتر تفاوت دارند (مانند کوئری هر ردیف در
+    حلقه) اثرانگشت یکسان دارند.
+    """
+    normalized = _STRING.sub('?', statement)
+    normalized = _PARAMETER.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _VALUE_LIST.sub('(?)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+@dataclass
+class CallStats:
+    """آمار کوئری‌های یک فراخوانی سرویس"""
+    name: str
+    statements: int = 0
+    db_time: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float):
+        self.statements += 1
+        self.db_time += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int = None) -> Dict[str, int]:
+        """دستورات تکراری با تعداد حداقل threshold"""
+        threshold = threshold or config.database.n_plus_one_threshold
+        return {fp: count for fp, count in self.fingerprints.items() if count >= threshold}
+
+
+class QueryStats:
+    """آمار تجمیعی thread-safe فراخوانی‌ها به تفکیک نام"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """صفر کردن آمار"""
+        with self._lock:
+            self.by_name: Dict[str, Dict[str, Any]] = {}
+            self.suspects: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, call: CallStats):
+        repeated = call.repeated()
+
+        with self._lock:
+            entry = self.by_name.setdefault(call.name, {
+                'calls': 0, 'statements': 0, 'max_statements': 0,
+                'db_time_ms': 0.0, 'n_plus_one': 0
+            })
+            entry['calls'] += 1
+            entry['statements'] += call.statements
+            entry['max_statements'] = max(entry['max_statements'], call.statements)
+            entry['db_time_ms'] += call.db_time * 1000
+            if repeated:
+                entry['n_plus_one'] += 1
+
+            for fp, count in repeated.items():
+                suspect = self.suspects.setdefault(fp, {'call': call.name, 'occurrences': 0, 'max_repeats': 0})
+                suspect['occurrences'] += 1
+                suspect['max_repeats'] = max(suspect['max_repeats'], count)
+
+        for fp, count in repeated.items():
+            logger.warning(f"⚠️ الگوی احتمالی N+1 در {call.name}: {count} بار تکرار «{fp[:200]}»")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """کپی آمار"""
+        with self._lock:
+            return {
+                'by_name': {name: dict(entry) for name, entry in self.by_name.items()},
+                'suspects': {fp: dict(entry) for fp, entry in self.suspects.items()}
+            }
+
+
+# آمار جهانی
+query_stats = QueryStats()
+
+# فراخوانی در حال اندازه‌گیری در context جاری
+_current_call: ContextVar[Optional[CallStats]] = ContextVar('query_call', default=None)
+
+
+def current_call() -> Optional[CallStats]:
+    """فراخوانی در حال اندازه‌گیری یا None"""
+    return _current_call.get()
+
+
+@contextmanager
+def track_queries(name: str = None, record: bool = True):
+    """
+    محدوده اندازه‌گیری کوئری‌ها
+
+    محدوده‌های تو در تو به بیرونی‌ترین محدوده می‌پیوندند تا یک فراخوانی
+    سرویس که چند session باز می‌کند یک‌جا شمرده شود.
+
+    Args:
+        name: نام فراخوانی (پیش‌فرض: نام تابع فراخواننده)
+        record: ثبت در آمار جهانی در پایان
+    """
+    active = _current_call.get()
+    if active is not None:
+        yield active
+        return
+
+    call = CallStats(name=name or caller_name(depth=3))
+    token = _current_call.set(call)
+    try:
+        yield call
+    finally:
+        _current_call.reset(token)
+        if record and config.database.query_instrumentation:
+            query_stats.record(call)
+
+
+def caller_name(depth: int = 2) -> str:
+    """نام کامل تابع فراخواننده (برای نام‌گذاری خودکار محدوده‌ها)"""
+    try:
+        code = sys._getframe(depth).f_code
+    except ValueError:
+        return 'unknown'
+    return getattr(code, 'co_qualname', code.co_name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_call.get() is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    call = _current_call.get()
+    started = getattr(context, '_query_started_at', None)
+    if call is None or started is None:
+        return
+    call.record(statement, time.perf_counter() - started)
+
+
+def install_query_instrumentation():
+    """ثبت رویدادهای اندازه‌گیری روی همه engineها (idempotent)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(max_statements: int, name: str = 'assert_max_queries'):
+    """
+    کمک‌کننده تست: فراخوانی داخل بلوک بیش از max_statements دستور اجرا نکند
+
+    مثال:
+        with assert_max_queries(3):
+            HousekeepingService.get_housekeeping_staff()
+    """
+    install_query_instrumentation()
+
+    with track_queries(name, record=False) as call:
+        yield call
+
+    if call.statements > max_statements:
+        repeated = call.repeated(threshold=2)
+        details = '\n'.join(f"  {count}× {fp}" for fp, count in repeated.items())
+        raise AssertionError(
+            f"{call.statements} دستور اجرا شد، حداکثر مجاز {max_statements}"
+            + (f"\nدستورات تکراری:\n{details}" if details else '')
+        )
@@ -0,0 +1,176 @@
+# app/core/service_registry.py
+"""
+رجیستری سرویس‌های هسته با ساخت تنبل و چرخه حیات start/stop
+
+سرویس‌ها هنگام ایمپورت ماژول فقط ثبت می‌شوند؛ instance در اولین استفاده
+ساخته می‌شود و تردهای پس‌زمینه فقط با فراخوانی صریح start اجرا می‌شوند.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """ثبت، ساخت تنبل و مدیریت چرخه حیات سرویس‌ها"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._autostart: Dict[str, bool] = {}
+        self._instances: Dict[str, Any] = {}
+        self._started: List[str] = []
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any], autostart: bool = False):
+        """
+        ثبت سرویس
+
+        Args:
+            name: نام سرویس
+            factory: تابع سازنده instance
+            autostart: آیا start_all این سرویس را شروع کند
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._autostart[name] = autostart
+
+    def get(self, name: str) -> Any:
+        """دریافت instance سرویس (ساخت در اولین فراخوانی)"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"سرویس {name} ثبت نشده است")
+                self._instances[name] = self._factories[name]()
+                logger.debug(f"سرویس {name} ساخته شد")
+            return self._instances[name]
+
+    def is_created(self, name: str) -> bool:
+        """آیا instance سرویس ساخته شده است"""
+        return name in self._instances
+
+    def is_started(self, name: str) -> bool:
+        """آیا سرویس شروع شده است"""
+        return name in self._started
+
+    def start(self, name: str) -> bool:
+        """شروع سرویس در صورت داشتن متد start"""
+        with self._lock:
+            if name in self._started:
+                return True
+
+            instance = self.get(name)
+            start = getattr(instance, 'start', None)
+            if start is None:
+                return False
+
+            start()
+            self._started.append(name)
+            logger.info(f"▶️ سرویس {name} شروع شد")
+            return True
+
+    def start_all(self, names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        شروع سرویس‌ها
+
+        Args:
+            names: نام سرویس‌ها؛ در صورت عدم تعیین سرویس‌های autostart
+
+        Returns:
+            dict: نتیجه شروع هر سرویس
+        """
+        if names is None:
+            names = [name for name, enabled in self._autostart.items() if enabled]
+
+        results = {}
+        for name in names:
+            try:
+                results[name] = self.start(name)
+            except Exception as e:
+                logger.error(f"❌ خطا در شروع سرویس {name}: {e}")
+                results[name] = False
+        return results
+
+    def stop(self, name: str):
+        """توقف سرویس شروع شده"""
+        with self._lock:
+            if name not in self._started:
+                return
+
+            self._started.remove(name)
+            stop = getattr(self._instances[name], 'stop', None)
+            if stop is not None:
+                stop()
+            logger.info(f"⏹️ سرویس {name} متوقف شد")
+
+    def stop_all(self):
+        """توقف تمام سرویس‌های شروع شده به ترتیب معکوس"""
+        for name in reversed(list(self._started)):
+            try:
+                self.stop(name)
+            except Exception as e:
+                logger.error(f"❌ خطا در توقف سرویس {name}: {e}")
+
+    def reset(self):
+        """توقف و حذف تمام instanceها (برای تست‌ها)"""
+        self.stop_all()
+        with self._lock:
+            self._instances.clear()
+
+
+class LazyService:
+    """
+    جایگزین instance جهانی سرویس
+
+    دسترسی به هر attribute باعث ساخت سرویس از رجیستری می‌شود، بنابراین
+    کدهای موجود مانند payment_processor.process_payment(...) بدون تغییر
+    کار می‌کنند.
+    """
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, name: str, registry: ServiceRegistry = None):
+        object.__setattr__(self, '_registry', registry or service_registry)
+        object.__setattr__(self, '_name', name)
+
+    def _instance(self) -> Any:
+        return self._registry.get(self._name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._instance(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._instance(), attr, value)
+
+    def __delattr__(self, attr: str):
+        delattr(self._instance(), attr)
+
+    def __repr__(self) -> str:
+        state = 'created' if self._registry.is_created(self._name) else 'lazy'
+        return f"<LazyService {self._name} ({state})>"
+
+
+class LazyRedisMixin:
+    """اتصال Redis در اولین استفاده به جای سازنده"""
+
+    _redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            from app.core.database import get_redis
+            self._redis = get_redis()
+        return self._redis
+
+    @redis.setter
+    def redis(self, client):
+        self._redis = client
+
+
+# رجیستری جهانی سرویس‌ها
+service_registry = ServiceRegistry()
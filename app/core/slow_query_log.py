@@ -0,0 +1,389 @@
+# app/core/slow_query_log.py
+"""
+ثبت کوئری‌های کند با plan اجرای خودکار
+
+پس از فعال‌سازی (DB_SLOW_QUERY_LOG=true) هر دستوری که بیش از آستانه طول
+بکشد با اثرانگشت SQL، پارامترهای پاک‌سازی شده از اطلاعات شخصی، مدت،
+سرویس فراخواننده و خروجی EXPLAIN ثبت می‌شود. گرفتن plan و ذخیره‌سازی در
+یک ترد پس‌زمینه انجام می‌شود تا فراخوانی کند دوباره منتظر نماند.
+
+رکوردها در فایل چرخشی slow_queries.log و جدول system_slow_queries ذخیره
+می‌شوند و top_offenders پرهزینه‌ترین الگوها را بر اساس زمان کل برمی‌گرداند.
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, JSON, Index, event, func
+
+from app.core.database import Base, db_session, replica_tolerant
+from app.core.query_stats import fingerprint, current_call
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# کلیدهای پارامتر حاوی اطلاعات شخصی
+PII_KEY_PATTERN = re.compile(
+    r'national|passport|phone|mobile|email|name|address|birth|card|cvv|password|iban|account',
+    re.IGNORECASE
+)
+# مقادیری که بدون توجه به نام پارامتر شبیه اطلاعات شخصی هستند
+PII_VALUE_PATTERN = re.compile(r'@|\d{6,}|^\+?\d[\d\s\-]{7,}$')
+_PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+REDACTED = '[REDACTED]'
+
+# دستورات یا بندهایی که ANALYZE آن‌ها داده تغییر می‌دهد یا قفل می‌گیرد
+# (CTE تغییر داده، SELECT ... FOR UPDATE)
+_WRITE_KEYWORDS = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+
+# حداکثر تعداد الگوهایی که زمان آخرین EXPLAIN آن‌ها نگه داشته می‌شود
+MAX_EXPLAINED_FINGERPRINTS = 2048
+
+
+class SlowQuery(Base):
+    """مدل ذخیره‌سازی کوئری‌های کند"""
+
+    __tablename__ = 'system_slow_queries'
+
+    id = Column(Integer, primary_key=True)
+    recorded_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    fingerprint_hash = Column(String(32), nullable=False)
+    fingerprint = Column(Text, nullable=False)
+    parameters = Column(JSON)                  # پارامترهای پاک‌سازی شده
+    duration_ms = Column(Float, nullable=False)
+    call_name = Column(String(200))            # سرویس فراخواننده
+    plan = Column(Text)                        # خروجی EXPLAIN
+
+    __table_args__ = (
+        Index('ix_system_slow_queries_fingerprint_hash', 'fingerprint_hash'),
+        Index('ix_system_slow_queries_recorded_at', 'recorded_at'),
+    )
+
+
+def _redact_value(key: Optional[str], value: Any) -> Any:
+    if value is None or isinstance(value, bool):
+        return value
+    if key is not None and PII_KEY_PATTERN.search(str(key)):
+        return REDACTED
+    if isinstance(value, (int, float, Decimal)):
+        return str(value) if isinstance(value, Decimal) else value
+    if isinstance(value, (bytes, bytearray)):
+        return f'<{len(value)} bytes>'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    text_value = str(value)
+    if PII_VALUE_PATTERN.search(text_value):
+        return REDACTED
+    return text_value[:100]
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """
+    حذف اطلاعات شخصی از پارامترهای دستور
+
+    پارامترهایی که نامشان به اطلاعات شخصی اشاره دارد و مقادیری که شبیه
+    کد ملی، تلفن، ایمیل یا شماره کارت هستند با [REDACTED] جایگزین می‌شوند.
+    """
+    if isinstance(parameters, dict):
+        return {key: _redact_value(key, value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(None, value) for value in parameters]
+    return None
+
+
+def redact_plan(plan: Optional[str]) -> Optional[str]:
+    """حذف مقادیر ثابت از plan (در plan پستگرس مقادیر فیلتر نمایش داده می‌شوند)"""
+    if plan is None:
+        return None
+    return _PLAN_LITERAL.sub("'?'", plan)
+
+
+class SlowQueryRecorder:
+    """ثبت‌کننده کوئری‌های کند روی engineهای دیتابیس"""
+
+    def __init__(self, log_path: Path = None):
+        self.log_path = log_path or config.app.log_dir / 'slow_queries.log'
+        self.threshold_ms = config.database.slow_query_threshold_ms
+        self.explain_enabled = config.database.slow_query_explain
+        self.explain_interval = config.database.slow_query_explain_interval
+        self.persist = True
+
+        self.recorded = 0
+        self.dropped = 0
+
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=1000)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_explained: 'OrderedDict[str, float]' = OrderedDict()
+        self._file_handler: Optional[RotatingFileHandler] = None
+        self._engines = []
+
+    # ---------- نصب روی engine ----------
+
+    def install(self, engine, threshold_ms: float = None):
+        """ثبت رویدادهای زمان‌سنجی روی engine (idempotent)"""
+        if threshold_ms is not None:
+            self.threshold_ms = threshold_ms
+
+        if event.contains(engine, 'after_cursor_execute', self._after_cursor_execute):
+            return
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines.append(engine)
+        logger.info(f"🐢 ثبت کوئری‌های کند فعال شد (آستانه {self.threshold_ms:.0f}ms)")
+
+    def uninstall(self):
+        """حذف رویدادها از همه engineها"""
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_started_at', None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        if duration_ms < self.threshold_ms or threading.current_thread() is self._worker:
+            return
+
+        call = current_call()
+        self._enqueue({
+            'engine': conn.engine,
+            'statement': statement,
+            'raw_parameters': None if executemany else parameters,
+            'parameters': redact_parameters(parameters) if not executemany else None,
+            'duration_ms': round(duration_ms, 2),
+            'call_name': call.name if call else None,
+            'recorded_at': datetime.now()
+        })
+
+    # ---------- پردازش پس‌زمینه ----------
+
+    def _enqueue(self, item: Dict[str, Any]):
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._process(item)
+            except Exception as e:
+                logger.error(f"❌ خطا در ثبت کوئری کند: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """انتظار تا پردازش همه رکوردهای صف (برای تست و خاموش شدن)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _process(self, item: Dict[str, Any]):
+        sql_fingerprint = fingerprint(item['statement'])
+        fingerprint_hash = hashlib.md5(sql_fingerprint.encode('utf-8')).hexdigest()
+
+        plan = None
+        if self.explain_enabled and item['raw_parameters'] is not None and self._should_explain(fingerprint_hash):
+            plan = redact_plan(self._explain(item['engine'], item['statement'], item['raw_parameters']))
+
+        record = {
+            'recorded_at': item['recorded_at'].isoformat(),
+            'fingerprint_hash': fingerprint_hash,
+            'fingerprint': sql_fingerprint,
+            'parameters': item['parameters'],
+            'duration_ms': item['duration_ms'],
+            'call_name': item['call_name'],
+            'plan': plan
+        }
+
+        self._write_file(record)
+        if self.persist:
+            self._write_table(record, item['recorded_at'])
+        self.recorded += 1
+
+    def _should_explain(self, fingerprint_hash: str) -> bool:
+        """
+        گرفتن plan برای هر الگو حداکثر یک بار در هر بازه
+
+        فقط MAX_EXPLAINED_FINGERPRINTS الگوی اخیر نگه داشته می‌شوند؛
+        قدیمی‌ترین الگو پس از رسیدن به سقف کنار می‌رود.
+        """
+        now = time.monotonic()
+        last = self._last_explained.get(fingerprint_hash)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._last_explained[fingerprint_hash] = now
+        self._last_explained.move_to_end(fingerprint_hash)
+        while len(self._last_explained) > MAX_EXPLAINED_FINGERPRINTS:
+            self._last_explained.popitem(last=False)
+        return True
+
+    @staticmethod
+    def explain_prefix(dialect_name: str, statement: str) -> Optional[str]:
+        """
+        پیشوند EXPLAIN مناسب برای دستور
+
+        ANALYZE دستور را دوباره اجرا می‌کند، پس فقط برای SELECT و WITH
+        بدون INSERT/UPDATE/DELETE/MERGE (و بدون FOR UPDATE) استفاده می‌شود؛
+        سایر دستورات فقط plan تخمینی می‌گیرند.
+        """
+        is_read = statement.lstrip().upper().startswith(('SELECT', 'WITH')) and \
+            not _WRITE_KEYWORDS.search(statement)
+        if dialect_name == 'postgresql':
+            return 'EXPLAIN (ANALYZE, BUFFERS) ' if is_read else 'EXPLAIN '
+        if dialect_name == 'sqlite':
+            return 'EXPLAIN QUERY PLAN '
+        return None
+
+    def _explain(self, engine, statement: str, parameters: Any) -> Optional[str]:
+        prefix = self.explain_prefix(engine.dialect.name, statement)
+        if prefix is None:
+            return None
+
+        raw_connection = engine.raw_connection()
+        try:
+            cursor = raw_connection.cursor()
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+            # plan در تراکنش جداگانه گرفته شده و هیچ تغییری نباید باقی بماند
+            raw_connection.rollback()
+        except Exception as e:
+            logger.warning(f"⚠️ گرفتن plan کوئری کند ناموفق بود: {e}")
+            return None
+        finally:
+            raw_connection.close()
+
+        return '\n'.join(' | '.join(str(column) for column in row) for row in rows)
+
+    def _write_file(self, record: Dict[str, Any]):
+        if self._file_handler is None:
+            self._file_handler = RotatingFileHandler(
+                self.log_path,
+                maxBytes=config.database.slow_query_log_max_bytes,
+                backupCount=config.database.slow_query_log_backups,
+                encoding='utf-8'
+            )
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        self._file_handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO}))
+
+    def _write_table(self, record: Dict[str, Any], recorded_at: datetime):
+        try:
+            with db_session() as session:
+                session.add(SlowQuery(
+                    recorded_at=recorded_at,
+                    fingerprint_hash=record['fingerprint_hash'],
+                    fingerprint=record['fingerprint'],
+                    parameters=record['parameters'],
+                    duration_ms=record['duration_ms'],
+                    call_name=record['call_name'],
+                    plan=record['plan']
+                ))
+        except Exception as e:
+            logger.error(f"❌ خطا در ذخیره کوئری کند در دیتابیس: {e}")
+
+    # ---------- گزارش ----------
+
+    @replica_tolerant()
+    def top_offenders(self, limit: int = 10, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        پرهزینه‌ترین الگوهای کوئری بر اساس زمان کل
+
+        Args:
+            limit: تعداد الگوها
+            days: بازه زمانی بررسی (روز)
+
+        Returns:
+            list: الگوها به ترتیب زمان کل نزولی
+        """
+        since = datetime.now() - timedelta(days=days)
+        total = func.sum(SlowQuery.duration_ms)
+
+        with db_session() as session:
+            rows = session.query(
+                SlowQuery.fingerprint_hash,
+                func.max(SlowQuery.fingerprint).label('fingerprint'),
+                func.max(SlowQuery.call_name).label('call_name'),
+                func.count(SlowQuery.id).label('occurrences'),
+                total.label('total_ms'),
+                func.avg(SlowQuery.duration_ms).label('avg_ms'),
+                func.max(SlowQuery.duration_ms).label('max_ms'),
+                func.max(SlowQuery.recorded_at).label('last_seen')
+            ).filter(
+                SlowQuery.recorded_at >= since
+            ).group_by(
+                SlowQuery.fingerprint_hash
+            ).order_by(total.desc()).limit(limit).all()
+
+            return [
+                {
+                    'fingerprint_hash': row.fingerprint_hash,
+                    'fingerprint': row.fingerprint,
+                    'call_name': row.call_name,
+                    'occurrences': row.occurrences,
+                    'total_ms': round(float(row.total_ms), 2),
+                    'avg_ms': round(float(row.avg_ms), 2),
+                    'max_ms': round(float(row.max_ms), 2),
+                    'last_seen': row.last_seen
+                }
+                for row in rows
+            ]
+
+    @replica_tolerant()
+    def latest_plan(self, fingerprint_hash: str) -> Optional[str]:
+        """آخرین plan ثبت شده برای یک الگو"""
+        with db_session() as session:
+            return session.query(SlowQuery.plan).filter(
+                SlowQuery.fingerprint_hash == fingerprint_hash,
+                SlowQuery.plan.isnot(None)
+            ).order_by(SlowQuery.recorded_at.desc()).limit(1).scalar()
+
+    def get_status(self) -> Dict[str, Any]:
+        """وضعیت ثبت‌کننده"""
+        return {
+            'enabled': bool(self._engines),
+            'threshold_ms': self.threshold_ms,
+            'recorded': self.recorded,
+            'dropped': self.dropped,
+            'pending': self._queue.qsize()
+        }
+
+
+# ثبت‌کننده جهانی
+slow_query_recorder = SlowQueryRecorder()
@@ -0,0 +1,105 @@
+# app/core/startup.py
+"""
+ابزارهای راه‌اندازی سریع: اندازه‌گیری مراحل و اتصال همزمان به Redis و دیتابیس
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """ثبت زمان مراحل راه‌اندازی (import، connect، first_paint)"""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.durations: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        """ثبت زمان رسیدن به یک مرحله (میلی‌ثانیه از شروع فرایند)"""
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.marks[phase] = elapsed
+        return elapsed
+
+    def record_duration(self, phase: str, duration_ms: float):
+        """ثبت مدت اجرای یک مرحله مستقل"""
+        self.durations[phase] = duration_ms
+
+    def report(self) -> Dict[str, Any]:
+        """گزارش مراحل راه‌اندازی"""
+        return {
+            'marks_ms': dict(self.marks),
+            'durations_ms': dict(self.durations)
+        }
+
+    def log_report(self):
+        """ثبت گزارش در لاگ"""
+        for phase, elapsed in self.marks.items():
+            logger.info(f"⏱️ {phase}: {elapsed:.0f}ms از شروع")
+        for phase, duration in self.durations.items():
+            logger.info(f"⏱️ مدت {phase}: {duration:.0f}ms")
+
+
+class BackendWarmup:
+    """
+    اجرای همزمان مراحل اتصال در تردهای پس‌زمینه
+
+    هر مرحله یک تابع بدون آرگومان است که True/False برمی‌گرداند؛ پنجره
+    اصلی بدون انتظار برای نتیجه نمایش داده می‌شود و وضعیت با poll بررسی می‌شود.
+    """
+
+    def __init__(self, steps: Dict[str, Callable[[], bool]]):
+        self.steps = steps
+        self.futures: Dict[str, Future] = {}
+        self.durations: Dict[str, float] = {}
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def start(self):
+        """شروع همه مراحل به صورت همزمان"""
+        self.started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=len(self.steps), thread_name_prefix='startup')
+        for name, step in self.steps.items():
+            self.futures[name] = executor.submit(self._timed, name, step)
+        executor.shutdown(wait=False)
+
+    def _timed(self, name: str, step: Callable[[], bool]) -> bool:
+        step_started = time.perf_counter()
+        try:
+            return bool(step())
+        except Exception as e:
+            logger.error(f"❌ خطا در مرحله راه‌اندازی {name}: {e}")
+            return False
+        finally:
+            self.durations[name] = (time.perf_counter() - step_started) * 1000
+
+    def is_done(self) -> bool:
+        """آیا همه مراحل تمام شده‌اند"""
+        done = bool(self.futures) and all(future.done() for future in self.futures.values())
+        if done and self.finished is None:
+            self.finished = time.perf_counter()
+        return done
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """انتظار برای پایان همه مراحل"""
+        results = {name: future.result(timeout=timeout) for name, future in self.futures.items()}
+        self.is_done()
+        return results
+
+    def results(self) -> Dict[str, bool]:
+        """نتیجه مراحل تمام شده"""
+        return {
+            name: future.result()
+            for name, future in self.futures.items() if future.done()
+        }
+
+    @property
+    def elapsed_ms(self) -> Optional[float]:
+        """مدت کل اتصال (حداکثر مدت مراحل همزمان)"""
+        if self.started is None or self.finished is None:
+            return None
+        return (self.finished - self.started) * 1000
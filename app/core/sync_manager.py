@@ -10,15 +10,14 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from config import config, sync_config, channel_config
-from app.core.database import get_redis
+from app.core.service_registry import service_registry, LazyService, LazyRedisMixin
 
 logger = logging.getLogger(__name__)
 
-class SyncManager:
+class SyncManager(LazyRedisMixin):
     """مدیریت پیشرفته همگام‌سازی با سیستم رزرواسیون"""
 
     def __init__(self):
-        self.redis = get_redis()
         self.is_running = False
         self.sync_thread = None
         self.event_thread = None
@@ -53,6 +52,14 @@ class SyncManager:
             self.event_thread.join(timeout=5)
         logger.info("⏹️ سرویس همگام‌سازی متوقف شد")
 
+    def start(self):
+        """شروع سرویس (هوک چرخه حیات)"""
+        self.start_sync()
+
+    def stop(self):
+        """توقف سرویس (هوک چرخه حیات)"""
+        self.stop_sync()
+
     def _sync_worker(self):
         """کارگر همگام‌سازی دوره‌ای"""
         while self.is_running:
@@ -292,5 +299,6 @@ class SyncManager:
             ]
         }
 
-# ایجاد instance جهانی
-sync_manager = SyncManager()
+# ثبت سرویس؛ instance در اولین استفاده ساخته می‌شود
+service_registry.register('sync_manager', SyncManager)
+sync_manager = LazyService('sync_manager')
@@ -0,0 +1,209 @@
+# app/core/transactions.py
+"""
+اجرای واحد کاری دیتابیس با تلاش مجدد روی خطاهای گذرا
+
+کل واحد کاری (نه فقط commit) در یک تراکنش تازه دوباره اجرا می‌شود، بنابراین
+تابع کاری نباید اثر جانبی خارج از دیتابیس داشته باشد (مثلاً ارسال پیامک یا
+تراکنش کارت‌خوان)؛ این کارها باید پس از موفقیت تراکنش انجام شوند.
+"""
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.unit_of_work import current_unit_of_work, unit_of_work
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# کدهای SQLSTATE گذرا در PostgreSQL
+TRANSIENT_SQLSTATES = {
+    '40001',  # serialization_failure
+    '40P01',  # deadlock_detected
+    '08000', '08001', '08003', '08004', '08006',  # connection exceptions
+    '57P01', '57P02', '57P03',  # admin/crash shutdown, cannot connect now
+    '55P03',  # lock_not_available
+}
+
+# پیام‌های خطای گذرا برای درایورهایی که SQLSTATE ندارند
+TRANSIENT_MESSAGES = (
+    'database is locked',
+    'server closed the connection unexpectedly',
+    'connection reset',
+    'could not serialize access',
+    'deadlock detected',
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    آیا خطا گذرا است و تکرار کل تراکنش احتمالاً موفق می‌شود
+
+    Args:
+        error: خطای دریافتی
+
+    Returns:
+        bool: True برای قطع اتصال، serialization failure و deadlock
+    """
+    if not isinstance(error, DBAPIError):
+        return False
+
+    if error.connection_invalidated:
+        return True
+
+    original = error.orig
+    sqlstate = getattr(original, 'pgcode', None) or getattr(original, 'sqlstate', None)
+    if sqlstate in TRANSIENT_SQLSTATES:
+        return True
+
+    message = str(original or error).lower()
+    return isinstance(error, OperationalError) and any(text in message for text in TRANSIENT_MESSAGES)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """سیاست تلاش مجدد با backoff نمایی و jitter کامل"""
+    max_attempts: int = 4
+    base_delay: float = 0.05
+    max_delay: float = 2.0
+
+    def delay_for(self, attempt: int) -> float:
+        """زمان انتظار قبل از تلاش بعدی (attempt از 1 شروع می‌شود)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class RetryStats:
+    """آمار thread-safe اجرای تراکنش‌ها و تلاش‌های مجدد"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """صفر کردن آمار"""
+        with self._lock:
+            self.runs = 0
+            self.retries = 0
+            self.exhausted = 0
+            self.by_name: Dict[str, Dict[str, int]] = {}
+
+    def _entry(self, name: str) -> Dict[str, int]:
+        return self.by_name.setdefault(name, {'runs': 0, 'retries': 0, 'exhausted': 0})
+
+    def record_run(self, name: str):
+        with self._lock:
+            self.runs += 1
+            self._entry(name)['runs'] += 1
+
+    def record_retry(self, name: str):
+        with self._lock:
+            self.retries += 1
+            self._entry(name)['retries'] += 1
+
+    def record_exhausted(self, name: str):
+        with self._lock:
+            self.exhausted += 1
+            self._entry(name)['exhausted'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """کپی آمار"""
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'retries': self.retries,
+                'exhausted': self.exhausted,
+                'by_name': {name: dict(entry) for name, entry in self.by_name.items()}
+            }
+
+
+# آمار جهانی
+retry_stats = RetryStats()
+
+
+def run_in_transaction(work: Callable[[Session], T],
+                       name: Optional[str] = None,
+                       policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+                       sleep: Callable[[float], None] = time.sleep) -> T:
+    """
+    اجرای واحد کاری در تراکنش با تلاش مجدد روی خطاهای گذرا
+
+    در هر تلاش یک unit_of_work تازه باز می‌شود و کل تابع work دوباره
+    اجرا می‌شود؛ سرویس‌هایی که work صدا می‌زند به همین تراکنش می‌پیوندند.
+    خطاهای غیرگذرا یا پایان تلاش‌ها دوباره raise می‌شوند. اگر واحد کاری
+    بیرونی فعال باشد work به آن می‌پیوندد و تلاش مجدد با مالک آن است.
+
+    Args:
+        work: تابعی که session را می‌گیرد و نتیجه را برمی‌گرداند
+        name: نام واحد کاری برای آمار
+        policy: سیاست تلاش مجدد
+        sleep: تابع انتظار (قابل جایگزینی در تست)
+
+    Returns:
+        نتیجه تابع work
+    """
+    from app.core.database import db_session
+
+    if current_unit_of_work() is not None:
+        with db_session() as session:
+            return work(session)
+
+    name = name or getattr(work, '__qualname__', 'transaction')
+    retry_stats.record_run(name)
+
+    for attempt in range(1, policy.max_attempts + 1):
+        try:
+            with unit_of_work() as unit:
+                return work(unit.session)
+
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+
+            if attempt >= policy.max_attempts:
+                retry_stats.record_exhausted(name)
+                logger.error(f"❌ تراکنش {name} پس از {attempt} تلاش ناموفق بود: {e}")
+                raise
+
+            delay = policy.delay_for(attempt)
+            retry_stats.record_retry(name)
+            logger.warning(
+                f"🔄 خطای گذرا در تراکنش {name} (تلاش {attempt}/{policy.max_attempts})، "
+                f"تلاش مجدد پس از {delay * 1000:.0f}ms: {e}"
+            )
+            sleep(delay)
+
+
+def transactional(name: Optional[str] = None, policy: RetryPolicy = DEFAULT_RETRY_POLICY):
+    """
+    دکوریتور برای توابعی که session را به عنوان اولین آرگومان می‌گیرند
+
+    مثال:
+        @transactional('room_status_update')
+        def _update(session, room_id, status): ...
+
+        _update(room_id=1, status='vacant')
+    """
+    def decorator(func):
+        unit_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return run_in_transaction(
+                lambda session: func(session, *args, **kwargs),
+                name=unit_name,
+                policy=policy
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,164 @@
+# app/core/unit_of_work.py
+"""
+واحد کاری (Unit of Work) در محدوده یک درخواست
+
+یک عملیات تجاری مانند ثبت خروج چند سرویس را صدا می‌زند که هر کدام
+db_session خود را باز می‌کنند. با unit_of_work بیرونی‌ترین فراخواننده
+مالک تراکنش است و db_session سرویس‌های تو در تو همان session را به
+اشتراک می‌گیرد؛ commit فقط یک بار در پایان واحد کاری انجام می‌شود.
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.query_stats import track_queries, caller_name
+
+logger = logging.getLogger(__name__)
+
+# واحد کاری فعال در context جاری (ترد یا task)
+_current_unit: ContextVar[Optional['UnitOfWork']] = ContextVar('unit_of_work', default=None)
+
+
+class UnitOfWork:
+    """تراکنش مشترک یک عملیات تجاری"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.rollback_only = False
+        self.failure: Optional[BaseException] = None
+        self.joined_calls = 0
+        self._after_commit: List[Callable[[], None]] = []
+
+    def set_rollback_only(self, error: BaseException = None):
+        """علامت‌گذاری واحد کاری برای rollback در پایان"""
+        self.rollback_only = True
+        if error is not None and self.failure is None:
+            self.failure = error
+
+    def on_commit(self, callback: Callable[[], None]):
+        """
+        ثبت کاری که فقط پس از commit موفق اجرا شود
+
+        برای اثرات جانبی خارج از دیتابیس (پیامک، ایمیل، انتشار Redis)
+        تا در صورت rollback ارسال نشوند.
+        """
+        self._after_commit.append(callback)
+
+    def run_after_commit(self):
+        """اجرای callbackهای پس از commit؛ خطای هر callback فقط ثبت می‌شود"""
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ خطا در اجرای کار پس از commit: {e}")
+
+    def discard_after_commit(self):
+        self._after_commit = []
+
+
+class JoinedSession:
+    """
+    session مشترک برای سرویس‌هایی که به واحد کاری بیرونی می‌پیوندند
+
+    commit به flush تبدیل می‌شود تا شناسه‌ها ساخته شوند و close کاری
+    انجام نمی‌دهد؛ commit و close واقعی با مالک واحد کاری است.
+    """
+
+    __slots__ = ('_unit',)
+
+    def __init__(self, unit: UnitOfWork):
+        object.__setattr__(self, '_unit', unit)
+
+    def commit(self):
+        self._unit.session.flush()
+
+    def rollback(self):
+        self._unit.set_rollback_only()
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._unit.session, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._unit.session, name, value)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """واحد کاری فعال یا None"""
+    return _current_unit.get()
+
+
+@contextmanager
+def join_unit_of_work(unit: UnitOfWork):
+    """
+    پیوستن db_session یک سرویس به واحد کاری فعال
+
+    خطای سرویس تو در تو کل واحد کاری را rollback-only می‌کند چون
+    session پس از flush ناموفق قابل استفاده نیست.
+    """
+    unit.joined_calls += 1
+    try:
+        yield JoinedSession(unit)
+    except Exception as e:
+        unit.set_rollback_only(e)
+        raise
+
+
+@contextmanager
+def unit_of_work():
+    """
+    شروع یا پیوستن به واحد کاری
+
+    اگر واحد کاری فعالی وجود داشته باشد همان برگردانده می‌شود؛ در غیر
+    این صورت session جدید باز می‌شود و در پایان یک بار commit می‌شود.
+    اگر مرحله‌ای واحد کاری را rollback-only کرده باشد همه تغییرات
+    rollback می‌شوند و خطای ثبت شده (در صورت وجود) دوباره raise می‌شود.
+
+    مثال:
+        with unit_of_work() as uow:
+            GuestService.check_out_guest(stay_id)
+            HousekeepingService.create_cleaning_task(room_id, 'checkout_cleaning')
+    """
+    active = _current_unit.get()
+    if active is not None:
+        yield active
+        return
+
+    from app.core import database
+
+    if database.SessionLocal is None:
+        if not database.init_db():
+            raise Exception("اتصال به دیتابیس در دسترس نیست")
+
+    unit = UnitOfWork(database.SessionLocal())
+    token = _current_unit.set(unit)
+    committed = False
+    try:
+        # دستورات flush هنگام commit هم به نام مالک واحد کاری شمرده می‌شوند
+        with track_queries(caller_name(depth=3)):
+            yield unit
+            if unit.rollback_only:
+                unit.session.rollback()
+                if unit.failure is not None:
+                    raise unit.failure
+            else:
+                unit.session.commit()
+                committed = True
+    except Exception as e:
+        unit.session.rollback()
+        logger.error(f"❌ خطا در واحد کاری: {e}")
+        raise
+    finally:
+        _current_unit.reset(token)
+        unit.session.close()
+        if committed:
+            unit.run_after_commit()
+        else:
+            unit.discard_after_commit()
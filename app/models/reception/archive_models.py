@@ -0,0 +1,79 @@
+# app/models/reception/archive_models.py
+"""
+جداول بایگانی سوابق قدیمی اقامت‌ها، تخصیص اتاق‌ها و صورت‌حساب‌ها
+
+هر جدول بایگانی همان ستون‌های جدول اصلی را (بدون کلید خارجی و قید
+یکتایی) به اضافه archived_at دارد. HistoryArchiver سوابق بسته شده قدیمی
+را به این جداول منتقل می‌کند و جداول اصلی کوچک می‌مانند.
+
+برای گزارش‌ها و سابقه مهمان، unified(model) اجتماع (UNION ALL) جدول اصلی و
+بایگانی آن را با همان ستون‌ها برمی‌گرداند؛ مهاجرت history_archive همین
+اجتماع را به صورت view با نام <جدول>_all در دیتابیس ایجاد می‌کند.
+"""
+
+from typing import Dict
+
+from sqlalchemy import Column, DateTime, Index, Table, select, union_all
+from sqlalchemy.orm import aliased
+
+from app.core.database import Base
+from .guest_models import Stay, CompanionStay
+from .room_status_models import RoomAssignment, RoomStatusChange
+from .payment_models import Payment, GuestFolio, FolioTransaction
+
+# ستون‌های ارتباطی و زمانی که در جداول بایگانی ایندکس می‌شوند
+ARCHIVE_INDEXED_COLUMNS = ('guest_id', 'stay_id', 'folio_id', 'room_assignment_id', 'room_id', 'created_at')
+
+
+def _archive_table(model) -> Table:
+    """جدول بایگانی هم‌ستون با جدول مدل"""
+    source = model.__table__
+    name = f"archive_{source.name}"
+    table = Table(
+        name, Base.metadata,
+        *[
+            Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False)
+            for column in source.columns
+        ],
+        Column('archived_at', DateTime, nullable=False)
+    )
+    for column in ARCHIVE_INDEXED_COLUMNS:
+        if column in table.c:
+            Index(f"ix_{name}_{column}", table.c[column])
+    return table
+
+
+ARCHIVE_TABLES: Dict[type, Table] = {
+    model: _archive_table(model)
+    for model in (Stay, CompanionStay, RoomAssignment, RoomStatusChange, Payment, GuestFolio, FolioTransaction)
+}
+
+
+def history_view_name(model) -> str:
+    """نام view یکپارچه جدول اصلی و بایگانی"""
+    return f"{model.__tablename__}_all"
+
+
+def history_union(model):
+    """SELECT ... UNION ALL SELECT ... روی جدول اصلی و بایگانی با ستون‌های جدول اصلی"""
+    source, archive = model.__table__, ARCHIVE_TABLES[model]
+    return union_all(
+        select(*source.columns),
+        select(*[archive.c[column.name] for column in source.columns])
+    )
+
+
+def unified(model):
+    """subquery اجتماع جدول اصلی و بایگانی"""
+    return history_union(model).subquery(history_view_name(model))
+
+
+def unified_entity(model):
+    """
+    موجودیت ORM روی اجتماع جدول اصلی و بایگانی
+
+    ستون‌ها همان نام‌های مدل را دارند و queryهای موجود با جایگزینی مدل
+    با این موجودیت بدون تغییر کار می‌کنند. شرط‌ها (مثلاً guest_id یا بازه
+    created_at) به هر دو شاخه اجتماع می‌رسند و از ایندکس‌ها استفاده می‌کنند.
+    """
+    return aliased(model, unified(model), adapt_on_names=True)
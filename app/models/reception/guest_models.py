@@ -1,8 +1,10 @@
 # app/models/reception/guest_models.py
-from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Time
+from sqlalchemy import (Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Time,
+                        Float, Index, UniqueConstraint, event, func)
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from app.core.database import Base
+from app.utils.text_normalizer import name_key, identifier_key, phone_key
 
 class Guest(Base):
     """مدل اطلاعات کامل مهمان"""
@@ -43,6 +45,14 @@ class Guest(Base):
     vip_status = Column(Boolean, default=False)
     blacklist_reason = Column(Text)  # در صورت وجود در لیست سیاه
 
+    # کلیدهای یکسان‌سازی شده جستجو (با search_keys در درج و ویرایش پر می‌شوند)
+    first_name_key = Column(String(100), index=True)
+    last_name_key = Column(String(100), index=True)
+    full_name_key = Column(String(200), index=True)
+    national_id_key = Column(String(20), index=True)
+    phone_key = Column(String(20), index=True)
+    passport_key = Column(String(20), index=True)
+
     # اطلاعات سیستم
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -51,6 +61,45 @@ class Guest(Base):
     stays = relationship("Stay", back_populates="guest")
     companions = relationship("Companion", back_populates="guest")
 
+    # ستون‌های منبع کلیدهای جستجو
+    SEARCH_KEY_SOURCES = ('first_name', 'last_name', 'national_id', 'phone', 'passport_number')
+
+    @staticmethod
+    def search_keys(first_name, last_name, national_id, phone, passport_number) -> dict:
+        """کلیدهای جستجوی یکسان‌سازی شده (کلید خالی None ذخیره می‌شود)"""
+        first = name_key(first_name)
+        last = name_key(last_name)
+        return {
+            'first_name_key': first or None,
+            'last_name_key': last or None,
+            'full_name_key': first + last,
+            'national_id_key': identifier_key(national_id) or None,
+            'phone_key': phone_key(phone) or None,
+            'passport_key': identifier_key(passport_number) or None
+        }
+
+    def refresh_search_keys(self):
+        """به‌روزرسانی کلیدهای جستجو از ستون‌های منبع"""
+        keys = Guest.search_keys(*(getattr(self, name) for name in Guest.SEARCH_KEY_SOURCES))
+        for name, value in keys.items():
+            setattr(self, name, value)
+
+
+@event.listens_for(Guest, 'before_insert')
+@event.listens_for(Guest, 'before_update')
+def _refresh_guest_search_keys(mapper, connection, target):
+    target.refresh_search_keys()
+
+
+# ایندکس‌های ترتیب‌های صفحه‌بندی keyset لیست مهمانان
+Index('ix_reception_guests_last_name_id', Guest.last_name, Guest.id)
+Index('ix_reception_guests_first_name_id', Guest.first_name, Guest.id)
+Index('ix_reception_guests_phone_id', Guest.phone, Guest.id)
+Index('ix_reception_guests_national_id_page', func.coalesce(Guest.national_id, ''), Guest.id)
+
+# بلوک نام و تاریخ تولد در تشخیص مهمانان تکراری
+Index('ix_reception_guests_name_birth_block', Guest.full_name_key, Guest.date_of_birth)
+
 class Companion(Base):
     """مدل همراهان مهمان"""
     __tablename__ = 'reception_companions'
@@ -114,14 +163,40 @@ class Stay(Base):
     payments = relationship("Payment", back_populates="stay")
     companions = relationship("CompanionStay", back_populates="stay")
 
+# ترتیب صفحه‌بندی لیست اقامت‌ها
+Index('ix_reception_stays_planned_check_in_id', Stay.planned_check_in, Stay.id)
+
 class CompanionStay(Base):
     """مدل ارتباط همراهان با اقامت"""
     __tablename__ = 'reception_companion_stays'
 
     id = Column(Integer, primary_key=True)
     companion_id = Column(Integer, ForeignKey('reception_companions.id'), nullable=False)
-    stay_id = Column(Integer, ForeignKey('reception_stays.id'), nullable=False)
+    stay_id = Column(Integer, ForeignKey('reception_stays.id'), nullable=False, index=True)
 
     # روابط
     companion = relationship("Companion", back_populates="stay_assignments")
     stay = relationship("Stay", back_populates="companions")
+
+class GuestDuplicateCandidate(Base):
+    """جفت مهمانان احتمالاً تکراری (خروجی GuestDuplicateDetector)"""
+    __tablename__ = 'reception_guest_duplicates'
+    __table_args__ = (
+        UniqueConstraint('guest_id', 'duplicate_id', name='uq_reception_guest_duplicates_pair'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # بدون کلید خارجی تا سابقه ادغام پس از حذف مهمان تکراری بماند
+    guest_id = Column(Integer, nullable=False, index=True)  # رکورد قدیمی‌تر (پیشنهاد نگهداری)
+    duplicate_id = Column(Integer, nullable=False, index=True)
+
+    score = Column(Float, nullable=False)
+    reasons = Column(String(100))  # بلوک‌های مشترک: name_birth, phone, passport
+    status = Column(String(20), default='pending', index=True)  # pending, merged, dismissed
+
+    detected_at = Column(DateTime, default=datetime.now)
+    resolved_at = Column(DateTime)
+
+# صف بررسی: امتیاز نزولی (ترتیب GuestService.DUPLICATE_KEYSET)
+Index('ix_reception_guest_duplicates_review', GuestDuplicateCandidate.status,
+      GuestDuplicateCandidate.score.desc(), GuestDuplicateCandidate.id.desc())
@@ -1,5 +1,5 @@
 # app/models/reception/housekeeping_models.py
-from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -40,6 +40,10 @@ class HousekeepingTask(Base):
     staff = relationship("Staff")
     checklist_items = relationship("HousekeepingChecklist", back_populates="task")
 
+# ترتیب صفحه‌بندی لیست وظایف (اولویت نزولی، زمان صعودی)
+Index('ix_reception_housekeeping_tasks_page', func.coalesce(HousekeepingTask.priority, '').desc(),
+      HousekeepingTask.scheduled_time, HousekeepingTask.id)
+
 class HousekeepingChecklist(Base):
     """مدل چک‌لیست نظافت اتاق"""
     __tablename__ = 'reception_housekeeping_checklists'
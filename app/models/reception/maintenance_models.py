@@ -1,5 +1,5 @@
 # app/models/reception/maintenance_models.py
-from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -43,6 +43,10 @@ class MaintenanceRequest(Base):
     technician = relationship("Staff", foreign_keys=[assigned_to])
     work_orders = relationship("MaintenanceWorkOrder", back_populates="request")
 
+# ترتیب صفحه‌بندی لیست درخواست‌ها (اولویت نزولی، قدیمی‌تر اول)
+Index('ix_reception_maintenance_requests_page', func.coalesce(MaintenanceRequest.priority, '').desc(),
+      MaintenanceRequest.created_at, MaintenanceRequest.id)
+
 class MaintenanceWorkOrder(Base):
     """مدل دستورکار تعمیرات"""
     __tablename__ = 'reception_maintenance_work_orders'
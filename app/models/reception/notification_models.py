@@ -1,5 +1,5 @@
 # app/models/reception/notification_models.py
-from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -41,6 +41,10 @@ class Notification(Base):
     # روابط
     sync_records = relationship("SyncRecord", back_populates="notification")
 
+# صندوق اطلاع‌رسانی کاربر به ترتیب صفحه‌بندی
+Index('ix_reception_notifications_inbox', Notification.to_user_id, Notification.status,
+      Notification.created_at, Notification.id)
+
 class SyncRecord(Base):
     """مدل رکوردهای همگام‌سازی با سیستم رزرواسیون"""
     __tablename__ = 'reception_sync_records'
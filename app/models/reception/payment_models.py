@@ -1,5 +1,5 @@
 # app/models/reception/payment_models.py
-from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -36,12 +36,16 @@ class Payment(Base):
     # روابط
     stay = relationship("Stay", back_populates="payments")
 
+# ترتیب صفحه‌بندی لیست پرداخت‌ها (کل و به تفکیک اقامت)
+Index('ix_reception_payments_created_at_id', Payment.created_at, Payment.id)
+Index('ix_reception_payments_stay_created_at_id', Payment.stay_id, Payment.created_at, Payment.id)
+
 class GuestFolio(Base):
     """مدل صورت�حساب مهمان"""
     __tablename__ = 'reception_guest_folios'
 
     id = Column(Integer, primary_key=True)
-    stay_id = Column(Integer, ForeignKey('reception_stays.id'), nullable=False)
+    stay_id = Column(Integer, ForeignKey('reception_stays.id'), nullable=False, index=True)
 
     # مانده حساب
     opening_balance = Column(DECIMAL(15, 0), default=0)
@@ -62,7 +66,7 @@ class FolioTransaction(Base):
     __tablename__ = 'reception_folio_transactions'
 
     id = Column(Integer, primary_key=True)
-    folio_id = Column(Integer, ForeignKey('reception_guest_folios.id'), nullable=False)
+    folio_id = Column(Integer, ForeignKey('reception_guest_folios.id'), nullable=False, index=True)
 
     # اطلاعات تراکنش
     transaction_type = Column(String(20), nullable=False)  # charge, payment, adjustment
@@ -1,5 +1,5 @@
 # app/models/reception/room_status_models.py
-from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, DECIMAL, DateTime, Date, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -9,7 +9,7 @@ class RoomAssignment(Base):
     __tablename__ = 'reception_room_assignments'
 
     id = Column(Integer, primary_key=True)
-    stay_id = Column(Integer, ForeignKey('reception_stays.id'), nullable=False)
+    stay_id = Column(Integer, ForeignKey('reception_stays.id'), nullable=False, index=True)
     room_id = Column(Integer, ForeignKey('hotel_rooms.id'), nullable=False)  # از سیستم مشترک
 
     # تاریخ‌های تخصیص
@@ -34,7 +34,7 @@ class RoomStatusChange(Base):
 
     id = Column(Integer, primary_key=True)
     room_id = Column(Integer, ForeignKey('hotel_rooms.id'), nullable=False)
-    room_assignment_id = Column(Integer, ForeignKey('reception_room_assignments.id'))
+    room_assignment_id = Column(Integer, ForeignKey('reception_room_assignments.id'), index=True)
 
     # وضعیت‌ها
     previous_status = Column(String(20))
@@ -55,6 +55,12 @@ class RoomStatusChange(Base):
     room = relationship("HotelRoom")
     room_assignment = relationship("RoomAssignment", back_populates="status_changes")
 
+    # آخرین وضعیت هر اتاق؛ روی جدول پارتیشن‌بندی شده (partitioning) از
+    # ایندکس هر پارتیشن فقط یک سطر خوانده می‌شود
+    __table_args__ = (
+        Index('ix_reception_room_status_changes_room_created', 'room_id', 'created_at'),
+    )
+
 class RoomStatusSnapshot(Base):
     """اسنپ‌شوت وضعیت اتاق‌ها برای گزارش‌گیری"""
     __tablename__ = 'reception_room_status_snapshots'
@@ -0,0 +1,202 @@
+# app/services/reception/guest_duplicates.py
+"""
+تشخیص مهمانان تکراری با کلیدهای بلوک‌بندی
+
+مقایسه همه جفت‌های یک میلیون مهمان (5×10¹¹ جفت) ممکن نیست. مهمانان
+بر اساس کلیدهای جستجوی یکسان‌سازی شده (name_key، identifier_key و
+phone_key در app.utils.text_normalizer) در بلوک‌ها گروه می‌شوند و فقط
+جفت‌های درون یک بلوک امتیاز می‌گیرند:
+
+    name_birth: نام کامل یکسان‌سازی شده + تاریخ تولد
+    phone:      تلفن یکسان‌سازی شده
+    passport:   شماره پاسپورت یکسان‌سازی شده
+
+بلوک‌های بیش از یک عضو با GROUP BY روی ایندکس همان کلید در دیتابیس پیدا
+می‌شوند و اعضای آن‌ها به ترتیب کلید stream می‌شوند؛ هیچ بلوکی کامل در
+حافظه نگه داشته نمی‌شود. بلوک‌های بسیار بزرگ (مثلاً تلفن هتل یا آژانس که
+برای همه مهمانان ثبت شده) مقایسه نمی‌شوند و در آمار گزارش می‌شوند.
+
+مهمانانی که کلید جستجو ندارند (پیش از اتمام GuestKeyBackfill) در هیچ
+بلوکی قرار نمی‌گیرند.
+"""
+
+import logging
+import time
+from datetime import datetime
+from difflib import SequenceMatcher
+from itertools import combinations, groupby
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.reception.guest_models import Guest, GuestDuplicateCandidate
+from app.services.reception.guest_search import similarity, trigrams
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# کلیدهای بلوک‌بندی: نام بلوک -> ستون‌ها
+BLOCKING_KEYS: Dict[str, Tuple[str, ...]] = {
+    'name_birth': ('full_name_key', 'date_of_birth'),
+    'phone': ('phone_key',),
+    'passport': ('passport_key',),
+}
+
+# ستون‌های مقایسه هر مهمان
+PROFILE_COLUMNS = ('id', 'first_name_key', 'last_name_key', 'date_of_birth',
+                   'phone_key', 'passport_key', 'national_id_key')
+
+# وزن شباهت نام و شواهد دیگر؛ شاهدی که یکی از دو طرف ندارد در امتیاز نیست
+NAME_WEIGHT = 0.5
+EVIDENCE_WEIGHTS = {
+    'date_of_birth': 0.2,
+    'national_id_key': 0.25,
+    'passport_key': 0.25,
+    'phone_key': 0.15,  # تلفن ممکن است بین اعضای خانواده مشترک باشد
+}
+
+# کدملی با شباهت کمتر از این مقدار خطای تایپی نیست (شخص دیگری است)؛
+# یک رقم اشتباه یا جابه‌جایی دو رقم در کدملی ده رقمی 0.9 است
+NATIONAL_ID_TYPO_RATIO = 0.9
+
+
+def match_score(left, right) -> float:
+    """
+    امتیاز تطابق دو مهمان بین 0 و 1
+
+    شباهت سه‌حرفی نام کامل (مانند جستجو) با تطابق تاریخ تولد، تلفن،
+    پاسپورت و کدملی میانگین وزنی می‌شود. کدملی با یک رقم اختلاف یا دو
+    رقم جابه‌جا (خطای تایپ) تقریباً تطابق حساب می‌شود.
+    """
+    name = similarity(
+        trigrams(f"{left.first_name_key or ''} {left.last_name_key or ''}"),
+        trigrams(f"{right.first_name_key or ''} {right.last_name_key or ''}")
+    )
+    total, weight = NAME_WEIGHT * name, NAME_WEIGHT
+
+    for column, column_weight in EVIDENCE_WEIGHTS.items():
+        left_value, right_value = getattr(left, column), getattr(right, column)
+        if left_value is None or right_value is None:
+            continue
+        if column == 'national_id_key':
+            ratio = SequenceMatcher(None, left_value, right_value).ratio()
+            value = ratio if ratio >= NATIONAL_ID_TYPO_RATIO else 0.0
+        else:
+            value = 1.0 if left_value == right_value else 0.0
+        total += column_weight * value
+        weight += column_weight
+
+    return total / weight
+
+
+class GuestDuplicateDetector:
+    """یک دور کامل تشخیص مهمانان تکراری"""
+
+    def __init__(self, threshold: float = None, max_block: int = None, batch_size: int = None):
+        self.threshold = threshold or config.database.guest_duplicate_threshold
+        self.max_block = max_block or config.database.guest_duplicate_max_block
+        self.batch_size = batch_size or config.database.guest_key_backfill_batch_size
+
+        self.blocks = 0
+        self.skipped_blocks = 0
+        self.comparisons = 0
+        self.candidates: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+    def _blocks(self, session: Session, columns: Tuple[str, ...]) -> Iterator[List[Any]]:
+        """اعضای بلوک‌های بیش از یک عضو یک کلید، بلوک به بلوک"""
+        table = Guest.__table__
+        keys = [table.c[name] for name in columns]
+
+        shared = (
+            select(*keys)
+            .where(*[key.isnot(None) for key in keys])
+            .group_by(*keys)
+            .having(func.count() > 1)
+            .subquery()
+        )
+        selected = PROFILE_COLUMNS + tuple(name for name in columns if name not in PROFILE_COLUMNS)
+        rows = session.execute(
+            select(*[table.c[name] for name in selected])
+            .join(shared, and_(*[key == shared.c[key.name] for key in keys]))
+            .order_by(*keys, table.c.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        for _, members in groupby(rows, key=lambda row: tuple(getattr(row, name) for name in columns)):
+            yield list(members)
+
+    def detect(self, session: Session) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        """
+        امتیازدهی جفت‌های درون بلوک‌ها
+
+        Returns:
+            {(guest_id, duplicate_id): {'score', 'reasons'}} برای جفت‌های بالای آستانه؛
+            guest_id رکورد قدیمی‌تر (id کوچک‌تر) است
+        """
+        scored: Dict[Tuple[int, int], float] = {}
+
+        for block_name, columns in BLOCKING_KEYS.items():
+            for members in self._blocks(session, columns):
+                if len(members) > self.max_block:
+                    self.skipped_blocks += 1
+                    continue
+                self.blocks += 1
+
+                # اعضا به ترتیب id هستند؛ جفت (قدیمی، جدید)
+                for left, right in combinations(members, 2):
+                    pair = (left.id, right.id)
+                    score = scored.get(pair)
+                    if score is None:
+                        score = scored[pair] = match_score(left, right)
+                        self.comparisons += 1
+                    if score >= self.threshold:
+                        candidate = self.candidates.setdefault(pair, {'score': score, 'reasons': []})
+                        candidate['reasons'].append(block_name)
+
+        return self.candidates
+
+    def save(self, session: Session) -> int:
+        """
+        جایگزینی جفت‌های در انتظار بررسی با نتیجه این دور
+
+        جفت‌هایی که قبلاً رد (dismissed) یا ادغام شده‌اند دوباره ثبت نمی‌شوند.
+        """
+        candidates = GuestDuplicateCandidate.__table__
+        resolved: Set[Tuple[int, int]] = set(session.execute(
+            select(candidates.c.guest_id, candidates.c.duplicate_id).where(candidates.c.status != 'pending')
+        ).all())
+
+        session.execute(delete(candidates).where(candidates.c.status == 'pending'))
+        detected_at = datetime.now()
+        rows = [
+            {
+                'guest_id': guest_id,
+                'duplicate_id': duplicate_id,
+                'score': round(candidate['score'], 4),
+                'reasons': ','.join(candidate['reasons']),
+                'status': 'pending',
+                'detected_at': detected_at
+            }
+            for (guest_id, duplicate_id), candidate in self.candidates.items()
+            if (guest_id, duplicate_id) not in resolved
+        ]
+        if rows:
+            session.execute(insert(candidates), rows)
+        return len(rows)
+
+    def run(self, session: Session) -> Dict[str, Any]:
+        """تشخیص و ذخیره (commit با فراخواننده)"""
+        started = time.perf_counter()
+        self.detect(session)
+        saved = self.save(session)
+        elapsed = time.perf_counter() - started
+
+        logger.info(f"🔍 تشخیص مهمانان تکراری: {saved} جفت از {self.blocks} بلوک "
+                    f"({self.comparisons} مقایسه، {elapsed:.1f}s)")
+        return {
+            'candidates': saved,
+            'blocks': self.blocks,
+            'skipped_blocks': self.skipped_blocks,
+            'comparisons': self.comparisons,
+            'elapsed_seconds': round(elapsed, 2)
+        }
@@ -0,0 +1,593 @@
+# app/services/reception/guest_search.py
+"""
+جستجوی مهمانان با ایندکس سه‌حرفی (trigram)
+
+جستجو روی ستون‌های کلید یکسان‌سازی شده (*_key) انجام می‌شود و عبارت
+جستجو برای هر فیلد با همان تابع کلید آن (name_key، identifier_key،
+phone_key) یکسان می‌شود؛ «ي/ی»، نیم‌فاصله، ارقام فارسی و قالب‌های مختلف
+تلفن مانع تطابق نمی‌شوند و تطابق کامل و پیشوندی مقایسه مستقیم ایندکس است.
+
+روی PostgreSQL از افزونه pg_trgm و ایندکس‌های GIN ستون‌های کلید
+(مهاجرت guest_search_keys) استفاده می‌شود: هم LIKE '%term%' و هم عملگر
+شباهت % از ایندکس سرویس می‌گیرند. روی SQLite (تست و توسعه) همان منطق با
+NGramIndex درون‌فرآیندی اجرا می‌شود.
+
+رتبه‌بندی در هر دو پیاده‌سازی یکسان است:
+    0. تطابق کامل کدملی یا تلفن
+    1. تطابق پیشوندی کدملی یا تلفن
+    2. سایر نتایج به ترتیب شباهت (similarity به روش pg_trgm)
+"""
+
+import logging
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+from heapq import heapify, heappop, heappush
+from math import ceil
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, case, event, func, literal, or_
+from sqlalchemy.orm import Session
+
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page, decode_cursor, encode_cursor
+from app.models.reception.guest_models import Guest
+from app.services.reception.projections import GuestListItem, columns_of
+from app.utils.text_normalizer import name_key, identifier_key, phone_key
+
+logger = logging.getLogger(__name__)
+
+# فیلدهای جستجو بر اساس نوع جستجو
+SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'name': ('first_name', 'last_name'),
+    'national_id': ('national_id',),
+    'phone': ('phone',),
+    'passport': ('passport_number',),
+    'all': ('first_name', 'last_name', 'national_id', 'phone', 'passport_number')
+}
+
+# ستون کلید و تابع یکسان‌سازی عبارت جستجو برای هر فیلد
+KEY_COLUMNS = {
+    'first_name': 'first_name_key',
+    'last_name': 'last_name_key',
+    'national_id': 'national_id_key',
+    'phone': 'phone_key',
+    'passport_number': 'passport_key'
+}
+QUERY_NORMALIZERS = {
+    'first_name': name_key,
+    'last_name': name_key,
+    'national_id': identifier_key,
+    'phone': phone_key,
+    'passport_number': identifier_key
+}
+
+# فیلدهای نام با جستجوی شباهت (نام کامل همراه first_name جستجو می‌شود)؛
+# سایر فیلدها فقط با زیررشته جستجو می‌شوند
+NAME_FIELDS = ('first_name', 'last_name')
+
+# فیلدهایی که تطابق کامل و پیشوندی آن‌ها در رتبه اول قرار می‌گیرد
+IDENTIFIER_FIELDS = ('national_id', 'phone')
+
+# معادل مقدار پیش‌فرض pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+EXACT, PREFIX, SIMILAR = 0, 1, 2
+MATCH_LABELS = {EXACT: 'exact', PREFIX: 'prefix', SIMILAR: 'similar'}
+
+_WORD = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def trigrams(value: Optional[str]) -> FrozenSet[str]:
+    """
+    سه‌حرفی‌های یک مقدار به روش pg_trgm
+
+    متن کوچک و به کلمات شکسته می‌شود و هر کلمه با دو فاصله در ابتدا و
+    یک فاصله در انتها پد می‌شود.
+    """
+    result = set()
+    for word in _WORD.findall((value or '').lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def _windows(value: str) -> Set[str]:
+    """سه‌حرفی‌های خام یک مقدار برای جستجوی زیررشته (بدون شکستن کلمات)"""
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def similarity(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    """شباهت دو مجموعه سه‌حرفی (نسبت اشتراک به اجتماع)"""
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+class GuestSearchHit(NamedTuple):
+    """نتیجه رتبه‌بندی شده جستجو"""
+    guest: GuestListItem
+    rank: int
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.guest.to_dict()
+        data['match'] = MATCH_LABELS[self.rank]
+        data['score'] = round(self.score, 3)
+        return data
+
+
+def search_fields(search_type: str) -> Tuple[str, ...]:
+    """فیلدهای جستجو برای نوع جستجو (پیش‌فرض: همه فیلدها)"""
+    return SEARCH_FIELDS.get(search_type, SEARCH_FIELDS['all'])
+
+
+def normalize_query(term: str, fields: Sequence[str]) -> Dict[str, str]:
+    """
+    یکسان‌سازی عبارت جستجو برای هر فیلد
+
+    Returns:
+        دیکشنری فیلد ← کلید؛ فیلدهایی که کلید خالی دارند (مثلاً متن فارسی
+        برای تلفن) حذف می‌شوند
+    """
+    keys = {name: QUERY_NORMALIZERS[name](term) for name in fields}
+    return {name: key for name, key in keys.items() if key}
+
+
+def key_row(guest_id: int, *sources: Optional[str]) -> Tuple:
+    """سطر ایندکس (id و کلیدها به ترتیب NGramIndex.FIELDS) از ستون‌های منبع"""
+    keys = Guest.search_keys(*sources)
+    return (guest_id, *(keys[name] for name in NGramIndex.FIELDS))
+
+
+def _like_escape(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class TrigramSearchBackend:
+    """
+    جستجو روی PostgreSQL با pg_trgm و ایندکس‌های GIN ستون‌های کلید
+
+    مهمانانی که کلیدهایشان هنوز توسط GuestKeyBackfill پر نشده است
+    (full_name_key خالی) با ستون‌های منبع جستجو می‌شوند؛ این شاخه با
+    ایندکس full_name_key فقط همان سطرها را می‌خواند.
+    """
+
+    @staticmethod
+    def query(session: Session, keys: Dict[str, str], after: Optional[Sequence] = None):
+        """query رتبه‌بندی شده (بدون limit)"""
+        pending = Guest.full_name_key.is_(None)
+
+        # (ستون کلید، ستون منبع، عبارت) برای هر فیلد
+        fields = [(getattr(Guest, KEY_COLUMNS[name]), getattr(Guest, name), key) for name, key in keys.items()]
+        identifiers = [field for field, name in zip(fields, keys) if name in IDENTIFIER_FIELDS]
+        names = [field for field, name in zip(fields, keys) if name in NAME_FIELDS]
+        if 'first_name' in keys:
+            full_name = (Guest.full_name_key, func.concat(Guest.first_name, Guest.last_name), keys['first_name'])
+            names.append(full_name)
+            fields.append(full_name)
+
+        def value(column, source):
+            return func.coalesce(column, func.lower(source))
+
+        # رتبه فقط روی سطرهای انتخاب شده با condition محاسبه می‌شود؛ کلیدها
+        # یکسان شده‌اند و تطبیق کامل و پیشوندی با مقایسه مستقیم تشخیص داده می‌شود
+        if identifiers:
+            rank = case(
+                (or_(*[value(column, source) == key for column, source, key in identifiers]), EXACT),
+                (or_(*[value(column, source).like(f"{_like_escape(key)}%", escape='\\')
+                       for column, source, key in identifiers]), PREFIX),
+                else_=SIMILAR
+            )
+        else:
+            rank = literal(SIMILAR)
+
+        scores = [func.similarity(func.coalesce(value(column, source), ''), key) for column, source, key in fields]
+        score = func.greatest(*scores) if len(scores) > 1 else scores[0]
+
+        # هر دو شرط با ایندکس GIN gin_trgm_ops سرویس می‌گیرند؛ شباهت تقریبی
+        # فقط برای نام‌ها معنا دارد و شناسه‌ها با زیررشته جستجو می‌شوند
+        condition = or_(
+            *[column.like(f"%{_like_escape(key)}%", escape='\\') for column, _, key in fields],
+            *[column.op('%')(key) for column, _, key in names],
+            and_(pending, or_(
+                *[source.ilike(f"%{_like_escape(key)}%", escape='\\') for _, source, key in fields],
+                *[func.lower(source).op('%')(key) for _, source, key in names]
+            ))
+        )
+
+        query = session.query(
+            *columns_of(GuestListItem, Guest), rank.label('rank'), score.label('score')
+        ).filter(condition)
+
+        if after is not None:
+            # seek روی (rank, -score, id) برای صفحه بعد
+            after_rank, after_score, after_id = after
+            query = query.filter(or_(
+                rank > after_rank,
+                and_(rank == after_rank, score < after_score),
+                and_(rank == after_rank, score == after_score, Guest.id > after_id)
+            ))
+
+        return query.order_by(rank, score.desc(), Guest.id)
+
+    @staticmethod
+    def search(session: Session, keys: Dict[str, str], limit: int,
+               after: Optional[Sequence] = None) -> List[GuestSearchHit]:
+        rows = TrigramSearchBackend.query(session, keys, after).limit(limit).all()
+
+        return [
+            GuestSearchHit(GuestListItem._make(row[:-2]), row.rank, float(row.score or 0))
+            for row in rows
+        ]
+
+
+class NGramIndex:
+    """
+    ایندکس سه‌حرفی درون‌فرآیندی (معادل GIN pg_trgm برای SQLite)
+
+    ایندکس روی کلیدهای یکسان‌سازی شده ساخته می‌شود. نام‌ها تکرار زیادی
+    دارند، پس ایندکس شباهت روی مقادیر یکتای کلید نام، نام خانوادگی و نام
+    کامل ساخته می‌شود (سه‌حرفی ← کلیدها، کلید ← شناسه مهمانان) و شباهت
+    برای هر کلید یکتا یک بار محاسبه می‌شود. کدملی، تلفن و پاسپورت با لیست
+    شناسه برای هر سه‌حرفی (جستجوی زیررشته) و کدملی و تلفن علاوه بر آن با
+    لیست مرتب (تطابق کامل و پیشوندی) ایندکس می‌شوند.
+
+    لیست‌ها فقط افزایشی‌اند و نتایج نهایی با مقادیر فعلی سطر بررسی
+    می‌شوند، پس ورودی‌های قدیمی پس از ویرایش یا حذف بی‌اثرند.
+
+    تفاوت با PostgreSQL: termهای کوتاه‌تر از سه حرف در نام‌ها با پیشوند
+    کلید و در شناسه‌ها فقط پیشوندی تطبیق می‌یابند.
+    """
+
+    FIELDS = ('first_name_key', 'last_name_key', 'full_name_key', 'national_id_key', 'phone_key', 'passport_key')
+    NAME_KEYS = 3
+    _EMPTY = array('i')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._positions = {name: self.FIELDS.index(column) for name, column in KEY_COLUMNS.items()}
+        self.clear()
+
+    def clear(self):
+        """پاک کردن کامل ایندکس"""
+        with self._lock:
+            self.bind = None
+            self._rows: Dict[int, Tuple[Optional[str], ...]] = {}
+            self._name_ids: Dict[str, array] = {}
+            self._name_postings: Dict[str, Set[str]] = {}
+            self._substring_postings: Dict[str, array] = {}
+            self._identifiers: Dict[str, List[Tuple[str, int]]] = {name: [] for name in IDENTIFIER_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def loaded(self) -> bool:
+        return self.bind is not None
+
+    def load(self, bind, rows: Iterable[Sequence]):
+        """ساخت ایندکس از سطرهای (id, *کلیدها به ترتیب FIELDS)"""
+        with self._lock:
+            self.clear()
+            for row in rows:
+                self._add(row[0], tuple(row[1:]), sort_identifiers=False)
+            for entries in self._identifiers.values():
+                entries.sort()
+            self.bind = bind
+
+    def add(self, guest_id: int, values: Sequence[Optional[str]]):
+        """افزودن یا به‌روزرسانی یک مهمان"""
+        with self._lock:
+            self.remove(guest_id)
+            self._add(guest_id, tuple(values), sort_identifiers=True)
+
+    def remove(self, guest_id: int):
+        """حذف یک مهمان (ورودی‌های لیست‌های سه‌حرفی در جستجو نادیده گرفته می‌شوند)"""
+        with self._lock:
+            values = self._rows.pop(guest_id, None)
+            if values is None:
+                return
+            for name in IDENTIFIER_FIELDS:
+                value = values[self._positions[name]]
+                if value:
+                    entries = self._identifiers[name]
+                    position = bisect_left(entries, (value, guest_id))
+                    if position < len(entries) and entries[position] == (value, guest_id):
+                        del entries[position]
+
+    def _add(self, guest_id: int, values: Tuple[Optional[str], ...], sort_identifiers: bool):
+        self._rows[guest_id] = values
+        national_id, phone, passport = values[self.NAME_KEYS:]
+
+        for name in set(values[:self.NAME_KEYS]) - {None, ''}:
+            ids = self._name_ids.get(name)
+            if ids is None:
+                ids = self._name_ids[name] = array('i')
+                for trigram in trigrams(name):
+                    self._name_postings.setdefault(trigram, set()).add(name)
+            ids.append(guest_id)
+
+        windows = set()
+        for value in (national_id, phone, passport):
+            if value:
+                windows |= _windows(value)
+        for window in windows:
+            posting = self._substring_postings.get(window)
+            if posting is None:
+                posting = self._substring_postings[window] = array('i')
+            posting.append(guest_id)
+
+        for name, value in (('national_id', national_id), ('phone', phone)):
+            if value:
+                if sort_identifiers:
+                    insort(self._identifiers[name], (value, guest_id))
+                else:
+                    self._identifiers[name].append((value, guest_id))
+
+    def search(self, keys: Dict[str, str], limit: int,
+               after: Optional[Sequence] = None) -> List[Tuple[int, int, float]]:
+        """
+        جستجوی رتبه‌بندی شده
+
+        Args:
+            keys: عبارت یکسان‌سازی شده برای هر فیلد (normalize_query)
+            after: (rank, score, id) آخرین نتیجه صفحه قبل
+
+        Returns:
+            لیست (guest_id, rank, score) به ترتیب رتبه، شباهت و id
+        """
+        name_term = keys.get('first_name') or keys.get('last_name')
+        other_fields = [name for name in keys if name not in NAME_FIELDS]
+
+        with self._lock:
+            # تخمین امتیاز نام‌ها از لیست‌های مقدار؛ سطرهای قدیمی در انتخاب نهایی اصلاح می‌شوند
+            name_scores: Dict[str, float] = {}
+            scores: Dict[int, float] = {}
+            if name_term:
+                name_scores = self._match_names(name_term, trigrams(name_term))
+                for name, score in sorted(name_scores.items(), key=lambda item: item[1]):
+                    scores.update(dict.fromkeys(self._name_ids[name], score))
+
+            # شناسه‌ها: تطابق کامل و پیشوندی از لیست مرتب، زیررشته از سه‌حرفی‌ها
+            ranks: Dict[int, int] = {}
+            other_scores: Dict[int, float] = {}
+            for name in other_fields:
+                needle = keys[name]
+                position = self._positions[name]
+                candidates = set()
+
+                if name in IDENTIFIER_FIELDS:
+                    entries = self._identifiers[name]
+                    index = bisect_left(entries, (needle,))
+                    while index < len(entries) and entries[index][0].startswith(needle):
+                        value, guest_id = entries[index]
+                        ranks[guest_id] = min(EXACT if value == needle else PREFIX, ranks.get(guest_id, SIMILAR))
+                        candidates.add(guest_id)
+                        index += 1
+
+                if len(needle) >= 3:
+                    candidates |= self._intersect(self._substring_postings, _windows(needle))
+
+                needle_trigrams = trigrams(needle)
+                for guest_id in candidates:
+                    values = self._rows.get(guest_id)
+                    value = values[position] if values is not None else None
+                    if value and needle in value:
+                        score = similarity(trigrams(value), needle_trigrams)
+                        if other_scores.get(guest_id, -1.0) < score:
+                            other_scores[guest_id] = score
+
+            for guest_id, score in other_scores.items():
+                if scores.get(guest_id, -1.0) < score:
+                    scores[guest_id] = score
+
+            heap = [(ranks.get(guest_id, SIMILAR), -score, guest_id) for guest_id, score in scores.items()]
+            heapify(heap)
+            boundary = (after[0], -after[1], after[2]) if after is not None else None
+
+            results = []
+            while heap and len(results) < limit:
+                rank, negative_score, guest_id = heappop(heap)
+                values = self._rows.get(guest_id)
+                if values is None:
+                    continue
+
+                score = other_scores.get(guest_id, -1.0)
+                if name_term:
+                    for value in values[:self.NAME_KEYS]:
+                        score = max(score, name_scores.get(value, -1.0))
+
+                if score < 0:
+                    continue
+                if score != -negative_score:
+                    heappush(heap, (rank, -score, guest_id))
+                    continue
+                if boundary is not None and (rank, -score, guest_id) <= boundary:
+                    continue
+                results.append((guest_id, rank, score))
+
+        return results
+
+    def _match_names(self, needle: str, query_trigrams: FrozenSet[str]) -> Dict[str, float]:
+        """نام‌های یکتای منطبق (شباهت کافی، زیررشته یا پیشوند کلمه) با امتیاز شباهت"""
+        inner = [trigram for trigram in query_trigrams if ' ' not in trigram]
+        if inner:
+            required = max(1, min(ceil(SIMILARITY_THRESHOLD * len(query_trigrams)), len(inner)))
+            counts = Counter()
+            for trigram in query_trigrams:
+                counts.update(self._name_postings.get(trigram, ()))
+            candidates = [name for name, count in counts.items() if count >= required]
+        else:
+            # term کوتاه: همه سه‌حرفی‌های ابتدای کلمه باید موجود باشند
+            sets = [self._name_postings.get(trigram, set())
+                    for trigram in query_trigrams if not trigram.endswith(' ')]
+            candidates = set.intersection(*sets) if sets else set()
+
+        matched = {}
+        for name in candidates:
+            score = similarity(trigrams(name), query_trigrams)
+            if score >= SIMILARITY_THRESHOLD or (
+                    needle in name if len(needle) >= 3 else
+                    any(word.startswith(needle) for word in _WORD.findall(name))):
+                matched[name] = score
+        return matched
+
+    def _intersect(self, postings: Dict[str, array], required: Iterable[str], max_lists: int = 3) -> set:
+        """
+        اشتراک لیست‌های سه‌حرفی از کوچک‌ترین؛ فقط max_lists لیست کوچک‌تر
+        اعمال می‌شود و بقیه در بررسی نهایی سطر کنترل می‌شوند
+        """
+        lists = sorted((postings.get(trigram, self._EMPTY) for trigram in required), key=len)
+        if not lists or not lists[0]:
+            return set()
+        result = set(lists[0])
+        for posting in lists[1:max_lists]:
+            result.intersection_update(posting)
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        """وضعیت ایندکس"""
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'guests': len(self._rows),
+                'distinct_names': len(self._name_ids),
+                'trigrams': len(self._name_postings) + len(self._substring_postings)
+            }
+
+
+class NGramSearchBackend:
+    """جستجو روی SQLite با NGramIndex درون‌فرآیندی"""
+
+    LOAD_BATCH_SIZE = 10000
+
+    def __init__(self, index: NGramIndex):
+        self.index = index
+
+    def ensure_loaded(self, session: Session):
+        """ساخت ایندکس از جدول مهمانان در اولین جستجو یا پس از تغییر engine"""
+        bind = session.get_bind()
+        if self.index.bind is bind:
+            return
+
+        install_index_maintenance()
+        rows = session.query(
+            Guest.id, *[getattr(Guest, name) for name in NGramIndex.FIELDS],
+            *[getattr(Guest, name) for name in Guest.SEARCH_KEY_SOURCES]
+        ).execution_options(yield_per=self.LOAD_BATCH_SIZE)
+        self.index.load(bind, self._key_rows(rows))
+        logger.info(f"✅ ایندکس جستجوی مهمانان ساخته شد ({len(self.index)} مهمان)")
+
+    @staticmethod
+    def _key_rows(rows: Iterable[Sequence]) -> Iterable[Tuple]:
+        """کلیدهای ذخیره شده؛ برای سطرهایی که هنوز backfill نشده‌اند از ستون‌های منبع"""
+        width = len(NGramIndex.FIELDS) + 1
+        full_name = NGramIndex.FIELDS.index('full_name_key') + 1
+        for row in rows:
+            if row[full_name] is None:
+                yield key_row(row[0], *row[width:])
+            else:
+                yield tuple(row[:width])
+
+    def search(self, session: Session, keys: Dict[str, str], limit: int,
+               after: Optional[Sequence] = None) -> List[GuestSearchHit]:
+        self.ensure_loaded(session)
+        hits = self.index.search(keys, limit, after)
+        if not hits:
+            return []
+
+        # داده نمایشی از دیتابیس؛ سطرهای حذف شده خودبه‌خود کنار می‌روند
+        guests = {
+            row.id: GuestListItem._make(row)
+            for row in session.query(*columns_of(GuestListItem, Guest)).filter(
+                Guest.id.in_([guest_id for guest_id, _, _ in hits])
+            )
+        }
+        return [
+            GuestSearchHit(guests[guest_id], rank, score)
+            for guest_id, rank, score in hits if guest_id in guests
+        ]
+
+
+# ایندکس جهانی SQLite
+guest_ngram_index = NGramIndex()
+
+
+def get_search_backend(session: Session):
+    """انتخاب پیاده‌سازی جستجو بر اساس dialect دیتابیس session"""
+    if session.get_bind().dialect.name == 'postgresql':
+        return TrigramSearchBackend
+    return NGramSearchBackend(guest_ngram_index)
+
+
+def search_guests(session: Session, term: str, search_type: str = 'all', limit: int = 50,
+                  cursor: Optional[str] = None) -> Page:
+    """
+    یک صفحه از جستجوی رتبه‌بندی شده مهمانان
+
+    next_cursor صفحه بعد همان جستجو را از بعد از آخرین نتیجه (rank،
+    score، id) ادامه می‌دهد و برای عبارت یا نوع جستجوی دیگر نامعتبر است.
+
+    Raises:
+        InvalidCursorError: توکن نامعتبر
+    """
+    keys = normalize_query(term, search_fields(search_type))
+    if not keys:
+        return Page([], None)
+
+    cursor_name = 'guest_search:' + '|'.join(f"{name}={key}" for name, key in keys.items())
+    after = decode_cursor(cursor, cursor_name, 3) if cursor else None
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+    hits = get_search_backend(session).search(session, keys, limit + 1, after)
+    if len(hits) <= limit:
+        return Page(hits, None)
+    hits = hits[:limit]
+    last = hits[-1]
+    return Page(hits, encode_cursor(cursor_name, [last.rank, last.score, last.guest.id]))
+
+
+# نگهداری ایندکس SQLite: تغییرات مهمانان پس از commit اعمال می‌شوند
+_PENDING_KEY = 'guest_search_pending'
+
+
+def _record_change(mapper, connection, target, removed: bool = False):
+    if guest_ngram_index.bind is None or connection.engine is not guest_ngram_index.bind:
+        return
+    session = Session.object_session(target)
+    if session is None:
+        return
+    values = None if removed else tuple(getattr(target, name) for name in NGramIndex.FIELDS)
+    session.info.setdefault(_PENDING_KEY, {})[target.id] = values
+
+
+def _record_removal(mapper, connection, target):
+    _record_change(mapper, connection, target, removed=True)
+
+
+def _apply_pending(session):
+    for guest_id, values in session.info.pop(_PENDING_KEY, {}).items():
+        if values is None:
+            guest_ngram_index.remove(guest_id)
+        else:
+            guest_ngram_index.add(guest_id, values)
+
+
+def _discard_pending(session, *args):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def install_index_maintenance():
+    """ثبت رویدادهای نگهداری ایندکس (idempotent)"""
+    if event.contains(Guest, 'after_insert', _record_change):
+        return
+    event.listen(Guest, 'after_insert', _record_change)
+    event.listen(Guest, 'after_update', _record_change)
+    event.listen(Guest, 'after_delete', _record_removal)
+    event.listen(Session, 'after_commit', _apply_pending)
+    event.listen(Session, 'after_soft_rollback', _discard_pending)
@@ -4,19 +4,33 @@
 """
 
 import logging
-from typing import Dict, List, Optional, Any
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, date
 from decimal import Decimal
+from sqlalchemy import and_, bindparam, delete, insert, or_, select, update
 from sqlalchemy.orm import Session
 
-from app.core.database import db_session
-from app.models.reception.guest_models import Guest, Stay, Companion, CompanionStay
+from app.core.database import db_session, replica_tolerant
+from app.core.guest_profile_cache import guest_profile_cache, invalidate_after_commit
+from app.core.pagination import Keyset, InvalidCursorError, paginate
+from app.core.transactions import run_in_transaction
+from app.core.unit_of_work import current_unit_of_work
+from app.models.reception.guest_models import Guest, Stay, Companion, CompanionStay, GuestDuplicateCandidate
+from app.models.reception.archive_models import ARCHIVE_TABLES, unified_entity
 from app.models.reception.room_status_models import RoomAssignment
 from app.models.reception.payment_models import GuestFolio, FolioTransaction
+from app.services.reception import guest_search
+from app.services.reception.guest_duplicates import GuestDuplicateDetector
+from app.services.reception.projections import GuestListItem, StayGuestItem, columns_of
 from config import config
 
 logger = logging.getLogger(__name__)
 
+def _match_key(values) -> Tuple:
+    return tuple(None if value is None else str(value) for value in values)
+
+
 class GuestService:
     """سرویس مدیریت کامل مهمانان"""
 
@@ -25,120 +39,231 @@ class GuestService:
         """ثبت مهمان جدید از سیستم رزرواسیون"""
         try:
             with db_session() as session:
-                # بررسی وجود مهمان
-                existing_guest = session.query(Guest).filter(
-                    Guest.national_id == guest_data.get('national_id')
-                ).first()
+                registration = GuestService._register_members(session, [(guest_data, reservation_data)])[0]
+                session.commit()
 
-                if existing_guest:
-                    guest = existing_guest
-                    # به‌روزرسانی اطلاعات مهمان موجود
-                    GuestService._update_guest_info(guest, guest_data)
-                else:
-                    # ایجاد مهمان جدید
-                    guest = GuestService._create_guest(guest_data)
-                    session.add(guest)
+            logger.info(f"✅ مهمان جدید ثبت شد: {registration['full_name']} (ID: {registration['guest_id']})")
 
-                session.flush()  # گرفتن ID مهمان
+            return {
+                'success': True,
+                'guest_id': registration['guest_id'],
+                'stay_id': registration['stay_id'],
+                'folio_id': registration['folio_id'],
+                'message': 'مهمان با موفقیت ثبت شد'
+            }
 
-                # ایجاد اقامت
-                stay = GuestService._create_stay(guest.id, reservation_data)
-                session.add(stay)
-                session.flush()
+        except Exception as e:
+            logger.error(f"❌ خطا در ثبت مهمان: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'GUEST_REGISTRATION_ERROR'
+            }
 
-                # ایجاد صورت‌حساب
-                folio = GuestService._create_guest_folio(stay.id)
-                session.add(folio)
-
-                # ثبت همراهان
-                companions_data = guest_data.get('companions', [])
-                for companion_data in companions_data:
-                    companion = GuestService._create_companion(guest.id, companion_data)
-                    session.add(companion)
-                    session.flush()
-
-                    # ارتباط همراه با اقامت
-                    companion_stay = CompanionStay(
-                        companion_id=companion.id,
-                        stay_id=stay.id
-                    )
-                    session.add(companion_stay)
+    @staticmethod
+    def register_group_from_reservations(members: List[Tuple[Dict, Dict]]) -> Dict[str, Any]:
+        """
+        ثبت یک گروه (تور) از چند رزرو در یک تراکنش
+
+        Args:
+            members: (guest_data, reservation_data) برای هر رزرو گروه
 
+        با شکست ثبت هر عضو هیچ بخشی از گروه ذخیره نمی‌شود.
+        """
+        if not members:
+            return {
+                'success': False,
+                'error': 'گروه بدون عضو است',
+                'error_code': 'EMPTY_GROUP'
+            }
+
+        try:
+            with db_session() as session:
+                registrations = GuestService._register_members(session, members)
                 session.commit()
 
-                logger.info(f"✅ مهمان جدید ثبت شد: {guest.full_name} (ID: {guest.id})")
+            companion_count = sum(item['companion_count'] for item in registrations)
+            logger.info(f"✅ گروه ثبت شد: {len(registrations)} رزرو، {companion_count} همراه")
 
-                return {
-                    'success': True,
-                    'guest_id': guest.id,
-                    'stay_id': stay.id,
-                    'folio_id': folio.id,
-                    'message': 'مهمان با موفقیت ثبت شد'
-                }
+            return {
+                'success': True,
+                'registrations': registrations,
+                'reservation_count': len(registrations),
+                'companion_count': companion_count,
+                'message': 'گروه با موفقیت ثبت شد'
+            }
 
         except Exception as e:
-            logger.error(f"❌ خطا در ثبت مهمان: {e}")
+            logger.error(f"❌ خطا در ثبت گروه: {e}")
             return {
                 'success': False,
                 'error': str(e),
-                'error_code': 'GUEST_REGISTRATION_ERROR'
+                'error_code': 'GROUP_REGISTRATION_ERROR'
+            }
+
+    @staticmethod
+    def _register_members(session: Session, members: List[Tuple[Dict, Dict]]) -> List[Dict[str, Any]]:
+        """
+        ثبت مهمانان، اقامت‌ها، صورت‌حساب‌ها و همراهان چند رزرو
+
+        هر مرحله برای کل گروه یک بار flush می‌شود و تعداد رفت و برگشت‌ها
+        به اندازه گروه بستگی ندارد. commit با فراخواننده است.
+        """
+        # مهمانان موجود در یک query
+        national_ids = {guest_data.get('national_id') for guest_data, _ in members} - {None, ''}
+        existing = {}
+        if national_ids:
+            existing = {
+                guest.national_id: guest
+                for guest in session.query(Guest).filter(Guest.national_id.in_(national_ids))
             }
 
+        guests = []
+        for guest_data, _ in members:
+            national_id = guest_data.get('national_id')
+            guest = existing.get(national_id) if national_id else None
+            if guest is not None:
+                # به‌روزرسانی اطلاعات مهمان موجود
+                GuestService._update_guest_info(guest, guest_data)
+            else:
+                guest = GuestService._create_guest(guest_data)
+                session.add(guest)
+                if national_id:
+                    # رزرو دیگر همان مهمان در گروه
+                    existing[national_id] = guest
+            guests.append(guest)
+
+        session.flush()  # گرفتن ID مهمانان
+
+        # ایجاد اقامت‌ها
+        stays = [
+            GuestService._create_stay(guest.id, reservation_data)
+            for guest, (_, reservation_data) in zip(guests, members)
+        ]
+        session.add_all(stays)
+        session.flush()
+
+        # ایجاد صورت‌حساب‌ها
+        folios = [GuestService._create_guest_folio(stay.id) for stay in stays]
+        session.add_all(folios)
+
+        # ثبت همراهان
+        GuestService._insert_companions(session, [
+            (guest.id, stay.id, companion_data)
+            for guest, stay, (guest_data, _) in zip(guests, stays, members)
+            for companion_data in guest_data.get('companions', [])
+        ])
+        session.flush()
+
+        return [
+            {
+                'guest_id': guest.id,
+                'full_name': f"{guest.first_name} {guest.last_name}",
+                'stay_id': stay.id,
+                'folio_id': folio.id,
+                'companion_count': len(guest_data.get('companions', []))
+            }
+            for guest, stay, folio, (guest_data, _) in zip(guests, stays, folios, members)
+        ]
+
+    @staticmethod
+    def _insert_companions(session: Session, stay_companions: List[Tuple[int, int, Dict]]) -> List[int]:
+        """
+        ثبت دسته‌ای همراهان و ارتباط آن‌ها با اقامت
+
+        همه همراهان با INSERT چندسطری و RETURNING ثبت می‌شوند و idها به
+        ترتیب ورودی برمی‌گردند (PostgreSQL با sort_by_parameter_order و سایر
+        دیتابیس‌ها با تطبیق همه ستون‌های درج شده)؛ ارتباط‌ها با یک
+        executemany درج می‌شوند. رویدادهای ORM همراه اجرا نمی‌شوند؛ ابطال کش
+        پروفایل مهمان با درج اقامت همان مهمان انجام می‌شود.
+
+        Args:
+            stay_companions: (guest_id, stay_id, companion_data) برای هر همراه
+
+        Returns:
+            List[int]: شناسه همراهان به ترتیب ورودی
+        """
+        if not stay_companions:
+            return []
+
+        companions = Companion.__table__
+        rows = [
+            GuestService._companion_values(guest_id, companion_data)
+            for guest_id, _, companion_data in stay_companions
+        ]
+        if session.get_bind().dialect.name == 'postgresql':
+            # insertmanyvalues در PostgreSQL با sentinel ضمنی id دسته‌ای می‌ماند
+            # و RETURNING را به ترتیب پارامترها برمی‌گرداند
+            companion_ids = session.execute(
+                insert(companions).returning(companions.c.id, sort_by_parameter_order=True),
+                rows
+            ).scalars().all()
+        else:
+            companion_ids = GuestService._match_returned_ids(session, companions, rows)
+
+        session.execute(insert(CompanionStay.__table__), [
+            {'companion_id': companion_id, 'stay_id': stay_id}
+            for companion_id, (_, stay_id, _) in zip(companion_ids, stay_companions)
+        ])
+        return companion_ids
+
     @staticmethod
     def check_in_guest(stay_id: int, room_id: int, check_in_time: datetime = None) -> Dict[str, Any]:
         """ثبت ورود مهمان و تخصیص اتاق"""
-        try:
-            with db_session() as session:
-                stay = session.query(Stay).filter(Stay.id == stay_id).first()
-                if not stay:
-                    return {
-                        'success': False,
-                        'error': 'اقامت یافت نشد',
-                        'error_code': 'STAY_NOT_FOUND'
-                    }
+        def check_in(session: Session) -> Dict[str, Any]:
+            stay = session.query(Stay).filter(Stay.id == stay_id).first()
+            if not stay:
+                return {
+                    'success': False,
+                    'error': 'اقامت یافت نشد',
+                    'error_code': 'STAY_NOT_FOUND'
+                }
 
-                # به‌روزرسانی زمان ورود واقعی
-                stay.actual_check_in = check_in_time or datetime.now()
-                stay.status = 'checked_in'
+            # به‌روزرسانی زمان ورود واقعی
+            stay.actual_check_in = check_in_time or datetime.now()
+            stay.status = 'checked_in'
 
-                # تخصیص اتاق
-                room_assignment = RoomAssignment(
-                    stay_id=stay_id,
-                    room_id=room_id,
-                    assignment_date=date.today(),
-                    expected_check_out=stay.planned_check_out.date(),
-                    assignment_type='primary'
+            # تخصیص اتاق
+            room_assignment = RoomAssignment(
+                stay_id=stay_id,
+                room_id=room_id,
+                assignment_date=date.today(),
+                expected_check_out=stay.planned_check_out.date(),
+                assignment_type='primary'
+            )
+            session.add(room_assignment)
+
+            # ایجاد تراکنش اتاق در صورت‌حساب
+            folio = session.query(GuestFolio).filter(GuestFolio.stay_id == stay_id).first()
+            if folio:
+                room_charge = FolioTransaction(
+                    folio_id=folio.id,
+                    transaction_type='charge',
+                    amount=stay.total_amount,
+                    description='هزینه اقامت اتاق',
+                    category='room_charge',
+                    subcategory='daily_rate'
                 )
-                session.add(room_assignment)
-
-                # ایجاد تراکنش اتاق در صورت‌حساب
-                folio = session.query(GuestFolio).filter(GuestFolio.stay_id == stay_id).first()
-                if folio:
-                    room_charge = FolioTransaction(
-                        folio_id=folio.id,
-                        transaction_type='charge',
-                        amount=stay.total_amount,
-                        description='هزینه اقامت اتاق',
-                        category='room_charge',
-                        subcategory='daily_rate'
-                    )
-                    session.add(room_charge)
+                session.add(room_charge)
 
-                    # به‌روزرسانی مانده صورت‌حساب
-                    folio.total_charges += stay.total_amount
-                    folio.current_balance = folio.total_charges - folio.total_payments
+                # به‌روزرسانی مانده صورت‌حساب
+                folio.total_charges += stay.total_amount
+                folio.current_balance = folio.total_charges - folio.total_payments
 
-                session.commit()
+            return {
+                'success': True,
+                'stay_id': stay_id,
+                'room_id': room_id,
+                'check_in_time': stay.actual_check_in,
+                'message': 'ورود مهمان با موفقیت ثبت شد'
+            }
 
+        try:
+            # کل واحد کاری روی خطاهای گذرا دوباره اجرا می‌شود
+            result = run_in_transaction(check_in, name='check_in_guest')
+            if result['success']:
                 logger.info(f"✅ ورود مهمان ثبت شد: Stay ID {stay_id}, Room {room_id}")
-
-                return {
-                    'success': True,
-                    'stay_id': stay_id,
-                    'room_id': room_id,
-                    'check_in_time': stay.actual_check_in,
-                    'message': 'ورود مهمان با موفقیت ثبت شد'
-                }
+            return result
 
         except Exception as e:
             logger.error(f"❌ خطا در ثبت ورود مهمان: {e}")
@@ -151,177 +276,908 @@ class GuestService:
     @staticmethod
     def check_out_guest(stay_id: int, check_out_time: datetime = None) -> Dict[str, Any]:
         """ثبت خروج مهمان و تسویه حساب"""
+        def check_out(session: Session) -> Dict[str, Any]:
+            stay = session.query(Stay).filter(Stay.id == stay_id).first()
+            if not stay:
+                return {
+                    'success': False,
+                    'error': 'اقامت یافت نشد',
+                    'error_code': 'STAY_NOT_FOUND'
+                }
+
+            # بررسی تسویه حساب
+            folio = session.query(GuestFolio).filter(GuestFolio.stay_id == stay_id).first()
+            if folio and folio.current_balance > 0:
+                return {
+                    'success': False,
+                    'error': 'مامان هنوز تسویه حساب نشده است',
+                    'error_code': 'BALANCE_NOT_ZERO',
+                    'remaining_balance': float(folio.current_balance)
+                }
+
+            # به‌روزرسانی زمان خروج واقعی
+            stay.actual_check_out = check_out_time or datetime.now()
+            stay.status = 'checked_out'
+
+            # به‌روزرسانی تخصیص اتاق
+            room_assignment = session.query(RoomAssignment).filter(
+                RoomAssignment.stay_id == stay_id,
+                RoomAssignment.actual_check_out.is_(None)
+            ).first()
+
+            if room_assignment:
+                room_assignment.actual_check_out = date.today()
+
+            # به‌روزرسانی صورت‌حساب
+            if folio:
+                folio.folio_status = 'settled'
+
+            return {
+                'success': True,
+                'stay_id': stay_id,
+                'room_id': room_assignment.room_id if room_assignment else None,
+                'check_out_time': stay.actual_check_out,
+                'message': 'خروج مهمان با موفقیت ثبت شد'
+            }
+
         try:
-            with db_session() as session:
-                stay = session.query(Stay).filter(Stay.id == stay_id).first()
-                if not stay:
-                    return {
-                        'success': False,
-                        'error': 'اقامت یافت نشد',
-                        'error_code': 'STAY_NOT_FOUND'
+            # کل واحد کاری روی خطاهای گذرا دوباره اجرا می‌شود
+            result = run_in_transaction(check_out, name='check_out_guest')
+            if result['success']:
+                logger.info(f"✅ خروج مهمان ثبت شد: Stay ID {stay_id}")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ خطا در ثبت خروج مهمان: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'CHECK_OUT_ERROR'
+            }
+
+    @staticmethod
+    def complete_check_out(stay_id: int, check_out_time: datetime = None,
+                           notify_housekeeping: bool = True) -> Dict[str, Any]:
+        """
+        عملیات کامل خروج در یک تراکنش
+
+        ثبت خروج، ایجاد وظیفه نظافت و ثبت اطلاع‌رسانی خانه‌داری در یک
+        واحد کاری انجام می‌شوند که روی خطاهای گذرا کامل دوباره اجرا می‌شود؛
+        با شکست هر مرحله هیچ تغییری ذخیره نمی‌شود و ارسال اطلاع‌رسانی به
+        پس از commit موکول می‌شود (تلاش ناموفق چیزی ارسال نمی‌کند).
+        """
+        from app.core.notification_service import notification_service
+        from app.services.reception.housekeeping_service import HousekeepingService
+
+        def check_out(session: Session) -> Dict[str, Any]:
+            # خطای گذرای سرویس‌های تو در تو روی واحد کاری ثبت و در پایان raise می‌شود
+            uow = current_unit_of_work()
+            result = GuestService.check_out_guest(stay_id, check_out_time)
+            if not result['success']:
+                uow.set_rollback_only()
+                return result
+
+            room_id = result.get('room_id')
+            if room_id:
+                task_result = HousekeepingService.create_cleaning_task(
+                    room_id=room_id,
+                    task_type='checkout_cleaning',
+                    priority='high'
+                )
+                if not task_result['success']:
+                    uow.set_rollback_only()
+                    return task_result
+                result['cleaning_task_id'] = task_result['task_id']
+
+                if notify_housekeeping:
+                    notification_service.send_notification({
+                        'title': 'نظافت پس از خروج',
+                        'message': f'اتاق {room_id} پس از خروج مهمان نیاز به نظافت دارد',
+                        'type': 'task',
+                        'category': 'housekeeping',
+                        'priority': 'high',
+                        'target_department': 'housekeeping'
+                    })
+
+            return result
+
+        try:
+            return run_in_transaction(check_out, name='complete_check_out')
+
+        except Exception as e:
+            logger.error(f"❌ خطا در عملیات خروج: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'CHECK_OUT_ERROR'
+            }
+
+    @staticmethod
+    def check_in_group(assignments: List[Tuple[int, int]], check_in_time: datetime = None) -> Dict[str, Any]:
+        """
+        ثبت ورود گروهی (تور) در یک تراکنش
+
+        وضعیت اقامت‌ها با یک UPDATE، تخصیص اتاق‌ها و هزینه‌های اتاق با
+        executemany و مانده صورت‌حساب‌ها با یک UPDATE دسته‌ای ثبت می‌شوند.
+        اقامت نامعتبر (ناموجود، تکراری یا غیر confirmed) در نتیجه همان
+        اقامت گزارش می‌شود و مانع ورود بقیه گروه نیست.
+
+        Args:
+            assignments: (stay_id, room_id) برای هر اقامت
+
+        Returns:
+            Dict: results با نتیجه هر اقامت به ترتیب ورودی
+        """
+        check_in_time = check_in_time or datetime.now()
+        stays, folios = Stay.__table__, GuestFolio.__table__
+        stay_ids = [stay_id for stay_id, _ in assignments]
+
+        def check_in(session: Session) -> Tuple[List[Dict[str, Any]], int]:
+            found = {
+                row.id: row for row in session.execute(
+                    select(stays.c.id, stays.c.guest_id, stays.c.status,
+                           stays.c.planned_check_out, stays.c.total_amount)
+                    .where(stays.c.id.in_(stay_ids))
+                )
+            }
+            folio_ids = dict(session.execute(
+                select(folios.c.stay_id, folios.c.id).where(folios.c.stay_id.in_(stay_ids))
+            ).all())
+
+            results, accepted = [], []
+            for stay_id, room_id in assignments:
+                error = GuestService._group_stay_error(stay_id, found, results, 'confirmed')
+                if error:
+                    results.append(error)
+                    continue
+                accepted.append((stay_id, room_id))
+                results.append({
+                    'stay_id': stay_id,
+                    'success': True,
+                    'room_id': room_id,
+                    'check_in_time': check_in_time
+                })
+
+            if accepted:
+                accepted_ids = [stay_id for stay_id, _ in accepted]
+                session.execute(
+                    update(stays).where(stays.c.id.in_(accepted_ids))
+                    .values(status='checked_in', actual_check_in=check_in_time)
+                )
+
+                # تخصیص اتاق‌ها
+                session.execute(insert(RoomAssignment.__table__), [
+                    {
+                        'stay_id': stay_id,
+                        'room_id': room_id,
+                        'assignment_date': date.today(),
+                        'expected_check_out': found[stay_id].planned_check_out.date(),
+                        'assignment_type': 'primary'
                     }
+                    for stay_id, room_id in accepted
+                ])
 
-                # بررسی تسویه حساب
-                folio = session.query(GuestFolio).filter(GuestFolio.stay_id == stay_id).first()
-                if folio and folio.current_balance > 0:
-                    return {
+                # هزینه اتاق در صورت‌حساب‌ها
+                charges = [
+                    {'folio_id': folio_ids[stay_id], 'amount': found[stay_id].total_amount or 0}
+                    for stay_id in accepted_ids if stay_id in folio_ids
+                ]
+                if charges:
+                    session.execute(insert(FolioTransaction.__table__), [
+                        {
+                            'folio_id': charge['folio_id'],
+                            'transaction_type': 'charge',
+                            'amount': charge['amount'],
+                            'description': 'هزینه اقامت اتاق',
+                            'category': 'room_charge',
+                            'subcategory': 'daily_rate'
+                        }
+                        for charge in charges
+                    ])
+                    session.execute(
+                        update(folios).where(folios.c.id == bindparam('folio_id')).values(
+                            total_charges=folios.c.total_charges + bindparam('amount'),
+                            current_balance=folios.c.total_charges + bindparam('amount') - folios.c.total_payments
+                        ),
+                        charges
+                    )
+
+                invalidate_after_commit(session, {found[stay_id].guest_id for stay_id in accepted_ids})
+
+            return results, len(accepted)
+
+        try:
+            # کل واحد کاری روی خطاهای گذرا دوباره اجرا می‌شود
+            results, accepted_count = run_in_transaction(check_in, name='check_in_group')
+
+            logger.info(f"✅ ورود گروهی ثبت شد: {accepted_count} از {len(assignments)} اقامت")
+            return GuestService._group_result(results, accepted_count, 'GROUP_CHECK_IN_FAILED',
+                                              'ورود هیچ اقامتی ثبت نشد')
+
+        except Exception as e:
+            logger.error(f"❌ خطا در ثبت ورود گروهی: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'CHECK_IN_ERROR'
+            }
+
+    @staticmethod
+    def check_out_group(stay_ids: List[int], check_out_time: datetime = None,
+                        notify_housekeeping: bool = True) -> Dict[str, Any]:
+        """
+        خروج گروهی (express check-out) در یک تراکنش
+
+        اقامت‌ها، تخصیص اتاق‌ها و صورت‌حساب‌ها هر کدام با یک UPDATE بسته
+        می‌شوند، وظایف نظافت همه اتاق‌ها یکجا ثبت می‌شوند و خانه‌داری یک
+        اطلاع‌رسانی برای کل گروه دریافت می‌کند (پس از commit). اقامت
+        نامعتبر یا تسویه نشده در نتیجه همان اقامت گزارش می‌شود. کل واحد
+        کاری روی خطاهای گذرا دوباره اجرا می‌شود.
+
+        Returns:
+            Dict: results با نتیجه هر اقامت به ترتیب ورودی
+        """
+        from app.core.notification_service import notification_service
+        from app.services.reception.housekeeping_service import HousekeepingService
+
+        check_out_time = check_out_time or datetime.now()
+        stays, folios = Stay.__table__, GuestFolio.__table__
+        assignments = RoomAssignment.__table__
+
+        def check_out(session: Session) -> Dict[str, Any]:
+            found = {
+                row.id: row for row in session.execute(
+                    select(stays.c.id, stays.c.guest_id, stays.c.status).where(stays.c.id.in_(stay_ids))
+                )
+            }
+            balances = {
+                row.stay_id: row for row in session.execute(
+                    select(folios.c.id, folios.c.stay_id, folios.c.current_balance)
+                    .where(folios.c.stay_id.in_(stay_ids))
+                )
+            }
+            open_assignments = defaultdict(list)
+            for row in session.execute(
+                select(assignments.c.id, assignments.c.stay_id, assignments.c.room_id)
+                .where(assignments.c.stay_id.in_(stay_ids), assignments.c.actual_check_out.is_(None))
+                .order_by(assignments.c.id)
+            ):
+                open_assignments[row.stay_id].append(row)
+
+            results, accepted = [], []
+            for stay_id in stay_ids:
+                error = GuestService._group_stay_error(stay_id, found, results, 'checked_in')
+                folio = balances.get(stay_id)
+                if not error and folio and (folio.current_balance or 0) > 0:
+                    error = {
+                        'stay_id': stay_id,
                         'success': False,
-                        'error': 'مامان هنوز تسویه حساب نشده است',
+                        'error': 'مهمان هنوز تسویه حساب نشده است',
                         'error_code': 'BALANCE_NOT_ZERO',
                         'remaining_balance': float(folio.current_balance)
                     }
+                if error:
+                    results.append(error)
+                    continue
 
-                # به‌روزرسانی زمان خروج واقعی
-                stay.actual_check_out = check_out_time or datetime.now()
-                stay.status = 'checked_out'
+                stay_assignments = open_assignments.get(stay_id, [])
+                accepted.append(stay_id)
+                results.append({
+                    'stay_id': stay_id,
+                    'success': True,
+                    'room_id': stay_assignments[-1].room_id if stay_assignments else None,
+                    'check_out_time': check_out_time
+                })
 
-                # به‌روزرسانی تخصیص اتاق
-                room_assignment = session.query(RoomAssignment).filter(
-                    RoomAssignment.stay_id == stay_id,
-                    RoomAssignment.actual_check_out.is_(None)
-                ).first()
+            if accepted:
+                session.execute(
+                    update(stays).where(stays.c.id.in_(accepted))
+                    .values(status='checked_out', actual_check_out=check_out_time)
+                )
+                assignment_ids = [row.id for stay_id in accepted for row in open_assignments.get(stay_id, [])]
+                if assignment_ids:
+                    session.execute(
+                        update(assignments).where(assignments.c.id.in_(assignment_ids))
+                        .values(actual_check_out=date.today())
+                    )
+                folio_ids = [balances[stay_id].id for stay_id in accepted if stay_id in balances]
+                if folio_ids:
+                    session.execute(
+                        update(folios).where(folios.c.id.in_(folio_ids)).values(folio_status='settled')
+                    )
+                invalidate_after_commit(session, {found[stay_id].guest_id for stay_id in accepted})
 
-                if room_assignment:
-                    room_assignment.actual_check_out = date.today()
+            # نظافت اتاق‌های خالی شده
+            room_ids = list(dict.fromkeys(
+                result['room_id'] for result in results if result['success'] and result['room_id']
+            ))
+            if room_ids:
+                task_result = HousekeepingService.create_cleaning_tasks(
+                    room_ids, 'checkout_cleaning', priority='high'
+                )
+                if not task_result['success']:
+                    current_unit_of_work().set_rollback_only()
+                    return task_result
+                for result in results:
+                    if result['success'] and result['room_id']:
+                        result['cleaning_task_id'] = task_result['tasks'][result['room_id']]
 
-                # به‌روزرسانی صورت‌حساب
-                if folio:
-                    folio.folio_status = 'settled'
+                if notify_housekeeping:
+                    notification_service.send_notification({
+                        'title': 'نظافت پس از خروج گروه',
+                        'message': f"{len(room_ids)} اتاق پس از خروج گروه نیاز به نظافت دارند: "
+                                   f"{', '.join(str(room_id) for room_id in room_ids)}",
+                        'type': 'task',
+                        'category': 'housekeeping',
+                        'priority': 'high',
+                        'target_department': 'housekeeping'
+                    })
 
-                session.commit()
+            return GuestService._group_result(results, len(accepted), 'GROUP_CHECK_OUT_FAILED',
+                                              'خروج هیچ اقامتی ثبت نشد')
 
-                logger.info(f"✅ خروج مهمان ثبت شد: Stay ID {stay_id}")
+        try:
+            # کل واحد کاری روی خطاهای گذرا دوباره اجرا می‌شود
+            result = run_in_transaction(check_out, name='check_out_group')
+            if 'results' in result:
+                logger.info(f"✅ خروج گروهی ثبت شد: {result['succeeded']} از {len(stay_ids)} اقامت")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ خطا در ثبت خروج گروهی: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'CHECK_OUT_ERROR'
+            }
+
+    @staticmethod
+    def _group_stay_error(stay_id: int, found: Dict[int, Any], results: List[Dict],
+                          expected_status: str) -> Optional[Dict[str, Any]]:
+        """خطای یک اقامت در عملیات گروهی یا None"""
+        if stay_id not in found:
+            error, error_code = 'اقامت یافت نشد', 'STAY_NOT_FOUND'
+        elif any(result['stay_id'] == stay_id for result in results):
+            error, error_code = 'اقامت تکراری در گروه', 'DUPLICATE_STAY'
+        elif found[stay_id].status != expected_status:
+            error, error_code = f'وضعیت اقامت {found[stay_id].status} است', 'INVALID_STAY_STATUS'
+        else:
+            return None
+        return {'stay_id': stay_id, 'success': False, 'error': error, 'error_code': error_code}
+
+    @staticmethod
+    def _group_result(results: List[Dict], succeeded: int, error_code: str, error: str) -> Dict[str, Any]:
+        """خلاصه نتیجه عملیات گروهی با نتیجه هر اقامت"""
+        summary = {
+            'success': succeeded > 0,
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        }
+        if not succeeded:
+            summary.update({'error': error, 'error_code': error_code})
+        return summary
+
+    @staticmethod
+    def get_guest_details(guest_id: int) -> Dict[str, Any]:
+        """دریافت اطلاعات کامل مهمان (از کش پروفایل)"""
+        try:
+            guest_data = guest_profile_cache.get(guest_id, GuestService._load_guest_profile)
+            if guest_data is None:
+                return {
+                    'success': False,
+                    'error': 'مهمان یافت نشد',
+                    'error_code': 'GUEST_NOT_FOUND'
+                }
+
+            return {
+                'success': True,
+                'guest': guest_data
+            }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در دریافت اطلاعات مهمان: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'GUEST_DETAILS_ERROR'
+            }
+
+    @staticmethod
+    def _load_guest_profile(guest_id: int) -> Optional[Dict[str, Any]]:
+        """ساخت پروفایل مهمان از دیتابیس (None برای مهمان ناموجود)"""
+        with db_session() as session:
+            guest = session.query(Guest).filter(Guest.id == guest_id).first()
+            if not guest:
+                return None
+
+            # اطلاعات اقامت‌های فعال
+            active_stays = session.query(Stay).filter(
+                Stay.guest_id == guest_id,
+                Stay.status.in_(['confirmed', 'checked_in'])
+            ).all()
+
+            # مانده صورت‌حساب اقامت‌های فعال در یک query
+            balances = {}
+            if active_stays:
+                balances = dict(session.query(GuestFolio.stay_id, GuestFolio.current_balance).filter(
+                    GuestFolio.stay_id.in_([stay.id for stay in active_stays])
+                ).all())
+
+            # اطلاعات همراهان
+            companions = session.query(Companion).filter(
+                Companion.guest_id == guest_id
+            ).all()
+
+            return {
+                'id': guest.id,
+                'full_name': f"{guest.first_name} {guest.last_name}",
+                'national_id': guest.national_id,
+                'passport_number': guest.passport_number,
+                'phone': guest.phone,
+                'email': guest.email,
+                'nationality': guest.nationality,
+                'vip_status': guest.vip_status,
+                'special_requests': guest.special_requests,
+                'active_stays': [
+                    {
+                        'stay_id': stay.id,
+                        'status': stay.status,
+                        'planned_check_in': stay.planned_check_in,
+                        'planned_check_out': stay.planned_check_out,
+                        'actual_check_in': stay.actual_check_in,
+                        'folio_balance': balances.get(stay.id)
+                    }
+                    for stay in active_stays
+                ],
+                'companions': [
+                    {
+                        'id': comp.id,
+                        'full_name': f"{comp.first_name} {comp.last_name}",
+                        'relationship': comp.relationship
+                    }
+                    for comp in companions
+                ]
+            }
+
+    @staticmethod
+    @replica_tolerant()
+    def search_guests(search_term: str, search_type: str = 'name', limit: int = 50,
+                      cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        جستجوی رتبه‌بندی شده مهمانان با ایندکس سه‌حرفی
+
+        تطابق کامل و پیشوندی کدملی و تلفن در ابتدا و سایر نتایج به ترتیب
+        شباهت برگردانده می‌شوند (guest_search). نتایج بیش از limit با
+        next_cursor در صفحه‌های بعد دریافت می‌شوند.
+        """
+        try:
+            with db_session() as session:
+                page = guest_search.search_guests(session, search_term, search_type, limit, cursor)
+                results = [hit.to_dict() for hit in page.items]
 
                 return {
                     'success': True,
-                    'stay_id': stay_id,
-                    'check_out_time': stay.actual_check_out,
-                    'message': 'خروج مهمان با موفقیت ثبت شد'
+                    'count': len(results),
+                    'guests': results,
+                    'next_cursor': page.next_cursor
                 }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
-            logger.error(f"❌ خطا در ثبت خروج مهمان: {e}")
+            logger.error(f"❌ خطا در جستجوی مهمانان: {e}")
             return {
                 'success': False,
                 'error': str(e),
-                'error_code': 'CHECK_OUT_ERROR'
+                'error_code': 'GUEST_SEARCH_ERROR'
             }
 
+    # ترتیب‌های مجاز صفحه‌بندی مهمانان (همه با id تکمیل می‌شوند)
+    PAGE_KEYSETS = {
+        'id': Keyset('guests_by_id', Guest.id),
+        'full_name': Keyset('guests_by_last_name', Guest.last_name, Guest.id),
+        'last_name': Keyset('guests_by_last_name', Guest.last_name, Guest.id),
+        'first_name': Keyset('guests_by_first_name', Guest.first_name, Guest.id),
+        'national_id': Keyset('guests_by_national_id', Guest.national_id, Guest.id, nulls={'national_id': ''}),
+        'phone': Keyset('guests_by_phone', Guest.phone, Guest.id)
+    }
+    PAGE_KEYSETS_DESC = {
+        'id': Keyset('guests_by_id_desc', Guest.id.desc()),
+        'full_name': Keyset('guests_by_last_name_desc', Guest.last_name.desc(), Guest.id.desc()),
+        'last_name': Keyset('guests_by_last_name_desc', Guest.last_name.desc(), Guest.id.desc()),
+        'first_name': Keyset('guests_by_first_name_desc', Guest.first_name.desc(), Guest.id.desc()),
+        'national_id': Keyset('guests_by_national_id_desc', Guest.national_id.desc(), Guest.id.desc(),
+                              nulls={'national_id': ''}),
+        'phone': Keyset('guests_by_phone_desc', Guest.phone.desc(), Guest.id.desc())
+    }
+
+    # لیست اقامت‌ها: جدیدترین ورود برنامه‌ریزی شده اول
+    STAY_KEYSET = Keyset('stays_by_check_in', Stay.planned_check_in.desc(), Stay.id.desc())
+
     @staticmethod
-    def get_guest_details(guest_id: int) -> Dict[str, Any]:
-        """دریافت اطلاعات کامل مهمان"""
+    @replica_tolerant()
+    def list_guests_page(search_term: str = '', search_type: str = 'all',
+                         cursor: Optional[str] = None, limit: int = 100,
+                         sort_by: str = 'id', descending: bool = False) -> Dict[str, Any]:
+        """
+        دریافت یک صفحه از مهمانان با صفحه‌بندی keyset
+
+        فیلتر و مرتب‌سازی در دیتابیس انجام می‌شود و next_cursor برگشتی
+        برای دریافت صفحه بعد با همان sort_by و descending استفاده می‌شود.
+        sort_by باید یکی از کلیدهای PAGE_KEYSETS باشد؛ در غیر این صورت
+        خطای INVALID_SORT برگردانده می‌شود.
+        """
+        keysets = GuestService.PAGE_KEYSETS_DESC if descending else GuestService.PAGE_KEYSETS
+        if sort_by not in keysets:
+            return {
+                'success': False,
+                'error': f"مرتب‌سازی بر اساس {sort_by} پشتیبانی نمی‌شود",
+                'error_code': 'INVALID_SORT'
+            }
+
         try:
             with db_session() as session:
-                guest = session.query(Guest).filter(Guest.id == guest_id).first()
-                if not guest:
-                    return {
-                        'success': False,
-                        'error': 'مهمان یافت نشد',
-                        'error_code': 'GUEST_NOT_FOUND'
-                    }
+                query = GuestService._apply_guest_filter(
+                    session.query(*columns_of(GuestListItem, Guest)), search_term, search_type
+                )
+                page = paginate(query, keysets[sort_by], cursor, limit,
+                                projection=GuestListItem)
 
-                # اطلاعات اقامت‌های فعال
-                active_stays = session.query(Stay).filter(
-                    Stay.guest_id == guest_id,
-                    Stay.status.in_(['confirmed', 'checked_in'])
-                ).all()
-
-                # اطلاعات همراهان
-                companions = session.query(Companion).filter(
-                    Companion.guest_id == guest_id
-                ).all()
-
-                guest_data = {
-                    'id': guest.id,
-                    'full_name': f"{guest.first_name} {guest.last_name}",
-                    'national_id': guest.national_id,
-                    'passport_number': guest.passport_number,
-                    'phone': guest.phone,
-                    'email': guest.email,
-                    'nationality': guest.nationality,
-                    'vip_status': guest.vip_status,
-                    'special_requests': guest.special_requests,
-                    'active_stays': [
-                        {
-                            'stay_id': stay.id,
-                            'status': stay.status,
-                            'planned_check_in': stay.planned_check_in,
-                            'planned_check_out': stay.planned_check_out,
-                            'actual_check_in': stay.actual_check_in
-                        }
-                        for stay in active_stays
-                    ],
-                    'companions': [
-                        {
-                            'id': comp.id,
-                            'full_name': f"{comp.first_name} {comp.last_name}",
-                            'relationship': comp.relationship
-                        }
-                        for comp in companions
-                    ]
+                results = [guest.to_dict() for guest in page.items]
+
+                return {
+                    'success': True,
+                    'count': len(results),
+                    'guests': results,
+                    'next_cursor': page.next_cursor
                 }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
+        except Exception as e:
+            logger.error(f"❌ خطا در دریافت صفحه مهمانان: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'GUEST_PAGE_ERROR'
+            }
+
+    @staticmethod
+    @replica_tolerant()
+    def list_stays_page(status: str = None, guest_id: int = None,
+                        cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """دریافت یک صفحه از اقامت‌ها (جدیدترین ورود اول) با صفحه‌بندی keyset"""
+        try:
+            with db_session() as session:
+                query = session.query(
+                    *columns_of(StayGuestItem, Stay, first_name=Guest.first_name, last_name=Guest.last_name)
+                ).join(Guest, Stay.guest_id == Guest.id)
+
+                if status:
+                    query = query.filter(Stay.status == status)
+                if guest_id:
+                    query = query.filter(Stay.guest_id == guest_id)
+
+                page = paginate(query, GuestService.STAY_KEYSET, cursor, limit, projection=StayGuestItem)
+                results = [stay.to_dict() for stay in page.items]
+
                 return {
                     'success': True,
-                    'guest': guest_data
+                    'count': len(results),
+                    'stays': results,
+                    'next_cursor': page.next_cursor
                 }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
-            logger.error(f"❌ خطا در دریافت اطلاعات مهمان: {e}")
+            logger.error(f"❌ خطا در دریافت صفحه اقامت‌ها: {e}")
             return {
                 'success': False,
                 'error': str(e),
-                'error_code': 'GUEST_DETAILS_ERROR'
+                'error_code': 'STAY_PAGE_ERROR'
             }
 
     @staticmethod
-    def search_guests(search_term: str, search_type: str = 'name') -> Dict[str, Any]:
-        """جستجوی مهمانان"""
+    @replica_tolerant()
+    def get_guest_stay_history(guest_id: int) -> Dict[str, Any]:
+        """
+        سابقه کامل اقامت‌های مهمان (جدیدترین اول)
+
+        اقامت‌ها و صورت‌حساب‌های بایگانی شده از اجتماع جدول اصلی و بایگانی
+        خوانده می‌شوند.
+        """
         try:
             with db_session() as session:
-                query = session.query(Guest)
+                stays, folios = unified_entity(Stay), unified_entity(GuestFolio)
+                rows = session.query(
+                    stays.id, stays.status, stays.planned_check_in, stays.planned_check_out,
+                    stays.actual_check_in, stays.actual_check_out, stays.total_amount,
+                    folios.total_charges, folios.total_payments
+                ).outerjoin(
+                    folios, folios.stay_id == stays.id
+                ).filter(
+                    stays.guest_id == guest_id
+                ).order_by(stays.planned_check_in.desc(), stays.id.desc()).all()
 
-                if search_type == 'name':
-                    query = query.filter(
-                        (Guest.first_name.ilike(f"%{search_term}%")) |
-                        (Guest.last_name.ilike(f"%{search_term}%"))
-                    )
-                elif search_type == 'national_id':
-                    query = query.filter(Guest.national_id.ilike(f"%{search_term}%"))
-                elif search_type == 'phone':
-                    query = query.filter(Guest.phone.ilike(f"%{search_term}%"))
-                elif search_type == 'passport':
-                    query = query.filter(Guest.passport_number.ilike(f"%{search_term}%"))
+                history = [
+                    {
+                        'stay_id': row.id,
+                        'status': row.status,
+                        'planned_check_in': row.planned_check_in,
+                        'planned_check_out': row.planned_check_out,
+                        'actual_check_in': row.actual_check_in,
+                        'actual_check_out': row.actual_check_out,
+                        'total_amount': float(row.total_amount or 0),
+                        'total_charges': float(row.total_charges or 0),
+                        'total_payments': float(row.total_payments or 0)
+                    }
+                    for row in rows
+                ]
+
+                return {
+                    'success': True,
+                    'count': len(history),
+                    'stays': history
+                }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در دریافت سابقه اقامت مهمان: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'STAY_HISTORY_ERROR'
+            }
 
-                guests = query.limit(50).all()
+    # صف بررسی مهمانان تکراری: بیشترین امتیاز اول
+    DUPLICATE_KEYSET = Keyset('guest_duplicates_by_score', GuestDuplicateCandidate.score.desc(),
+                              GuestDuplicateCandidate.id.desc())
+
+    # فیلدهایی که در ادغام اگر در رکورد نگهداری شده خالی باشند از رکورد تکراری پر می‌شوند
+    MERGE_FILL_FIELDS = (
+        'national_id', 'passport_number', 'gender', 'date_of_birth', 'nationality', 'email',
+        'address', 'emergency_contact', 'emergency_phone', 'company_name', 'company_address',
+        'business_title', 'id_card_image', 'passport_image', 'guest_photo', 'special_requests'
+    )
+
+    @staticmethod
+    def detect_duplicate_guests(threshold: float = None, max_block: int = None) -> Dict[str, Any]:
+        """
+        تشخیص مهمانان احتمالاً تکراری و جایگزینی صف بررسی
+
+        Returns:
+            Dict: آمار اجرا (candidates، blocks، skipped_blocks، comparisons، elapsed_seconds)
+        """
+        try:
+            with db_session() as session:
+                stats = GuestDuplicateDetector(threshold, max_block).run(session)
+                session.commit()
+
+            return {
+                'success': True,
+                **stats
+            }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در تشخیص مهمانان تکراری: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'DUPLICATE_DETECTION_ERROR'
+            }
+
+    @staticmethod
+    def get_duplicate_candidates(cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """دریافت یک صفحه از جفت‌های تکراری در انتظار بررسی (بیشترین امتیاز اول)"""
+        try:
+            with db_session() as session:
+                query = session.query(GuestDuplicateCandidate).filter(GuestDuplicateCandidate.status == 'pending')
+                page = paginate(query, GuestService.DUPLICATE_KEYSET, cursor, limit)
 
                 results = [
                     {
-                        'id': guest.id,
-                        'full_name': f"{guest.first_name} {guest.last_name}",
-                        'national_id': guest.national_id,
-                        'phone': guest.phone,
-                        'email': guest.email,
-                        'vip_status': guest.vip_status
+                        'id': candidate.id,
+                        'guest_id': candidate.guest_id,
+                        'duplicate_id': candidate.duplicate_id,
+                        'score': candidate.score,
+                        'reasons': candidate.reasons.split(',') if candidate.reasons else [],
+                        'detected_at': candidate.detected_at
                     }
-                    for guest in guests
+                    for candidate in page.items
                 ]
 
                 return {
                     'success': True,
                     'count': len(results),
-                    'guests': results
+                    'candidates': results,
+                    'next_cursor': page.next_cursor
                 }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
-            logger.error(f"❌ خطا در جستجوی مهمانان: {e}")
+            logger.error(f"❌ خطا در دریافت مهمانان تکراری: {e}")
             return {
                 'success': False,
                 'error': str(e),
-                'error_code': 'GUEST_SEARCH_ERROR'
+                'error_code': 'DUPLICATE_LIST_ERROR'
+            }
+
+    @staticmethod
+    def dismiss_duplicate(candidate_id: int) -> Dict[str, Any]:
+        """رد یک جفت تکراری (در تشخیص‌های بعدی دوباره پیشنهاد نمی‌شود)"""
+        try:
+            with db_session() as session:
+                candidate = session.query(GuestDuplicateCandidate).filter(
+                    GuestDuplicateCandidate.id == candidate_id
+                ).first()
+                if not candidate:
+                    return {
+                        'success': False,
+                        'error': 'جفت تکراری یافت نشد',
+                        'error_code': 'CANDIDATE_NOT_FOUND'
+                    }
+
+                candidate.status = 'dismissed'
+                candidate.resolved_at = datetime.now()
+                session.commit()
+
+            return {
+                'success': True,
+                'message': 'جفت تکراری رد شد'
+            }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در رد جفت تکراری: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'DUPLICATE_DISMISS_ERROR'
+            }
+
+    @staticmethod
+    def merge_guests(keep_id: int, duplicate_id: int) -> Dict[str, Any]:
+        """
+        ادغام مهمان تکراری در مهمان نگهداری شده
+
+        اقامت‌ها (و صورت‌حساب‌های آن‌ها، از جمله اقامت‌های بایگانی شده)،
+        همراهان و اشیای گمشده مهمان تکراری هر کدام با یک UPDATE به مهمان
+        نگهداری شده منتقل می‌شوند،
+        فیلدهای خالی رکورد نگهداری شده از رکورد تکراری پر می‌شوند و رکورد
+        تکراری حذف می‌شود. حذف و ویرایش مهمانان با ORM انجام می‌شود تا
+        کلیدهای جستجو، ایندکس جستجو و کش پروفایل به‌روز شوند.
+
+        Returns:
+            Dict: تعداد رکوردهای منتقل شده هر جدول در moved
+        """
+        from app.models.reception.housekeeping_models import LostAndFound
+
+        if keep_id == duplicate_id:
+            return {
+                'success': False,
+                'error': 'مهمان با خودش ادغام نمی‌شود',
+                'error_code': 'INVALID_MERGE'
+            }
+
+        try:
+            with db_session() as session:
+                guests = {
+                    guest.id: guest
+                    for guest in session.query(Guest).filter(Guest.id.in_([keep_id, duplicate_id]))
+                }
+                if len(guests) != 2:
+                    return {
+                        'success': False,
+                        'error': 'مهمان یافت نشد',
+                        'error_code': 'GUEST_NOT_FOUND'
+                    }
+                keep, duplicate = guests[keep_id], guests[duplicate_id]
+
+                moved = {}
+                for name, table in (('stays', Stay.__table__), ('archived_stays', ARCHIVE_TABLES[Stay]),
+                                    ('companions', Companion.__table__), ('lost_items', LostAndFound.__table__)):
+                    moved[name] = session.execute(
+                        update(table).where(table.c.guest_id == duplicate_id).values(guest_id=keep_id)
+                    ).rowcount
+
+                filled = {
+                    field: getattr(duplicate, field) for field in GuestService.MERGE_FILL_FIELDS
+                    if getattr(keep, field) in (None, '') and getattr(duplicate, field) not in (None, '')
+                }
+                preferences = {**(duplicate.preferences or {}), **(keep.preferences or {})}
+                vip_status = bool(keep.vip_status or duplicate.vip_status)
+
+                # کدملی یکتاست؛ رکورد تکراری پیش از انتقال مقادیر حذف می‌شود
+                session.delete(duplicate)
+                session.flush()
+
+                for field, value in filled.items():
+                    setattr(keep, field, value)
+                keep.preferences = preferences
+                keep.vip_status = vip_status
+
+                candidates = GuestDuplicateCandidate.__table__
+                resolved_at = datetime.now()
+                session.execute(
+                    update(candidates)
+                    .where(or_(
+                        and_(candidates.c.guest_id == keep_id, candidates.c.duplicate_id == duplicate_id),
+                        and_(candidates.c.guest_id == duplicate_id, candidates.c.duplicate_id == keep_id)
+                    ))
+                    .values(status='merged', resolved_at=resolved_at)
+                )
+                session.execute(
+                    delete(candidates).where(
+                        candidates.c.status == 'pending',
+                        or_(candidates.c.guest_id == duplicate_id, candidates.c.duplicate_id == duplicate_id)
+                    )
+                )
+
+                # انتقال اقامت‌ها و همراهان با Core رویداد mapper ندارد
+                invalidate_after_commit(session, [keep_id, duplicate_id])
+                session.commit()
+
+            logger.info(f"✅ مهمان {duplicate_id} در مهمان {keep_id} ادغام شد: {moved}")
+
+            return {
+                'success': True,
+                'guest_id': keep_id,
+                'merged_guest_id': duplicate_id,
+                'moved': moved,
+                'filled_fields': sorted(filled),
+                'message': 'مهمانان با موفقیت ادغام شدند'
+            }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در ادغام مهمانان: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'GUEST_MERGE_ERROR'
             }
 
     # متدهای کمکی خصوصی
+    @staticmethod
+    def _apply_guest_filter(query, search_term: str, search_type: str):
+        """اعمال فیلتر جستجو روی query مهمانان"""
+        if not search_term:
+            return query
+
+        pattern = f"%{search_term}%"
+        if search_type == 'name':
+            return query.filter(or_(Guest.first_name.ilike(pattern), Guest.last_name.ilike(pattern)))
+        elif search_type == 'national_id':
+            return query.filter(Guest.national_id.ilike(pattern))
+        elif search_type == 'phone':
+            return query.filter(Guest.phone.ilike(pattern))
+        elif search_type == 'passport':
+            return query.filter(Guest.passport_number.ilike(pattern))
+
+        return query.filter(or_(
+            Guest.first_name.ilike(pattern),
+            Guest.last_name.ilike(pattern),
+            Guest.national_id.ilike(pattern),
+            Guest.phone.ilike(pattern),
+            Guest.passport_number.ilike(pattern)
+        ))
+
     @staticmethod
     def _create_guest(guest_data: Dict) -> Guest:
         """ایجاد شیء مهمان جدید"""
@@ -371,17 +1227,42 @@ class GuestService:
         )
 
     @staticmethod
-    def _create_companion(guest_id: int, companion_data: Dict) -> Companion:
-        """ایجاد شیء همراه جدید"""
-        return Companion(
-            guest_id=guest_id,
-            first_name=companion_data.get('first_name', ''),
-            last_name=companion_data.get('last_name', ''),
-            relationship=companion_data.get('relationship', 'همراه'),
-            date_of_birth=companion_data.get('date_of_birth'),
-            national_id=companion_data.get('national_id'),
-            phone=companion_data.get('phone')
-        )
+    def _match_returned_ids(session: Session, table, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        نگاشت idهای RETURNING یک INSERT چندسطری به ترتیب ورودی
+
+        SQLite بدون ستون sentinel ترتیب RETURNING را تضمین نمی‌کند و با
+        sort_by_parameter_order سطر به سطر درج می‌کند؛ idها با همه ستون‌های
+        درج شده به ورودی نگاشت می‌شوند. سطرهایی که در همه ستون‌ها یکسان‌اند
+        قابل تمایز نیستند و جابه‌جایی id آن‌ها داده ذخیره شده را تغییر نمی‌دهد.
+        """
+        columns = list(rows[0])
+        returned = session.execute(
+            insert(table).returning(table.c.id, *[table.c[column] for column in columns]),
+            rows
+        ).all()
+
+        ids_by_values = defaultdict(list)
+        for row in returned:
+            ids_by_values[_match_key(row[1:])].append(row[0])
+        return [
+            ids_by_values[_match_key(values[column] for column in columns)].pop(0)
+            for values in rows
+        ]
+
+    @staticmethod
+    def _companion_values(guest_id: int, companion_data: Dict) -> Dict[str, Any]:
+        """مقادیر ستون‌های همراه جدید"""
+        return {
+            'guest_id': guest_id,
+            'first_name': companion_data.get('first_name', ''),
+            'last_name': companion_data.get('last_name', ''),
+            'relationship': companion_data.get('relationship', 'همراه'),
+            'date_of_birth': companion_data.get('date_of_birth'),
+            'national_id': companion_data.get('national_id'),
+            'phone': companion_data.get('phone'),
+            'emergency_contact': bool(companion_data.get('emergency_contact', False))
+        }
 
     @staticmethod
     def _create_guest_folio(stay_id: int) -> GuestFolio:
@@ -7,14 +7,17 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, insert, select
 
-from app.core.database import db_session
+from app.core.database import db_session, replica_tolerant
+from app.core.pagination import Keyset, InvalidCursorError, paginate
 from app.models.reception.housekeeping_models import HousekeepingTask, HousekeepingStaff, QualityInspection
 from app.models.reception.room_status_models import RoomStatusChange
 from app.models.shared.hotel_models import HotelRoom
 from app.models.reception.guest_models import Stay
+from app.models.reception.staff_models import Staff
+from app.services.reception.projections import TaskListItem, columns_of, fetch_projection
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -22,6 +25,10 @@ logger = logging.getLogger(__name__)
 class HousekeepingService:
     """سرویس مدیریت خانه‌داری و نظافت"""
 
+    # لیست وظایف: اولویت نزولی، سپس زمان برنامه‌ریزی
+    TASK_KEYSET = Keyset('tasks_by_priority', HousekeepingTask.priority.desc(),
+                         HousekeepingTask.scheduled_time, HousekeepingTask.id, nulls={'priority': ''})
+
     @staticmethod
     def create_cleaning_task(room_id: int, task_type: str, scheduled_time: datetime = None,
                            priority: str = 'medium', assigned_to: int = None) -> Dict[str, Any]:
@@ -82,6 +89,85 @@ class HousekeepingService:
                 'error_code': 'TASK_CREATION_ERROR'
             }
 
+    @staticmethod
+    def create_cleaning_tasks(room_ids: List[int], task_type: str, scheduled_time: datetime = None,
+                              priority: str = 'medium') -> Dict[str, Any]:
+        """
+        ایجاد گروهی وظایف نظافت (مثلاً پس از خروج یک گروه)
+
+        وجود همه اتاق‌ها با یک SELECT بررسی می‌شود؛ اگر اتاقی یافت نشود هیچ
+        وظیفه‌ای ساخته نمی‌شود و ROOM_NOT_FOUND با شناسه اتاق‌های ناموجود
+        برگردانده می‌شود. سپس وظایف با یک INSERT چندسطری و تغییرات وضعیت
+        اتاق با یک executemany ثبت می‌شوند؛ برای هر اتاق یک وظیفه ساخته می‌شود.
+
+        Returns:
+            Dict: tasks شامل {room_id: task_id}
+        """
+        room_ids = list(dict.fromkeys(room_ids))
+        if not room_ids:
+            return {'success': True, 'tasks': {}}
+
+        try:
+            with db_session() as session:
+                # بررسی وجود اتاق‌ها
+                rooms = HotelRoom.__table__
+                found = set(session.execute(
+                    select(rooms.c.id).where(rooms.c.id.in_(room_ids))
+                ).scalars())
+                missing = [room_id for room_id in room_ids if room_id not in found]
+                if missing:
+                    return {
+                        'success': False,
+                        'error': 'اتاق یافت نشد',
+                        'error_code': 'ROOM_NOT_FOUND',
+                        'room_ids': missing
+                    }
+
+                scheduled_time = scheduled_time or datetime.now()
+                tasks = HousekeepingTask.__table__
+                rows = session.execute(
+                    insert(tasks).returning(tasks.c.room_id, tasks.c.id),
+                    [
+                        {
+                            'room_id': room_id,
+                            'task_type': task_type,
+                            'scheduled_time': scheduled_time,
+                            'priority': priority,
+                            'status': 'pending'
+                        }
+                        for room_id in room_ids
+                    ]
+                ).all()
+
+                session.execute(insert(RoomStatusChange.__table__), [
+                    {
+                        'room_id': room_id,
+                        'previous_status': 'vacant',
+                        'new_status': 'cleaning',
+                        'status_reason': f'وظیفه نظافت: {task_type}',
+                        'changed_by': 0,  # سیستم
+                        'change_type': 'housekeeping'
+                    }
+                    for room_id in room_ids
+                ])
+
+                session.commit()
+
+                logger.info(f"🧹 {len(rows)} وظیفه نظافت ایجاد شد: نوع {task_type}")
+
+                return {
+                    'success': True,
+                    'tasks': dict(rows)
+                }
+
+        except Exception as e:
+            logger.error(f"❌ خطا در ایجاد گروهی وظایف نظافت: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'TASK_CREATION_ERROR'
+            }
+
     @staticmethod
     def assign_task(task_id: int, staff_id: int) -> Dict[str, Any]:
         """محول کردن وظیفه به کارمند خانه‌داری"""
@@ -300,14 +386,13 @@ class HousekeepingService:
             }
 
     @staticmethod
-    def get_tasks(status: str = None, staff_id: int = None, date: date = None) -> Dict[str, Any]:
-        """دریافت لیست وظایف خانه‌داری"""
+    @replica_tolerant()
+    def get_tasks(status: str = None, staff_id: int = None, date: date = None,
+                  cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """دریافت یک صفحه از وظایف خانه‌داری (اولویت بالاتر و زودتر اول)"""
         try:
             with db_session() as session:
-                query = session.query(HousekeepingTask).options(
-                    joinedload(HousekeepingTask.room),
-                    joinedload(HousekeepingTask.staff)
-                )
+                query = HousekeepingService._task_list_query(session)
 
                 # فیلترها
                 if status:
@@ -319,35 +404,22 @@ class HousekeepingService:
                 if date:
                     query = query.filter(func.date(HousekeepingTask.scheduled_time) == date)
 
-                tasks = query.order_by(
-                    HousekeepingTask.priority.desc(),
-                    HousekeepingTask.scheduled_time.asc()
-                ).all()
-
-                tasks_data = [
-                    {
-                        'task_id': task.id,
-                        'room_id': task.room_id,
-                        'room_number': task.room.room_number if task.room else 'نامشخص',
-                        'task_type': task.task_type,
-                        'status': task.status,
-                        'priority': task.priority,
-                        'scheduled_time': task.scheduled_time,
-                        'assigned_to': task.assigned_to,
-                        'staff_name': f"{task.staff.first_name} {task.staff.last_name}" if task.staff else 'محول نشده',
-                        'actual_start': task.actual_start,
-                        'completed_at': task.completed_at,
-                        'quality_rating': task.quality_rating
-                    }
-                    for task in tasks
-                ]
+                page = paginate(query, HousekeepingService.TASK_KEYSET, cursor, limit, projection=TaskListItem)
+                tasks_data = [task.to_dict() for task in page.items]
 
                 return {
                     'success': True,
                     'tasks': tasks_data,
-                    'count': len(tasks_data)
+                    'count': len(tasks_data),
+                    'next_cursor': page.next_cursor
                 }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
             logger.error(f"❌ خطا در دریافت لیست وظایف: {e}")
             return {
@@ -418,9 +490,12 @@ class HousekeepingService:
                 ).all()
 
                 # وظایف برنامه‌ریزی شده برای امروز
-                scheduled_tasks = session.query(HousekeepingTask).filter(
-                    func.date(HousekeepingTask.scheduled_time) == target_date
-                ).all()
+                scheduled_tasks = fetch_projection(
+                    HousekeepingService._task_list_query(session).filter(
+                        func.date(HousekeepingTask.scheduled_time) == target_date
+                    ),
+                    TaskListItem
+                )
 
                 schedule_data = {
                     'date': target_date,
@@ -436,19 +511,21 @@ class HousekeepingService:
                     'scheduled_tasks': [
                         {
                             'task_id': task.id,
-                            'room_number': task.room.room_number if task.room else 'نامشخص',
+                            'room_number': task.room_number or 'نامشخص',
                             'task_type': task.task_type,
                             'status': task.status,
-                            'assigned_staff': f"{task.staff.first_name} {task.staff.last_name}" if task.staff else None
+                            'assigned_staff': task.staff_name
                         }
                         for task in scheduled_tasks
                     ],
                     'checkout_rooms': [
                         {
                             'room_id': room_id,
-                            'room_number': session.query(HotelRoom.room_number).filter(HotelRoom.id == room_id).scalar()
+                            'room_number': room_number
                         }
-                        for room_id in session.query(checkout_rooms.c.room_id).all()
+                        for room_id, room_number in session.query(
+                            checkout_rooms.c.room_id, HotelRoom.room_number
+                        ).outerjoin(HotelRoom, HotelRoom.id == checkout_rooms.c.room_id).all()
                     ]
                 }
 
@@ -466,6 +543,7 @@ class HousekeepingService:
             }
 
     @staticmethod
+    @replica_tolerant()
     def get_performance_metrics(staff_id: int = None, start_date: date = None, end_date: date = None) -> Dict[str, Any]:
         """دریافت معیارهای عملکرد خانه‌داری"""
         try:
@@ -533,3 +611,18 @@ class HousekeepingService:
                 'error': str(e),
                 'error_code': 'PERFORMANCE_METRICS_ERROR'
             }
+
+    # متدهای کمکی خصوصی
+    @staticmethod
+    def _task_list_query(session: Session):
+        """query ستونی وظایف همراه با شماره اتاق و نام کارمند"""
+        return session.query(*columns_of(
+            TaskListItem, HousekeepingTask,
+            room_number=HotelRoom.room_number,
+            staff_first_name=Staff.first_name,
+            staff_last_name=Staff.last_name
+        )).outerjoin(
+            HotelRoom, HotelRoom.id == HousekeepingTask.room_id
+        ).outerjoin(
+            Staff, Staff.id == HousekeepingTask.assigned_to
+        )
@@ -30,24 +30,7 @@ class InitialDataService:
             logger.info("🚀 شروع ایجاد داده‌های اولیه سیستم پذیرش...")
 
             with db_session() as session:
-                # ایجاد نقش‌ها و دپارتمان‌ها
-                InitialDataService._create_roles_and_departments(session)
-
-                # ایجاد کاربران نمونه
-                InitialDataService._create_sample_users(session)
-
-                # ایجاد اتاق‌ها و انواع اتاق
-                InitialDataService._create_rooms_and_types(session)
-
-                # ایجاد مهمانان و اقامت‌های نمونه
-                InitialDataService._create_sample_guests_and_stays(session)
-
-                # ایجاد داده‌های خانه‌داری
-                InitialDataService._create_housekeeping_data(session)
-
-                # ایجاد داده‌های تعمیرات
-                InitialDataService._create_maintenance_data(session)
-
+                InitialDataService.seed(session)
                 session.commit()
 
             logger.info("✅ داده‌های اولیه سیستم پذیرش با موفقیت ایجاد شدند")
@@ -57,6 +40,32 @@ class InitialDataService:
             logger.error(f"❌ خطا در ایجاد داده‌های اولیه: {e}")
             return False
 
+    @staticmethod
+    def seed(session: Session):
+        """
+        درج داده‌های اولیه در session داده شده (بدون commit)
+
+        هر بخش وجود رکوردها را بررسی می‌کند؛ از database.seed_initial_data
+        در راه‌اندازی اجرا می‌شود تا یک بار با موفقیت در data_seed ثبت شود.
+        """
+        # ایجاد نقش‌ها و دپارتمان‌ها
+        InitialDataService._create_roles_and_departments(session)
+
+        # ایجاد کاربران نمونه
+        InitialDataService._create_sample_users(session)
+
+        # ایجاد اتاق‌ها و انواع اتاق
+        InitialDataService._create_rooms_and_types(session)
+
+        # ایجاد مهمانان و اقامت‌های نمونه
+        InitialDataService._create_sample_guests_and_stays(session)
+
+        # ایجاد داده‌های خانه‌داری
+        InitialDataService._create_housekeeping_data(session)
+
+        # ایجاد داده‌های تعمیرات
+        InitialDataService._create_maintenance_data(session)
+
     @staticmethod
     def _create_roles_and_departments(session: Session):
         """ایجاد نقش‌ها و دپارتمان‌های اولیه"""
@@ -10,7 +10,8 @@ from decimal import Decimal
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, func
 
-from app.core.database import db_session
+from app.core.database import db_session, replica_tolerant
+from app.core.pagination import Keyset, InvalidCursorError, paginate
 from app.models.reception.maintenance_models import MaintenanceRequest, MaintenanceStaff, MaintenanceWorkLog
 from app.models.reception.room_status_models import RoomStatusChange
 from app.models.shared.hotel_models import HotelRoom
@@ -22,6 +23,10 @@ logger = logging.getLogger(__name__)
 class MaintenanceService:
     """سرویس مدیریت تعمیرات و تاسیسات"""
 
+    # لیست درخواست‌ها: اولویت نزولی، سپس قدیمی‌ترین اول
+    REQUEST_KEYSET = Keyset('maintenance_by_priority', MaintenanceRequest.priority.desc(),
+                            MaintenanceRequest.created_at, MaintenanceRequest.id, nulls={'priority': ''})
+
     @staticmethod
     def create_maintenance_request(room_id: int, issue_type: str, description: str,
                                  reported_by: int, priority: str = 'medium') -> Dict[str, Any]:
@@ -366,9 +371,11 @@ class MaintenanceService:
             }
 
     @staticmethod
+    @replica_tolerant()
     def get_maintenance_requests(status: str = None, technician_id: int = None,
-                               priority: str = None) -> Dict[str, Any]:
-        """دریافت لیست درخواست‌های تعمیرات"""
+                               priority: str = None, cursor: Optional[str] = None,
+                               limit: int = 100) -> Dict[str, Any]:
+        """دریافت یک صفحه از درخواست‌های تعمیرات (اولویت بالاتر و قدیمی‌تر اول)"""
         try:
             with db_session() as session:
                 query = session.query(MaintenanceRequest).options(
@@ -387,10 +394,7 @@ class MaintenanceService:
                 if priority:
                     query = query.filter(MaintenanceRequest.priority == priority)
 
-                requests = query.order_by(
-                    MaintenanceRequest.priority.desc(),
-                    MaintenanceRequest.created_at.asc()
-                ).all()
+                page = paginate(query, MaintenanceService.REQUEST_KEYSET, cursor, limit)
 
                 requests_data = [
                     {
@@ -409,15 +413,22 @@ class MaintenanceService:
                         'assigned_at': req.assigned_at,
                         'completed_at': req.completed_at
                     }
-                    for req in requests
+                    for req in page.items
                 ]
 
                 return {
                     'success': True,
                     'requests': requests_data,
-                    'count': len(requests_data)
+                    'count': len(requests_data),
+                    'next_cursor': page.next_cursor
                 }
 
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
         except Exception as e:
             logger.error(f"❌ خطا در دریافت لیست درخواست‌ها: {e}")
             return {
@@ -504,6 +515,7 @@ class MaintenanceService:
             }
 
     @staticmethod
+    @replica_tolerant()
     def get_maintenance_metrics(start_date: date = None, end_date: date = None) -> Dict[str, Any]:
         """دریافت معیارهای عملکرد تعمیرات"""
         try:
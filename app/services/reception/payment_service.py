@@ -9,10 +9,14 @@ from datetime import datetime
 from decimal import Decimal
 from sqlalchemy.orm import Session, joinedload
 
-from app.core.database import db_session
+from app.core.database import db_session, replica_tolerant
+from app.core.pagination import Keyset, InvalidCursorError, paginate
+from app.core.transactions import run_in_transaction
+from app.core.unit_of_work import unit_of_work
 from app.models.reception.payment_models import Payment, GuestFolio, FolioTransaction, CashierShift
 from app.models.reception.guest_models import Stay
 from app.core.payment_processor import payment_processor
+from app.services.reception.projections import PaymentListItem, columns_of
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -20,10 +24,18 @@ logger = logging.getLogger(__name__)
 class PaymentService:
     """سرویس مدیریت پرداخت‌ها و مالی"""
 
+    # لیست پرداخت‌ها: جدیدترین اول
+    PAYMENT_KEYSET = Keyset('payments_by_created_at', Payment.created_at.desc(), Payment.id.desc())
+
     @staticmethod
     def process_payment(stay_id: int, amount: Decimal, payment_method: str,
                        payment_data: Dict) -> Dict[str, Any]:
-        """پردازش پرداخت مهمان"""
+        """
+        پردازش پرداخت مهمان
+
+        تراکنش کارت‌خوان یک بار و خارج از واحد کاری انجام می‌شود؛ فقط ثبت
+        پرداخت در دیتابیس روی خطاهای گذرا دوباره اجرا می‌شود.
+        """
         try:
             with db_session() as session:
                 # بررسی اقامت
@@ -35,26 +47,32 @@ class PaymentService:
                         'error_code': 'STAY_NOT_FOUND'
                     }
 
-                # دریافت صورت‌حساب
-                folio = session.query(GuestFolio).filter(GuestFolio.stay_id == stay_id).first()
-                if not folio:
+                # بررسی صورت‌حساب
+                has_folio = session.query(GuestFolio.id).filter(GuestFolio.stay_id == stay_id).first()
+                if not has_folio:
                     return {
                         'success': False,
                         'error': 'صورت‌حساب یافت نشد',
                         'error_code': 'FOLIO_NOT_FOUND'
                     }
 
-                # پردازش پرداخت
-                payment_result = payment_processor.process_payment({
-                    'amount': amount,
-                    'payment_method': payment_method,
-                    'cash_received': payment_data.get('cash_received'),
-                    'card_data': payment_data.get('card_data', {}),
-                    'description': f'پرداخت اقامت مهمان {stay.guest.first_name} {stay.guest.last_name}'
-                })
+                description = f'پرداخت اقامت مهمان {stay.guest.first_name} {stay.guest.last_name}'
 
-                if not payment_result['success']:
-                    return payment_result
+            # پردازش پرداخت
+            payment_result = payment_processor.process_payment({
+                'amount': amount,
+                'payment_method': payment_method,
+                'cash_received': payment_data.get('cash_received'),
+                'card_data': payment_data.get('card_data', {}),
+                'description': description
+            })
+
+            if not payment_result['success']:
+                return payment_result
+
+            def record(session: Session) -> Dict[str, Any]:
+                stay = session.query(Stay).filter(Stay.id == stay_id).first()
+                folio = session.query(GuestFolio).filter(GuestFolio.stay_id == stay_id).first()
 
                 # ایجاد رکورد پرداخت
                 payment = Payment(
@@ -96,10 +114,6 @@ class PaymentService:
                 # به‌روزرسانی اقامت
                 stay.remaining_balance = folio.current_balance
 
-                session.commit()
-
-                logger.info(f"✅ پرداخت موفق: {amount} {config.payment.default_currency} برای اقامت {stay_id}")
-
                 return {
                     'success': True,
                     'payment_id': payment.id,
@@ -111,6 +125,12 @@ class PaymentService:
                     'message': 'پرداخت با موفقیت انجام شد'
                 }
 
+            result = run_in_transaction(record, name='process_payment')
+
+            logger.info(f"✅ پرداخت موفق: {amount} {config.payment.default_currency} برای اقامت {stay_id}")
+
+            return result
+
         except Exception as e:
             logger.error(f"❌ خطا در پردازش پرداخت: {e}")
             return {
@@ -119,6 +139,57 @@ class PaymentService:
                 'error_code': 'PAYMENT_PROCESSING_ERROR'
             }
 
+    @staticmethod
+    def settle_stay(stay_id: int, charges: List[Dict], payment_method: str,
+                    payment_data: Dict, amount: Decimal = None) -> Dict[str, Any]:
+        """
+        ثبت هزینه‌های پایانی و پرداخت در یک تراکنش
+
+        هزینه‌ها (مثلاً مینی‌بار) با add_folio_charge و پرداخت با
+        process_payment در یک unit_of_work ثبت می‌شوند؛ با شکست هر مرحله
+        هیچ تراکنشی در صورت‌حساب باقی نمی‌ماند. بدون amount کل مانده
+        صورت‌حساب پس از هزینه‌ها پرداخت می‌شود.
+        """
+        try:
+            with unit_of_work() as uow:
+                charge_ids = []
+                for charge in charges:
+                    charge_result = PaymentService.add_folio_charge(
+                        stay_id=stay_id,
+                        amount=charge['amount'],
+                        description=charge['description'],
+                        category=charge.get('category', 'service'),
+                        subcategory=charge.get('subcategory')
+                    )
+                    if not charge_result['success']:
+                        uow.set_rollback_only()
+                        return charge_result
+                    charge_ids.append(charge_result['transaction_id'])
+
+                if amount is None:
+                    folio = uow.session.query(GuestFolio).filter(
+                        GuestFolio.stay_id == stay_id
+                    ).first()
+                    amount = folio.current_balance if folio else Decimal('0')
+
+                payment_result = PaymentService.process_payment(
+                    stay_id, amount, payment_method, payment_data
+                )
+                if not payment_result['success']:
+                    uow.set_rollback_only()
+                    return payment_result
+
+                payment_result['charge_transaction_ids'] = charge_ids
+                return payment_result
+
+        except Exception as e:
+            logger.error(f"❌ خطا در تسویه اقامت: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'PAYMENT_PROCESSING_ERROR'
+            }
+
     @staticmethod
     def get_guest_folio(stay_id: int) -> Dict[str, Any]:
         """دریافت صورت‌حساب مهمان"""
@@ -194,54 +265,104 @@ class PaymentService:
             }
 
     @staticmethod
-    def add_folio_charge(stay_id: int, amount: Decimal, description: str,
-                        category: str, subcategory: str = None) -> Dict[str, Any]:
-        """افزودن هزینه به صورت‌حساب مهمان"""
+    @replica_tolerant()
+    def list_payments_page(stay_id: int = None, status: str = None, payment_method: str = None,
+                           start_date: datetime = None, end_date: datetime = None,
+                           cursor: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """دریافت یک صفحه از پرداخت‌ها (جدیدترین اول) با صفحه‌بندی keyset"""
         try:
             with db_session() as session:
-                folio = session.query(GuestFolio).filter(
-                    GuestFolio.stay_id == stay_id
-                ).first()
+                query = session.query(*columns_of(PaymentListItem, Payment))
+
+                if stay_id:
+                    query = query.filter(Payment.stay_id == stay_id)
+                if status:
+                    query = query.filter(Payment.status == status)
+                if payment_method:
+                    query = query.filter(Payment.payment_method == payment_method)
+                if start_date:
+                    query = query.filter(Payment.created_at >= start_date)
+                if end_date:
+                    query = query.filter(Payment.created_at <= end_date)
+
+                page = paginate(query, PaymentService.PAYMENT_KEYSET, cursor, limit,
+                                projection=PaymentListItem)
+                results = [payment.to_dict() for payment in page.items]
 
-                if not folio:
-                    return {
-                        'success': False,
-                        'error': 'صورت‌حساب یافت نشد',
-                        'error_code': 'FOLIO_NOT_FOUND'
-                    }
+                return {
+                    'success': True,
+                    'count': len(results),
+                    'payments': results,
+                    'next_cursor': page.next_cursor
+                }
 
-                # ایجاد تراکنش هزینه
-                transaction = FolioTransaction(
-                    folio_id=folio.id,
-                    transaction_type='charge',
-                    amount=amount,
-                    description=description,
-                    category=category,
-                    subcategory=subcategory
-                )
-                session.add(transaction)
+        except InvalidCursorError as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'INVALID_CURSOR'
+            }
+        except Exception as e:
+            logger.error(f"❌ خطا در دریافت صفحه پرداخت‌ها: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'error_code': 'PAYMENT_PAGE_ERROR'
+            }
 
-                # به‌روزرسانی صورت‌حساب
-                folio.total_charges += amount
-                folio.current_balance = folio.total_charges - folio.total_payments
+    @staticmethod
+    def add_folio_charge(stay_id: int, amount: Decimal, description: str,
+                        category: str, subcategory: str = None) -> Dict[str, Any]:
+        """افزودن هزینه به صورت‌حساب مهمان"""
+        def add_charge(session: Session) -> Dict[str, Any]:
+            folio = session.query(GuestFolio).filter(
+                GuestFolio.stay_id == stay_id
+            ).first()
 
-                # به‌روزرسانی اقامت
-                stay = session.query(Stay).filter(Stay.id == stay_id).first()
-                if stay:
-                    stay.remaining_balance = folio.current_balance
+            if not folio:
+                return {
+                    'success': False,
+                    'error': 'صورت‌حساب یافت نشد',
+                    'error_code': 'FOLIO_NOT_FOUND'
+                }
 
-                session.commit()
+            # ایجاد تراکنش هزینه
+            transaction = FolioTransaction(
+                folio_id=folio.id,
+                transaction_type='charge',
+                amount=amount,
+                description=description,
+                category=category,
+                subcategory=subcategory
+            )
+            session.add(transaction)
+
+            # به‌روزرسانی صورت‌حساب
+            folio.total_charges += amount
+            folio.current_balance = folio.total_charges - folio.total_payments
+
+            # به‌روزرسانی اقامت
+            stay = session.query(Stay).filter(Stay.id == stay_id).first()
+            if stay:
+                stay.remaining_balance = folio.current_balance
 
-                logger.info(f"✅ هزینه به صورت‌حساب افزوده شد: {amount} - {description}")
+            session.flush()  # گرفتن ID تراکنش
 
-                return {
-                    'success': True,
-                    'transaction_id': transaction.id,
-                    'amount': float(amount),
-                    'description': description,
-                    'new_balance': float(folio.current_balance),
-                    'message': 'هزینه با موفقیت افزوده شد'
-                }
+            return {
+                'success': True,
+                'transaction_id': transaction.id,
+                'amount': float(amount),
+                'description': description,
+                'new_balance': float(folio.current_balance),
+                'message': 'هزینه با موفقیت افزوده شد'
+            }
+
+        try:
+            # کل واحد کاری روی خطاهای گذرا دوباره اجرا می‌شود
+            result = run_in_transaction(add_charge, name='add_folio_charge')
+            if result['success']:
+                logger.info(f"✅ هزینه به صورت‌حساب افزوده شد: {amount} - {description}")
+            return result
 
         except Exception as e:
             logger.error(f"❌ خطا در افزودن هزینه: {e}")
@@ -253,7 +374,12 @@ class PaymentService:
 
     @staticmethod
     def refund_payment(payment_id: int, refund_amount: Decimal = None) -> Dict[str, Any]:
-        """عودت پرداخت"""
+        """
+        عودت پرداخت
+
+        عودت کارت‌خوان یک بار و خارج از واحد کاری انجام می‌شود؛ فقط ثبت
+        عودت در دیتابیس روی خطاهای گذرا دوباره اجرا می‌شود.
+        """
         try:
             with db_session() as session:
                 payment = session.query(Payment).filter(Payment.id == payment_id).first()
@@ -272,16 +398,20 @@ class PaymentService:
                     }
 
                 amount_to_refund = refund_amount or payment.amount
+                transaction_id, payment_method = payment.transaction_id, payment.payment_method
 
-                # پردازش عودت
-                refund_result = payment_processor.refund_payment(
-                    payment.transaction_id,
-                    amount_to_refund,
-                    payment.payment_method
-                )
+            # پردازش عودت
+            refund_result = payment_processor.refund_payment(
+                transaction_id,
+                amount_to_refund,
+                payment_method
+            )
 
-                if not refund_result['success']:
-                    return refund_result
+            if not refund_result['success']:
+                return refund_result
+
+            def record(session: Session) -> Dict[str, Any]:
+                payment = session.query(Payment).filter(Payment.id == payment_id).first()
 
                 # ایجاد پرداخت عودت
                 refund_payment = Payment(
@@ -322,10 +452,6 @@ class PaymentService:
                 # به‌روزرسانی پرداخت اصلی
                 payment.status = 'refunded'
 
-                session.commit()
-
-                logger.info(f"✅ عودت پرداخت انجام شد: {amount_to_refund} برای پرداخت {payment_id}")
-
                 return {
                     'success': True,
                     'refund_id': refund_payment.id,
@@ -334,6 +460,12 @@ class PaymentService:
                     'message': 'عودت با موفقیت انجام شد'
                 }
 
+            result = run_in_transaction(record, name='refund_payment')
+
+            logger.info(f"✅ عودت پرداخت انجام شد: {amount_to_refund} برای پرداخت {payment_id}")
+
+            return result
+
         except Exception as e:
             logger.error(f"❌ خطا در عودت پرداخت: {e}")
             return {
@@ -0,0 +1,183 @@
+# app/services/reception/projections.py
+"""
+پروجکشن‌های سبک برای صفحات لیست و خلاصه
+
+به جای بارگذاری کامل موجودیت‌های ORM (همه ستون‌ها، identity map و
+روابط joinedload) فقط ستون‌های مورد نیاز انتخاب و در named tuple نگاشت
+می‌شوند. named tuple بدون __dict__ است و ساخت آن از سطر نتیجه تقریباً
+هزینه‌ای ندارد.
+
+مثال:
+    query = session.query(*columns_of(GuestListItem, Guest))
+    guests = fetch_projection(query, GuestListItem)
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Type, TypeVar
+
+P = TypeVar('P')
+
+
+def columns_of(projection: Type[NamedTuple], model, **overrides) -> List[Any]:
+    """
+    ستون‌های انتخاب برای یک پروجکشن به ترتیب فیلدهای آن
+
+    Args:
+        projection: کلاس named tuple
+        model: مدل پیش‌فرض برای فیلدهای هم‌نام
+        overrides: ستون جایگزین برای فیلدهایی که از مدل دیگر یا با نام دیگر می‌آیند
+    """
+    return [
+        overrides[name] if name in overrides else getattr(model, name)
+        for name in projection._fields
+    ]
+
+
+def fetch_projection(query: Iterable, projection: Type[P]) -> List[P]:
+    """اجرای query ستونی و نگاشت سطرها به پروجکشن"""
+    return [projection._make(row) for row in query]
+
+
+def _full_name(first_name: Optional[str], last_name: Optional[str]) -> str:
+    return f"{first_name} {last_name}"
+
+
+class GuestListItem(NamedTuple):
+    """سطر لیست و جستجوی مهمانان"""
+    id: int
+    first_name: str
+    last_name: str
+    national_id: Optional[str]
+    phone: Optional[str]
+    email: Optional[str]
+    vip_status: Optional[bool]
+
+    @property
+    def full_name(self) -> str:
+        return _full_name(self.first_name, self.last_name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'full_name': self.full_name,
+            'national_id': self.national_id,
+            'phone': self.phone,
+            'email': self.email,
+            'vip_status': self.vip_status
+        }
+
+
+class StayGuestItem(NamedTuple):
+    """سطر خلاصه اقامت همراه با نام مهمان (گزارش‌ها و لیست اقامت‌ها)"""
+    id: int
+    guest_id: int
+    status: str
+    planned_check_in: datetime
+    planned_check_out: datetime
+    actual_check_in: Optional[datetime]
+    first_name: str
+    last_name: str
+
+    @property
+    def guest_name(self) -> str:
+        return _full_name(self.first_name, self.last_name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stay_id': self.id,
+            'guest_id': self.guest_id,
+            'guest_name': self.guest_name,
+            'status': self.status,
+            'planned_check_in': self.planned_check_in,
+            'planned_check_out': self.planned_check_out,
+            'actual_check_in': self.actual_check_in
+        }
+
+
+class AssignmentListItem(NamedTuple):
+    """سطر لیست تخصیص‌های اتاق"""
+    id: int
+    room_id: int
+    stay_id: int
+    first_name: str
+    last_name: str
+    assignment_date: date
+    expected_check_out: date
+    actual_check_out: Optional[date]
+    assignment_type: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'assignment_id': self.id,
+            'room_id': self.room_id,
+            'stay_id': self.stay_id,
+            'guest_name': _full_name(self.first_name, self.last_name),
+            'assignment_date': self.assignment_date,
+            'expected_check_out': self.expected_check_out,
+            'actual_check_out': self.actual_check_out,
+            'assignment_type': self.assignment_type
+        }
+
+
+class PaymentListItem(NamedTuple):
+    """سطر لیست پرداخت‌ها"""
+    id: int
+    stay_id: int
+    amount: Decimal
+    payment_method: str
+    payment_type: str
+    status: str
+    receipt_number: Optional[str]
+    created_at: datetime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'stay_id': self.stay_id,
+            'amount': float(self.amount),
+            'method': self.payment_method,
+            'type': self.payment_type,
+            'status': self.status,
+            'receipt_number': self.receipt_number,
+            'created_at': self.created_at
+        }
+
+
+class TaskListItem(NamedTuple):
+    """سطر لیست وظایف خانه‌داری"""
+    id: int
+    room_id: int
+    room_number: Optional[str]
+    task_type: str
+    status: str
+    priority: str
+    scheduled_time: datetime
+    assigned_to: Optional[int]
+    staff_first_name: Optional[str]
+    staff_last_name: Optional[str]
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+    quality_score: Optional[int]
+
+    @property
+    def staff_name(self) -> Optional[str]:
+        if self.staff_first_name is None and self.staff_last_name is None:
+            return None
+        return _full_name(self.staff_first_name, self.staff_last_name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'task_id': self.id,
+            'room_id': self.room_id,
+            'room_number': self.room_number or 'نامشخص',
+            'task_type': self.task_type,
+            'status': self.status,
+            'priority': self.priority,
+            'scheduled_time': self.scheduled_time,
+            'assigned_to': self.assigned_to,
+            'staff_name': self.staff_name or 'محول نشده',
+            'actual_start': self.started_at,
+            'completed_at': self.completed_at,
+            'quality_rating': self.quality_score
+        }
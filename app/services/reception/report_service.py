@@ -10,14 +10,16 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy import func, and_, or_, extract, case
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
-from app.core.database import db_session
+from app.core.archival import history_entity
+from app.core.database import db_session, replica_tolerant
 from app.models.reception.guest_models import Guest, Stay, Companion
 from app.models.reception.room_status_models import RoomAssignment, RoomStatusSnapshot
 from app.models.reception.payment_models import Payment, GuestFolio, FolioTransaction, CashierShift
 from app.models.reception.housekeeping_models import HousekeepingTask
 from app.models.reception.maintenance_models import MaintenanceRequest
+from app.services.reception.projections import StayGuestItem, columns_of, fetch_projection
 from config import config
 import os
 
@@ -27,6 +29,7 @@ class ReportService:
     """سرویس گزارش‌گیری جامع سیستم پذیرش"""
 
     @staticmethod
+    @replica_tolerant()
     def generate_daily_occupancy_report(report_date: date = None) -> Dict[str, Any]:
         """گزارش روزانه اشغال اتاق‌ها"""
         try:
@@ -96,51 +99,55 @@ class ReportService:
             }
 
     @staticmethod
+    @replica_tolerant()
     def generate_financial_report(start_date: date, end_date: date) -> Dict[str, Any]:
-        """گزارش مالی دوره‌ای"""
+        """گزارش مالی دوره‌ای (دوره‌هایی که به سوابق بایگانی شده می‌رسند شامل بایگانی)"""
         try:
             with db_session() as session:
+                payments = history_entity(session, Payment, start_date)
+                transactions = history_entity(session, FolioTransaction, start_date)
+
                 # درآمد کلی
-                total_revenue = session.query(func.sum(Payment.amount)).filter(
-                    Payment.created_at >= start_date,
-                    Payment.created_at <= end_date,
-                    Payment.status == 'completed'
+                total_revenue = session.query(func.sum(payments.amount)).filter(
+                    payments.created_at >= start_date,
+                    payments.created_at <= end_date,
+                    payments.status == 'completed'
                 ).scalar() or Decimal('0')
 
                 # درآمد بر اساس روش پرداخت
                 revenue_by_method = session.query(
-                    Payment.payment_method,
-                    func.count(Payment.id),
-                    func.sum(Payment.amount)
+                    payments.payment_method,
+                    func.count(payments.id),
+                    func.sum(payments.amount)
                 ).filter(
-                    Payment.created_at >= start_date,
-                    Payment.created_at <= end_date,
-                    Payment.status == 'completed'
-                ).group_by(Payment.payment_method).all()
+                    payments.created_at >= start_date,
+                    payments.created_at <= end_date,
+                    payments.status == 'completed'
+                ).group_by(payments.payment_method).all()
 
                 # درآمد بر اساس نوع پرداخت
                 revenue_by_type = session.query(
-                    Payment.payment_type,
-                    func.count(Payment.id),
-                    func.sum(Payment.amount)
+                    payments.payment_type,
+                    func.count(payments.id),
+                    func.sum(payments.amount)
                 ).filter(
-                    Payment.created_at >= start_date,
-                    Payment.created_at <= end_date,
-                    Payment.status == 'completed'
-                ).group_by(Payment.payment_type).all()
+                    payments.created_at >= start_date,
+                    payments.created_at <= end_date,
+                    payments.status == 'completed'
+                ).group_by(payments.payment_type).all()
 
                 # تراکنش‌های صورت‌حساب
                 folio_transactions = session.query(
-                    FolioTransaction.transaction_type,
-                    FolioTransaction.category,
-                    func.count(FolioTransaction.id),
-                    func.sum(FolioTransaction.amount)
+                    transactions.transaction_type,
+                    transactions.category,
+                    func.count(transactions.id),
+                    func.sum(transactions.amount)
                 ).filter(
-                    FolioTransaction.created_at >= start_date,
-                    FolioTransaction.created_at <= end_date
+                    transactions.created_at >= start_date,
+                    transactions.created_at <= end_date
                 ).group_by(
-                    FolioTransaction.transaction_type,
-                    FolioTransaction.category
+                    transactions.transaction_type,
+                    transactions.category
                 ).all()
 
                 # آمار شیفت‌های صندوق
@@ -217,6 +224,7 @@ class ReportService:
             }
 
     @staticmethod
+    @replica_tolerant()
     def generate_guest_analysis_report(period: str = 'month') -> Dict[str, Any]:
         """گزارش تحلیل مهمانان"""
         try:
@@ -339,6 +347,7 @@ class ReportService:
             }
 
     @staticmethod
+    @replica_tolerant()
     def generate_housekeeping_report(start_date: date, end_date: date) -> Dict[str, Any]:
         """گزارش عملکرد خانه‌داری"""
         try:
@@ -542,19 +551,24 @@ class ReportService:
         # در این نسخه ساده شده است
         return []
 
+    @staticmethod
+    def _stay_guest_query(session: Session):
+        """query ستونی اقامت‌ها همراه با نام مهمان"""
+        return session.query(*columns_of(
+            StayGuestItem, Stay, first_name=Guest.first_name, last_name=Guest.last_name
+        )).join(Guest, Guest.id == Stay.guest_id)
+
     @staticmethod
     def _get_todays_arrivals(session: Session, target_date: date) -> List[Dict[str, Any]]:
         """دریافت مهمانان ورودی امروز"""
-        arrivals = session.query(Stay).options(
-            joinedload(Stay.guest)
-        ).filter(
+        arrivals = fetch_projection(ReportService._stay_guest_query(session).filter(
             func.date(Stay.planned_check_in) == target_date,
             Stay.status.in_(['confirmed', 'checked_in'])
-        ).all()
+        ), StayGuestItem)
 
         return [
             {
-                'guest_name': f"{stay.guest.first_name} {stay.guest.last_name}",
+                'guest_name': stay.guest_name,
                 'check_in_time': stay.planned_check_in,
                 'status': stay.status,
                 'room_number': 'تعیین نشده'  # نیاز به پیاده‌سازی
@@ -565,16 +579,14 @@ class ReportService:
     @staticmethod
     def _get_todays_departures(session: Session, target_date: date) -> List[Dict[str, Any]]:
         """دریافت مهمانان خروجی امروز"""
-        departures = session.query(Stay).options(
-            joinedload(Stay.guest)
-        ).filter(
+        departures = fetch_projection(ReportService._stay_guest_query(session).filter(
             func.date(Stay.planned_check_out) == target_date,
             Stay.status.in_(['checked_in', 'checked_out'])
-        ).all()
+        ), StayGuestItem)
 
         return [
             {
-                'guest_name': f"{stay.guest.first_name} {stay.guest.last_name}",
+                'guest_name': stay.guest_name,
                 'check_out_time': stay.planned_check_out,
                 'status': stay.status,
                 'room_number': 'تعیین نشده'  # نیاز به پیاده‌سازی
@@ -585,17 +597,15 @@ class ReportService:
     @staticmethod
     def _get_current_guests(session: Session, target_date: date) -> List[Dict[str, Any]]:
         """دریافت مهمانان حاضر"""
-        current_guests = session.query(Stay).options(
-            joinedload(Stay.guest)
-        ).filter(
+        current_guests = fetch_projection(ReportService._stay_guest_query(session).filter(
             Stay.actual_check_in <= target_date,
             Stay.actual_check_out.is_(None),
             Stay.status == 'checked_in'
-        ).all()
+        ), StayGuestItem)
 
         return [
             {
-                'guest_name': f"{stay.guest.first_name} {stay.guest.last_name}",
+                'guest_name': stay.guest_name,
                 'check_in_date': stay.actual_check_in.date(),
                 'planned_check_out': stay.planned_check_out.date(),
                 'room_number': 'تعیین نشده'  # نیاز به پیاده‌سازی
@@ -6,11 +6,13 @@
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 from app.core.database import db_session
+from app.core.transactions import run_in_transaction
 from app.models.reception.room_status_models import RoomAssignment, RoomStatusChange, RoomStatusSnapshot
 from app.models.reception.guest_models import Stay, Guest
+from app.services.reception.projections import AssignmentListItem, columns_of, fetch_projection
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -51,37 +53,40 @@ class RoomService:
     def update_room_status(room_id: int, new_status: str,
                          changed_by: int, reason: str = None) -> Dict[str, Any]:
         """به‌روزرسانی وضعیت اتاق"""
-        try:
-            with db_session() as session:
-                # دریافت آخرین وضعیت
-                last_status = session.query(RoomStatusChange).filter(
-                    RoomStatusChange.room_id == room_id
-                ).order_by(RoomStatusChange.created_at.desc()).first()
-
-                previous_status = last_status.new_status if last_status else 'vacant'
-
-                # ایجاد تغییر وضعیت جدید
-                status_change = RoomStatusChange(
-                    room_id=room_id,
-                    previous_status=previous_status,
-                    new_status=new_status,
-                    status_reason=reason,
-                    changed_by=changed_by,
-                    change_type='manual'
-                )
+        def update(session: Session) -> str:
+            # دریافت آخرین وضعیت
+            last_status = session.query(RoomStatusChange).filter(
+                RoomStatusChange.room_id == room_id
+            ).order_by(RoomStatusChange.created_at.desc()).first()
+
+            previous_status = last_status.new_status if last_status else 'vacant'
+
+            # ایجاد تغییر وضعیت جدید
+            status_change = RoomStatusChange(
+                room_id=room_id,
+                previous_status=previous_status,
+                new_status=new_status,
+                status_reason=reason,
+                changed_by=changed_by,
+                change_type='manual'
+            )
+
+            session.add(status_change)
+            return previous_status
 
-                session.add(status_change)
-                session.commit()
+        try:
+            # کل واحد کاری روی خطاهای گذرا دوباره اجرا می‌شود
+            previous_status = run_in_transaction(update, name='room_status_update')
 
-                logger.info(f"✅ وضعیت اتاق {room_id} از {previous_status} به {new_status} تغییر یافت")
+            logger.info(f"✅ وضعیت اتاق {room_id} از {previous_status} به {new_status} تغییر یافت")
 
-                return {
-                    'success': True,
-                    'room_id': room_id,
-                    'previous_status': previous_status,
-                    'new_status': new_status,
-                    'message': 'وضعیت اتاق با موفقیت به‌روزرسانی شد'
-                }
+            return {
+                'success': True,
+                'room_id': room_id,
+                'previous_status': previous_status,
+                'new_status': new_status,
+                'message': 'وضعیت اتاق با موفقیت به‌روزرسانی شد'
+            }
 
         except Exception as e:
             logger.error(f"❌ خطا در به‌روزرسانی وضعیت اتاق: {e}")
@@ -163,8 +168,13 @@ class RoomService:
         """دریافت تخصیص‌های اتاق"""
         try:
             with db_session() as session:
-                query = session.query(RoomAssignment).options(
-                    joinedload(RoomAssignment.stay).joinedload(Stay.guest)
+                query = session.query(*columns_of(
+                    AssignmentListItem, RoomAssignment,
+                    first_name=Guest.first_name, last_name=Guest.last_name
+                )).join(
+                    Stay, Stay.id == RoomAssignment.stay_id
+                ).join(
+                    Guest, Guest.id == Stay.guest_id
                 )
 
                 if room_id:
@@ -178,21 +188,10 @@ class RoomService:
                          (RoomAssignment.actual_check_out >= date))
                     )
 
-                assignments = query.order_by(RoomAssignment.assignment_date).all()
-
-                assignments_data = [
-                    {
-                        'assignment_id': assignment.id,
-                        'room_id': assignment.room_id,
-                        'stay_id': assignment.stay_id,
-                        'guest_name': f"{assignment.stay.guest.first_name} {assignment.stay.guest.last_name}",
-                        'assignment_date': assignment.assignment_date,
-                        'expected_check_out': assignment.expected_check_out,
-                        'actual_check_out': assignment.actual_check_out,
-                        'assignment_type': assignment.assignment_type
-                    }
-                    for assignment in assignments
-                ]
+                assignments = fetch_projection(
+                    query.order_by(RoomAssignment.assignment_date), AssignmentListItem
+                )
+                assignments_data = [assignment.to_dict() for assignment in assignments]
 
                 return {
                     'success': True,
@@ -18,8 +18,13 @@ from .calculators import (
     calculate_occupancy_rate, calculate_average_daily_rate
 )
 
+from .text_normalizer import (
+    normalize_persian_text, normalize_digits, collation_key,
+    name_key, identifier_key, phone_key
+)
+
 from .export_utils import (
-    export_to_excel, export_to_csv, export_to_pdf,
+    export_to_excel, export_to_csv, export_to_pdf, stream_export,
     generate_guest_report, generate_financial_report
 )
 
@@ -41,8 +46,12 @@ __all__ = [
     'calculate_stay_amount', 'calculate_tax', 'calculate_discount',
     'calculate_occupancy_rate', 'calculate_average_daily_rate',
 
+    # Text Normalization
+    'normalize_persian_text', 'normalize_digits', 'collation_key',
+    'name_key', 'identifier_key', 'phone_key',
+
     # Export Utilities
-    'export_to_excel', 'export_to_csv', 'export_to_pdf',
+    'export_to_excel', 'export_to_csv', 'export_to_pdf', 'stream_export',
     'generate_guest_report', 'generate_financial_report',
 
     # Backup Utilities
@@ -5,10 +5,11 @@
 
 import logging
 import csv
+import gzip
 import json
 import os
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Callable
 from decimal import Decimal
 import tempfile
 
@@ -33,6 +34,99 @@ from app.utils.formatters import format_currency, format_date, format_datetime
 
 logger = logging.getLogger(__name__)
 
+# فاصله گزارش پیشرفت در خروجی‌های جریانی (تعداد رکورد)
+PROGRESS_INTERVAL = 10_000
+
+# progress_callback(written, total)؛ total ممکن است None باشد
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+STREAM_FORMATS = ('json', 'jsonl', 'csv')
+
+def _open_export_file(filepath: str, encoding: str = 'utf-8', compress: bool = None):
+    """باز کردن فایل خروجی متنی؛ پسوند .gz (یا compress) یعنی فشرده‌سازی gzip هنگام نوشتن"""
+    if compress is None:
+        compress = filepath.endswith('.gz')
+    if compress:
+        return gzip.open(filepath, 'wt', encoding=encoding, newline='')
+    return open(filepath, 'w', encoding=encoding, newline='')
+
+def _csv_value(value: Any) -> Any:
+    """مقادیر ساختاریافته (dict و list) در CSV به صورت JSON نوشته می‌شوند"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+def stream_export(records: Iterable[Dict[str, Any]],
+                  filepath: str,
+                  export_format: str = 'jsonl',
+                  fieldnames: List[str] = None,
+                  total: int = None,
+                  progress_callback: ProgressCallback = None) -> int:
+    """
+    نوشتن جریانی رکوردها در فایل با حافظه ثابت
+
+    رکوردها یکی یکی از records (مثلاً generator روی server-side cursor)
+    خوانده و نوشته می‌شوند و هیچ‌گاه همه در حافظه نیستند. فایل ابتدا با
+    پسوند .partial نوشته و پس از پایان موفق جایگزین می‌شود تا خطا در میانه
+    کار فایل ناقص باقی نگذارد.
+
+    Args:
+        records: رکوردها
+        filepath: مسیر فایل؛ پسوند .gz یعنی خروجی فشرده
+        export_format: json (آرایه)، jsonl (یک رکورد در هر خط) یا csv
+        fieldnames: ستون‌های CSV (پیش‌فرض کلیدهای اولین رکورد)
+        total: تعداد کل رکوردها برای گزارش پیشرفت (اختیاری)
+        progress_callback: هر PROGRESS_INTERVAL رکورد و در پایان فراخوانی می‌شود
+
+    Returns:
+        int: تعداد رکوردهای نوشته شده
+    """
+
+    if export_format not in STREAM_FORMATS:
+        raise ValueError(f"فرمت {export_format} پشتیبانی نمی‌شود")
+
+    partial = f"{filepath}.partial"
+    written = 0
+    try:
+        with _open_export_file(partial, 'utf-8-sig' if export_format == 'csv' else 'utf-8',
+                               compress=filepath.endswith('.gz')) as f:
+            writer = None
+            if export_format == 'json':
+                f.write('[')
+
+            for record in records:
+                if export_format == 'csv':
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=fieldnames or list(record.keys()))
+                        writer.writeheader()
+                    writer.writerow({key: _csv_value(value) for key, value in record.items()})
+                else:
+                    line = json.dumps(record, ensure_ascii=False, default=str)
+                    if export_format == 'json':
+                        f.write(',\n' if written else '\n')
+                    f.write(line)
+                    if export_format == 'jsonl':
+                        f.write('\n')
+
+                written += 1
+                if progress_callback and written % PROGRESS_INTERVAL == 0:
+                    progress_callback(written, total)
+
+            if export_format == 'json':
+                f.write('\n]\n' if written else ']\n')
+            elif writer is None and fieldnames:
+                csv.DictWriter(f, fieldnames=fieldnames).writeheader()
+
+        os.replace(partial, filepath)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+    if progress_callback:
+        progress_callback(written, total)
+    return written
+
 def export_to_excel(data: List[Dict[str, Any]],
                    columns: List[Dict[str, str]],
                    filename: str = None,
@@ -106,16 +200,18 @@ def export_to_excel(data: List[Dict[str, Any]],
         logger.error(f"خطا در ایجاد فایل Excel: {e}")
         return None
 
-def export_to_csv(data: List[Dict[str, Any]],
+def export_to_csv(data: Iterable[Dict[str, Any]],
                  columns: List[Dict[str, str]],
-                 filename: str = None) -> Optional[str]:
+                 filename: str = None,
+                 progress_callback: ProgressCallback = None) -> Optional[str]:
     """
     خروجی گرفتن به فرمت CSV
 
     Args:
-        data: داده‌ها برای export
+        data: داده‌ها برای export (لیست یا generator؛ سطر به سطر نوشته می‌شوند)
         columns: تعریف ستون‌ها
-        filename: نام فایل خروجی
+        filename: نام فایل خروجی (پسوند .gz یعنی فشرده)
+        progress_callback: گزارش پیشرفت (written, total)
 
     Returns:
         Optional[str]: مسیر فایل ایجاد شده یا None در صورت خطا
@@ -134,8 +230,10 @@ def export_to_csv(data: List[Dict[str, Any]],
 
         # هدرهای CSV
         fieldnames = [col['title'] for col in columns]
+        total = len(data) if isinstance(data, (list, tuple)) else None
+        written = 0
 
-        with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        with _open_export_file(filepath, 'utf-8-sig') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
 
@@ -160,6 +258,13 @@ def export_to_csv(data: List[Dict[str, Any]],
 
                 writer.writerow(formatted_row)
 
+                written += 1
+                if progress_callback and written % PROGRESS_INTERVAL == 0:
+                    progress_callback(written, total)
+
+        if progress_callback:
+            progress_callback(written, total)
+
         logger.info(f"فایل CSV با موفقیت ایجاد شد: {filepath}")
         return filepath
 
@@ -427,14 +532,20 @@ def generate_occupancy_report(occupancy_data: List[Dict[str, Any]],
         logger.error(f"خطا در تولید گزارش اشغال: {e}")
         return None
 
-def export_audit_logs(audit_data: List[Dict[str, Any]],
-                     format: str = "excel") -> Optional[str]:
+def export_audit_logs(audit_data: Iterable[Dict[str, Any]],
+                     format: str = "excel",
+                     progress_callback: ProgressCallback = None) -> Optional[str]:
     """
     خروجی گرفتن از لاگ‌های Audit
 
+    برای بازه‌های بزرگ از AuditManager.export_audit_logs (خروجی جریانی از
+    دیتابیس) یا format='csv' با generator استفاده کنید؛ excel و pdf همه
+    داده‌ها را در حافظه نگه می‌دارند.
+
     Args:
         audit_data: داده‌های Audit
         format: فرمت خروجی (excel, csv, pdf)
+        progress_callback: گزارش پیشرفت خروجی csv (written, total)
 
     Returns:
         Optional[str]: مسیر فایل ایجاد شده
@@ -456,7 +567,7 @@ def export_audit_logs(audit_data: List[Dict[str, Any]],
         if format == 'excel':
             return export_to_excel(audit_data, columns, title="گزارش فعالیت‌های سیستم")
         elif format == 'csv':
-            return export_to_csv(audit_data, columns)
+            return export_to_csv(audit_data, columns, progress_callback=progress_callback)
         elif format == 'pdf':
             return export_to_pdf(audit_data, columns, title="گزارش فعالیت‌های سیستم")
         else:
@@ -0,0 +1,208 @@
+# app/utils/text_normalizer.py
+"""
+ماژول یکسان‌سازی متن فارسی برای جستجو و مرتب‌سازی
+"""
+
+import re
+from datetime import datetime, date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Tuple
+
+# یکسان‌سازی حروف عربی به معادل فارسی
+_LETTER_MAP = {
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و'
+}
+
+# ارقام فارسی و عربی به انگلیسی
+_DIGIT_MAP = {
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
+}
+
+# نویسه‌های حذفی: نیم‌فاصله، کشیده، اعراب
+_REMOVED_CHARS = '\u200c\u200d\u200e\u200f\u0640' + ''.join(
+    chr(code) for code in range(0x064B, 0x0660)
+) + '\u0670'
+
+_NORMALIZE_TABLE = str.maketrans(
+    {**_LETTER_MAP, **_DIGIT_MAP, **{char: None for char in _REMOVED_CHARS}}
+)
+_DIGIT_TABLE = str.maketrans(_DIGIT_MAP)
+
+# ترتیب الفبای فارسی؛ حروف به ناحیه خصوصی یونیکد نگاشت می‌شوند تا
+# مقایسه رشته‌ای ترتیب الفبایی صحیح (پ بعد از ب، گ بعد از ک و ...) را بدهد
+_PERSIAN_ALPHABET = 'آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی'
+_COLLATION_TABLE = str.maketrans({
+    letter: chr(0xE000 + index) for index, letter in enumerate(_PERSIAN_ALPHABET)
+})
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+_NON_DIGIT_RE = re.compile(r'\D+')
+_AMOUNT_RE = re.compile(r'^[+-]?\d+(\.\d+)?$')
+_DATE_RE = re.compile(r'^(\d{4})[/-](\d{1,2})[/-](\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+_AMOUNT_NOISE = (',', '،', '٬', 'تومان', 'ریال', 'IRT', 'IRR', ' ')
+
+
+def normalize_digits(text: str) -> str:
+    """
+    تبدیل ارقام فارسی و عربی به انگلیسی
+
+    Args:
+        text: متن ورودی
+
+    Returns:
+        str: متن با ارقام انگلیسی
+    """
+
+    if not text:
+        return ""
+
+    return text.translate(_DIGIT_TABLE)
+
+
+def normalize_persian_text(text: Any) -> str:
+    """
+    یکسان‌سازی متن برای مقایسه و جستجو
+
+    حروف عربی (ي، ك، ...) به فارسی، ارقام به انگلیسی تبدیل می‌شوند،
+    نیم‌فاصله، کشیده و اعراب حذف و فاصله‌ها یکسان می‌شوند.
+
+    Args:
+        text: متن یا مقدار ورودی
+
+    Returns:
+        str: متن یکسان‌سازی شده با حروف کوچک
+    """
+
+    if text is None:
+        return ""
+
+    normalized = str(text).translate(_NORMALIZE_TABLE).casefold()
+    return _WHITESPACE_RE.sub(' ', normalized).strip()
+
+
+def name_key(text: Any) -> str:
+    """
+    کلید جستجوی نام: متن یکسان‌سازی شده بدون فاصله
+
+    «عبدالله»، «عبد الله» و «عبد‌الله» (با نیم‌فاصله) کلید یکسان دارند.
+    """
+
+    return normalize_persian_text(text).replace(' ', '')
+
+
+def identifier_key(text: Any) -> str:
+    """
+    کلید جستجوی شناسه (کدملی، پاسپورت): فقط حروف و ارقام انگلیسی/یکسان شده
+
+    Returns:
+        str: کلید با حروف کوچک؛ جداکننده‌ها (فاصله، خط تیره، ...) حذف می‌شوند
+    """
+
+    return _NON_ALNUM_RE.sub('', normalize_persian_text(text))
+
+
+def phone_key(text: Any) -> str:
+    """
+    کلید جستجوی تلفن: فقط ارقام با پیش‌شماره داخلی
+
+    +98912...، 0098912...، 98912... و 912... (ده رقمی) همه به 0912... تبدیل می‌شوند.
+    """
+
+    digits = _NON_DIGIT_RE.sub('', normalize_digits(str(text)) if text is not None else '')
+    if digits.startswith('0098'):
+        return '0' + digits[4:]
+    if digits.startswith('98') and len(digits) == 12:
+        return '0' + digits[2:]
+    if digits.startswith('9') and len(digits) == 10:
+        return '0' + digits
+    return digits
+
+
+def parse_amount(text: str):
+    """
+    تبدیل متن مبلغ (با ارقام فارسی، جداکننده و واحد پول) به Decimal
+
+    Returns:
+        Decimal یا None اگر متن مبلغ نباشد
+    """
+
+    candidate = normalize_digits(text).strip()
+    for noise in _AMOUNT_NOISE:
+        candidate = candidate.replace(noise, '')
+
+    if not candidate or not _AMOUNT_RE.match(candidate):
+        return None
+
+    try:
+        return Decimal(candidate)
+    except InvalidOperation:
+        return None
+
+
+def collation_key(value: Any) -> Tuple:
+    """
+    کلید مرتب‌سازی آگاه از زبان فارسی
+
+    ترتیب گروه‌ها: مقادیر خالی، اعداد و مبالغ، تاریخ‌ها، متن.
+    کلید برگشتی بین مقادیر مختلف یک ستون قابل مقایسه است.
+
+    Args:
+        value: مقدار خام سلول
+
+    Returns:
+        tuple: کلید مرتب‌سازی
+    """
+
+    if value is None or value == "":
+        return (0, 0)
+
+    if isinstance(value, bool):
+        return (1, int(value))
+
+    if isinstance(value, (int, float, Decimal)):
+        return (1, Decimal(str(value)))
+
+    if isinstance(value, datetime):
+        return (2, value.timetuple()[:6])
+
+    if isinstance(value, date):
+        return (2, (value.year, value.month, value.day, 0, 0, 0))
+
+    text = str(value)
+
+    amount = parse_amount(text)
+    if amount is not None:
+        return (1, amount)
+
+    date_match = _DATE_RE.match(normalize_digits(text).strip())
+    if date_match:
+        parts = tuple(int(part) if part else 0 for part in date_match.groups())
+        return (2, parts)
+
+    return (3, normalize_persian_text(text).translate(_COLLATION_TABLE))
+
+
+def ngrams(text: str, size: int = 3) -> set:
+    """
+    استخراج n-gramهای یک متن یکسان‌سازی شده
+
+    Args:
+        text: متن یکسان‌سازی شده
+        size: طول هر n-gram
+
+    Returns:
+        set: مجموعه n-gramها
+    """
+
+    if len(text) < size:
+        return {text} if text else set()
+
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
@@ -1,6 +1,7 @@
 # app/views/main_window.py
 import logging
 import sys
+import time
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QTabWidget, QStatusBar, QMenuBar, QMenu, QAction,
                             QToolBar, QLabel, QMessageBox, QSplitter, QFrame,
@@ -17,6 +18,7 @@ from app.views.widgets.guest_management.check_out_widget import CheckOutWidget
 from app.views.widgets.room_management.room_list_widget import RoomListWidget
 from app.views.widgets.room_management.room_assignment import RoomAssignmentWidget
 from app.views.widgets.room_management.room_status_manager import RoomStatusManager
+from app.views.widgets.shared.lazy_tab_widget import LazyTabWidget
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -24,11 +26,18 @@ logger = logging.getLogger(__name__)
 class MainWindow(QMainWindow):
     """پنجره اصلی سیستم پذیرش - نسخه به‌روز شده"""
 
-    def __init__(self):
+    def __init__(self, backend_ready: bool = True):
         super().__init__()
         self.current_user = None
+        self.backend_ready = backend_ready
+
+        # اندازه‌گیری زمان راه‌اندازی تا اولین تعامل
+        self.startup_metrics = {}
+        self._construct_started = time.perf_counter()
+        self._first_show_reported = False
+
         self.init_ui()
-        self.setup_connections()
+        self.startup_metrics['construct_ms'] = (time.perf_counter() - self._construct_started) * 1000
 
     def init_ui(self):
         """راه‌اندازی رابط کاربری"""
@@ -51,7 +60,13 @@ class MainWindow(QMainWindow):
         # تایمر برای به‌روزرسانی وضعیت
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self.update_statusbar)
-        self.status_timer.start(5000)  # هر 5 ثانیه
+
+        if self.backend_ready:
+            self.status_timer.start(5000)  # هر 5 ثانیه
+        else:
+            # تا آماده شدن اتصالات فقط قاب پنجره نمایش داده می‌شود
+            self.main_tabs.set_builds_enabled(False)
+            self.system_status_label.setText("سیستم: در حال اتصال...")
 
     def create_menus(self):
         """ایجاد منوهای اصلی"""
@@ -171,22 +186,19 @@ class MainWindow(QMainWindow):
         central_widget = QWidget()
         main_layout = QVBoxLayout()
 
-        # ایجاد تب‌های اصلی
-        self.main_tabs = QTabWidget()
+        # ایجاد تب‌های اصلی (محتوای هر تب در اولین فعال‌سازی ساخته می‌شود)
+        self.main_tabs = LazyTabWidget()
         self.main_tabs.setDocumentMode(True)
         self.main_tabs.setTabPosition(QTabWidget.North)
 
         # تب دشبورد
-        self.dashboard_tab = self.create_dashboard_tab()
-        self.main_tabs.addTab(self.dashboard_tab, "🏠 دشبورد")
+        self.main_tabs.add_lazy_tab(self.create_dashboard_tab, "🏠 دشبورد")
 
         # تب مدیریت مهمانان
-        self.guests_tab = self.create_guests_tab()
-        self.main_tabs.addTab(self.guests_tab, "👥 مدیریت مهمانان")
+        self.main_tabs.add_lazy_tab(self.create_guests_tab, "👥 مدیریت مهمانان")
 
         # تب مدیریت اتاق‌ها
-        self.rooms_tab = self.create_rooms_tab()
-        self.main_tabs.addTab(self.rooms_tab, "🏨 مدیریت اتاق‌ها")
+        self.main_tabs.add_lazy_tab(self.create_rooms_tab, "🏨 مدیریت اتاق‌ها")
 
         main_layout.addWidget(self.main_tabs)
         central_widget.setLayout(main_layout)
@@ -243,6 +255,21 @@ class MainWindow(QMainWindow):
         # تنظیم سایز اولیه
         splitter.setSizes([400, 600])
 
+        # اتصال لیست مهمانان به جزئیات
+        self.guest_list_widget.guest_selected.connect(
+            self.guest_details_widget.set_guest_id
+        )
+
+        # اتصال درخواست ثبت ورود
+        self.guest_list_widget.check_in_requested.connect(
+            self.show_checkin_dialog
+        )
+
+        # اتصال درخواست ثبت خروج
+        self.guest_list_widget.check_out_requested.connect(
+            self.show_checkout_dialog
+        )
+
         layout.addWidget(splitter)
         widget.setLayout(layout)
         return widget
@@ -253,15 +280,13 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout()
 
         # ایجاد تب‌های داخلی برای مدیریت اتاق‌ها
-        self.rooms_inner_tabs = QTabWidget()
+        self.rooms_inner_tabs = LazyTabWidget()
 
         # تب لیست اتاق‌ها
-        self.room_list_tab = self.create_room_list_tab()
-        self.rooms_inner_tabs.addTab(self.room_list_tab, "📋 لیست اتاق‌ها")
+        self.rooms_inner_tabs.add_lazy_tab(self.create_room_list_tab, "📋 لیست اتاق‌ها")
 
         # تب مدیریت وضعیت
-        self.room_status_tab = self.create_room_status_tab()
-        self.rooms_inner_tabs.addTab(self.room_status_tab, "🔧 مدیریت وضعیت")
+        self.rooms_inner_tabs.add_lazy_tab(self.create_room_status_tab, "🔧 مدیریت وضعیت")
 
         layout.addWidget(self.rooms_inner_tabs)
         widget.setLayout(layout)
@@ -276,6 +301,10 @@ class MainWindow(QMainWindow):
         self.room_list_widget = RoomListWidget()
         layout.addWidget(self.room_list_widget)
 
+        # اتصال تغییر وضعیت و انتخاب اتاق
+        self.room_list_widget.status_changed.connect(self.on_room_status_changed)
+        self.room_list_widget.room_selected.connect(self.on_room_selected)
+
         widget.setLayout(layout)
         return widget
 
@@ -288,6 +317,8 @@ class MainWindow(QMainWindow):
         self.room_status_manager = RoomStatusManager()
         layout.addWidget(self.room_status_manager)
 
+        self.room_status_manager.status_updated.connect(self.on_room_status_changed)
+
         widget.setLayout(layout)
         return widget
 
@@ -318,36 +349,30 @@ class MainWindow(QMainWindow):
         self.available_rooms_label = QLabel("اتاق خالی: --")
         statusbar.addPermanentWidget(self.available_rooms_label)
 
-    def setup_connections(self):
-        """تنظیم اتصالات بین ویجت‌ها"""
-        # اتصال لیست مهمانان به جزئیات
-        self.guest_list_widget.guest_selected.connect(
-            self.guest_details_widget.set_guest_id
-        )
-
-        # اتصال درخواست ثبت ورود
-        self.guest_list_widget.check_in_requested.connect(
-            self.show_checkin_dialog
-        )
-
-        # اتصال درخواست ثبت خروج
-        self.guest_list_widget.check_out_requested.connect(
-            self.show_checkout_dialog
-        )
-
-        # اتصال تغییر وضعیت اتاق‌ها
-        self.room_list_widget.status_changed.connect(
-            self.on_room_status_changed
-        )
-
-        self.room_status_manager.status_updated.connect(
-            self.on_room_status_changed
-        )
-
-        # اتصال انتخاب اتاق
-        self.room_list_widget.room_selected.connect(
-            self.on_room_selected
-        )
+    def showEvent(self, event):
+        """ثبت زمان تا اولین تعامل پس از اولین نمایش پنجره"""
+        super().showEvent(event)
+        if not self._first_show_reported:
+            self._first_show_reported = True
+            # اجرای تابع پس از پردازش رویدادهای نقاشی اولیه
+            QTimer.singleShot(0, self._record_first_interactive)
+
+    def _record_first_interactive(self):
+        """ثبت زمان رسیدن به اولین حالت قابل تعامل"""
+        elapsed = (time.perf_counter() - self._construct_started) * 1000
+        self.startup_metrics['time_to_first_interactive_ms'] = elapsed
+        self.startup_metrics['tab_build_ms'] = dict(self.main_tabs.build_times)
+        logger.info(f"⏱️ زمان تا اولین تعامل: {elapsed:.0f}ms")
+
+    def on_backend_ready(self):
+        """فعال‌سازی تب‌ها و تایمرها پس از برقراری اتصال دیتابیس"""
+        if self.backend_ready:
+            return
+
+        self.backend_ready = True
+        self.main_tabs.set_builds_enabled(True)
+        self.update_statusbar()
+        self.status_timer.start(5000)
 
     def update_statusbar(self):
         """به‌روزرسانی نوار وضعیت"""
@@ -393,6 +418,7 @@ class MainWindow(QMainWindow):
         """نمایش وضعیت اتاق‌ها"""
         self.show_rooms_management()
         self.rooms_inner_tabs.setCurrentIndex(0)  # تب لیست اتاق‌ها
+        self.rooms_inner_tabs.ensure_built(0)
 
     def show_room_assignment(self):
         """نمایش دیالوگ تخصیص اتاق"""
@@ -630,14 +656,15 @@ class MainWindow(QMainWindow):
         """توقف تمام تایمرها"""
         self.status_timer.stop()
 
-        # توقف تایمرهای ویجت‌ها
-        widgets_to_check = [
-            self.dashboard_widget,
-            self.room_status_widget,
-            self.guest_list_widget,
-            self.room_list_widget,
-            self.room_status_manager
+        # توقف تایمرهای ویجت‌های ساخته شده
+        widget_names = [
+            'dashboard_widget',
+            'room_status_widget',
+            'guest_list_widget',
+            'room_list_widget',
+            'room_status_manager'
         ]
+        widgets_to_check = [getattr(self, name) for name in widget_names if hasattr(self, name)]
 
         for widget in widgets_to_check:
             if hasattr(widget, 'auto_refresh_timer'):
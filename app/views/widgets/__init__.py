@@ -4,6 +4,7 @@
 """
 from .admin.backup_restore import BackupRestoreWidget
 from .admin.log_viewer import LogViewerWidget
+from .admin.slow_query_viewer import SlowQueryViewerWidget
 from .admin.system_setting import SystemSettingsWidget
 from .admin.user_management import UserManagementWidget
 from .dashboard.main_dashboard import MainDashboard
@@ -30,6 +31,7 @@ from .shared.toolbar import ToolBarWidget
 __all__ = [
     'BackupRestoreWidget',
     'LogViewerWidget',
+    'SlowQueryViewerWidget',
     'SystemSettingsWidget',
     'UserManagementWidget',
     'MainDashboard',
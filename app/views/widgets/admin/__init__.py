@@ -7,10 +7,12 @@ from .user_management import UserManagementWidget
 from .system_settings import SystemSettingsWidget
 from .backup_restore import BackupRestoreWidget
 from .log_viewer import LogViewerWidget
+from .slow_query_viewer import SlowQueryViewerWidget
 
 __all__ = [
     'UserManagementWidget',
     'SystemSettingsWidget',
     'BackupRestoreWidget',
-    'LogViewerWidget'
+    'LogViewerWidget',
+    'SlowQueryViewerWidget'
 ]
@@ -0,0 +1,137 @@
+# app/views/widgets/admin/slow_query_viewer.py
+"""
+ویجت نمایش کوئری‌های کند به ترتیب زمان کل
+"""
+
+import logging
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                            QComboBox, QPushButton, QGroupBox, QTableWidget,
+                            QTableWidgetItem, QHeaderView, QTextEdit, QSplitter)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+
+from app.core.slow_query_log import slow_query_recorder
+
+logger = logging.getLogger(__name__)
+
+class SlowQueryViewerWidget(QWidget):
+    """ویجت خلاصه پرهزینه‌ترین کوئری‌ها برای مدیر سیستم"""
+
+    PERIODS = [("24 ساعت اخیر", 1), ("7 روز اخیر", 7), ("30 روز اخیر", 30)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.offenders = []
+        self.init_ui()
+        self.load_offenders()
+
+    def init_ui(self):
+        """راه‌اندازی رابط کاربری"""
+        layout = QVBoxLayout()
+
+        # نوار کنترل
+        control_layout = QHBoxLayout()
+
+        self.cmb_period = QComboBox()
+        for label, days in self.PERIODS:
+            self.cmb_period.addItem(label, days)
+        self.cmb_period.setCurrentIndex(1)
+        self.cmb_period.currentIndexChanged.connect(self.load_offenders)
+
+        self.btn_refresh = QPushButton("🔄 بروزرسانی")
+        self.btn_refresh.clicked.connect(self.load_offenders)
+
+        self.lbl_status = QLabel()
+        self.lbl_status.setStyleSheet("color: #7f8c8d;")
+
+        control_layout.addWidget(QLabel("بازه:"))
+        control_layout.addWidget(self.cmb_period)
+        control_layout.addWidget(self.btn_refresh)
+        control_layout.addStretch()
+        control_layout.addWidget(self.lbl_status)
+        layout.addLayout(control_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        # جدول پرهزینه‌ترین الگوها
+        offenders_group = QGroupBox("پرهزینه‌ترین کوئری‌ها (بر اساس زمان کل)")
+        offenders_layout = QVBoxLayout()
+
+        self.offenders_table = QTableWidget()
+        self.offenders_table.setColumnCount(6)
+        self.offenders_table.setHorizontalHeaderLabels([
+            "سرویس", "تعداد", "زمان کل (ms)", "میانگین (ms)", "بیشترین (ms)", "کوئری"
+        ])
+        self.offenders_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.offenders_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.offenders_table.itemSelectionChanged.connect(self.show_selected_plan)
+
+        header = self.offenders_table.horizontalHeader()
+        for column in range(5):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(5, QHeaderView.Stretch)
+
+        offenders_layout.addWidget(self.offenders_table)
+        offenders_group.setLayout(offenders_layout)
+        splitter.addWidget(offenders_group)
+
+        # plan اجرای الگوی انتخاب شده
+        plan_group = QGroupBox("Plan اجرا (EXPLAIN)")
+        plan_layout = QVBoxLayout()
+
+        self.txt_plan = QTextEdit()
+        self.txt_plan.setReadOnly(True)
+        self.txt_plan.setFont(QFont("Courier", 9))
+        self.txt_plan.setLayoutDirection(Qt.LeftToRight)
+
+        plan_layout.addWidget(self.txt_plan)
+        plan_group.setLayout(plan_layout)
+        splitter.addWidget(plan_group)
+
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    def load_offenders(self):
+        """بارگذاری پرهزینه‌ترین الگوها"""
+        try:
+            days = self.cmb_period.currentData()
+            self.offenders = slow_query_recorder.top_offenders(limit=20, days=days)
+
+            self.offenders_table.setRowCount(len(self.offenders))
+            for row, offender in enumerate(self.offenders):
+                values = [
+                    offender['call_name'] or '--',
+                    str(offender['occurrences']),
+                    f"{offender['total_ms']:,.0f}",
+                    f"{offender['avg_ms']:,.0f}",
+                    f"{offender['max_ms']:,.0f}",
+                    offender['fingerprint']
+                ]
+                for column, value in enumerate(values):
+                    item = QTableWidgetItem(value)
+                    if column == 5:
+                        item.setToolTip(offender['fingerprint'])
+                    self.offenders_table.setItem(row, column, item)
+
+            status = slow_query_recorder.get_status()
+            state = "فعال" if status['enabled'] else "غیرفعال"
+            self.lbl_status.setText(f"ثبت کوئری کند: {state} | آستانه: {status['threshold_ms']:.0f}ms")
+            self.txt_plan.clear()
+
+        except Exception as e:
+            logger.error(f"خطا در بارگذاری کوئری‌های کند: {e}")
+            self.lbl_status.setText(f"خطا: {e}")
+
+    def show_selected_plan(self):
+        """نمایش آخرین plan الگوی انتخاب شده"""
+        rows = self.offenders_table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self.offenders):
+            return
+
+        offender = self.offenders[rows[0].row()]
+        try:
+            plan = slow_query_recorder.latest_plan(offender['fingerprint_hash'])
+            self.txt_plan.setPlainText(plan or "plan ثبت نشده است")
+        except Exception as e:
+            logger.error(f"خطا در دریافت plan: {e}")
+            self.txt_plan.setPlainText(f"خطا: {e}")
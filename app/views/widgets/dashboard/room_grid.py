@@ -0,0 +1,235 @@
+# app/views/widgets/dashboard/room_grid.py
+"""
+گرید مجازی کارت‌های اتاق (مدل، فیلتر و delegate)
+
+به جای ساخت یک QWidget برای هر اتاق، کارت‌ها توسط delegate فقط برای
+سطرهای قابل مشاهده نقاشی می‌شوند و در هر بروزرسانی فقط اتاق‌هایی که
+اطلاعات نمایشی آن‌ها تغییر کرده dataChanged دریافت می‌کنند.
+"""
+
+import logging
+from typing import Dict, List, Any, Optional
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt5.QtCore import (Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel,
+                          QSize, QRect)
+from PyQt5.QtGui import QColor, QPen, QFont, QPainter
+
+logger = logging.getLogger(__name__)
+
+# نقش‌های داده سفارشی
+RoomDataRole = Qt.UserRole + 1
+RoomStatusRole = Qt.UserRole + 2
+RoomFloorRole = Qt.UserRole + 3
+
+STATUS_TEXT = {
+    'vacant': 'خالی',
+    'occupied': 'اشغال',
+    'cleaning': 'نظافت',
+    'maintenance': 'تعمیرات',
+    'out_of_order': 'غیرقابل استفاده',
+    'inspection': 'بازرسی'
+}
+
+STATUS_COLOR = {
+    'vacant': QColor('green'),
+    'occupied': QColor('red'),
+    'cleaning': QColor('orange'),
+    'maintenance': QColor('purple'),
+    'out_of_order': QColor('gray'),
+    'inspection': QColor('blue')
+}
+
+STATUS_BACKGROUND = {
+    'vacant': QColor('#e8f5e8'),  # سبز بسیار روشن
+    'occupied': QColor('#ffe8e8'),  # قرمز بسیار روشن
+    'cleaning': QColor('#fff4e8'),  # نارنجی بسیار روشن
+    'maintenance': QColor('#f0e8ff'),  # بنفش بسیار روشن
+    'out_of_order': QColor('#f0f0f0'),  # خاکستری
+    'inspection': QColor('#e8f4ff')  # آبی بسیار روشن
+}
+
+
+def room_display_state(room: Dict[str, Any]) -> tuple:
+    """اطلاعاتی از اتاق که روی کارت نمایش داده می‌شود (برای تشخیص تغییر)"""
+    guest = room.get('current_guest')
+    guest_name = guest['full_name'].split()[0] if guest and guest.get('full_name') else ""
+    return (
+        room.get('room_number'),
+        room.get('room_type'),
+        room.get('floor'),
+        room.get('current_status'),
+        guest_name
+    )
+
+
+class RoomGridModel(QAbstractListModel):
+    """مدل لیست اتاق‌ها با به‌روزرسانی افزایشی"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rooms: List[Dict[str, Any]] = []
+        self._states: List[tuple] = []
+        self._row_by_id: Dict[Any, int] = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """تعداد اتاق‌ها"""
+        if parent.isValid():
+            return 0
+        return len(self._rooms)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        """داده هر اتاق"""
+        if not index.isValid() or index.row() >= len(self._rooms):
+            return None
+
+        row = index.row()
+        if role == RoomDataRole:
+            return self._states[row]
+        elif role == RoomStatusRole:
+            return self._rooms[row].get('current_status')
+        elif role == RoomFloorRole:
+            return self._rooms[row].get('floor')
+        elif role == Qt.DisplayRole:
+            return self._rooms[row].get('room_number')
+        elif role == Qt.ToolTipRole:
+            state = self._states[row]
+            return f"اتاق {state[0]} - {STATUS_TEXT.get(state[3], state[3])}"
+
+        return None
+
+    def update_rooms(self, rooms: List[Dict[str, Any]]) -> int:
+        """
+        به‌روزرسانی اتاق‌ها
+
+        اگر مجموعه و ترتیب اتاق‌ها تغییر نکرده باشد فقط برای سطرهای تغییر یافته
+        dataChanged ارسال می‌شود؛ در غیر این صورت مدل بازنشانی می‌شود.
+
+        Returns:
+            int: تعداد اتاق‌های تغییر یافته (یا کل اتاق‌ها در صورت بازنشانی)
+        """
+        room_ids = [room.get('room_id') for room in rooms]
+        states = [room_display_state(room) for room in rooms]
+
+        if len(room_ids) != len(self._rooms) or any(
+                self._row_by_id.get(room_id) != row for row, room_id in enumerate(room_ids)):
+            self.beginResetModel()
+            self._rooms = list(rooms)
+            self._states = states
+            self._row_by_id = {room_id: row for row, room_id in enumerate(room_ids)}
+            self.endResetModel()
+            return len(rooms)
+
+        changed = 0
+        for row, (room, state) in enumerate(zip(rooms, states)):
+            self._rooms[row] = room
+            if state != self._states[row]:
+                self._states[row] = state
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [RoomDataRole, RoomStatusRole])
+                changed += 1
+
+        return changed
+
+    def get_room(self, row: int) -> Optional[Dict[str, Any]]:
+        """دریافت داده اتاق یک سطر"""
+        if 0 <= row < len(self._rooms):
+            return self._rooms[row]
+        return None
+
+
+class RoomFilterProxyModel(QSortFilterProxyModel):
+    """فیلتر طبقه و وضعیت بدون ساخت مجدد کارت‌ها"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._floor: Optional[int] = None
+        self._status: Optional[str] = None
+
+    def set_filters(self, floor: Optional[int], status: Optional[str]):
+        """تنظیم فیلترها"""
+        if floor == self._floor and status == self._status:
+            return
+        self._floor = floor
+        self._status = status
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        """پذیرش اتاق بر اساس طبقه و وضعیت"""
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        if self._floor is not None and index.data(RoomFloorRole) != self._floor:
+            return False
+        if self._status is not None and index.data(RoomStatusRole) != self._status:
+            return False
+        return True
+
+
+class RoomCardDelegate(QStyledItemDelegate):
+    """نقاشی کارت اتاق فقط برای آیتم‌های قابل مشاهده"""
+
+    CARD_SIZE = QSize(120, 100)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.number_font = QFont()
+        self.number_font.setPointSize(12)
+        self.number_font.setBold(True)
+
+        self.type_font = QFont()
+        self.type_font.setPointSize(9)
+
+        self.status_font = QFont()
+        self.status_font.setBold(True)
+
+        self.guest_font = QFont()
+        self.guest_font.setPointSize(8)
+
+        self.border_pen = QPen(QColor('#ccc'))
+        self.selected_pen = QPen(QColor('#3498db'), 2)
+
+    def sizeHint(self, option, index) -> QSize:
+        """اندازه ثابت کارت"""
+        return self.CARD_SIZE
+
+    def paint(self, painter, option, index):
+        """نقاشی کارت اتاق"""
+        state = index.data(RoomDataRole)
+        if not state:
+            return
+
+        room_number, room_type, _floor, status, guest_name = state
+        rect = option.rect.adjusted(3, 3, -3, -3)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # پس‌زمینه و کادر
+        painter.setBrush(STATUS_BACKGROUND.get(status, QColor('white')))
+        painter.setPen(self.selected_pen if option.state & QStyle.State_Selected else self.border_pen)
+        painter.drawRoundedRect(rect, 5, 5)
+
+        line_height = rect.height() // 4
+        lines = [QRect(rect.left(), rect.top() + i * line_height, rect.width(), line_height)
+                 for i in range(4)]
+
+        # شماره اتاق
+        painter.setPen(QColor('black'))
+        painter.setFont(self.number_font)
+        painter.drawText(lines[0], Qt.AlignCenter, str(room_number or ""))
+
+        # نوع اتاق
+        painter.setPen(QColor('#666'))
+        painter.setFont(self.type_font)
+        painter.drawText(lines[1], Qt.AlignCenter, str(room_type or ""))
+
+        # وضعیت
+        painter.setPen(STATUS_COLOR.get(status, QColor('black')))
+        painter.setFont(self.status_font)
+        painter.drawText(lines[2], Qt.AlignCenter, STATUS_TEXT.get(status, status or ""))
+
+        # مهمان فعلی
+        if guest_name:
+            painter.setPen(QColor('#333'))
+            painter.setFont(self.guest_font)
+            painter.drawText(lines[3], Qt.AlignCenter, f"👤 {guest_name}")
+
+        painter.restore()
@@ -4,13 +4,13 @@
 """
 
 import logging
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-                            QLabel, QPushButton, QGroupBox, QScrollArea,
-                            QFrame, QComboBox)
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QColor, QPalette
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListView,
+                            QLabel, QPushButton, QComboBox)
+from PyQt5.QtCore import QTimer, QSize
 
 from app.services.reception.room_service import RoomService
+from app.views.widgets.dashboard.room_grid import (RoomGridModel, RoomFilterProxyModel,
+                                                   RoomCardDelegate, STATUS_TEXT)
 
 logger = logging.getLogger(__name__)
 
@@ -77,16 +77,26 @@ class RoomStatusWidget(QWidget):
         return layout
 
     def create_rooms_container(self):
-        """ایجاد کانتینر نمایش اتاق‌ها"""
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-
-        self.rooms_widget = QWidget()
-        self.rooms_layout = QGridLayout()
-        self.rooms_widget.setLayout(self.rooms_layout)
-
-        scroll_area.setWidget(self.rooms_widget)
-        return scroll_area
+        """ایجاد گرید مجازی نمایش اتاق‌ها"""
+        self.room_model = RoomGridModel(self)
+        self.room_proxy = RoomFilterProxyModel(self)
+        self.room_proxy.setSourceModel(self.room_model)
+
+        view = QListView()
+        view.setViewMode(QListView.IconMode)
+        view.setResizeMode(QListView.Adjust)
+        view.setMovement(QListView.Static)
+        view.setUniformItemSizes(True)
+        view.setLayoutMode(QListView.Batched)
+        view.setBatchSize(100)
+        view.setSpacing(4)
+        view.setGridSize(RoomCardDelegate.CARD_SIZE + QSize(8, 8))
+        view.setSelectionMode(QListView.SingleSelection)
+        view.setItemDelegate(RoomCardDelegate(view))
+        view.setModel(self.room_proxy)
+
+        self.rooms_view = view
+        return view
 
     def load_room_status(self):
         """بارگذاری وضعیت اتاق‌ها"""
@@ -103,120 +113,25 @@ class RoomStatusWidget(QWidget):
             logger.error(f"خطا در بارگذاری وضعیت اتاق‌ها: {e}")
 
     def display_rooms(self, rooms):
-        """نمایش اتاق‌ها در گرید"""
-        # پاک کردن layout فعلی
-        for i in reversed(range(self.rooms_layout.count())):
-            self.rooms_layout.itemAt(i).widget().setParent(None)
-
-        # نمایش اتاق‌ها
-        row, col = 0, 0
-        max_cols = 6  # حداکثر تعداد ستون
-
-        for room in rooms:
-            room_widget = self.create_room_widget(room)
-            self.rooms_layout.addWidget(room_widget, row, col)
-
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
-
-    def create_room_widget(self, room_data):
-        """ایجاد ویجت نمایش یک اتاق"""
-        room_frame = QFrame()
-        room_frame.setFrameStyle(QFrame.Box)
-        room_frame.setLineWidth(1)
-        room_frame.setMinimumSize(120, 100)
-
-        layout = QVBoxLayout()
-
-        # شماره اتاق
-        room_number = QLabel(room_data['room_number'])
-        room_number.setAlignment(Qt.AlignCenter)
-        room_number.setStyleSheet("font-size: 16px; font-weight: bold;")
-
-        # نوع اتاق
-        room_type = QLabel(room_data['room_type'])
-        room_type.setAlignment(Qt.AlignCenter)
-        room_type.setStyleSheet("font-size: 12px; color: #666;")
-
-        # وضعیت
-        status = QLabel(self.get_status_text(room_data['current_status']))
-        status.setAlignment(Qt.AlignCenter)
-        status.setStyleSheet(self.get_status_style(room_data['current_status']))
-
-        # مهمان فعلی (اگر وجود دارد)
-        guest_info = ""
-        if room_data['current_guest']:
-            guest = room_data['current_guest']
-            guest_name = guest['full_name'].split()[0]  # فقط نام کوچک
-            guest_info = f"👤 {guest_name}"
-
-        guest_label = QLabel(guest_info)
-        guest_label.setAlignment(Qt.AlignCenter)
-        guest_label.setStyleSheet("font-size: 10px; color: #333;")
-
-        layout.addWidget(room_number)
-        layout.addWidget(room_type)
-        layout.addWidget(status)
-        layout.addWidget(guest_label)
-
-        room_frame.setLayout(layout)
-
-        # تنظیم رنگ背景 بر اساس وضعیت
-        room_frame.setStyleSheet(self.get_room_background_style(room_data['current_status']))
-
-        return room_frame
+        """نمایش اتاق‌ها در گرید (فقط کارت‌های تغییر یافته بازنقاشی می‌شوند)"""
+        self.room_model.update_rooms(rooms)
 
     def get_status_text(self, status):
         """متن وضعیت به فارسی"""
-        status_map = {
-            'vacant': 'خالی',
-            'occupied': 'اشغال',
-            'cleaning': 'نظافت',
-            'maintenance': 'تعمیرات',
-            'out_of_order': 'غیرقابل استفاده',
-            'inspection': 'بازرسی'
-        }
-        return status_map.get(status, status)
-
-    def get_status_style(self, status):
-        """استایل متن وضعیت"""
-        color_map = {
-            'vacant': 'color: green; font-weight: bold;',
-            'occupied': 'color: red; font-weight: bold;',
-            'cleaning': 'color: orange; font-weight: bold;',
-            'maintenance': 'color: purple; font-weight: bold;',
-            'out_of_order': 'color: gray; font-weight: bold;',
-            'inspection': 'color: blue; font-weight: bold;'
-        }
-        return color_map.get(status, '')
-
-    def get_room_background_style(self, status):
-        """استایل background اتاق"""
-        color_map = {
-            'vacant': 'background-color: #e8f5e8;',  # سبز بسیار روشن
-            'occupied': 'background-color: #ffe8e8;',  # قرمز بسیار روشن
-            'cleaning': 'background-color: #fff4e8;',  # نارنجی بسیار روشن
-            'maintenance': 'background-color: #f0e8ff;',  # بنفش بسیار روشن
-            'out_of_order': 'background-color: #f0f0f0;',  # خاکستری
-            'inspection': 'background-color: #e8f4ff;'  # آبی بسیار روشن
-        }
-        return color_map.get(status, '') + 'border: 1px solid #ccc; border-radius: 5px; padding: 5px;'
+        return STATUS_TEXT.get(status, status)
 
     def apply_filters(self):
         """اعمال فیلترهای انتخاب شده"""
         floor_filter = self.floor_filter.currentText()
         status_filter = self.status_filter.currentText()
 
-        filtered_rooms = self.rooms_data
-
         # فیلتر طبقه
+        floor_num = None
         if floor_filter != "همه طبقات":
             floor_num = int(floor_filter.split()[1])  # استخراج شماره طبقه
-            filtered_rooms = [r for r in filtered_rooms if r['floor'] == floor_num]
 
         # فیلتر وضعیت
+        target_status = None
         if status_filter != "همه وضعیت‌ها":
             status_map = {
                 "خالی": "vacant",
@@ -225,7 +140,5 @@ class RoomStatusWidget(QWidget):
                 "تعمیرات": "maintenance"
             }
             target_status = status_map.get(status_filter)
-            if target_status:
-                filtered_rooms = [r for r in filtered_rooms if r['current_status'] == target_status]
 
-        self.display_rooms(filtered_rooms)
+        self.room_proxy.set_filters(floor_num, target_status)
@@ -14,7 +14,6 @@ from decimal import Decimal
 
 from app.services.reception.guest_service import GuestService
 from app.services.reception.payment_service import PaymentService
-from app.services.reception.housekeeping_service import HousekeepingService
 
 logger = logging.getLogger(__name__)
 
@@ -249,22 +248,10 @@ class CheckOutWidget(QWidget):
                 QMessageBox.warning(self, "هشدار", "لطفاً بررسی صندوق امانات را تأیید کنید")
                 return
 
-            # ثبت خروج
-            result = GuestService.check_out_guest(self.stay_id)
+            # ثبت خروج، وظیفه نظافت و اطلاع‌رسانی در یک تراکنش
+            result = GuestService.complete_check_out(self.stay_id)
 
             if result['success']:
-                # ایجاد وظیفه نظافت
-                try:
-                    room_result = self.get_room_id_from_stay()
-                    if room_result['success']:
-                        HousekeepingService.create_cleaning_task(
-                            room_id=room_result['room_id'],
-                            task_type='checkout_cleaning',
-                            priority='high'
-                        )
-                except Exception as e:
-                    logger.warning(f"خطا در ایجاد وظیفه نظافت: {e}")
-
                 QMessageBox.information(self, "موفق", "خروج مهمان با موفقیت ثبت شد")
                 self.btn_print_receipt.setEnabled(True)
                 self.check_out_completed.emit(self.stay_id)
@@ -275,12 +262,6 @@ class CheckOutWidget(QWidget):
             logger.error(f"خطا در ثبت خروج: {e}")
             QMessageBox.critical(self, "خطا", f"خطا در ثبت خروج: {str(e)}")
 
-    def get_room_id_from_stay(self):
-        """دریافت ID اتاق از اقامت"""
-        # این متد نیاز به پیاده‌سازی دارد
-        # در نسخه واقعی از RoomService استفاده می‌شود
-        return {'success': True, 'room_id': 1}
-
     def print_receipt(self):
         """چاپ رسید"""
         try:
@@ -5,14 +5,15 @@
 
 import logging
 from datetime import datetime, date
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-                            QTableWidgetItem, QPushButton, QLineEdit, QComboBox,
-                            QLabel, QMessageBox, QHeaderView, QGroupBox,
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
+                            QPushButton, QLineEdit, QComboBox,
+                            QLabel, QGroupBox,
                             QFormLayout, QDateEdit, QTabWidget)
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer
-from PyQt5.QtGui import QFont, QColor, QBrush
+from PyQt5.QtGui import QFont, QColor
 
 from app.services.reception.guest_service import GuestService
+from app.views.widgets.shared.custom_table import CustomTableWidget
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -25,16 +26,33 @@ class GuestListWidget(QWidget):
     check_in_requested = pyqtSignal(int)  # درخواست ثبت ورود
     check_out_requested = pyqtSignal(int)  # درخواست ثبت خروج
 
+    # نگاشت نوع جستجو به پارامتر سرویس
+    SEARCH_TYPE_MAP = {
+        "همه": 'all',
+        "نام": 'name',
+        "کدملی": 'national_id',
+        "تلفن": 'phone',
+        "پاسپورت": 'passport'
+    }
+
+    PAGE_SIZE = 100
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.current_guests = []
         self.selected_guest_id = None
+
+        # تاخیر در ارسال جستجو به سرویس تا پایان تایپ
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.apply_filters)
+
         self.init_ui()
         self.load_guests()
 
         # تایمر برای به‌روزرسانی خودکار
         self.auto_refresh_timer = QTimer()
-        self.auto_refresh_timer.timeout.connect(self.load_guests)
+        self.auto_refresh_timer.timeout.connect(self.guest_table.refresh_data)
         self.auto_refresh_timer.start(30000)  # هر 30 ثانیه
 
     def init_ui(self):
@@ -70,6 +88,7 @@ class GuestListWidget(QWidget):
         # نوع جستجو
         self.search_type = QComboBox()
         self.search_type.addItems(["همه", "نام", "کدملی", "تلفن", "پاسپورت"])
+        self.search_type.currentTextChanged.connect(self.on_search_changed)
         layout.addWidget(QLabel("نوع جستجو:"))
         layout.addWidget(self.search_type)
 
@@ -89,27 +108,15 @@ class GuestListWidget(QWidget):
         return group
 
     def create_guest_table(self):
-        """ایجاد جدول نمایش مهمانان"""
-        table = QTableWidget()
-        table.setColumnCount(8)
-        table.setHorizontalHeaderLabels([
-            "ID", "نام کامل", "کدملی", "تلفن", "تاریخ ورود",
-            "تاریخ خروج", "وضعیت", "اتاق"
-        ])
-
-        # تنظیمات جدول
-        table.setSelectionBehavior(QTableWidget.SelectRows)
-        table.setSelectionMode(QTableWidget.SingleSelection)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
-        table.doubleClicked.connect(self.on_guest_double_click)
-        table.clicked.connect(self.on_guest_clicked)
-
-        # تنظیم سایز ستون‌ها
-        header = table.horizontalHeader()
-        header.setSectionResizeMode(1, QHeaderView.Stretch)  # نام کامل
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # کدملی
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # تلفن
+        """ایجاد جدول نمایش مهمانان (بارگذاری صفحه‌ای)"""
+        table = CustomTableWidget()
+        # جستجو در گروه جستجوی همین ویجت انجام می‌شود
+        table.toolbar.hide()
+        table.model.set_row_color_func(self.get_row_color)
+
+        table.row_selected.connect(self.on_guest_clicked)
+        table.row_double_clicked.connect(self.on_guest_double_click)
+        table.model.page_loaded.connect(self.on_page_loaded)
 
         return table
 
@@ -132,7 +139,7 @@ class GuestListWidget(QWidget):
         self.btn_check_out.setEnabled(False)
 
         self.btn_refresh = QPushButton("بروزرسانی")
-        self.btn_refresh.clicked.connect(self.load_guests)
+        self.btn_refresh.clicked.connect(self.guest_table.refresh_data)
 
         # افزودن دکمه‌ها به layout
         layout.addWidget(self.btn_view_details)
@@ -149,108 +156,86 @@ class GuestListWidget(QWidget):
         return group
 
     def load_guests(self):
-        """بارگذاری لیست مهمانان"""
-        try:
-            # دریافت داده از سرویس
-            result = GuestService.search_guests("", "name")
-
-            if result['success']:
-                self.current_guests = result['guests']
-                self.populate_table(self.current_guests)
-                self.update_stats(len(self.current_guests))
-            else:
-                QMessageBox.warning(self, "خطا", f"خطا در بارگذاری مهمانان: {result.get('error')}")
-
-        except Exception as e:
-            logger.error(f"خطا در بارگذاری مهمانان: {e}")
-            QMessageBox.critical(self, "خطا", f"خطا در بارگذاری مهمانان: {str(e)}")
-
-    def populate_table(self, guests):
-        """پر کردن جدول با داده مهمانان"""
-        self.guest_table.setRowCount(len(guests))
-
-        for row, guest in enumerate(guests):
-            # ID
-            self.guest_table.setItem(row, 0, QTableWidgetItem(str(guest['id'])))
-
-            # نام کامل
-            self.guest_table.setItem(row, 1, QTableWidgetItem(guest['full_name']))
-
-            # کدملی
-            national_id = guest.get('national_id', '')
-            self.guest_table.setItem(row, 2, QTableWidgetItem(national_id))
-
-            # تلفن
-            phone = guest.get('phone', '')
-            self.guest_table.setItem(row, 3, QTableWidgetItem(phone))
-
-            # تاریخ ورود (نمایشی)
-            self.guest_table.setItem(row, 4, QTableWidgetItem("--"))
-
-            # تاریخ خروج (نمایشی)
-            self.guest_table.setItem(row, 5, QTableWidgetItem("--"))
-
-            # وضعیت
-            status_item = QTableWidgetItem("تأیید شده")
-            self.set_status_color(status_item, guest.get('vip_status', False))
-            self.guest_table.setItem(row, 6, status_item)
-
-            # اتاق
-            self.guest_table.setItem(row, 7, QTableWidgetItem("--"))
+        """بارگذاری لیست مهمانان (صفحه اول؛ صفحات بعد با پیمایش دریافت می‌شوند)"""
+        self.guest_table.set_data_source(
+            self.fetch_guest_page,
+            headers=["ID", "نام کامل", "کدملی", "تلفن", "تاریخ ورود",
+                     "تاریخ خروج", "وضعیت", "اتاق"],
+            column_keys=['id', 'full_name', 'national_id', 'phone', 'check_in',
+                         'check_out', 'status', 'room'],
+            page_size=self.PAGE_SIZE,
+            # ستون‌های اقامت در keysetهای سرویس نیستند و مرتب‌سازی ندارند
+            sortable_keys=list(GuestService.PAGE_KEYSETS)
+        )
 
         # پنهان کردن ستون ID
-        self.guest_table.setColumnHidden(0, True)
+        self.guest_table.table_view.setColumnHidden(0, True)
 
-    def set_status_color(self, item, is_vip):
-        """تعیین رنگ وضعیت بر اساس VIP بودن"""
-        if is_vip:
-            item.setBackground(QBrush(QColor(255, 255, 200)))  # زرد برای VIP
-            item.setForeground(QBrush(QColor(139, 0, 0)))  # قرمز تیره
+    def fetch_guest_page(self, cursor=None, limit=100, search_text="", search_column=None,
+                         sort_key=None, descending=False):
+        """دریافت یک صفحه از مهمانان از سرویس"""
+        search_type = self.SEARCH_TYPE_MAP.get(self.search_type.currentText(), 'all')
+        if search_text:
+            # جستجو با ایندکس سه‌حرفی: نتایج به ترتیب رتبه، صفحه بعد با cursor
+            result = GuestService.search_guests(search_text, search_type, limit=limit, cursor=cursor)
+        else:
+            result = GuestService.list_guests_page(
+                cursor=cursor,
+                limit=limit,
+                sort_by=sort_key or 'id',
+                descending=descending
+            )
+
+        if not result['success']:
+            logger.error(f"خطا در بارگذاری مهمانان: {result.get('error')}")
+            return result
+
+        rows = [
+            {
+                'id': guest['id'],
+                'full_name': guest['full_name'],
+                'national_id': guest.get('national_id') or '',
+                'phone': guest.get('phone') or '',
+                'check_in': "--",
+                'check_out': "--",
+                'status': "تأیید شده",
+                'room': "--",
+                'vip_status': guest.get('vip_status', False)
+            }
+            for guest in result['guests']
+        ]
+
+        return {
+            'success': True,
+            'rows': rows,
+            'next_cursor': result.get('next_cursor')
+        }
+
+    def get_row_color(self, row_data):
+        """تعیین رنگ سطر بر اساس VIP بودن"""
+        if row_data.get('vip_status'):
+            return QColor(255, 255, 200)  # زرد برای VIP
+        return None
+
+    def on_page_loaded(self, loaded_count, has_more):
+        """هنگام بارگذاری یک صفحه از مهمانان"""
+        self.update_stats(loaded_count, has_more)
 
     def on_search_changed(self, text):
         """هنگام تغییر متن جستجو"""
-        self.apply_filters()
+        self.search_timer.start()
 
     def apply_filters(self):
-        """اعمال فیلترهای جستجو"""
+        """ارسال فیلترهای جستجو به سرویس و بارگذاری مجدد از صفحه اول"""
         search_text = self.search_input.text().strip()
         status_filter = self.status_filter.currentText()
 
-        filtered_guests = self.current_guests
-
-        # فیلتر بر اساس متن جستجو
-        if search_text:
-            search_type = self.search_type.currentText()
-            if search_type == "همه":
-                filtered_guests = [
-                    g for g in filtered_guests
-                    if search_text.lower() in g['full_name'].lower() or
-                       search_text in g.get('national_id', '') or
-                       search_text in g.get('phone', '')
-                ]
-            elif search_type == "نام":
-                filtered_guests = [
-                    g for g in filtered_guests
-                    if search_text.lower() in g['full_name'].lower()
-                ]
-            elif search_type == "کدملی":
-                filtered_guests = [
-                    g for g in filtered_guests
-                    if search_text in g.get('national_id', '')
-                ]
-            elif search_type == "تلفن":
-                filtered_guests = [
-                    g for g in filtered_guests
-                    if search_text in g.get('phone', '')
-                ]
-
         # فیلتر بر اساس وضعیت
         if status_filter != "همه":
             # این بخش نیاز به اطلاعات وضعیت از سرویس دارد
             pass
 
-        self.populate_table(filtered_guests)
-        self.update_stats(len(filtered_guests))
+        self.guest_table.model.set_filter(search_text)
 
     def reset_filters(self):
         """بازنشانی تمام فیلترها"""
@@ -259,20 +244,16 @@ class GuestListWidget(QWidget):
         self.status_filter.setCurrentIndex(0)
         self.load_guests()
 
-    def on_guest_clicked(self, index):
+    def on_guest_clicked(self, row_data):
         """هنگام کلیک روی مهمان"""
-        row = index.row()
-        if 0 <= row < self.guest_table.rowCount():
-            guest_id = int(self.guest_table.item(row, 0).text())
-            self.selected_guest_id = guest_id
+        if row_data:
+            self.selected_guest_id = int(row_data['id'])
             self.update_action_buttons(True)
 
-    def on_guest_double_click(self, index):
+    def on_guest_double_click(self, row_data):
         """هنگام دابل کلیک روی مهمان"""
-        row = index.row()
-        if 0 <= row < self.guest_table.rowCount():
-            guest_id = int(self.guest_table.item(row, 0).text())
-            self.guest_selected.emit(guest_id)
+        if row_data:
+            self.guest_selected.emit(int(row_data['id']))
 
     def update_action_buttons(self, enabled):
         """به‌روزرسانی وضعیت دکمه‌های عملیاتی"""
@@ -280,9 +261,10 @@ class GuestListWidget(QWidget):
         self.btn_check_in.setEnabled(enabled)
         self.btn_check_out.setEnabled(enabled)
 
-    def update_stats(self, count):
+    def update_stats(self, count, has_more=False):
         """به‌روزرسانی آمار"""
-        self.stats_label.setText(f"تعداد مهمانان: {count}")
+        suffix = "+" if has_more else ""
+        self.stats_label.setText(f"تعداد مهمانان: {count}{suffix}")
 
     def view_guest_details(self):
         """مشاهده جزئیات مهمان انتخاب شده"""
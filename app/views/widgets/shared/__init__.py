@@ -4,7 +4,8 @@
 """
 
 from .base_widget import BaseWidget, BaseDialog
-from .custom_table import CustomTableWidget, TableModel
+from .custom_table import CustomTableWidget, TableModel, PersianSortFilterProxyModel
+from .lazy_tab_widget import LazyTabWidget, TimerVisibilityGuard
 from .search_bar import SearchWidget
 from .date_range_selector import DateRangeSelector
 from .loading_widget import LoadingWidget
@@ -16,6 +17,9 @@ __all__ = [
     'BaseDialog',
     'CustomTableWidget',
     'TableModel',
+    'PersianSortFilterProxyModel',
+    'LazyTabWidget',
+    'TimerVisibilityGuard',
     'SearchWidget',
     'DateRangeSelector',
     'LoadingWidget',
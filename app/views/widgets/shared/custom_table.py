@@ -4,36 +4,164 @@
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from PyQt5.QtWidgets import (QTableView, QWidget, QVBoxLayout, QHBoxLayout,
                             QHeaderView, QAbstractItemView, QMenu, QAction,
                             QLabel, QLineEdit, QPushButton, QComboBox)
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QBrush, QColor
 
+from app.utils.text_normalizer import normalize_persian_text, collation_key, ngrams
+
 logger = logging.getLogger(__name__)
 
 class TableModel(QAbstractTableModel):
     """
     مدل جدول برای نمایش داده‌های پویا
+
+    در حالت صفحه‌ای (set_data_source) داده‌ها به صورت تدریجی و با
+    canFetchMore/fetchMore از منبع داده دریافت می‌شوند. منبع داده یک
+    callable با امضای زیر است و فیلتر/مرتب‌سازی را در سرویس انجام می‌دهد:
+
+        fetch_page(cursor, limit, search_text, search_column, sort_key, descending)
+            -> {'success': bool, 'rows': List[Dict], 'next_cursor': Any}
     """
 
+    # سیگنال‌های بارگذاری صفحه‌ای
+    page_loaded = pyqtSignal(int, bool)  # تعداد سطرهای بارگذاری شده، وجود صفحه بعد
+    page_failed = pyqtSignal(str)  # پیام خطا
+
     def __init__(self, data: List[Dict] = None, headers: List[str] = None):
         super().__init__()
         self._data = data or []
         self._headers = headers or []
         self._column_keys = []
 
+        # وضعیت منبع داده صفحه‌ای
+        self._fetch_page: Optional[Callable] = None
+        self._page_size = 100
+        self._cursor = None
+        self._has_more = False
+        self._fetching = False
+        self._search_text = ""
+        self._search_column: Optional[str] = None
+        self._sort_key: Optional[str] = None
+        self._sort_descending = False
+        self._sortable_keys: Optional[set] = None
+        self._row_color_func: Optional[Callable[[Dict], Optional[QColor]]] = None
+
     def set_data(self, data: List[Dict], headers: List[str] = None, column_keys: List[str] = None):
         """تنظیم داده‌ها و هدرهای جدول"""
         self.beginResetModel()
         self._data = data
+        self._fetch_page = None
+        self._has_more = False
         if headers:
             self._headers = headers
         if column_keys:
             self._column_keys = column_keys
         self.endResetModel()
 
+    def set_data_source(self, fetch_page: Callable, headers: List[str],
+                        column_keys: List[str], page_size: int = 100,
+                        sortable_keys: Optional[List[str]] = None):
+        """
+        تنظیم منبع داده صفحه‌ای و بارگذاری صفحه اول
+
+        sortable_keys ستون‌هایی است که منبع داده مرتب‌سازی آن‌ها را پشتیبانی
+        می‌کند (None یعنی همه ستون‌ها).
+        """
+        self._fetch_page = fetch_page
+        self._page_size = page_size
+        self._headers = headers
+        self._column_keys = column_keys
+        self._sortable_keys = set(sortable_keys) if sortable_keys is not None else None
+        self._sort_key = None
+        self._sort_descending = False
+        self.reload()
+
+    def is_sortable(self, column: int) -> bool:
+        """آیا منبع داده صفحه‌ای مرتب‌سازی ستون را پشتیبانی می‌کند"""
+        key = self.get_column_key(column)
+        return key is not None and (self._sortable_keys is None or key in self._sortable_keys)
+
+    def is_paged(self) -> bool:
+        """آیا مدل در حالت صفحه‌ای است"""
+        return self._fetch_page is not None
+
+    def has_more(self) -> bool:
+        """آیا صفحه دیگری در منبع داده وجود دارد"""
+        return self._has_more
+
+    def set_filter(self, search_text: str, search_column: Optional[str] = None):
+        """تنظیم فیلتر سمت سرویس و بارگذاری مجدد"""
+        self._search_text = search_text
+        self._search_column = search_column
+        self.reload()
+
+    def set_sort(self, sort_key: Optional[str], descending: bool = False):
+        """تنظیم مرتب‌سازی سمت سرویس و بارگذاری مجدد"""
+        self._sort_key = sort_key
+        self._sort_descending = descending
+        self.reload()
+
+    def reload(self):
+        """پاک کردن سطرها و دریافت صفحه اول از منبع داده"""
+        if not self.is_paged():
+            return
+
+        self.beginResetModel()
+        self._data = []
+        self._cursor = None
+        self._has_more = True
+        self.endResetModel()
+
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """آیا سطرهای بیشتری برای دریافت وجود دارد"""
+        if parent.isValid():
+            return False
+        return self.is_paged() and self._has_more and not self._fetching
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        """دریافت صفحه بعد از منبع داده (keyset)"""
+        if not self.canFetchMore(parent):
+            return
+
+        self._fetching = True
+        try:
+            result = self._fetch_page(
+                cursor=self._cursor,
+                limit=self._page_size,
+                search_text=self._search_text,
+                search_column=self._search_column,
+                sort_key=self._sort_key,
+                descending=self._sort_descending
+            )
+        except Exception as e:
+            logger.error(f"خطا در دریافت صفحه داده: {e}")
+            result = {'success': False, 'error': str(e)}
+        finally:
+            self._fetching = False
+
+        if not result.get('success'):
+            self._has_more = False
+            self.page_failed.emit(result.get('error', ''))
+            return
+
+        rows = result.get('rows', [])
+        self._cursor = result.get('next_cursor')
+        self._has_more = self._cursor is not None
+
+        if rows:
+            first = len(self._data)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._data.extend(rows)
+            self.endInsertRows()
+
+        self.page_loaded.emit(len(self._data), self._has_more)
+
     def rowCount(self, parent: QModelIndex = None) -> int:
         """تعداد سطرها"""
         return len(self._data)
@@ -59,9 +187,17 @@ class TableModel(QAbstractTableModel):
 
         if role == Qt.DisplayRole:
             return str(value)
+        elif role == Qt.UserRole:
+            # مقدار خام برای مرتب‌سازی
+            return value
         elif role == Qt.TextAlignmentRole:
             return Qt.AlignRight | Qt.AlignVCenter
         elif role == Qt.BackgroundRole:
+            if self._row_color_func:
+                color = self._row_color_func(item)
+                if color is not None:
+                    return QBrush(color)
+
             # رنگ‌آمیزی سطرهای زوج و فرد
             if row % 2 == 0:
                 return QBrush(QColor(248, 249, 250))  # رنگ روشن
@@ -92,6 +228,181 @@ class TableModel(QAbstractTableModel):
             return self._data[row]
         return {}
 
+    def set_row_color_func(self, func: Optional[Callable[[Dict], Optional[QColor]]]):
+        """تنظیم تابع تعیین رنگ پس‌زمینه سطر بر اساس داده آن"""
+        self._row_color_func = func
+
+    def get_column_key(self, column: int) -> Optional[str]:
+        """دریافت کلید داده ستون مشخص"""
+        if 0 <= column < len(self._column_keys):
+            return self._column_keys[column]
+        return None
+
+    def get_raw_value(self, row: int, column: int) -> Any:
+        """دریافت مقدار خام یک سلول بدون ساخت QModelIndex"""
+        item = self._data[row]
+        key = self._column_keys[column] if self._column_keys else list(item.keys())[column]
+        return item.get(key, "")
+
+
+class PersianSortFilterProxyModel(QSortFilterProxyModel):
+    """
+    پراکسی مرتب‌سازی و فیلتر آگاه از زبان فارسی
+
+    کلیدهای مرتب‌سازی (collation_key) و متن یکسان‌سازی شده هر ستون فقط یک بار
+    پس از هر بارگذاری محاسبه می‌شوند و برای فیلتر متنی یک ایندکس سه‌حرفی
+    (trigram) برای هر ستون نگه داشته می‌شود. با اضافه شدن سطرها (مثلاً در
+    بارگذاری صفحه‌ای) کش‌ها به صورت افزایشی به‌روز می‌شوند.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._search_text = ""
+        self._filter_column = -1
+        self._matching_rows: Optional[set] = None
+
+        # کش‌های هر ستون: ستون -> لیست مقادیر به ترتیب سطر منبع
+        self._sort_keys: Dict[int, List] = {}
+        self._normalized: Dict[int, List[str]] = {}
+        # ایندکس trigram: ستون -> {trigram: set(ردیف‌ها)}
+        self._trigram_index: Dict[int, Dict[str, set]] = {}
+
+    def setSourceModel(self, model):
+        """تنظیم مدل منبع و اتصال سیگنال‌های باطل‌سازی کش"""
+        old_model = self.sourceModel()
+        if old_model is not None:
+            old_model.modelReset.disconnect(self.clear_caches)
+            old_model.rowsInserted.disconnect(self._on_rows_inserted)
+            old_model.dataChanged.disconnect(self.clear_caches)
+
+        super().setSourceModel(model)
+
+        model.modelReset.connect(self.clear_caches)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.dataChanged.connect(self.clear_caches)
+        self.clear_caches()
+
+    def clear_caches(self, *args):
+        """پاک کردن کش کلیدها و ایندکس‌ها (پس از بارگذاری مجدد داده)"""
+        self._sort_keys.clear()
+        self._normalized.clear()
+        self._trigram_index.clear()
+        self._refresh_matches()
+
+    def _raw_value(self, row: int, column: int) -> Any:
+        """دریافت مقدار خام سلول از مدل منبع"""
+        source = self.sourceModel()
+        if hasattr(source, 'get_raw_value'):
+            return source.get_raw_value(row, column)
+        return source.index(row, column).data(Qt.UserRole)
+
+    def _column_sort_keys(self, column: int) -> List:
+        """کلیدهای مرتب‌سازی ستون (هر سطر فقط یک بار محاسبه می‌شود)"""
+        keys = self._sort_keys.setdefault(column, [])
+        row_count = self.sourceModel().rowCount()
+        if len(keys) < row_count:
+            keys.extend(collation_key(self._raw_value(row, column))
+                        for row in range(len(keys), row_count))
+        return keys
+
+    def _column_normalized(self, column: int) -> List[str]:
+        """متن یکسان‌سازی شده ستون (هر سطر فقط یک بار محاسبه می‌شود)"""
+        values = self._normalized.setdefault(column, [])
+        row_count = self.sourceModel().rowCount()
+        if len(values) < row_count:
+            first = len(values)
+            values.extend(normalize_persian_text(self._raw_value(row, column))
+                          for row in range(first, row_count))
+
+            # به‌روزرسانی افزایشی ایندکس در صورت وجود
+            index = self._trigram_index.get(column)
+            if index is not None:
+                self._index_rows(index, values, first)
+        return values
+
+    def _column_index(self, column: int) -> Dict[str, set]:
+        """ایندکس trigram ستون (ساخت یک‌باره و به‌روزرسانی افزایشی)"""
+        values = self._column_normalized(column)
+        index = self._trigram_index.get(column)
+        if index is None:
+            index = {}
+            self._index_rows(index, values, 0)
+            self._trigram_index[column] = index
+        return index
+
+    @staticmethod
+    def _index_rows(index: Dict[str, set], values: List[str], first: int):
+        """افزودن سطرها از first به بعد به ایندکس trigram"""
+        for row in range(first, len(values)):
+            for gram in ngrams(values[row]):
+                index.setdefault(gram, set()).add(row)
+
+    def _on_rows_inserted(self, parent: QModelIndex, first: int, last: int):
+        """محاسبه مجدد فیلتر برای سطرهای اضافه شده (کش‌ها افزایشی پر می‌شوند)"""
+        if self._search_text:
+            self._refresh_matches()
+
+    def _match_column(self, column: int, needle: str) -> set:
+        """یافتن سطرهای منطبق در یک ستون"""
+        values = self._column_normalized(column)
+
+        if len(needle) < 3:
+            # عبارت‌های کوتاه: پیمایش مستقیم روی متن از پیش یکسان‌شده
+            return {row for row, text in enumerate(values) if needle in text}
+
+        index = self._column_index(column)
+        postings = []
+        for gram in ngrams(needle):
+            rows = index.get(gram)
+            if not rows:
+                return set()
+            postings.append(rows)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for rows in postings[1:]:
+            candidates &= rows
+            if not candidates:
+                return candidates
+
+        # تأیید نهایی برای حذف انطباق‌های کاذب trigram
+        return {row for row in candidates if needle in values[row]}
+
+    def _refresh_matches(self):
+        """محاسبه مجدد مجموعه سطرهای منطبق با فیلتر فعلی"""
+        if not self._search_text or self.sourceModel() is None:
+            self._matching_rows = None
+        else:
+            columns = ([self._filter_column] if self._filter_column >= 0
+                       else range(self.sourceModel().columnCount()))
+            matches = set()
+            for column in columns:
+                matches |= self._match_column(column, self._search_text)
+            self._matching_rows = matches
+
+        self.invalidateFilter()
+
+    def set_search_text(self, text: str):
+        """تنظیم متن فیلتر (یکسان‌سازی فارسی و ارقام)"""
+        self._search_text = normalize_persian_text(text)
+        self._refresh_matches()
+
+    def set_filter_column(self, column: int):
+        """تنظیم ستون فیلتر (۱- برای همه ستون‌ها)"""
+        self._filter_column = column
+        self._refresh_matches()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        """پذیرش سطر بر اساس مجموعه از پیش محاسبه شده"""
+        if self._matching_rows is None:
+            return True
+        return source_row in self._matching_rows
+
+    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
+        """مقایسه با کلیدهای از پیش محاسبه شده"""
+        keys = self._column_sort_keys(left.column())
+        return keys[left.row()] < keys[right.row()]
+
 
 class CustomTableWidget(QWidget):
     """
@@ -106,9 +417,17 @@ class CustomTableWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.model = TableModel()
-        self.proxy_model = QSortFilterProxyModel()
+        self.proxy_model = PersianSortFilterProxyModel()
         self.proxy_model.setSourceModel(self.model)
-        self.proxy_model.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+        # ستون و ترتیب مرتب‌سازی سمت سرویس (حالت صفحه‌ای)
+        self._sort_section = -1
+        self._sort_order = Qt.AscendingOrder
+
+        # تاخیر در ارسال جستجو به سرویس در حالت صفحه‌ای
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
 
         self.setup_ui()
         self.setup_connections()
@@ -193,8 +512,14 @@ class CustomTableWidget(QWidget):
         self.table_view.doubleClicked.connect(self.on_double_click)
         self.table_view.customContextMenuRequested.connect(self.show_context_menu)
 
+        self.search_timer.timeout.connect(self.apply_remote_filter)
+        self.model.page_loaded.connect(lambda *_: self.update_status())
+        self.model.page_failed.connect(self.on_page_failed)
+        self.table_view.horizontalHeader().sortIndicatorChanged.connect(self.on_sort_indicator_changed)
+
     def set_data(self, data: List[Dict], headers: List[str], column_keys: List[str] = None):
         """تنظیم داده‌های جدول"""
+        self.table_view.setSortingEnabled(True)
         self.model.set_data(data, headers, column_keys)
         self.update_column_filter(headers)
         self.update_status()
@@ -202,6 +527,28 @@ class CustomTableWidget(QWidget):
         # تنظیم عرض ستون‌ها
         self.table_view.resizeColumnsToContents()
 
+    def set_data_source(self, fetch_page: Callable, headers: List[str],
+                        column_keys: List[str], page_size: int = 100,
+                        sortable_keys: Optional[List[str]] = None):
+        """
+        تنظیم منبع داده صفحه‌ای
+
+        در این حالت فقط صفحات دیده شده در حافظه نگه داشته می‌شوند و
+        جستجو و مرتب‌سازی به سرویس سپرده می‌شود. کلیک روی هدر ستون‌های
+        خارج از sortable_keys نادیده گرفته می‌شود.
+        """
+        # مرتب‌سازی محلی پراکسی غیرفعال؛ کلیک روی هدر به سرویس ارسال می‌شود
+        self.table_view.setSortingEnabled(False)
+        header = self.table_view.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        self._set_sort_indicator(-1, Qt.AscendingOrder)
+
+        self.proxy_model.set_search_text("")
+        self.model.set_data_source(fetch_page, headers, column_keys, page_size, sortable_keys)
+        self.update_column_filter(headers)
+        self.table_view.resizeColumnsToContents()
+
     def update_column_filter(self, headers: List[str]):
         """به‌روزرسانی فیلتر ستون‌ها"""
         self.column_filter.clear()
@@ -211,20 +558,61 @@ class CustomTableWidget(QWidget):
     def update_status(self):
         """به‌روزرسانی نوار وضعیت"""
         count = self.model.rowCount()
-        self.status_bar.setText(f"تعداد رکوردها: {count}")
+        if self.model.is_paged() and self.model.has_more():
+            self.status_bar.setText(f"تعداد رکوردها: {count}+ (با پیمایش بیشتر بارگذاری می‌شود)")
+        else:
+            self.status_bar.setText(f"تعداد رکوردها: {count}")
+
+    def on_page_failed(self, error: str):
+        """هنگام خطا در دریافت صفحه"""
+        self.status_bar.setText(f"خطا در بارگذاری داده‌ها: {error}")
 
     def on_search_text_changed(self, text: str):
         """هنگام تغییر متن جستجو"""
-        self.proxy_model.setFilterFixedString(text)
+        if self.model.is_paged():
+            self.search_timer.start()
+        else:
+            self.proxy_model.set_search_text(text)
+
+    def apply_remote_filter(self):
+        """ارسال فیلتر جستجو به منبع داده صفحه‌ای"""
+        column_index = self.column_filter.currentIndex() - 1
+        search_column = self.model.get_column_key(column_index) if column_index >= 0 else None
+        self.model.set_filter(self.search_input.text().strip(), search_column)
+
+    def _set_sort_indicator(self, column: int, order: Qt.SortOrder):
+        """تنظیم نشانگر مرتب‌سازی هدر بدون ارسال سیگنال"""
+        header = self.table_view.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(column, order)
+        header.blockSignals(False)
+        self._sort_section, self._sort_order = column, order
+
+    def on_sort_indicator_changed(self, column: int, order: Qt.SortOrder):
+        """هنگام کلیک روی هدر در حالت صفحه‌ای"""
+        if not self.model.is_paged():
+            return
+        if not self.model.is_sortable(column):
+            # نشانگر همان ترتیب داده‌های نمایش داده شده را نشان می‌دهد
+            self._set_sort_indicator(self._sort_section, self._sort_order)
+            return
+
+        self._sort_section, self._sort_order = column, order
+        self.model.set_sort(self.model.get_column_key(column), order == Qt.DescendingOrder)
 
     def on_column_filter_changed(self, column: str):
         """هنگام تغییر فیلتر ستون"""
+        if self.model.is_paged():
+            if self.search_input.text().strip():
+                self.search_timer.start()
+            return
+
         if column == "همه ستون‌ها":
-            self.proxy_model.setFilterKeyColumn(-1)  # همه ستون‌ها
+            self.proxy_model.set_filter_column(-1)  # همه ستون‌ها
         else:
             column_index = self.column_filter.currentIndex() - 1
             if column_index >= 0:
-                self.proxy_model.setFilterKeyColumn(column_index)
+                self.proxy_model.set_filter_column(column_index)
 
     def on_selection_changed(self):
         """هنگام تغییر انتخاب"""
@@ -271,6 +659,10 @@ class CustomTableWidget(QWidget):
 
     def refresh_data(self):
         """بروزرسانی داده‌ها"""
+        if self.model.is_paged():
+            self.model.reload()
+            return
+
         # باید در کلاس فرزند پیاده‌سازی شود
         logger.info("بروزرسانی داده‌های جدول")
 
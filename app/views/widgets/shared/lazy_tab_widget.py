@@ -0,0 +1,123 @@
+# app/views/widgets/shared/lazy_tab_widget.py
+"""
+تب ویجت با ساخت تنبل صفحات و توقف تایمرهای صفحات پنهان
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List
+from PyQt5.QtWidgets import QTabWidget, QWidget, QVBoxLayout
+from PyQt5.QtCore import QObject, QEvent, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class TimerVisibilityGuard(QObject):
+    """
+    فیلتر رویداد که تایمرهای یک ویجت را هنگام پنهان شدن متوقف و هنگام
+    نمایش دوباره ادامه می‌دهد.
+
+    تایمرهای ویجت‌ها در این پروژه بدون والد و به صورت attribute ساخته
+    می‌شوند (مثلاً self.refresh_timer)، بنابراین از طریق vars() پیدا می‌شوند.
+    فقط تایمرهایی که هنگام پنهان شدن فعال بوده‌اند دوباره شروع می‌شوند.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paused: Dict[int, List[QTimer]] = {}
+
+    @staticmethod
+    def find_timers(widget: QWidget) -> List[QTimer]:
+        """یافتن تایمرهای نگهداری شده به صورت attribute ویجت"""
+        return [value for value in vars(widget).values() if isinstance(value, QTimer)]
+
+    def guard(self, root: QWidget):
+        """نصب فیلتر روی ویجت و تمام فرزندانی که تایمر دارند"""
+        for widget in [root] + root.findChildren(QWidget):
+            if self.find_timers(widget):
+                widget.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        """توقف/ادامه تایمرها با تغییر نمایش ویجت"""
+        if event.type() == QEvent.Hide:
+            active = [timer for timer in self.find_timers(watched) if timer.isActive()]
+            for timer in active:
+                timer.stop()
+            if active:
+                self._paused[id(watched)] = active
+        elif event.type() == QEvent.Show:
+            for timer in self._paused.pop(id(watched), []):
+                timer.start()
+
+        return False
+
+
+class LazyTabWidget(QTabWidget):
+    """
+    تب ویجتی که محتوای هر تب را در اولین فعال‌سازی می‌سازد
+
+    هر تب با یک تابع سازنده ثبت می‌شود؛ تا زمان انتخاب تب فقط یک ویجت
+    خالی جایگزین آن است. تایمرهای محتوای ساخته شده فقط هنگام نمایش تب
+    فعال هستند.
+    """
+
+    tab_built = pyqtSignal(int, QWidget)  # اندیس تب، ویجت ساخته شده
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._builders: Dict[int, Callable[[], QWidget]] = {}
+        self._built: Dict[int, QWidget] = {}
+        self.build_times: Dict[str, float] = {}
+        self._builds_enabled = True
+        self.timer_guard = TimerVisibilityGuard(self)
+        self.currentChanged.connect(self.ensure_built)
+
+    def add_lazy_tab(self, builder: Callable[[], QWidget], label: str) -> int:
+        """افزودن تب با سازنده تنبل"""
+        placeholder = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        placeholder.setLayout(layout)
+
+        index = self.addTab(placeholder, label)
+        self._builders[index] = builder
+        return index
+
+    def showEvent(self, event):
+        """ساخت تب جاری در اولین نمایش"""
+        super().showEvent(event)
+        self.ensure_built(self.currentIndex())
+
+    def set_builds_enabled(self, enabled: bool):
+        """
+        فعال/غیرفعال کردن ساخت تب‌ها
+
+        تا زمان آماده شدن اتصالات، ساخت محتوا متوقف می‌ماند و با فعال شدن
+        دوباره تب جاری ساخته می‌شود.
+        """
+        self._builds_enabled = enabled
+        if enabled and self.isVisible():
+            self.ensure_built(self.currentIndex())
+
+    def is_built(self, index: int) -> bool:
+        """آیا محتوای تب ساخته شده است"""
+        return index in self._built
+
+    def ensure_built(self, index: int):
+        """ساخت محتوای تب در صورت عدم ساخت قبلی"""
+        if not self._builds_enabled:
+            return
+        if index < 0 or index in self._built or index not in self._builders:
+            return
+
+        started = time.perf_counter()
+        content = self._builders[index]()
+        self.widget(index).layout().addWidget(content)
+        self._built[index] = content
+        self.timer_guard.guard(content)
+
+        elapsed = (time.perf_counter() - started) * 1000
+        self.build_times[self.tabText(index)] = elapsed
+        logger.info(f"تب «{self.tabText(index)}» در {elapsed:.0f}ms ساخته شد")
+
+        self.tab_built.emit(index, content)
@@ -23,6 +23,57 @@ class DatabaseConfig:
     max_overflow: int = int(os.getenv('DB_MAX_OVERFLOW', '30'))
     pool_timeout: int = int(os.getenv('DB_POOL_TIMEOUT', '30'))
     pool_recycle: int = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+    pool_pre_ping: bool = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+
+    # حالت pool: standard، small (برای تعداد زیاد ایستگاه پشت pooler) یا
+    # transaction (سازگار با PgBouncer در pool_mode=transaction)
+    pool_mode: str = os.getenv('DB_POOL_MODE', 'standard')
+    small_pool_size: int = int(os.getenv('DB_SMALL_POOL_SIZE', '2'))
+    small_max_overflow: int = int(os.getenv('DB_SMALL_MAX_OVERFLOW', '1'))
+    small_pool_recycle: int = int(os.getenv('DB_SMALL_POOL_RECYCLE', '300'))
+    transaction_pool_size: int = int(os.getenv('DB_TRANSACTION_POOL_SIZE', '0'))  # 0 یعنی NullPool
+
+    # replica فقط‌خواندنی (اختیاری) برای گزارش‌ها و لیست‌ها
+    read_url: Optional[str] = os.getenv('DB_READ_URL') or None
+    replica_max_staleness: float = float(os.getenv('DB_REPLICA_MAX_STALENESS', '30'))  # ثانیه
+    replica_lag_check_interval: float = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+    replica_retry_after: float = float(os.getenv('DB_REPLICA_RETRY_AFTER', '30'))
+
+    # اندازه‌گیری کوئری‌ها و تشخیص N+1
+    query_instrumentation: bool = os.getenv('DB_QUERY_INSTRUMENTATION', 'True').lower() == 'true'
+    n_plus_one_threshold: int = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', '5'))  # تکرار یک دستور در یک فراخوانی
+
+    # ثبت کوئری‌های کند (اختیاری) با plan اجرا
+    slow_query_log: bool = os.getenv('DB_SLOW_QUERY_LOG', 'False').lower() == 'true'
+    slow_query_threshold_ms: float = float(os.getenv('DB_SLOW_QUERY_THRESHOLD_MS', '1000'))
+    slow_query_explain: bool = os.getenv('DB_SLOW_QUERY_EXPLAIN', 'True').lower() == 'true'
+    slow_query_explain_interval: float = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_INTERVAL', '300'))  # ثانیه برای هر الگو
+    slow_query_log_max_bytes: int = int(os.getenv('DB_SLOW_QUERY_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+    slow_query_log_backups: int = int(os.getenv('DB_SLOW_QUERY_LOG_BACKUPS', '5'))
+
+    # پر کردن پس‌زمینه کلیدهای جستجوی مهمانان (ردیف‌های قدیمی)
+    guest_key_backfill_batch_size: int = int(os.getenv('DB_GUEST_KEY_BACKFILL_BATCH_SIZE', '2000'))
+    guest_key_backfill_pause: float = float(os.getenv('DB_GUEST_KEY_BACKFILL_PAUSE', '0.05'))  # ثانیه بین دسته‌ها
+
+    # تشخیص مهمانان تکراری
+    guest_duplicate_threshold: float = float(os.getenv('DB_GUEST_DUPLICATE_THRESHOLD', '0.82'))  # حداقل امتیاز تطابق
+    guest_duplicate_max_block: int = int(os.getenv('DB_GUEST_DUPLICATE_MAX_BLOCK', '50'))  # بلوک‌های بزرگ‌تر مقایسه نمی‌شوند
+
+    # بایگانی سوابق بسته شده قدیمی (اقامت‌ها، تخصیص‌ها، تغییرات وضعیت، صورت‌حساب‌ها)
+    archive_horizon_days: int = int(os.getenv('DB_ARCHIVE_HORIZON_DAYS', '730'))  # سوابق قدیمی‌تر بایگانی می‌شوند
+    archive_batch_size: int = int(os.getenv('DB_ARCHIVE_BATCH_SIZE', '500'))  # اقامت در هر تراکنش
+    archive_pause: float = float(os.getenv('DB_ARCHIVE_PAUSE', '0.5'))  # ثانیه بین دسته‌ها
+    archive_window: str = os.getenv('DB_ARCHIVE_WINDOW', '01:00-05:00')  # بازه شیفت شب؛ خالی یعنی همیشه
+
+    # پارتیشن‌بندی ماهانه تغییرات وضعیت اتاق و Audit (فقط PostgreSQL)
+    partition_months_ahead: int = int(os.getenv('DB_PARTITION_MONTHS_AHEAD', '3'))  # پارتیشن‌های از پیش ساخته
+    partition_retention_mode: str = os.getenv('DB_PARTITION_RETENTION_MODE', 'drop')  # drop یا detach
+    partition_maintenance_interval: float = float(os.getenv('DB_PARTITION_MAINTENANCE_INTERVAL', '21600'))  # ثانیه
+    room_status_retention_days: int = int(os.getenv('DB_ROOM_STATUS_RETENTION_DAYS', '1095'))
+    audit_retention_days: int = int(os.getenv('DB_AUDIT_RETENTION_DAYS', '365'))
+
+    # خروجی جریانی (سطر در هر دسته server-side cursor)
+    export_batch_size: int = int(os.getenv('DB_EXPORT_BATCH_SIZE', '5000'))
 
     # تنظیمات پیشرفته
     echo: bool = os.getenv('DB_ECHO', 'False').lower() == 'true'
@@ -35,18 +86,47 @@ class DatabaseConfig:
         return f"postgresql://{self.username}:{self.password}@{self.host}:{self.port}/{self.name}"
 
     def get_connection_params(self) -> dict:
-        """دریافت پارامترهای اتصال"""
+        """
+        دریافت پارامترهای create_engine بر اساس حالت pool
+
+        در حالت‌های standard و small، statement_timeout از طریق options هنگام
+        برقراری هر اتصال اعمال می‌شود. در حالت transaction پارامتر startup
+        ارسال نمی‌شود (PgBouncer آن را رد می‌کند) و timeout در هر تراکنش با
+        SET LOCAL تنظیم می‌شود.
+        """
+        connect_args = {
+            'connect_timeout': self.connect_timeout,
+            'application_name': f'hotel_reception_{os.getenv("VERSION", "1.0.0")}'
+        }
+
+        if self.pool_mode == 'transaction':
+            pool_params = {
+                'pool_size': self.transaction_pool_size,
+                'max_overflow': 0,
+                'pool_recycle': self.small_pool_recycle
+            }
+        elif self.pool_mode == 'small':
+            pool_params = {
+                'pool_size': self.small_pool_size,
+                'max_overflow': self.small_max_overflow,
+                'pool_recycle': self.small_pool_recycle
+            }
+        else:
+            pool_params = {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'pool_recycle': self.pool_recycle
+            }
+
+        if self.pool_mode != 'transaction':
+            connect_args['options'] = f'-c statement_timeout={self.statement_timeout}'
+
         return {
-            'pool_size': self.pool_size,
-            'max_overflow': self.max_overflow,
+            **pool_params,
             'pool_timeout': self.pool_timeout,
-            'pool_recycle': self.pool_recycle,
+            'pool_pre_ping': self.pool_pre_ping,
             'echo': self.echo,
-            'connect_args': {
-                'connect_timeout': self.connect_timeout,
-                'application_name': f'hotel_reception_{os.getenv("VERSION", "1.0.0")}',
-                'options': f'-c statement_timeout={self.statement_timeout}'
-            }
+            'connect_args': connect_args
         }
 
 @dataclass
@@ -67,6 +147,12 @@ class RedisConfig:
     # تنظیمات pub/sub
     pubsub_timeout: int = int(os.getenv('REDIS_PUBSUB_TIMEOUT', '1'))
 
+    # کش پروفایل مهمان (ثانیه برای عمرها، نرخ نمونه‌برداری بین 0 و 1)
+    guest_profile_ttl: int = int(os.getenv('REDIS_GUEST_PROFILE_TTL', '300'))
+    guest_profile_l1_ttl: float = float(os.getenv('GUEST_PROFILE_L1_TTL', '30'))
+    guest_profile_l1_size: int = int(os.getenv('GUEST_PROFILE_L1_SIZE', '2000'))
+    guest_profile_verify_rate: float = float(os.getenv('GUEST_PROFILE_VERIFY_RATE', '0'))
+
     def get_connection_params(self) -> dict:
         """دریافت پارامترهای اتصال Redis"""
         return {
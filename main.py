@@ -1,10 +1,14 @@
 # main.py - نسخه بهینه شده برای Redis 8.2.3
 import sys
 import os
+import time
 import logging
 from pathlib import Path
 
-# پاک کردن کش قبل از هر چیزی
+# شروع اندازه‌گیری زمان راه‌اندازی
+STARTUP_STARTED = time.perf_counter()
+
+# پاک کردن کش (فقط با آرگومان --clear-cache؛ در اجرای عادی bytecode حفظ می‌شود)
 def clear_python_cache():
     """پاک کردن کامل کش‌های Python"""
     import shutil
@@ -23,7 +27,9 @@ def clear_python_cache():
             shutil.rmtree(cache_path)
             print(f"🧹 پاک شد: {cache_dir}")
 
-clear_python_cache()
+if '--clear-cache' in sys.argv:
+    sys.argv.remove('--clear-cache')
+    clear_python_cache()
 
 # تنظیمات محیط
 os.environ['SQLALCHEMY_SILENCE_UBER_WARNING'] = '1'
@@ -33,9 +39,14 @@ os.environ['PYTHONWARNINGS'] = 'ignore'
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont
 
+from app.core.startup import StartupProfiler, BackendWarmup
+
+WARMUP_POLL_INTERVAL = 50  # میلی‌ثانیه
+
 def setup_logging():
     """تنظیمات لاگ‌گیری"""
     logging.basicConfig(
@@ -65,21 +76,20 @@ def initialize_redis_8_2_3(logger):
 def initialize_database_fixed(logger):
     """راه‌اندازی دیتابیس با حل تعارض مدل‌ها"""
     try:
-        from app.core.database import init_db, create_tables
-        from app.services.reception.initial_data_service import InitialDataService
+        from app.core.database import init_db, migrate_database, init_read_replica
         
         logger.info("🗄️ در حال اتصال به دیتابیس...")
         if not init_db():
             logger.error("❌ اتصال به دیتابیس ناموفق")
             return False
 
-        # ایجاد جداول
-        logger.info("📋 در حال ایجاد جداول...")
-        create_tables()
+        # بررسی نسخه اسکیما و اعمال مهاجرت‌های معوق (داده اولیه تا درج موفق در هر راه‌اندازی امتحان می‌شود)
+        logger.info("📋 در حال بررسی نسخه اسکیما...")
+        migrate_database()
 
-        # داده‌های اولیه
-        logger.info("📥 در حال بارگذاری داده‌های اولیه...")
-        InitialDataService.create_reception_initial_data()
+        # replica فقط‌خواندنی برای گزارش‌ها (اختیاری)
+        if init_read_replica():
+            logger.info("📖 گزارش‌ها و لیست‌ها از replica خوانده می‌شوند")
 
         logger.info("✅ دیتابیس با موفقیت راه‌اندازی شد")
         return True
@@ -88,10 +98,45 @@ def initialize_database_fixed(logger):
         logger.error(f"❌ خطا در دیتابیس: {e}")
         return False
 
+def create_backend_warmup(logger) -> BackendWarmup:
+    """اتصال همزمان به Redis و دیتابیس در پس‌زمینه"""
+    return BackendWarmup({
+        'redis': lambda: initialize_redis_8_2_3(logger),
+        'database': lambda: initialize_database_fixed(logger)
+    })
+
+def on_backend_warmed_up(app, main_window, warmup, profiler, logger):
+    """ادامه راه‌اندازی پس از پایان اتصالات"""
+    results = warmup.results()
+    profiler.mark('connect')
+    profiler.record_duration('connect', warmup.elapsed_ms or 0)
+    for name, duration in warmup.durations.items():
+        profiler.record_duration(f'connect_{name}', duration)
+
+    if not results.get('database'):
+        logger.error("💥 خروج به دلیل خطا در دیتابیس")
+        QMessageBox.critical(main_window, "خطا", "اتصال به دیتابیس برقرار نشد")
+        app.exit(1)
+        return
+
+    # شروع صریح سرویس‌های پس‌زمینه (ایمپورت ماژول‌ها تردی اجرا نمی‌کند)
+    from app.core import service_registry
+    service_registry.start_all()
+    app.aboutToQuit.connect(service_registry.stop_all)
+
+    main_window.on_backend_ready()
+    profiler.log_report()
+
+    if results.get('redis'):
+        logger.info("🎉 سیستم با پشتیبانی کامل Redis 8.2.3 راه‌اندازی شد!")
+    else:
+        logger.info("⚠️ سیستم بدون Redis در حال اجراست")
+
 def main():
     """تابع اصلی"""
     logger = setup_logging()
-    
+    profiler = StartupProfiler(STARTUP_STARTED)
+
     try:
         logger.info("🚀 شروع سیستم پذیرش هتل...")
         logger.info("🔧 نسخه Redis: 8.2.3")
@@ -106,25 +151,31 @@ def main():
         app.setApplicationName("سیستم پذیرش هتل")
         app.setApplicationVersion("2.0.0")
 
-        # راه‌اندازی Redis
-        redis_ok = initialize_redis_8_2_3(logger)
+        # راه‌اندازی همزمان Redis و دیتابیس در پس‌زمینه
+        warmup = create_backend_warmup(logger)
+        warmup.start()
 
-        # راه‌اندازی دیتابیس
-        if not initialize_database_fixed(logger):
-            logger.error("💥 خروج به دلیل خطا در دیتابیس")
-            return 1
-
-        # ایجاد پنجره اصلی
+        # ایجاد پنجره اصلی (محتوای تب‌ها پس از آماده شدن اتصالات ساخته می‌شود)
         logger.info("🖥️ در حال ایجاد رابط کاربری...")
         from app.views.main_window import MainWindow
-        main_window = MainWindow()
+        profiler.mark('import')
+
+        main_window = MainWindow(backend_ready=False)
         main_window.showMaximized()
-        
-        if redis_ok:
-            logger.info("🎉 سیستم با پشتیبانی کامل Redis 8.2.3 راه‌اندازی شد!")
-        else:
-            logger.info("⚠️ سیستم بدون Redis در حال اجراست")
-        
+        app.processEvents()
+        profiler.mark('first_paint')
+
+        # بررسی دوره‌ای پایان اتصالات بدون مسدود کردن رابط کاربری
+        warmup_timer = QTimer()
+
+        def check_warmup():
+            if warmup.is_done():
+                warmup_timer.stop()
+                on_backend_warmed_up(app, main_window, warmup, profiler, logger)
+
+        warmup_timer.timeout.connect(check_warmup)
+        warmup_timer.start(WARMUP_POLL_INTERVAL)
+
         return app.exec_()
 
     except Exception as e:
@@ -126,6 +126,18 @@ def mock_payment_gateway():
         }
         yield mock_instance
 
+@pytest.fixture
+def max_queries():
+    """
+    بررسی حداکثر تعداد دستورات SQL یک فراخوانی سرویس
+
+    مثال:
+        with max_queries(3):
+            HousekeepingService.get_housekeeping_staff()
+    """
+    from app.core.query_stats import assert_max_queries
+    return assert_max_queries
+
 # fixtureهای کمکی
 @pytest.fixture
 def current_date():
@@ -227,20 +227,48 @@ class TestDatabase:
     def test_database_recovery_on_connection_error(self, mock_session_local):
         """تست بازیابی دیتابیس پس از خطای اتصال"""
         # Given
+        from sqlalchemy.exc import OperationalError
+        from app.core.transactions import RetryPolicy, run_in_transaction
+
         mock_session = MagicMock()
         mock_session.commit.side_effect = [
-            Exception("Connection closed"),
+            OperationalError("COMMIT", {}, Exception("server closed the connection unexpectedly")),
             None  # commit موفق در تلاش دوم
         ]
         mock_session_local.return_value = mock_session
 
         # When & Then - نباید خطا بدهد
         try:
-            with db_session() as session:
-                session.add(MagicMock())
+            run_in_transaction(
+                lambda session: session.add(MagicMock()),
+                policy=RetryPolicy(base_delay=0),
+                sleep=lambda _: None
+            )
         except Exception as e:
             pytest.fail(f"بازیابی دیتابیس شکست خورد: {e}")
 
+        assert mock_session.add.call_count == 2
+
+    @patch('app.core.database.SessionLocal')
+    def test_db_session_reraises_connection_error(self, mock_session_local):
+        """db_session خطای اتصال را پس از rollback دوباره raise می‌کند"""
+        # Given
+        from sqlalchemy.exc import OperationalError
+
+        mock_session = MagicMock()
+        mock_session.commit.side_effect = OperationalError(
+            "COMMIT", {}, Exception("server closed the connection unexpectedly")
+        )
+        mock_session_local.return_value = mock_session
+
+        # When & Then - تکرار با run_in_transaction است نه db_session
+        with pytest.raises(OperationalError):
+            with db_session() as session:
+                session.add(MagicMock())
+
+        mock_session.rollback.assert_called_once()
+        mock_session.close.assert_called_once()
+
     def test_bulk_operations_performance(self, test_session):
         """تست عملکرد عملیات گروهی"""
         # Given
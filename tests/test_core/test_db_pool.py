@@ -0,0 +1,92 @@
+"""
+تست‌های تنظیمات و آمار connection pool
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.db_pool import MeteredQueuePool, get_pool_status
+from config.database_config import DatabaseConfig
+
+
+@pytest.fixture
+def small_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestPoolConfig:
+    """تست پارامترهای pool بر اساس DatabaseConfig"""
+
+    def test_standard_mode_uses_configured_pool(self):
+        """حالت standard از pool_size و max_overflow تنظیمات استفاده می‌کند"""
+        db_config = DatabaseConfig(pool_mode='standard', pool_size=7, max_overflow=3)
+
+        params = db_config.get_connection_params()
+
+        assert params['pool_size'] == 7
+        assert params['max_overflow'] == 3
+        assert params['pool_pre_ping'] is True
+        assert 'statement_timeout' in params['connect_args']['options']
+
+    def test_small_mode_limits_connections(self):
+        """حالت small تعداد اتصالات هر ایستگاه را محدود می‌کند"""
+        db_config = DatabaseConfig(pool_mode='small', small_pool_size=2, small_max_overflow=1)
+
+        params = db_config.get_connection_params()
+
+        assert params['pool_size'] + params['max_overflow'] == 3
+        assert params['pool_recycle'] == db_config.small_pool_recycle
+
+
+class TestMeteredQueuePool:
+    """تست آمار انتظار pool"""
+
+    def test_checkout_without_wait(self, small_engine):
+        """checkout عادی بدون ثبت انتظار"""
+        with small_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            status = get_pool_status(small_engine)
+            assert status['checked_out'] == 1
+
+        status = get_pool_status(small_engine)
+        assert status['pool_class'] == 'MeteredQueuePool'
+        assert status['checkouts'] == 1
+        assert status['waits'] == 0
+
+    def test_wait_and_timeout_are_recorded(self, small_engine):
+        """انتظار برای اتصال و timeout در آمار ثبت می‌شود"""
+        # Given - تنها اتصال pool در دست یک ترد دیگر است
+        held = small_engine.connect()
+
+        # When - timeout
+        with pytest.raises(PoolTimeoutError):
+            small_engine.connect()
+
+        # When - انتظار موفق تا آزاد شدن اتصال
+        releaser = threading.Timer(0.05, held.close)
+        releaser.start()
+        with small_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        releaser.join()
+
+        # Then
+        status = get_pool_status(small_engine)
+        assert status['timeouts'] == 1
+        assert status['waits'] == 2
+        assert status['wait_time_max_ms'] >= 150
+        assert status['wait_time_avg_ms'] > 0
+
+    def test_status_without_engine(self):
+        """وضعیت pool قبل از راه‌اندازی"""
+        assert get_pool_status(None) == {'status': 'Not initialized'}
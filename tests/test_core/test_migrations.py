@@ -0,0 +1,162 @@
+"""
+تست‌های مهاجرت‌های نسخه‌دار اسکیما
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.migrations import INITIAL_DATA_SEED, Migration, MigrationRunner, MIGRATIONS
+
+
+def create_items(session):
+    session.execute(text("CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, name TEXT)"))
+
+
+def seed_items(session):
+    exists = session.execute(text("SELECT COUNT(*) FROM items WHERE name = 'default'")).scalar()
+    if not exists:
+        session.execute(text("INSERT INTO items (name) VALUES ('default')"))
+
+
+def broken_migration(session):
+    session.execute(text("INSERT INTO items (name) VALUES ('partial')"))
+    raise RuntimeError("migration failed")
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite:///:memory:')
+    yield engine
+    engine.dispose()
+
+
+class TestMigrationRunner:
+    """تست‌های اجرای مهاجرت‌ها"""
+
+    def test_fresh_database_has_version_zero(self, engine):
+        """دیتابیس خالی نسخه 0 دارد"""
+        runner = MigrationRunner(engine, [Migration(1, 'create_items', create_items)])
+
+        assert runner.current_version() == 0
+        assert [m.name for m in runner.pending()] == ['create_items']
+
+    def test_upgrade_applies_pending_once(self, engine):
+        """مهاجرت‌ها یک بار اعمال و نسخه ثبت می‌شود"""
+        # Given
+        runner = MigrationRunner(engine, [
+            Migration(1, 'create_items', create_items),
+            Migration(2, 'seed_items', seed_items)
+        ])
+
+        # When
+        first = runner.upgrade()
+        second = runner.upgrade()
+
+        # Then
+        assert first['success'] is True
+        assert first['applied'] == ['create_items', 'seed_items']
+        assert first['to_version'] == 2
+        assert second['applied'] == []
+        assert second['from_version'] == 2
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+
+    def test_upgrade_to_target_version(self, engine):
+        """ارتقا تا نسخه مشخص"""
+        runner = MigrationRunner(engine, [
+            Migration(1, 'create_items', create_items),
+            Migration(2, 'seed_items', seed_items)
+        ])
+
+        result = runner.upgrade(target=1)
+
+        assert result['applied'] == ['create_items']
+        assert runner.current_version() == 1
+
+    def test_failed_migration_rolls_back(self, engine):
+        """شکست یک مهاجرت تغییرات و نسخه آن را ثبت نمی‌کند"""
+        # Given
+        runner = MigrationRunner(engine, [
+            Migration(1, 'create_items', create_items),
+            Migration(2, 'broken', broken_migration)
+        ])
+
+        # When
+        result = runner.upgrade()
+
+        # Then
+        assert result['success'] is False
+        assert result['error_code'] == 'MIGRATION_ERROR'
+        assert runner.current_version() == 1
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 0
+
+    def test_non_transactional_migration(self, engine):
+        """مهاجرت خارج از تراکنش (autocommit) اعمال و نسخه آن ثبت می‌شود"""
+        runner = MigrationRunner(engine, [
+            Migration(1, 'create_items', create_items),
+            Migration(2, 'seed_items', seed_items, transactional=False)
+        ])
+
+        first = runner.upgrade()
+        second = runner.upgrade()
+
+        assert first['applied'] == ['create_items', 'seed_items']
+        assert second['applied'] == []
+        assert runner.current_version() == 2
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+
+    def test_registered_migrations_have_unique_versions(self):
+        """شماره نسخه مهاجرت‌های ثبت شده یکتا و صعودی است"""
+        versions = [migration.version for migration in MIGRATIONS]
+
+        assert versions == sorted(set(versions))
+        assert MIGRATIONS[0].name == 'initial_schema'
+
+    def test_seed_runs_once_and_retries_after_failure(self, engine):
+        """داده اولیه ناموفق ثبت نمی‌شود و اجرای بعدی آن را کامل می‌کند"""
+        # Given
+        runner = MigrationRunner(engine, [Migration(1, 'create_items', create_items)])
+        runner.upgrade()
+
+        # When: اولین تلاش شکست می‌خورد
+        with pytest.raises(RuntimeError):
+            runner.run_seed('items', broken_migration)
+
+        # Then: نه داده نیمه‌کاره و نه ثبت اجرا
+        assert runner.is_seeded('items') is False
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 0
+
+        # When: راه‌اندازی‌های بعدی
+        first = runner.run_seed('items', seed_items)
+        second = runner.run_seed('items', seed_items)
+
+        # Then
+        assert (first, second) == (True, False)
+        assert runner.is_seeded('items') is True
+        assert runner.current_version() == 1
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+
+    def test_seed_failure_does_not_block_startup(self, engine, monkeypatch):
+        """خطای داده اولیه پس از ساخت دیتابیس جدید فقط ثبت می‌شود"""
+        import sys
+        from app.core import database
+
+        # Given: ماژول داده اولیه قابل import نیست
+        monkeypatch.setattr(database, 'engine', engine)
+        monkeypatch.setattr('app.core.migrations.MIGRATIONS', [Migration(1, 'create_items', create_items)])
+        monkeypatch.setitem(sys.modules, 'app.services.reception.initial_data_service', None)
+
+        # When
+        result = database.migrate_database()
+
+        # Then: اسکیما ارتقا یافته و خطا منتشر نشده است
+        assert result['success'] is True
+        assert result['applied'] == ['create_items']
+        assert database.seed_initial_data() is False
+        assert MigrationRunner(engine).is_seeded(INITIAL_DATA_SEED) is False
@@ -0,0 +1,127 @@
+"""
+تست‌های اندازه‌گیری کوئری و تشخیص N+1
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import db_session
+from app.core.query_stats import (
+    fingerprint, query_stats, track_queries, assert_max_queries, install_query_instrumentation
+)
+
+
+@pytest.fixture
+def staff_database(tmp_path, monkeypatch):
+    """کارکنان و وظایف نمونه در SQLite"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'staff.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE staff (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, staff_id INTEGER, status TEXT)"))
+        for staff_id in range(1, 9):
+            conn.execute(text("INSERT INTO staff (id, name) VALUES (:id, :name)"),
+                         {'id': staff_id, 'name': f'staff {staff_id}'})
+            conn.execute(text("INSERT INTO tasks (staff_id, status) VALUES (:id, 'assigned')"),
+                         {'id': staff_id})
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+    install_query_instrumentation()
+    query_stats.reset()
+
+    yield engine
+    engine.dispose()
+
+
+def staff_with_counts_n_plus_one():
+    """الگوی get_housekeeping_staff: یک کوئری شمارش برای هر کارمند"""
+    with db_session() as session:
+        staff = session.execute(text("SELECT id, name FROM staff")).all()
+        return [
+            (row.id, session.execute(
+                text("SELECT COUNT(*) FROM tasks WHERE staff_id = :id AND status IN ('assigned', 'in_progress')"),
+                {'id': row.id}
+            ).scalar())
+            for row in staff
+        ]
+
+
+def staff_with_counts_grouped():
+    """همان نتیجه با یک کوئری گروه‌بندی شده"""
+    with db_session() as session:
+        return session.execute(text(
+            "SELECT s.id, COUNT(t.id) FROM staff s "
+            "LEFT JOIN tasks t ON t.staff_id = s.id AND t.status IN ('assigned', 'in_progress') "
+            "GROUP BY s.id"
+        )).all()
+
+
+class TestFingerprint:
+    """تست نرمال‌سازی دستورات"""
+
+    def test_literals_and_parameters_are_normalized(self):
+        a = fingerprint("SELECT * FROM guests WHERE id = 12 AND name = 'Ali'")
+        b = fingerprint("SELECT *  FROM guests\nWHERE id = %(id_1)s AND name = %(name_1)s")
+        assert a == b == "SELECT * FROM guests WHERE id = ? AND name = ?"
+
+    def test_in_lists_collapse(self):
+        assert fingerprint("SELECT 1 WHERE id IN (?, ?, ?)") == fingerprint("SELECT 1 WHERE id IN (:a)")
+
+
+class TestQueryInstrumentation:
+    """تست شمارش دستورات و تشخیص N+1"""
+
+    def test_n_plus_one_is_flagged(self, staff_database, caplog):
+        """کوئری تکراری در حلقه به عنوان N+1 احتمالی ثبت می‌شود"""
+        # When
+        with caplog.at_level(logging.WARNING, logger='app.core.query_stats'):
+            staff_with_counts_n_plus_one()
+
+        # Then - نام فراخوانی از تابع فراخواننده db_session گرفته می‌شود
+        stats = query_stats.snapshot()
+        entry = stats['by_name']['staff_with_counts_n_plus_one']
+        assert entry['statements'] == 9
+        assert entry['n_plus_one'] == 1
+        assert entry['db_time_ms'] > 0
+
+        [(suspect_fp, suspect)] = stats['suspects'].items()
+        assert suspect_fp.startswith('SELECT COUNT(*) FROM tasks')
+        assert suspect['max_repeats'] == 8
+        assert 'N+1' in caplog.text
+
+    def test_grouped_query_is_not_flagged(self, staff_database):
+        """نسخه بدون N+1 فقط یک دستور دارد"""
+        staff_with_counts_grouped()
+
+        entry = query_stats.snapshot()['by_name']['staff_with_counts_grouped']
+        assert entry['statements'] == 1
+        assert entry['n_plus_one'] == 0
+
+    def test_nested_sessions_count_in_outer_call(self, staff_database):
+        """sessionهای تو در تو در محدوده بیرونی شمرده می‌شوند"""
+        with track_queries('check_out_flow') as call:
+            staff_with_counts_grouped()
+            staff_with_counts_grouped()
+
+        assert call.statements == 2
+        assert query_stats.snapshot()['by_name']['check_out_flow']['calls'] == 1
+
+
+class TestAssertMaxQueries:
+    """تست کمک‌کننده حداکثر دستورات"""
+
+    def test_within_budget(self, staff_database, max_queries):
+        with max_queries(1):
+            staff_with_counts_grouped()
+
+    def test_over_budget_reports_repeated_statements(self, staff_database):
+        with pytest.raises(AssertionError) as error:
+            with assert_max_queries(3):
+                staff_with_counts_n_plus_one()
+
+        assert '9' in str(error.value)
+        assert '8× SELECT COUNT(*) FROM tasks' in str(error.value)
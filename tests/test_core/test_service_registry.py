@@ -0,0 +1,159 @@
+"""
+تست‌های رجیستری سرویس‌ها و ایمپورت بدون اثر جانبی
+"""
+
+import json
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.core.service_registry import ServiceRegistry, LazyService
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+LAZY_SERVICES = [
+    'sync_manager', 'housekeeping_manager', 'maintenance_manager',
+    'notification_service', 'payment_processor'
+]
+
+
+class FakeWorker:
+    """سرویس نمونه با ترد پس‌زمینه"""
+
+    instances = 0
+
+    def __init__(self):
+        FakeWorker.instances += 1
+        self._stop_event = threading.Event()
+        self.thread = None
+        self.value = 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self._stop_event.wait, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self.thread.join(timeout=1)
+
+
+class TestServiceRegistry:
+    """تست‌های چرخه حیات سرویس‌ها"""
+
+    def setup_method(self):
+        FakeWorker.instances = 0
+
+    def test_register_does_not_create_instance(self):
+        """ثبت سرویس نباید instance بسازد"""
+        # Given
+        registry = ServiceRegistry()
+
+        # When
+        registry.register('worker', FakeWorker)
+        proxy = LazyService('worker', registry)
+
+        # Then
+        assert FakeWorker.instances == 0
+        assert not registry.is_created('worker')
+        assert 'lazy' in repr(proxy)
+
+    def test_proxy_creates_instance_once(self):
+        """دسترسی به proxy سرویس را یک بار می‌سازد"""
+        # Given
+        registry = ServiceRegistry()
+        registry.register('worker', FakeWorker)
+        proxy = LazyService('worker', registry)
+
+        # When
+        proxy.value = 5
+
+        # Then
+        assert proxy.value == 5
+        assert FakeWorker.instances == 1
+        assert registry.get('worker') is registry.get('worker')
+
+    def test_start_all_and_stop_all(self):
+        """start_all فقط سرویس‌های autostart را شروع و stop_all متوقف می‌کند"""
+        # Given
+        registry = ServiceRegistry()
+        registry.register('auto', FakeWorker, autostart=True)
+        registry.register('manual', FakeWorker)
+
+        # When
+        results = registry.start_all()
+
+        # Then
+        assert results == {'auto': True}
+        assert registry.is_started('auto')
+        assert not registry.is_created('manual')
+        assert registry.get('auto').thread.is_alive()
+
+        # When
+        registry.stop_all()
+
+        # Then
+        assert not registry.is_started('auto')
+        assert not registry.get('auto').thread.is_alive()
+
+    def test_unknown_service_raises(self):
+        """درخواست سرویس ثبت نشده خطا می‌دهد"""
+        registry = ServiceRegistry()
+
+        with pytest.raises(KeyError):
+            registry.get('missing')
+
+
+class TestImportSideEffects:
+    """ایمپورت پکیج core نباید ترد اجرا یا اتصال باز کند"""
+
+    def test_import_starts_no_threads_and_opens_no_connections(self):
+        """ایمپورت در یک مفسر تمیز با ثبت تلاش‌های اتصال شبکه"""
+        # Given
+        script = textwrap.dedent(f"""
+            import json
+            import socket
+            import threading
+
+            attempts = []
+
+            def blocked_connect(self, address):
+                attempts.append(str(address))
+                raise OSError('network disabled in test')
+
+            socket.socket.connect = blocked_connect
+            socket.socket.connect_ex = blocked_connect
+            threads_before = threading.active_count()
+
+            import app.core
+            from app.core import database, service_registry
+
+            print(json.dumps({{
+                'threads_before': threads_before,
+                'threads_after': threading.active_count(),
+                'connection_attempts': attempts,
+                'engine_created': database.engine is not None,
+                'redis_created': database.redis_client is not None,
+                'created_services': [
+                    name for name in {LAZY_SERVICES!r} if service_registry.is_created(name)
+                ]
+            }}))
+        """)
+
+        # When
+        completed = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60
+        )
+
+        # Then
+        assert completed.returncode == 0, completed.stderr
+        report = json.loads(completed.stdout.strip().splitlines()[-1])
+        assert report['threads_after'] == report['threads_before']
+        assert report['connection_attempts'] == []
+        assert not report['engine_created']
+        assert not report['redis_created']
+        assert report['created_services'] == []
@@ -0,0 +1,168 @@
+"""
+تست‌های ثبت کوئری‌های کند
+"""
+
+import json
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import db_session
+from app.core.slow_query_log import (
+    SlowQuery, SlowQueryRecorder, redact_parameters, redact_plan, REDACTED
+)
+
+
+@pytest.fixture
+def slow_database(tmp_path, monkeypatch):
+    """SQLite با تابع sleep_ms برای ساخت کوئری کند"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+
+    @event.listens_for(engine, 'connect')
+    def register_sleep(dbapi_connection, connection_record):
+        dbapi_connection.create_function('sleep_ms', 1, lambda ms: time.sleep(ms / 1000) or ms)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE guests (id INTEGER PRIMARY KEY, national_id TEXT, status TEXT)"))
+        conn.execute(text("INSERT INTO guests (national_id, status) VALUES ('0012345678', 'active')"))
+    SlowQuery.__table__.create(bind=engine)
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+
+    recorder = SlowQueryRecorder(log_path=tmp_path / 'slow_queries.log')
+    recorder.install(engine, threshold_ms=40)
+
+    yield engine, recorder
+
+    recorder.uninstall()
+    engine.dispose()
+
+
+def find_guest_slowly(national_id, delay_ms=60):
+    with db_session() as session:
+        return session.execute(
+            text("SELECT id, sleep_ms(:delay) FROM guests WHERE national_id = :national_id AND status = :status"),
+            {'delay': delay_ms, 'national_id': national_id, 'status': 'active'}
+        ).all()
+
+
+class TestRedaction:
+    """تست حذف اطلاعات شخصی"""
+
+    def test_pii_keys_and_values_are_redacted(self):
+        redacted = redact_parameters({
+            'national_id_1': '0012345678',
+            'first_name': 'علی',
+            'phone': '+989121234567',
+            'note': 'reza@example.com',
+            'status': 'active',
+            'room_id': 12
+        })
+
+        assert redacted['national_id_1'] == REDACTED
+        assert redacted['first_name'] == REDACTED
+        assert redacted['phone'] == REDACTED
+        assert redacted['note'] == REDACTED
+        assert redacted['status'] == 'active'
+        assert redacted['room_id'] == 12
+
+    def test_positional_values_are_redacted_by_shape(self):
+        assert redact_parameters(('0012345678', 'active', 3)) == [REDACTED, 'active', 3]
+
+    def test_plan_literals_are_removed(self):
+        plan = "Seq Scan on reception_guests  (cost=0.00..1.10) Filter: ((national_id)::text = '0012345678'::text)"
+        assert '0012345678' not in redact_plan(plan)
+
+
+class TestSlowQueryRecorder:
+    """تست ثبت کوئری کند در فایل و جدول"""
+
+    def test_slow_query_is_recorded_with_plan(self, slow_database):
+        # Given
+        engine, recorder = slow_database
+
+        # When
+        find_guest_slowly('0012345678')
+        assert recorder.flush()
+
+        # Then - جدول
+        with engine.connect() as conn:
+            row = conn.execute(text(
+                "SELECT fingerprint, parameters, duration_ms, call_name, plan FROM system_slow_queries"
+            )).one()
+        assert 'FROM guests WHERE national_id = ?' in row.fingerprint
+        assert row.duration_ms >= 40
+        assert row.call_name == 'find_guest_slowly'
+        assert 'SCAN' in row.plan.upper()
+
+        parameters = json.loads(row.parameters)
+        assert parameters['national_id'] == REDACTED
+        assert parameters['status'] == 'active'
+
+        # Then - فایل چرخشی
+        [line] = recorder.log_path.read_text(encoding='utf-8').splitlines()
+        assert '0012345678' not in line
+        assert json.loads(line)['call_name'] == 'find_guest_slowly'
+
+    def test_fast_query_is_ignored(self, slow_database):
+        engine, recorder = slow_database
+
+        find_guest_slowly('0012345678', delay_ms=0)
+        assert recorder.flush()
+
+        assert recorder.recorded == 0
+        assert not recorder.log_path.exists()
+
+    def test_top_offenders_by_total_time(self, slow_database):
+        """الگوی پرتکرار با زمان کل بیشتر در رتبه اول"""
+        # Given
+        engine, recorder = slow_database
+        recorder.explain_enabled = False
+
+        for _ in range(3):
+            find_guest_slowly('0012345678', delay_ms=50)
+        with db_session() as session:
+            session.execute(text("SELECT sleep_ms(80)")).all()
+        assert recorder.flush()
+
+        # When
+        offenders = recorder.top_offenders(limit=5)
+
+        # Then
+        assert [o['occurrences'] for o in offenders] == [3, 1]
+        assert offenders[0]['total_ms'] >= 150
+        assert offenders[0]['total_ms'] > offenders[1]['total_ms']
+
+    def test_explain_prefix_by_dialect(self):
+        """ANALYZE فقط برای SELECT در PostgreSQL"""
+        assert SlowQueryRecorder.explain_prefix('postgresql', 'SELECT 1') == 'EXPLAIN (ANALYZE, BUFFERS) '
+        assert SlowQueryRecorder.explain_prefix('postgresql', 'UPDATE t SET a = 1') == 'EXPLAIN '
+        assert SlowQueryRecorder.explain_prefix('mysql', 'SELECT 1') is None
+
+    def test_explain_never_analyzes_writes(self):
+        """CTEهای تغییر داده و SELECT ... FOR UPDATE با ANALYZE دوباره اجرا نمی‌شوند"""
+        analyze = 'EXPLAIN (ANALYZE, BUFFERS) '
+        assert SlowQueryRecorder.explain_prefix(
+            'postgresql', 'WITH recent AS (SELECT id FROM t) SELECT * FROM recent') == analyze
+        assert SlowQueryRecorder.explain_prefix(
+            'postgresql', 'SELECT updated_at FROM t') == analyze
+        assert SlowQueryRecorder.explain_prefix(
+            'postgresql', 'WITH moved AS (DELETE FROM t RETURNING *) INSERT INTO a SELECT * FROM moved') == 'EXPLAIN '
+        assert SlowQueryRecorder.explain_prefix(
+            'postgresql', 'with x as (update t set a = 1 returning id) select * from x') == 'EXPLAIN '
+        assert SlowQueryRecorder.explain_prefix('postgresql', 'SELECT * FROM t FOR UPDATE') == 'EXPLAIN '
+
+    def test_explained_fingerprints_are_bounded(self, tmp_path, monkeypatch):
+        """زمان آخرین EXPLAIN فقط برای تعداد محدودی الگو نگه داشته می‌شود"""
+        monkeypatch.setattr('app.core.slow_query_log.MAX_EXPLAINED_FINGERPRINTS', 10)
+        recorder = SlowQueryRecorder(log_path=tmp_path / 'slow_queries.log')
+
+        assert all(recorder._should_explain(f"query-{index}") for index in range(25))
+
+        assert len(recorder._last_explained) == 10
+        assert list(recorder._last_explained)[0] == 'query-15'
+        assert recorder._should_explain('query-24') is False
@@ -0,0 +1,277 @@
+"""
+ماتریس تست حالت‌های pool پشت یک pooler شبیه‌سازی شده (transaction pooling)
+
+TransactionPoolerProxy مانند PgBouncer در pool_mode=transaction رفتار
+می‌کند: هر تراکنش کلاینت یک اتصال سرور از مجموعه کوچکی از اتصالات SQLite
+می‌گیرد و با commit/rollback آن را پس می‌دهد. دستورات دارای وضعیت session
+(SET بدون LOCAL، PREPARE، LISTEN، ...) به عنوان نقض ثبت می‌شوند چون در
+pooler واقعی به کلاینت دیگری نشت می‌کنند.
+"""
+
+import queue
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.database import DatabaseManager, install_transaction_statement_timeout
+from app.core.db_pool import MeteredQueuePool
+from config import config
+from config.database_config import DatabaseConfig
+
+SESSION_STATE_STATEMENTS = ('SET ', 'PREPARE ', 'EXECUTE ', 'LISTEN ', 'DECLARE ', 'DISCARD ')
+
+
+class ProxyCursor:
+    """cursor کلاینت که دستورات را به اتصال سرور تراکنش جاری می‌فرستد"""
+
+    arraysize = 1
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = None
+
+    def execute(self, sql, parameters=()):
+        statement = sql.strip().upper()
+        backend = self.connection.ensure_backend()
+        self._cursor = None
+
+        if statement.startswith('SET LOCAL '):
+            self.connection.proxy.record('local_settings', sql)
+            return self
+        if statement.startswith(SESSION_STATE_STATEMENTS):
+            self.connection.proxy.record('violations', sql)
+            return self
+
+        self._cursor = backend.cursor()
+        self._cursor.execute(sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        backend = self.connection.ensure_backend()
+        self._cursor = backend.cursor()
+        self._cursor.executemany(sql, seq_of_parameters)
+        return self
+
+    @property
+    def description(self):
+        return self._cursor.description if self._cursor else None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount if self._cursor else -1
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid if self._cursor else None
+
+    def fetchone(self):
+        return self._cursor.fetchone() if self._cursor else None
+
+    def fetchmany(self, size=None):
+        if not self._cursor:
+            return []
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall() if self._cursor else []
+
+    def close(self):
+        if self._cursor:
+            self._cursor.close()
+            self._cursor = None
+
+
+class ProxyConnection:
+    """اتصال کلاینت به pooler"""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.backend = None
+        self.closed = False
+
+    def ensure_backend(self):
+        """گرفتن اتصال سرور در شروع تراکنش"""
+        if self.backend is None:
+            self.backend = self.proxy.acquire()
+            self.backend.execute('BEGIN IMMEDIATE')
+        return self.backend
+
+    def _release(self, command):
+        if self.backend is not None:
+            self.backend.execute(command)
+            self.proxy.release(self.backend)
+            self.backend = None
+
+    def cursor(self):
+        return ProxyCursor(self)
+
+    def commit(self):
+        self._release('COMMIT')
+
+    def rollback(self):
+        self._release('ROLLBACK')
+
+    def close(self):
+        if not self.closed:
+            self.rollback()
+            self.closed = True
+            self.proxy.client_closed()
+
+    def create_function(self, *args, **kwargs):
+        """توابع SQLite که SQLAlchemy ثبت می‌کند در این شبیه‌ساز لازم نیستند"""
+
+
+class TransactionPoolerProxy:
+    """شبیه‌ساز pooler در حالت transaction روی یک فایل SQLite"""
+
+    def __init__(self, path, server_connections=2):
+        self._free = queue.Queue()
+        for _ in range(server_connections):
+            self._free.put(sqlite3.connect(str(path), check_same_thread=False,
+                                           isolation_level=None, timeout=10))
+        self._lock = threading.Lock()
+        self.open_clients = 0
+        self.transactions = 0
+        self.violations = []
+        self.local_settings = []
+
+    def connect(self):
+        with self._lock:
+            self.open_clients += 1
+        return ProxyConnection(self)
+
+    def client_closed(self):
+        with self._lock:
+            self.open_clients -= 1
+
+    def acquire(self):
+        backend = self._free.get(timeout=10)
+        with self._lock:
+            self.transactions += 1
+        return backend
+
+    def release(self, backend):
+        self._free.put(backend)
+
+    def record(self, kind, sql):
+        with self._lock:
+            getattr(self, kind).append(sql)
+
+
+def run_workload(engine, workers=4, units_per_worker=25):
+    """اجرای همزمان واحدهای کاری کوتاه مانند ثبت ورود از چند ایستگاه"""
+    session_factory = sessionmaker(bind=engine)
+    errors = []
+
+    def worker(worker_id):
+        for unit in range(units_per_worker):
+            session = session_factory()
+            try:
+                session.execute(text("INSERT INTO checkins (station, unit) VALUES (:s, :u)"),
+                                {'s': worker_id, 'u': unit})
+                session.execute(text("SELECT COUNT(*) FROM checkins")).scalar()
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                errors.append(e)
+            finally:
+                session.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return errors
+
+
+POOL_MODE_MATRIX = [
+    # (حالت، کلاس pool، نگه داشتن اتصال کلاینت بین تراکنش‌ها)
+    ('standard', MeteredQueuePool, True),
+    ('small', MeteredQueuePool, True),
+    ('transaction', NullPool, False),
+]
+
+
+class TestTransactionPoolingMatrix:
+    """ماتریس حالت‌های pool در برابر pooler شبیه‌سازی شده"""
+
+    @pytest.mark.parametrize('pool_mode,pool_class,holds_clients', POOL_MODE_MATRIX)
+    def test_workload_through_pooler(self, tmp_path, pool_mode, pool_class, holds_clients):
+        """اجرای بار همزمان از طریق pooler در هر حالت pool"""
+        # Given
+        db_path = tmp_path / 'pooler.db'
+        proxy = TransactionPoolerProxy(db_path, server_connections=2)
+
+        with patch.object(config.database, 'pool_mode', pool_mode):
+            engine = DatabaseManager.build_engine(f'sqlite:///{db_path}', creator=proxy.connect)
+        if pool_mode == 'transaction':
+            install_transaction_statement_timeout(engine, 5000)
+
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE checkins (id INTEGER PRIMARY KEY, station INTEGER, unit INTEGER)"))
+
+        # When
+        errors = run_workload(engine)
+
+        # Then
+        assert errors == []
+        assert isinstance(engine.pool, pool_class)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM checkins")).scalar() == 100
+
+        assert proxy.violations == []
+        assert (proxy.open_clients > 0) == holds_clients
+
+        if pool_mode == 'transaction':
+            # هر تراکنش timeout خود را با SET LOCAL تنظیم کرده است
+            assert len(proxy.local_settings) >= 100
+
+        engine.dispose()
+
+    def test_transaction_mode_params(self):
+        """حالت transaction پارامتر startup و overflow ندارد"""
+        params = DatabaseConfig(pool_mode='transaction', transaction_pool_size=0).get_connection_params()
+
+        assert 'options' not in params['connect_args']
+        assert params['pool_size'] == 0
+        assert params['max_overflow'] == 0
+
+    def test_tiny_pool_in_transaction_mode(self, tmp_path):
+        """با transaction_pool_size مثبت یک pool کوچک بدون overflow ساخته می‌شود"""
+        proxy = TransactionPoolerProxy(tmp_path / 'tiny.db')
+
+        with patch.object(config.database, 'pool_mode', 'transaction'), \
+                patch.object(config.database, 'transaction_pool_size', 1):
+            engine = DatabaseManager.build_engine(f"sqlite:///{tmp_path / 'tiny.db'}", creator=proxy.connect)
+
+        assert isinstance(engine.pool, MeteredQueuePool)
+        assert engine.pool.size() == 1
+        engine.dispose()
+
+    def test_proxy_detects_session_state(self, tmp_path):
+        """کنترل منفی: SET در سطح session به عنوان نقض ثبت می‌شود"""
+        # Given
+        proxy = TransactionPoolerProxy(tmp_path / 'state.db')
+        with patch.object(config.database, 'pool_mode', 'standard'):
+            engine = DatabaseManager.build_engine(f"sqlite:///{tmp_path / 'state.db'}", creator=proxy.connect)
+
+        @event.listens_for(engine, 'connect')
+        def set_session_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET statement_timeout = 1000")
+            cursor.close()
+
+        # When
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        # Then
+        assert proxy.violations == ["SET statement_timeout = 1000"]
+        engine.dispose()
@@ -0,0 +1,157 @@
+"""
+تست‌های تزریق خطا برای اجرای تراکنش با تلاش مجدد
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.transactions import (
+    RetryPolicy, run_in_transaction, transactional, is_transient_error, retry_stats
+)
+
+FAST_POLICY = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.05)
+
+
+class FakeDriverError(Exception):
+    """خطای درایور با SQLSTATE (مشابه psycopg2)"""
+
+    def __init__(self, message, pgcode):
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+def driver_error(pgcode, message='transient failure'):
+    return OperationalError("UPDATE ...", {}, FakeDriverError(message, pgcode))
+
+
+@pytest.fixture
+def tx_database(tmp_path, monkeypatch):
+    """دیتابیس SQLite با جدول نمونه به جای دیتابیس اصلی"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tx.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE folio_lines (id INTEGER PRIMARY KEY, amount INTEGER)"))
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+    retry_stats.reset()
+
+    yield engine
+    engine.dispose()
+
+
+def count_rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM folio_lines")).scalar()
+
+
+class TestTransientClassification:
+    """تست تشخیص خطاهای گذرا"""
+
+    @pytest.mark.parametrize('pgcode', ['40001', '40P01', '08006', '57P01'])
+    def test_transient_sqlstates(self, pgcode):
+        assert is_transient_error(driver_error(pgcode))
+
+    def test_sqlite_locked_is_transient(self):
+        error = OperationalError("INSERT ...", {}, sqlite3.OperationalError("database is locked"))
+        assert is_transient_error(error)
+
+    def test_integrity_error_is_not_transient(self):
+        error = IntegrityError("INSERT ...", {}, FakeDriverError("duplicate key", '23505'))
+        assert not is_transient_error(error)
+
+    def test_non_database_error_is_not_transient(self):
+        assert not is_transient_error(ValueError("bad input"))
+
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=0.3)
+        for attempt in range(1, 10):
+            assert 0 <= policy.delay_for(attempt) <= min(0.3, 0.1 * 2 ** (attempt - 1))
+
+
+class TestRunInTransaction:
+    """تست‌های تکرار کل واحد کاری"""
+
+    def test_retries_whole_unit_until_success(self, tx_database):
+        """کار ناقص تلاش‌های ناموفق rollback و کل واحد کاری تکرار می‌شود"""
+        # Given
+        attempts = []
+        sleeps = []
+
+        def work(session):
+            attempts.append(1)
+            session.execute(text("INSERT INTO folio_lines (amount) VALUES (100)"))
+            if len(attempts) < 3:
+                raise driver_error('40001', 'could not serialize access')
+            return 'posted'
+
+        # When
+        result = run_in_transaction(work, name='post_charge', policy=FAST_POLICY, sleep=sleeps.append)
+
+        # Then
+        assert result == 'posted'
+        assert len(attempts) == 3
+        assert count_rows(tx_database) == 1
+        assert len(sleeps) == 2
+        stats = retry_stats.snapshot()
+        assert stats['by_name']['post_charge'] == {'runs': 1, 'retries': 2, 'exhausted': 0}
+
+    def test_reraises_when_exhausted(self, tx_database):
+        """پس از پایان تلاش‌ها خطا دوباره raise می‌شود"""
+        # Given
+        sleeps = []
+
+        def work(session):
+            session.execute(text("INSERT INTO folio_lines (amount) VALUES (1)"))
+            raise driver_error('40P01', 'deadlock detected')
+
+        # When & Then
+        with pytest.raises(OperationalError):
+            run_in_transaction(work, name='deadlocked', policy=FAST_POLICY, sleep=sleeps.append)
+
+        assert len(sleeps) == FAST_POLICY.max_attempts - 1
+        assert count_rows(tx_database) == 0
+        assert retry_stats.snapshot()['by_name']['deadlocked']['exhausted'] == 1
+
+    def test_non_transient_error_is_not_retried(self, tx_database):
+        """خطای غیرگذرا بدون تلاش مجدد raise می‌شود"""
+        attempts = []
+
+        def work(session):
+            attempts.append(1)
+            raise ValueError("invalid amount")
+
+        with pytest.raises(ValueError):
+            run_in_transaction(work, policy=FAST_POLICY, sleep=lambda _: None)
+
+        assert len(attempts) == 1
+        assert retry_stats.snapshot()['retries'] == 0
+
+    def test_engine_level_fault_injection(self, tx_database):
+        """خطای درایور تزریق شده در سطح cursor تکرار می‌شود"""
+        # Given - دو اجرای اول INSERT با قفل دیتابیس شکست می‌خورند
+        failures = {'remaining': 2}
+
+        @event.listens_for(tx_database, 'before_cursor_execute')
+        def inject_lock(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT') and failures['remaining'] > 0:
+                failures['remaining'] -= 1
+                raise sqlite3.OperationalError("database is locked")
+
+        @transactional('injected_insert', policy=FAST_POLICY)
+        def insert_line(session, amount):
+            session.execute(text("INSERT INTO folio_lines (amount) VALUES (:a)"), {'a': amount})
+            return amount
+
+        # When
+        result = insert_line(amount=250)
+
+        # Then
+        assert result == 250
+        assert failures['remaining'] == 0
+        assert count_rows(tx_database) == 1
+        assert retry_stats.snapshot()['by_name']['injected_insert']['retries'] == 2
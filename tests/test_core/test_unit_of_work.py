@@ -0,0 +1,122 @@
+"""
+تست‌های واحد کاری مشترک بین سرویس‌ها
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import db_session
+from app.core.transactions import RetryPolicy, run_in_transaction
+from app.core.unit_of_work import unit_of_work, current_unit_of_work
+
+
+@pytest.fixture
+def uow_database(tmp_path, monkeypatch):
+    """دیتابیس SQLite با شمارنده commit"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'uow.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    commits = []
+    event.listen(engine, 'commit', lambda conn: commits.append(1))
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+
+    yield engine, commits
+    engine.dispose()
+
+
+def record_event(name):
+    """سرویس نمونه با الگوی سرویس‌های پروژه: db_session و commit صریح"""
+    with db_session() as session:
+        session.execute(text("INSERT INTO events (name) VALUES (:n)"), {'n': name})
+        session.commit()
+
+
+def event_names(engine):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SELECT name FROM events ORDER BY id"))]
+
+
+class TestUnitOfWork:
+    """تست‌های پیوستن سرویس‌ها به تراکنش بیرونی"""
+
+    def test_nested_services_share_one_commit(self, uow_database):
+        """سرویس‌های تو در تو session مشترک و یک commit دارند"""
+        # Given
+        engine, commits = uow_database
+        commits.clear()
+
+        # When
+        with unit_of_work() as uow:
+            record_event('check_out')
+            record_event('cleaning_task')
+            record_event('notification')
+            joined = uow.joined_calls
+
+        # Then
+        assert joined == 3
+        assert len(commits) == 1
+        assert event_names(engine) == ['check_out', 'cleaning_task', 'notification']
+        assert current_unit_of_work() is None
+
+    def test_failure_in_nested_service_rolls_back_everything(self, uow_database):
+        """خطای یک مرحله تغییرات مراحل قبل را هم rollback می‌کند"""
+        engine, _ = uow_database
+
+        def failing_service():
+            with db_session() as session:
+                session.execute(text("INSERT INTO missing_table VALUES (1)"))
+
+        with pytest.raises(Exception):
+            with unit_of_work():
+                record_event('check_out')
+                try:
+                    failing_service()
+                except Exception:
+                    pass  # سرویس‌ها خطا را به dict تبدیل می‌کنند
+
+        assert event_names(engine) == []
+
+    def test_rollback_only_without_error(self, uow_database):
+        """شکست منطقی (بدون exception) با set_rollback_only لغو می‌شود"""
+        engine, _ = uow_database
+
+        with unit_of_work() as uow:
+            record_event('check_out')
+            uow.set_rollback_only()
+
+        assert event_names(engine) == []
+
+    def test_after_commit_callbacks(self, uow_database):
+        """کارهای پس از commit فقط با commit موفق اجرا می‌شوند"""
+        sent = []
+
+        with unit_of_work() as uow:
+            record_event('check_out')
+            uow.on_commit(lambda: sent.append('sms'))
+            assert sent == []
+        assert sent == ['sms']
+
+        with unit_of_work() as uow:
+            uow.on_commit(lambda: sent.append('cancelled'))
+            uow.set_rollback_only()
+        assert sent == ['sms']
+
+    def test_run_in_transaction_joins_outer_unit(self, uow_database):
+        """run_in_transaction داخل واحد کاری بیرونی commit جداگانه ندارد"""
+        engine, commits = uow_database
+        commits.clear()
+
+        with unit_of_work():
+            record_event('payment')
+            run_in_transaction(
+                lambda session: session.execute(text("INSERT INTO events (name) VALUES ('folio')")),
+                policy=RetryPolicy(max_attempts=1)
+            )
+
+        assert len(commits) == 1
+        assert event_names(engine) == ['payment', 'folio']
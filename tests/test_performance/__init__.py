@@ -0,0 +1,5 @@
+"""
+تست‌های کارایی (benchmark) سیستم پذیرش
+
+اجرا: pytest -m performance -s tests/test_performance
+"""
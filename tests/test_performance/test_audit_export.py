@@ -0,0 +1,194 @@
+"""
+تست و بنچمارک خروجی جریانی لاگ‌های Audit
+
+جدول Audit در SQLite ساخته می‌شود (schema system با schema_translate_map
+حذف می‌شود). بنچمارک پنج میلیون رکورد را به JSON Lines فشرده می‌نویسد و
+اوج حافظه Python را با tracemalloc زیر سقف ثابت نگه می‌دارد.
+"""
+
+import csv
+import gzip
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.audit_trail import AuditTrail, AuditManager
+from app.utils.export_utils import PROGRESS_INTERVAL, stream_export
+from config import config
+
+BENCHMARK_ROWS = 5_000_000
+WARMUP_ROWS = 500_000
+SEED_BATCH = 50_000
+MEMORY_CEILING_MB = 32
+
+START = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def audit_database(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'audit.db'}",
+        execution_options={'schema_translate_map': {'system': None}}
+    )
+    AuditTrail.__table__.create(engine)
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(config.app, 'export_dir', tmp_path / 'exports')
+
+    yield engine
+    engine.dispose()
+
+
+def audit_rows(first: int, count: int):
+    """رکوردهای Audit هر دقیقه یکی با مقادیر تغییرات"""
+    for index in range(first, first + count):
+        yield {
+            'timestamp': START + timedelta(minutes=index), 'action_type': 'guest_update',
+            'severity': 'low', 'user_id': index % 40, 'user_name': 'کاربر پذیرش', 'user_role': 'receptionist',
+            'entity_type': 'guest', 'entity_id': index, 'entity_name': f'مهمان {index}',
+            'old_values': {'phone': '09120000000'}, 'new_values': {'phone': f'0912{index:07d}'},
+            'changes': ['phone'], 'description': 'ویرایش شماره تماس مهمان', 'ip_address': '10.0.0.5',
+            'module': 'reception', 'status': 'success'
+        }
+
+
+def seed(engine, count: int, first: int = 0):
+    with engine.begin() as conn:
+        for batch_start in range(first, first + count, SEED_BATCH):
+            conn.execute(insert(AuditTrail.__table__),
+                         list(audit_rows(batch_start, min(SEED_BATCH, first + count - batch_start))))
+
+
+def export(manager: AuditManager, **kwargs):
+    """خروجی بازه کامل با ثبت گزارش‌های پیشرفت"""
+    progress = []
+    filepath = manager.export_audit_logs(
+        START, START + timedelta(days=36500),
+        progress_callback=lambda written, total: progress.append((written, total)), **kwargs
+    )
+    return filepath, progress
+
+
+@pytest.mark.performance
+class TestStreamingAuditExport:
+    """خروجی JSON Lines، CSV و JSON بدون سقف تعداد رکورد"""
+
+    ROWS = 25_000
+
+    def test_jsonl_export_has_every_record_in_order(self, audit_database):
+        # Given: بیش از سقف قبلی 10,000 رکورد
+        seed(audit_database, self.ROWS)
+
+        # When
+        filepath, progress = export(AuditManager(), export_format='jsonl')
+
+        # Then: همه رکوردها به ترتیب زمان
+        with open(filepath, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == self.ROWS
+        assert [record['entity_id'] for record in records] == list(range(self.ROWS))
+        assert records[7]['new_values'] == {'phone': '09120000007'}
+        assert records[7]['timestamp'] == (START + timedelta(minutes=7)).isoformat()
+
+        # پیشرفت در فواصل ثابت و در پایان
+        assert progress == [(written, self.ROWS) for written in range(PROGRESS_INTERVAL, self.ROWS, PROGRESS_INTERVAL)] \
+            + [(self.ROWS, self.ROWS)]
+
+    def test_compressed_csv_export(self, audit_database):
+        seed(audit_database, 1_000)
+
+        # When
+        filepath, _ = export(AuditManager(), export_format='csv', compress=True)
+
+        # Then: CSV فشرده با ستون‌های ساختاریافته به صورت JSON
+        assert filepath.endswith('.csv.gz')
+        with gzip.open(filepath, 'rt', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 1_000
+        assert json.loads(rows[3]['new_values']) == {'phone': '09120000003'}
+        assert json.loads(rows[3]['changes']) == ['phone']
+        assert rows[3]['user_name'] == 'کاربر پذیرش'
+
+    def test_json_export_is_valid_array(self, audit_database):
+        seed(audit_database, 1_000)
+
+        filepath, _ = export(AuditManager(), export_format='json')
+
+        with open(filepath, encoding='utf-8') as f:
+            records = json.load(f)
+        assert [record['entity_id'] for record in records] == list(range(1_000))
+
+    def test_date_range_and_empty_export(self, audit_database):
+        seed(audit_database, 1_000)
+        manager = AuditManager()
+
+        # بازه 100 دقیقه‌ای (هر دو مرز شامل)
+        records = list(manager.iter_audit_records(START + timedelta(minutes=200), START + timedelta(minutes=299)))
+        assert [record['entity_id'] for record in records] == list(range(200, 300))
+
+        # بازه بدون رکورد
+        assert manager.export_audit_logs(START - timedelta(days=10), START - timedelta(days=1)) is None
+
+    def test_failed_export_leaves_no_file(self, tmp_path):
+        """خطا در میانه خروجی فایل ناقص باقی نمی‌گذارد"""
+        def broken_records():
+            yield from audit_rows(0, 10)
+            raise RuntimeError("قطع اتصال دیتابیس")
+
+        filepath = str(tmp_path / 'broken.jsonl.gz')
+        with pytest.raises(RuntimeError):
+            stream_export(broken_records(), filepath, 'jsonl')
+
+        assert os.listdir(tmp_path) == []
+
+
+def measured_export(manager: AuditManager):
+    """زمان و اوج حافظه Python خروجی JSON Lines فشرده"""
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    filepath, progress = export(manager, export_format='jsonl', compress=True)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return filepath, progress, elapsed, (peak - baseline) / (1024 * 1024)
+
+
+@pytest.mark.performance
+class TestStreamingAuditExportPerformance:
+    """بنچمارک خروجی پنج میلیون رکورد با حافظه ثابت"""
+
+    def test_five_million_rows_under_memory_ceiling(self, audit_database):
+        manager = AuditManager()
+
+        # Given: خروجی اولیه کوچک‌تر برای مقایسه اوج حافظه
+        seed(audit_database, WARMUP_ROWS)
+        _, _, warmup_elapsed, warmup_peak = measured_export(manager)
+
+        started = time.perf_counter()
+        seed(audit_database, BENCHMARK_ROWS - WARMUP_ROWS, first=WARMUP_ROWS)
+        seeded = time.perf_counter() - started
+
+        # When
+        filepath, progress, elapsed, peak = measured_export(manager)
+
+        # Then: همه رکوردها نوشته شده‌اند و حافظه با تعداد رکوردها رشد نکرده است
+        print(f"\n📤 خروجی {BENCHMARK_ROWS:,} رکورد Audit (درج در {seeded:.0f}s):")
+        print(f"   {WARMUP_ROWS:,} رکورد: {warmup_elapsed:.1f}s، اوج حافظه {warmup_peak:.1f}MB")
+        print(f"   {BENCHMARK_ROWS:,} رکورد: {elapsed:.1f}s، اوج حافظه {peak:.1f}MB، "
+              f"فایل {os.path.getsize(filepath) / (1024 * 1024):.0f}MB")
+
+        assert progress[-1] == (BENCHMARK_ROWS, BENCHMARK_ROWS)
+        with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+            assert sum(1 for _ in f) == BENCHMARK_ROWS
+
+        assert peak < MEMORY_CEILING_MB
+        assert peak < warmup_peak * 1.5 + 1
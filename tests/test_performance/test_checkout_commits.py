@@ -0,0 +1,117 @@
+"""
+بنچمارک تعداد commit و checkout اتصال در هر عملیات خروج
+
+مراحل خروج با همان الگوی سرویس‌ها (db_session و commit صریح) شبیه‌سازی
+می‌شوند: ثبت خروج، ایجاد وظیفه نظافت، ذخیره و به‌روزرسانی وضعیت
+اطلاع‌رسانی. حالت قبلی هر مرحله را جداگانه اجرا می‌کند و حالت جدید
+همه را در یک unit_of_work.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import db_session
+from app.core.unit_of_work import unit_of_work, current_unit_of_work
+
+CHECKOUTS = 200
+
+
+@pytest.fixture
+def checkout_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'checkout.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE stays (id INTEGER PRIMARY KEY, status TEXT)"))
+        conn.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, stay_id INTEGER)"))
+        conn.execute(text("CREATE TABLE notifications (id INTEGER PRIMARY KEY, status TEXT)"))
+        conn.execute(text("INSERT INTO stays (id, status) VALUES " +
+                          ", ".join(f"({i}, 'checked_in')" for i in range(1, CHECKOUTS + 1))))
+
+    counters = {'commits': 0, 'checkouts': 0}
+    event.listen(engine, 'commit', lambda conn: counters.__setitem__('commits', counters['commits'] + 1))
+    event.listen(engine.pool, 'checkout',
+                 lambda *args: counters.__setitem__('checkouts', counters['checkouts'] + 1))
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+
+    yield counters
+    engine.dispose()
+
+
+def check_out(stay_id):
+    with db_session() as session:
+        session.execute(text("UPDATE stays SET status = 'checked_out' WHERE id = :id"), {'id': stay_id})
+        session.commit()
+
+
+def create_cleaning_task(stay_id):
+    with db_session() as session:
+        session.execute(text("INSERT INTO tasks (stay_id) VALUES (:id)"), {'id': stay_id})
+        session.commit()
+
+
+def send_notification():
+    with db_session() as session:
+        notification_id = session.execute(
+            text("INSERT INTO notifications (status) VALUES ('pending')")
+        ).lastrowid
+        session.commit()
+
+    def mark_sent():
+        with db_session() as session:
+            session.execute(text("UPDATE notifications SET status = 'sent' WHERE id = :id"),
+                            {'id': notification_id})
+            session.commit()
+
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.on_commit(mark_sent)
+    else:
+        mark_sent()
+
+
+def run_checkouts(counters, stay_ids, use_unit_of_work):
+    counters['commits'] = counters['checkouts'] = 0
+    started = time.perf_counter()
+
+    for stay_id in stay_ids:
+        if use_unit_of_work:
+            with unit_of_work():
+                check_out(stay_id)
+                create_cleaning_task(stay_id)
+                send_notification()
+        else:
+            check_out(stay_id)
+            create_cleaning_task(stay_id)
+            send_notification()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {
+        'commits': counters['commits'] / len(stay_ids),
+        'checkouts': counters['checkouts'] / len(stay_ids),
+        'ms': elapsed_ms / len(stay_ids)
+    }
+
+
+@pytest.mark.performance
+class TestCheckoutCommits:
+    """مقایسه commit در هر خروج با و بدون unit_of_work"""
+
+    def test_unit_of_work_reduces_commits(self, checkout_database):
+        half = CHECKOUTS // 2
+        separate = run_checkouts(checkout_database, range(1, half + 1), use_unit_of_work=False)
+        combined = run_checkouts(checkout_database, range(half + 1, CHECKOUTS + 1), use_unit_of_work=True)
+
+        print(f"\n🔁 مراحل جداگانه: {separate['commits']:.1f} commit، "
+              f"{separate['checkouts']:.1f} اتصال، {separate['ms']:.2f}ms در هر خروج")
+        print(f"✅ unit_of_work: {combined['commits']:.1f} commit، "
+              f"{combined['checkouts']:.1f} اتصال، {combined['ms']:.2f}ms در هر خروج")
+
+        assert separate['commits'] == 4
+        # یک commit برای کل عملیات و یک commit برای وضعیت ارسال پس از commit
+        assert combined['commits'] == 2
+        assert combined['checkouts'] < separate['checkouts']
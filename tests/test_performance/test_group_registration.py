@@ -0,0 +1,178 @@
+"""
+تست و بنچمارک ثبت دسته‌ای همراهان گروه
+
+جداول همراهان و ارتباط همراه-اقامت در SQLite ساخته می‌شوند. ثبت یک گروه
+40 نفره (8 اتاق، سرگروه و 4 همراه در هر اتاق) با روش قبلی (flush برای هر
+همراه) و INSERT چندسطری GuestService._insert_companions مقایسه می‌شود.
+"""
+
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.reception.guest_models import Companion, CompanionStay
+from app.services.reception.guest_service import GuestService
+
+ROOMS = 8
+COMPANIONS_PER_ROOM = 4
+GROUP_SIZE = ROOMS * (COMPANIONS_PER_ROOM + 1)
+ROUNDS = 50
+NETWORK_RTT_MS = 1.0
+
+
+def group_companions(rooms: int = ROOMS, per_room: int = COMPANIONS_PER_ROOM):
+    """(guest_id, stay_id, companion_data) همراهان هر اتاق گروه"""
+    return [
+        (room, 100 + room, {
+            'first_name': f"همراه{room}-{index}",
+            'last_name': 'گروه تور',
+            'relationship': 'همسفر',
+            'national_id': f"{room:05d}{index:05d}"
+        })
+        for room in range(1, rooms + 1)
+        for index in range(per_room)
+    ]
+
+
+@pytest.fixture
+def companion_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'companions.db'}")
+    Companion.__table__.create(bind=engine)
+    CompanionStay.__table__.create(bind=engine)
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    yield sessionmaker(bind=engine), statements
+    engine.dispose()
+
+
+def insert_one_by_one(session, stay_companions):
+    """روش قبلی: درج و flush هر همراه برای گرفتن id و سپس ارتباط آن"""
+    companions = Companion.__table__
+    companion_ids = []
+    for guest_id, stay_id, companion_data in stay_companions:
+        companion_id = session.execute(
+            insert(companions).values(**GuestService._companion_values(guest_id, companion_data))
+        ).inserted_primary_key[0]
+        session.execute(insert(CompanionStay.__table__).values(companion_id=companion_id, stay_id=stay_id))
+        companion_ids.append(companion_id)
+    return companion_ids
+
+
+class TestInsertCompanions:
+    """تست صحت ثبت دسته‌ای همراهان"""
+
+    def test_ids_follow_input_order_and_links_match(self, companion_database):
+        # Given
+        Session, statements = companion_database
+        stay_companions = group_companions()
+
+        # When
+        with Session() as session:
+            companion_ids = GuestService._insert_companions(session, stay_companions)
+            session.commit()
+
+            # Then - هر id متعلق به همراه هم‌جایگاه ورودی است
+            companions = Companion.__table__
+            rows = {
+                row.id: row for row in session.execute(select(companions)).all()
+            }
+            links = dict(session.execute(
+                select(CompanionStay.__table__.c.companion_id, CompanionStay.__table__.c.stay_id)
+            ).all())
+
+        assert len(companion_ids) == len(set(companion_ids)) == len(stay_companions)
+        for companion_id, (guest_id, stay_id, companion_data) in zip(companion_ids, stay_companions):
+            assert rows[companion_id].guest_id == guest_id
+            assert rows[companion_id].national_id == companion_data['national_id']
+            assert rows[companion_id].relationship == 'همسفر'
+            assert links[companion_id] == stay_id
+
+    def test_companions_differing_only_in_unlisted_columns_keep_their_stays(self, companion_database):
+        # Given - همراهان یکسان جز در تاریخ تولد و تماس اضطراری با اقامت‌های متفاوت
+        Session, _ = companion_database
+        twin = {'first_name': 'همراه', 'last_name': 'دوقلو', 'relationship': 'فرزند'}
+        stay_companions = [
+            (1, 201, {**twin, 'date_of_birth': date(2015, 1, 1)}),
+            (1, 202, {**twin, 'date_of_birth': date(2016, 1, 1)}),
+            (1, 203, {**twin, 'emergency_contact': True}),
+            (1, 204, dict(twin)),
+        ]
+
+        # When
+        with Session() as session:
+            companion_ids = GuestService._insert_companions(session, stay_companions)
+            session.commit()
+
+            companions = Companion.__table__
+            rows = {row.id: row for row in session.execute(select(companions)).all()}
+            links = dict(session.execute(
+                select(CompanionStay.__table__.c.companion_id, CompanionStay.__table__.c.stay_id)
+            ).all())
+
+        # Then - هر اقامت به همان همراهی وصل است که برایش ارسال شده
+        for companion_id, (_, stay_id, companion_data) in zip(companion_ids, stay_companions):
+            assert links[companion_id] == stay_id
+            assert rows[companion_id].date_of_birth == companion_data.get('date_of_birth')
+            assert rows[companion_id].emergency_contact == companion_data.get('emergency_contact', False)
+
+    def test_statement_count_does_not_grow_with_group(self, companion_database):
+        Session, statements = companion_database
+
+        with Session() as session:
+            GuestService._insert_companions(session, group_companions(rooms=1, per_room=1))
+            single = len(statements)
+            statements.clear()
+            GuestService._insert_companions(session, group_companions())
+            session.commit()
+
+        assert len([s for s in statements if s.lstrip().upper().startswith('INSERT')]) == single == 2
+
+    def test_empty_group_issues_no_statements(self, companion_database):
+        Session, statements = companion_database
+
+        with Session() as session:
+            assert GuestService._insert_companions(session, []) == []
+        assert statements == []
+
+
+@pytest.mark.performance
+class TestGroupRegistrationPerformance:
+    """بنچمارک ثبت همراهان یک گروه 40 نفره"""
+
+    def test_batched_companions_beat_flush_per_companion(self, companion_database):
+        # Given
+        Session, statements = companion_database
+        stay_companions = group_companions()
+
+        def measure(insert_companions):
+            durations = []
+            statements.clear()
+            for _ in range(ROUNDS):
+                with Session() as session:
+                    started = time.perf_counter()
+                    insert_companions(session, stay_companions)
+                    session.commit()
+                    durations.append(time.perf_counter() - started)
+            durations.sort()
+            inserts = len([s for s in statements if s.lstrip().upper().startswith('INSERT')]) // ROUNDS
+            return durations[len(durations) // 2] * 1000, inserts
+
+        # When
+        one_by_one_ms, one_by_one_statements = measure(insert_one_by_one)
+        batched_ms, batched_statements = measure(GuestService._insert_companions)
+
+        # Then
+        print(f"\n🚌 گروه {GROUP_SIZE} نفره ({len(stay_companions)} همراه):")
+        print(f"   یکی‌یکی: {one_by_one_ms:.2f}ms با {one_by_one_statements} دستور "
+              f"(~{one_by_one_ms + one_by_one_statements * NETWORK_RTT_MS:.0f}ms با RTT {NETWORK_RTT_MS}ms)")
+        print(f"   دسته‌ای: {batched_ms:.2f}ms با {batched_statements} دستور "
+              f"(~{batched_ms + batched_statements * NETWORK_RTT_MS:.0f}ms با RTT {NETWORK_RTT_MS}ms)")
+
+        assert one_by_one_statements == len(stay_companions) * 2
+        assert batched_statements == 2
+        assert batched_ms < one_by_one_ms, "درج دسته‌ای همراهان کندتر از روش قبلی است"
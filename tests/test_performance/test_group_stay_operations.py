@@ -0,0 +1,239 @@
+"""
+تست و بنچمارک ورود و خروج گروهی
+
+جداول اقامت، صورت‌حساب، تخصیص اتاق و خانه‌داری در SQLite ساخته می‌شوند.
+ورود و خروج یک تور 60 اتاقه با GuestService.check_in_group و
+check_out_group انجام و با یک فراخوانی برای هر اتاق (check_in_guest و
+check_out_group تک‌اقامتی) مقایسه می‌شود.
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event, func, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import Base
+from app.core.notification_service import NotificationService
+from app.models.reception.guest_models import Stay
+from app.models.reception.housekeeping_models import HousekeepingTask
+from app.models.reception.payment_models import GuestFolio, FolioTransaction
+from app.models.reception.room_status_models import RoomAssignment, RoomStatusChange
+from app.services.reception.guest_service import GuestService
+from app.services.reception.housekeeping_service import HousekeepingService
+
+ROOMS = 60
+ROOM_RATE = Decimal('2500000')
+
+TABLES = [Stay, GuestFolio, FolioTransaction, RoomAssignment, HousekeepingTask, RoomStatusChange]
+
+
+@pytest.fixture
+def tour_database(tmp_path, monkeypatch):
+    """یک تور با 60 اقامت confirmed و صورت‌حساب باز (و 60 اقامت برای مقایسه)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tour.db'}")
+    Base.metadata.create_all(engine, tables=[model.__table__ for model in TABLES])
+
+    arrival = datetime(2024, 6, 1, 14, 0)
+    with engine.begin() as conn:
+        # جدول اتاق‌ها از سیستم مشترک است؛ بررسی وجود اتاق فقط id را می‌خواند
+        conn.execute(text("CREATE TABLE hotel_rooms (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO hotel_rooms (id) VALUES " +
+                          ", ".join(f"({100 + stay_id})" for stay_id in range(1, ROOMS * 2 + 1))))
+        conn.execute(Stay.__table__.insert(), [
+            {
+                'id': stay_id,
+                'guest_id': stay_id,
+                'planned_check_in': arrival,
+                'planned_check_out': arrival + timedelta(days=3),
+                'total_amount': ROOM_RATE,
+                'status': 'confirmed'
+            }
+            for stay_id in range(1, ROOMS * 2 + 1)
+        ])
+        conn.execute(GuestFolio.__table__.insert(), [
+            {'id': stay_id, 'stay_id': stay_id, 'opening_balance': 0, 'total_charges': 0,
+             'total_payments': 0, 'current_balance': 0, 'folio_status': 'open'}
+            for stay_id in range(1, ROOMS * 2 + 1)
+        ])
+
+    counters = {'statements': 0, 'commits': 0}
+    event.listen(engine, 'before_cursor_execute',
+                 lambda *args: counters.__setitem__('statements', counters['statements'] + 1))
+    event.listen(engine, 'commit', lambda conn: counters.__setitem__('commits', counters['commits'] + 1))
+
+    notifications = []
+    monkeypatch.setattr(NotificationService, 'send_notification',
+                        lambda self, data: notifications.append(data) or {'success': True})
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+
+    yield engine, counters, notifications
+    engine.dispose()
+
+
+def tour(first_stay: int = 1):
+    """(stay_id, room_id) اتاق‌های تور"""
+    return [(stay_id, 100 + stay_id) for stay_id in range(first_stay, first_stay + ROOMS)]
+
+
+def settle(engine, stay_ids):
+    """پرداخت کامل صورت‌حساب اقامت‌ها"""
+    folios = GuestFolio.__table__
+    with engine.begin() as conn:
+        conn.execute(update(folios).where(folios.c.stay_id.in_(stay_ids))
+                     .values(total_payments=folios.c.total_charges, current_balance=0))
+
+
+def count(engine, model, *conditions) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__).where(*conditions)).scalar()
+
+
+class TestGroupCheckIn:
+    """تست ورود گروهی"""
+
+    def test_checks_in_valid_stays_and_reports_failures(self, tour_database):
+        # Given - اقامت ناموجود، اقامت تکراری و اقامتی که قبلاً وارد شده
+        engine, _, _ = tour_database
+        GuestService.check_in_group([(3, 103)])
+        assignments = tour()[:5] + [(999, 200), (2, 102)]
+
+        # When
+        result = GuestService.check_in_group(assignments)
+
+        # Then
+        assert result['success']
+        assert (result['succeeded'], result['failed']) == (4, 3)
+        codes = {item['stay_id']: item.get('error_code') for item in result['results'] if not item['success']}
+        assert codes == {3: 'INVALID_STAY_STATUS', 999: 'STAY_NOT_FOUND', 2: 'DUPLICATE_STAY'}
+        assert [item['stay_id'] for item in result['results']] == [stay_id for stay_id, _ in assignments]
+
+        stays = Stay.__table__
+        assert count(engine, Stay, stays.c.status == 'checked_in') == 5
+        assert count(engine, RoomAssignment) == 5
+        assert count(engine, FolioTransaction) == 5
+        with engine.connect() as conn:
+            folio = conn.execute(select(GuestFolio.__table__).where(GuestFolio.__table__.c.stay_id == 1)).one()
+        assert folio.total_charges == folio.current_balance == ROOM_RATE
+
+    def test_nothing_to_check_in(self, tour_database):
+        result = GuestService.check_in_group([(999, 100)])
+
+        assert not result['success']
+        assert result['error_code'] == 'GROUP_CHECK_IN_FAILED'
+
+
+class TestGroupCheckOut:
+    """تست خروج گروهی"""
+
+    def test_checks_out_settled_stays_with_one_notification(self, tour_database):
+        # Given - همه وارد شده‌اند و یک اقامت تسویه نشده است
+        engine, _, notifications = tour_database
+        GuestService.check_in_group(tour())
+        stay_ids = [stay_id for stay_id, _ in tour()]
+        settle(engine, stay_ids[1:])
+
+        # When
+        result = GuestService.check_out_group(stay_ids)
+
+        # Then
+        assert (result['succeeded'], result['failed']) == (ROOMS - 1, 1)
+        unpaid = result['results'][0]
+        assert unpaid['error_code'] == 'BALANCE_NOT_ZERO'
+        assert unpaid['remaining_balance'] == float(ROOM_RATE)
+
+        task_ids = {item['cleaning_task_id'] for item in result['results'][1:]}
+        assert len(task_ids) == ROOMS - 1
+        assert count(engine, HousekeepingTask) == ROOMS - 1
+        assert count(engine, RoomStatusChange) == ROOMS - 1
+        assert count(engine, RoomAssignment, RoomAssignment.__table__.c.actual_check_out.is_(None)) == 1
+        assert count(engine, GuestFolio, GuestFolio.__table__.c.folio_status == 'settled') == ROOMS - 1
+
+        # یک اطلاع‌رسانی برای کل گروه
+        assert len(notifications) == 1
+        assert notifications[0]['message'].startswith(f"{ROOMS - 1} اتاق")
+
+    def test_transient_failure_retries_whole_check_out(self, tour_database):
+        """خطای گذرا در ثبت وظایف نظافت کل خروج را دوباره اجرا می‌کند و یک بار اطلاع می‌دهد"""
+        # Given - اولین INSERT وظایف نظافت با قفل دیتابیس شکست می‌خورد
+        engine, _, notifications = tour_database
+        GuestService.check_in_group(tour())
+        stay_ids = [stay_id for stay_id, _ in tour()]
+        settle(engine, stay_ids)
+        failures = []
+
+        def lock_once(conn, cursor, statement, *args):
+            if statement.startswith('INSERT INTO reception_housekeeping_tasks') and not failures:
+                failures.append(statement)
+                raise sqlite3.OperationalError('database is locked')
+
+        event.listen(engine, 'before_cursor_execute', lock_once)
+
+        # When
+        result = GuestService.check_out_group(stay_ids)
+
+        # Then
+        assert len(failures) == 1
+        assert result['succeeded'] == ROOMS
+        assert count(engine, HousekeepingTask) == ROOMS
+        assert count(engine, GuestFolio, GuestFolio.__table__.c.folio_status == 'settled') == ROOMS
+        assert len(notifications) == 1
+
+    def test_cleaning_tasks_for_unknown_rooms_are_rejected(self, tour_database):
+        """اتاق ناموجود در دسته، هیچ وظیفه یا تغییر وضعیتی نمی‌سازد"""
+        engine, _, _ = tour_database
+
+        result = HousekeepingService.create_cleaning_tasks([101, 9999, 102], 'checkout_cleaning')
+
+        assert not result['success']
+        assert result['error_code'] == 'ROOM_NOT_FOUND'
+        assert result['room_ids'] == [9999]
+        assert count(engine, HousekeepingTask) == 0
+        assert count(engine, RoomStatusChange) == 0
+
+
+@pytest.mark.performance
+class TestGroupStayOperationsPerformance:
+    """بنچمارک ورود و خروج یک تور 60 اتاقه"""
+
+    def test_group_operations_beat_per_stay_calls(self, tour_database):
+        engine, counters, notifications = tour_database
+
+        def measure(operation):
+            counters['statements'] = counters['commits'] = 0
+            started = time.perf_counter()
+            operation()
+            return (time.perf_counter() - started) * 1000, counters['statements'], counters['commits']
+
+        # Given - دو تور هم‌اندازه
+        single_tour, group_tour = tour(1), tour(ROOMS + 1)
+
+        # When - ورود
+        single_in = measure(lambda: [GuestService.check_in_guest(stay_id, room_id) for stay_id, room_id in single_tour])
+        group_in = measure(lambda: GuestService.check_in_group(group_tour))
+        settle(engine, [stay_id for stay_id, _ in single_tour + group_tour])
+
+        # When - خروج
+        notifications.clear()
+        single_out = measure(lambda: [GuestService.check_out_group([stay_id]) for stay_id, _ in single_tour])
+        single_notifications = len(notifications)
+        notifications.clear()
+        group_out = measure(lambda: GuestService.check_out_group([stay_id for stay_id, _ in group_tour]))
+
+        # Then
+        print(f"\n🚌 تور {ROOMS} اتاقه (زمان، دستور SQL، commit):")
+        for label, single, group in (('ورود', single_in, group_in), ('خروج', single_out, group_out)):
+            print(f"   {label}: تک‌اقامتی {single[0]:.0f}ms/{single[1]}/{single[2]}، "
+                  f"گروهی {group[0]:.0f}ms/{group[1]}/{group[2]}")
+
+        assert count(engine, Stay, Stay.__table__.c.status == 'checked_out') == ROOMS * 2
+        assert single_notifications == ROOMS and len(notifications) == 1
+        for single, group in ((single_in, group_in), (single_out, group_out)):
+            assert group[2] == 1
+            assert group[1] < single[1] / 10
+            assert group[0] < single[0]
@@ -0,0 +1,300 @@
+"""
+تست و بنچمارک تشخیص و ادغام مهمانان تکراری
+
+مهمانان با کلیدهای جستجوی یکسان‌سازی شده (Guest.search_keys) مستقیماً با
+Core در SQLite درج می‌شوند. تکراری‌ها مانند ثبت دوباره توسط همگام‌سازی
+یا پذیرش حضوری ساخته می‌شوند: بدون کدملی یا با کدملی اشتباه تایپ شده.
+بنچمارک یک دور کامل تشخیص را روی یک میلیون مهمان اجرا می‌کند.
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.database import Base
+from app.models.reception.guest_models import Guest, Stay, Companion, GuestDuplicateCandidate
+from app.models.reception.archive_models import ARCHIVE_TABLES
+from app.models.reception.housekeeping_models import LostAndFound
+from app.models.reception.payment_models import GuestFolio
+from app.services.reception.guest_duplicates import GuestDuplicateDetector, match_score
+from app.services.reception.guest_service import GuestService
+
+BENCHMARK_GUESTS = 1_000_000
+DUPLICATE_EVERY = 100
+BATCH = 20_000
+MAX_DETECTION_SECONDS = 300
+
+FIRST_NAMES = ['علی', 'محمد', 'رضا', 'حسین', 'مهدی', 'امیر', 'سارا', 'زهرا', 'مریم', 'فاطمه',
+               'نرگس', 'لیلا', 'حمید', 'سعید', 'مجید', 'کاوه', 'بهرام', 'شیرین', 'پریسا', 'نازنین',
+               'یاسمن', 'آرش', 'بابک', 'کیان', 'پویا', 'نیما', 'سینا', 'هستی', 'آیدا', 'مینا']
+LAST_NAMES = ['احمدی', 'محمدی', 'رضایی', 'حسینی', 'کریمی', 'موسوی', 'جعفری', 'صادقی', 'رحیمی',
+              'هاشمی', 'نوری', 'کاظمی', 'قاسمی', 'مرادی', 'عباسی', 'سلیمانی', 'اکبری', 'یوسفی',
+              'شریفی', 'طاهری', 'نظری', 'باقری', 'امینی', 'فرهادی', 'زمانی', 'کیانی', 'ملکی',
+              'بهرامی', 'سعیدی', 'افشار', 'تهرانی', 'شیرازی', 'اصفهانی', 'کرمانی', 'رشتی', 'یزدی']
+
+TABLES = [Guest, Stay, GuestFolio, Companion, LostAndFound, GuestDuplicateCandidate]
+TABLE_OBJECTS = [model.__table__ for model in TABLES] + [ARCHIVE_TABLES[Stay]]
+
+
+def guest_row(guest_id: int, first_name: str, last_name: str, phone: str,
+              date_of_birth: date = None, national_id: str = None, passport_number: str = None):
+    """سطر مهمان با کلیدهای جستجو (مانند رویداد before_insert)"""
+    return {
+        'id': guest_id,
+        'first_name': first_name,
+        'last_name': last_name,
+        'phone': phone,
+        'date_of_birth': date_of_birth,
+        'national_id': national_id,
+        'passport_number': passport_number,
+        **Guest.search_keys(first_name, last_name, national_id, phone, passport_number)
+    }
+
+
+def synthetic_guests(count: int, duplicate_every: int = DUPLICATE_EVERY):
+    """
+    مهمانان یکتا و به ازای هر duplicate_every مهمان یک تکراری
+
+    تکراری‌ها یک در میان بدون کدملی (با همان تلفن) یا با یک رقم اشتباه
+    در کدملی و «ي» عربی در نام ثبت شده‌اند.
+    """
+    next_id = 1
+    for index in range(count):
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        birth = date(1950, 1, 1) + timedelta(days=(index * 7919) % 20011)
+        national_id = f"{index:09d}0"
+        phone = f"0912{index:07d}"
+        yield guest_row(next_id, first, last, phone, birth, national_id)
+        next_id += 1
+
+        if index % duplicate_every == 0:
+            if (index // duplicate_every) % 2:
+                yield guest_row(next_id, first, last, phone, birth)
+            else:
+                typo = national_id[:-1] + str((int(national_id[-1]) + 1) % 10)
+                yield guest_row(next_id, first.replace('ی', 'ي'), last, phone, birth, typo)
+            next_id += 1
+
+
+@pytest.fixture
+def guest_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'guests.db'}")
+    Base.metadata.create_all(engine, tables=TABLE_OBJECTS)
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+
+    yield engine
+    engine.dispose()
+
+
+def seed(engine, rows):
+    batch = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH:
+                conn.execute(insert(Guest.__table__), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Guest.__table__), batch)
+
+
+def pending_pairs(engine):
+    candidates = GuestDuplicateCandidate.__table__
+    with engine.connect() as conn:
+        return {
+            (row.guest_id, row.duplicate_id): row
+            for row in conn.execute(select(candidates).where(candidates.c.status == 'pending'))
+        }
+
+
+class TestMatchScore:
+    """تست امتیاز تطابق"""
+
+    def test_recreated_guest_without_national_id(self):
+        original = Guest(**guest_row(1, 'علی', 'رضایی', '09121234567', date(1980, 5, 1), '0012345678'))
+        recreated = Guest(**guest_row(2, 'علي', 'رضائی', '+98 912 123 4567', date(1980, 5, 1)))
+
+        assert match_score(original, recreated) >= 0.95
+
+    def test_mistyped_national_id_still_matches(self):
+        original = Guest(**guest_row(1, 'سارا', 'کریمی', '09120000001', date(1990, 1, 1), '0012345678'))
+        mistyped = Guest(**guest_row(2, 'سارا', 'کریمی', '09120000001', date(1990, 1, 1), '0012345687'))
+
+        assert match_score(original, mistyped) >= 0.9
+
+    def test_same_name_and_birth_date_different_person(self):
+        # Given - همنام با تاریخ تولد یکسان اما کدملی و تلفن دیگر
+        first = Guest(**guest_row(1, 'محمد', 'احمدی', '09120000001', date(1985, 3, 3), '0012345678'))
+        second = Guest(**guest_row(2, 'محمد', 'احمدی', '09350000002', date(1985, 3, 3), '2290011223'))
+
+        assert match_score(first, second) < 0.7
+
+
+class TestDuplicateDetection:
+    """تست تشخیص تکراری‌ها"""
+
+    def test_detects_duplicates_within_blocks(self, guest_database):
+        # Given
+        engine = guest_database
+        seed(engine, [
+            guest_row(1, 'علی', 'رضایی', '09121111111', date(1980, 5, 1), '0012345678'),
+            guest_row(2, 'علي', 'رضایی', '09121111111', date(1980, 5, 1)),               # بدون کدملی
+            guest_row(3, 'سارا', 'کریمی', '09122222222', date(1990, 1, 1), '0023456789'),
+            guest_row(4, 'سارا', 'کریمی', '09123333333', date(1990, 1, 1), '0023456798'),  # کدملی اشتباه
+            guest_row(5, 'محمد', 'احمدی', '09124444444', date(1985, 3, 3), '0034567890'),
+            guest_row(6, 'محمد', 'احمدی', '09355555555', date(1985, 3, 3), '2290011223'),  # همنام
+            guest_row(7, 'مریم', 'نوری', '09126666666', passport_number='K1234567'),
+            guest_row(8, 'مريم', 'نوری', '09127777777', passport_number='k 1234567'),    # پاسپورت
+        ])
+
+        # When
+        with database.SessionLocal() as session:
+            stats = GuestDuplicateDetector(threshold=0.82).run(session)
+            session.commit()
+
+        # Then
+        pairs = pending_pairs(engine)
+        assert set(pairs) == {(1, 2), (3, 4), (7, 8)}
+        assert set(pairs[(1, 2)].reasons.split(',')) == {'name_birth', 'phone'}
+        assert pairs[(7, 8)].reasons == 'passport'
+        assert stats['candidates'] == 3
+        assert stats['comparisons'] == 4  # جفت (1, 2) در دو بلوک فقط یک بار امتیاز می‌گیرد
+
+    def test_oversized_block_is_skipped(self, guest_database):
+        # Given - تلفن آژانس برای 30 مهمان ثبت شده
+        engine = guest_database
+        seed(engine, [
+            guest_row(guest_id, FIRST_NAMES[guest_id % 30], 'مسافر', '02188888888')
+            for guest_id in range(1, 31)
+        ])
+
+        # When
+        with database.SessionLocal() as session:
+            stats = GuestDuplicateDetector(max_block=20).run(session)
+
+        # Then
+        assert stats['skipped_blocks'] == 1
+        assert stats['comparisons'] == 0
+
+    def test_rerun_replaces_pending_and_keeps_dismissed(self, guest_database):
+        # Given - یک جفت رد شده و یک جفت در انتظار
+        engine = guest_database
+        seed(engine, [
+            guest_row(1, 'علی', 'رضایی', '09121111111', date(1980, 5, 1), '0012345678'),
+            guest_row(2, 'علی', 'رضایی', '09121111111', date(1980, 5, 1)),
+            guest_row(3, 'سارا', 'کریمی', '09122222222', date(1990, 1, 1)),
+            guest_row(4, 'سارا', 'کریمی', '09122222222', date(1990, 1, 1)),
+        ])
+        GuestService.detect_duplicate_guests()
+        dismissed = pending_pairs(engine)[(3, 4)].id
+        assert GuestService.dismiss_duplicate(dismissed)['success']
+
+        # When
+        result = GuestService.detect_duplicate_guests()
+
+        # Then
+        assert result['success'] and result['candidates'] == 1
+        assert set(pending_pairs(engine)) == {(1, 2)}
+        page = GuestService.get_duplicate_candidates()
+        assert [(item['guest_id'], item['duplicate_id']) for item in page['candidates']] == [(1, 2)]
+        assert page['next_cursor'] is None
+
+
+class TestMergeGuests:
+    """تست ادغام مهمانان"""
+
+    def test_merge_repoints_records_and_fills_missing_fields(self, guest_database):
+        # Given - مهمان تکراری با کدملی، یک اقامت با صورت‌حساب، یک همراه و یک شیء گمشده
+        engine = guest_database
+        seed(engine, [
+            guest_row(1, 'علی', 'رضایی', '09121111111', date(1980, 5, 1)),
+            guest_row(2, 'علي', 'رضایی', '09121111111', date(1980, 5, 1), '0012345678'),
+            guest_row(3, 'علی', 'رضایی', '09121111111'),
+        ])
+        with engine.begin() as conn:
+            conn.execute(insert(Stay.__table__), [
+                {'id': 10, 'guest_id': 1, 'planned_check_in': date(2024, 1, 1), 'planned_check_out': date(2024, 1, 3),
+                 'total_amount': Decimal('1000'), 'status': 'checked_out'},
+                {'id': 11, 'guest_id': 2, 'planned_check_in': date(2024, 6, 1), 'planned_check_out': date(2024, 6, 3),
+                 'total_amount': Decimal('1000'), 'status': 'confirmed'},
+            ])
+            conn.execute(insert(GuestFolio.__table__), [{'id': 11, 'stay_id': 11, 'folio_status': 'open'}])
+            conn.execute(insert(Companion.__table__), [
+                {'id': 20, 'guest_id': 2, 'first_name': 'سارا', 'last_name': 'رضایی', 'relationship': 'همسر'}
+            ])
+            conn.execute(insert(LostAndFound.__table__), [
+                {'id': 30, 'guest_id': 2, 'item_name': 'عینک', 'found_date': datetime(2024, 6, 2), 'status': 'found'}
+            ])
+        with database.SessionLocal() as session:
+            GuestDuplicateDetector().run(session)
+            session.commit()
+        assert {(1, 2), (1, 3), (2, 3)} <= set(pending_pairs(engine))
+
+        # When
+        result = GuestService.merge_guests(1, 2)
+
+        # Then
+        assert result['success']
+        assert result['moved'] == {'stays': 1, 'archived_stays': 0, 'companions': 1, 'lost_items': 1}
+        assert 'national_id' in result['filled_fields']
+
+        with database.SessionLocal() as session:
+            assert session.get(Guest, 2) is None
+            keep = session.get(Guest, 1)
+            assert keep.national_id == '0012345678'
+            assert keep.national_id_key == '0012345678'
+            assert sorted(stay.id for stay in session.query(Stay).filter(Stay.guest_id == 1)) == [10, 11]
+            assert session.query(GuestFolio.stay_id).scalar() == 11
+            assert session.get(Companion, 20).guest_id == 1
+            assert session.get(LostAndFound, 30).guest_id == 1
+
+            statuses = {
+                (candidate.guest_id, candidate.duplicate_id): candidate.status
+                for candidate in session.query(GuestDuplicateCandidate)
+            }
+        assert statuses == {(1, 2): 'merged', (1, 3): 'pending'}
+
+    def test_merge_validation(self, guest_database):
+        seed(guest_database, [guest_row(1, 'علی', 'رضایی', '09121111111')])
+
+        assert GuestService.merge_guests(1, 1)['error_code'] == 'INVALID_MERGE'
+        assert GuestService.merge_guests(1, 99)['error_code'] == 'GUEST_NOT_FOUND'
+
+
+@pytest.mark.performance
+class TestDuplicateDetectionPerformance:
+    """بنچمارک تشخیص تکراری‌ها روی یک میلیون مهمان"""
+
+    def test_million_guests_within_minutes(self, guest_database):
+        # Given
+        engine = guest_database
+        started = time.perf_counter()
+        seed(engine, synthetic_guests(BENCHMARK_GUESTS))
+        seeded = time.perf_counter() - started
+        duplicates = len(range(0, BENCHMARK_GUESTS, DUPLICATE_EVERY))
+
+        # When
+        with database.SessionLocal() as session:
+            stats = GuestDuplicateDetector().run(session)
+            session.commit()
+
+        # Then
+        total = BENCHMARK_GUESTS + duplicates
+        print(f"\n👥 {total:,} مهمان ({duplicates:,} تکراری، درج در {seeded:.0f}s):")
+        print(f"   تشخیص: {stats['elapsed_seconds']:.1f}s، {stats['blocks']:,} بلوک، "
+              f"{stats['comparisons']:,} مقایسه (همه جفت‌ها: {total * (total - 1) // 2:,})")
+        print(f"   جفت‌های یافت شده: {stats['candidates']:,}")
+
+        pairs = pending_pairs(engine)
+        assert stats['candidates'] == len(pairs)
+        assert len(pairs) == duplicates
+        assert stats['comparisons'] == duplicates
+        assert stats['elapsed_seconds'] < MAX_DETECTION_SECONDS
@@ -0,0 +1,150 @@
+"""
+تست کلیدهای جستجوی یکسان‌سازی شده و بنچمارک پر کردن آن‌ها
+
+جدول مهمانان با ستون‌های کلید خالی (مانند دیتابیس پیش از مهاجرت
+guest_search_keys) در SQLite ساخته می‌شود و GuestKeyBackfill آن را
+دسته به دسته پر می‌کند.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.guest_key_backfill import GuestKeyBackfill
+from app.models.reception.guest_models import Guest
+from app.utils.text_normalizer import name_key, identifier_key, phone_key
+
+GUEST_COUNT = 200_000
+
+FIRST_NAMES = ['علي', 'محمد', 'عبد الله', 'حسین', 'مهدی', 'زهرا', 'فاطمه', 'مریم', 'سارا', 'نرگس']
+LAST_NAMES = ['رضايي', 'محمدی', 'حسینی', 'احمدی', 'كريمي', 'موسوی', 'جعفری', 'صادقی', 'رحیمی', 'نوری']
+
+
+def legacy_guests(count: int):
+    """سطرهای مهمان با قالب‌های ناهمگون ورودی و بدون کلید"""
+    for guest_id in range(1, count + 1):
+        yield {
+            'id': guest_id,
+            'first_name': FIRST_NAMES[guest_id % len(FIRST_NAMES)],
+            'last_name': LAST_NAMES[guest_id % len(LAST_NAMES)],
+            'national_id': f"{guest_id:03d}-{guest_id:06d}-{guest_id % 10}",
+            'nationality': 'ایرانی',
+            'phone': f"+98 912 {guest_id:07d}",
+            'passport_number': f"p {guest_id:08d}" if guest_id % 3 == 0 else None
+        }
+
+
+@pytest.fixture
+def guest_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'guests.db'}")
+    Guest.__table__.create(bind=engine)
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+
+    def populate(count: int):
+        with engine.begin() as conn:
+            conn.execute(Guest.__table__.insert(), list(legacy_guests(count)))
+
+    yield engine, populate
+    engine.dispose()
+
+
+def missing_keys(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(Guest.__table__).where(Guest.__table__.c.full_name_key.is_(None))
+        ).scalar()
+
+
+class TestSearchKeys:
+    """تست توابع کلید جستجو"""
+
+    def test_name_variants_share_key(self):
+        assert name_key('عبد‌الله  كريمي') == name_key('عبدالله کریمی')
+        assert name_key('علي') == name_key('علی')
+
+    def test_identifier_separators_are_removed(self):
+        assert identifier_key('۰۰۱-۲۳۴۵۶۷-۸') == '0012345678'
+        assert identifier_key('P 1234-56') == 'p123456'
+
+    @pytest.mark.parametrize('raw', [
+        '09121234567', '+98 912 123 4567', '0098-912-1234567', '989121234567', '9121234567', '۰۹۱۲ ۱۲۳ ۴۵۶۷'
+    ])
+    def test_phone_formats_share_key(self, raw):
+        assert phone_key(raw) == '09121234567'
+
+    def test_search_keys_of_guest(self):
+        keys = Guest.search_keys('علي', 'كريمي', '001-234567-8', '+98 912 1234567', None)
+
+        assert keys == {
+            'first_name_key': 'علی',
+            'last_name_key': 'کریمی',
+            'full_name_key': 'علیکریمی',
+            'national_id_key': '0012345678',
+            'phone_key': '09121234567',
+            'passport_key': None
+        }
+
+
+class TestGuestKeyBackfill:
+    """تست پر کردن کلیدهای مهمانان موجود"""
+
+    def test_backfill_fills_all_keys(self, guest_database):
+        # Given
+        engine, populate = guest_database
+        populate(50)
+
+        # When
+        status = GuestKeyBackfill(batch_size=7, pause=0).run()
+
+        # Then
+        assert status['finished'] and status['processed'] == 50
+        assert missing_keys(engine) == 0
+        with engine.connect() as conn:
+            row = conn.execute(select(Guest.__table__).where(Guest.__table__.c.id == 3)).one()
+        assert row.phone_key == '09120000003'
+        assert row.national_id_key == '0030000033'
+        assert row.passport_key == 'p00000003'
+
+    def test_backfill_resumes_after_stop(self, guest_database):
+        # Given - اجرای اول پس از دو دسته متوقف می‌شود
+        engine, populate = guest_database
+        populate(50)
+        GuestKeyBackfill(batch_size=10, pause=0).run(max_batches=2)
+        assert missing_keys(engine) == 30
+
+        # When - نمونه جدید (مانند اجرای مجدد برنامه) ادامه می‌دهد
+        status = GuestKeyBackfill(batch_size=10, pause=0).run()
+
+        # Then
+        assert status['processed'] == 30
+        assert missing_keys(engine) == 0
+
+
+@pytest.mark.performance
+class TestGuestKeyBackfillPerformance:
+    """بنچمارک پر کردن کلیدها برای 200000 مهمان"""
+
+    def test_backfill_throughput(self, guest_database):
+        # Given
+        engine, populate = guest_database
+        populate(GUEST_COUNT)
+
+        # When
+        backfill = GuestKeyBackfill(pause=0)
+        started = time.perf_counter()
+        status = backfill.run()
+        elapsed = time.perf_counter() - started
+
+        # Then
+        rate = status['processed'] / elapsed
+        print(f"\n🔑 پر کردن کلید {status['processed']:,} مهمان در {status['batches']} دسته: "
+              f"{elapsed:.1f}s ({rate:,.0f} سطر در ثانیه)")
+
+        assert status['processed'] == GUEST_COUNT
+        assert missing_keys(engine) == 0
+        assert rate > 10_000, "پر کردن کلیدها کندتر از هدف است"
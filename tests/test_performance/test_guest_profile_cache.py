@@ -0,0 +1,475 @@
+"""
+تست و بنچمارک کش پروفایل مهمان
+
+Redis با یک جایگزین درون‌حافظه‌ای (مشترک بین چند نمونه کش، مانند چند
+ایستگاه کاری) شبیه‌سازی می‌شود. بنچمارک پروفایل‌ها را از SQLite با همان
+سه query پروفایل (مهمان، اقامت‌های فعال با مانده، همراهان) می‌خواند و
+تأخیر و نرخ برخورد را با توزیع داغ مراجعات پذیرش اندازه می‌گیرد.
+"""
+
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import DECIMAL, Column, DateTime, ForeignKey, Integer, String, create_engine, event, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core import guest_profile_cache as profile_cache_module
+from app.core.guest_profile_cache import GuestProfileCache
+from app.models.reception.guest_models import Stay
+from app.models.reception.payment_models import GuestFolio
+
+GUEST_COUNT = 20_000
+LOOKUPS = 20_000
+
+Base = declarative_base()
+
+
+class ProfileGuest(Base):
+    __tablename__ = 'guests'
+
+    id = Column(Integer, primary_key=True)
+    first_name = Column(String(50))
+    last_name = Column(String(50))
+    phone = Column(String(20))
+
+
+class ProfileStay(Base):
+    __tablename__ = 'stays'
+
+    id = Column(Integer, primary_key=True)
+    guest_id = Column(Integer, ForeignKey('guests.id'), index=True)
+    status = Column(String(20))
+    planned_check_in = Column(DateTime)
+
+
+class ProfileFolio(Base):
+    __tablename__ = 'folios'
+
+    id = Column(Integer, primary_key=True)
+    stay_id = Column(Integer, ForeignKey('stays.id'), index=True)
+    current_balance = Column(DECIMAL(15, 0))
+
+
+class ProfileCompanion(Base):
+    __tablename__ = 'companions'
+
+    id = Column(Integer, primary_key=True)
+    guest_id = Column(Integer, ForeignKey('guests.id'), index=True)
+    first_name = Column(String(50))
+
+
+class FakeRedis:
+    """جایگزین درون‌حافظه‌ای Redis با دستورات مورد استفاده کش"""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError('redis down')
+
+    def mget(self, *keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+
+    def incr(self, key):
+        self._check()
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        self.redis._check()
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+def make_cache(redis, **kwargs) -> GuestProfileCache:
+    options = {'ttl': 300, 'l1_ttl': 30, 'l1_size': 100, 'verify_rate': 0}
+    options.update(kwargs)
+    cache = GuestProfileCache(**options)
+    cache.redis = redis
+    return cache
+
+
+class ProfileStore:
+    """منبع پروفایل با شمارش فراخوانی loader"""
+
+    def __init__(self):
+        self.profiles = {
+            1: {'id': 1, 'full_name': 'علی رضایی', 'balance': Decimal('1500000'),
+                'check_in': datetime(2024, 5, 1, 14, 0)},
+            2: {'id': 2, 'full_name': 'مریم کریمی', 'balance': Decimal('0'), 'check_in': None},
+        }
+        self.loads = Counter()
+
+    def load(self, guest_id):
+        self.loads[guest_id] += 1
+        profile = self.profiles.get(guest_id)
+        return dict(profile) if profile else None
+
+
+@pytest.fixture
+def store():
+    return ProfileStore()
+
+
+class TestGuestProfileCache:
+    """تست صحت کش پروفایل"""
+
+    def test_read_through_and_l1_hit(self, store):
+        # Given
+        cache = make_cache(FakeRedis())
+
+        # When
+        first = cache.get(1, store.load)
+        second = cache.get(1, store.load)
+
+        # Then - یک بار از دیتابیس، با انواع داده حفظ شده
+        assert first == second == store.profiles[1]
+        assert store.loads[1] == 1
+        stats = cache.get_stats()
+        assert (stats['misses'], stats['l1_hits']) == (1, 1)
+
+    def test_returned_profile_is_a_copy(self, store):
+        cache = make_cache(FakeRedis())
+        cache.get(1, store.load)['full_name'] = 'تغییر'
+
+        assert cache.get(1, store.load)['full_name'] == 'علی رضایی'
+
+    def test_workstations_share_l2(self, store):
+        # Given - دو ایستگاه با یک Redis
+        redis = FakeRedis()
+        front_desk, back_office = make_cache(redis), make_cache(redis)
+
+        # When
+        front_desk.get(1, store.load)
+        profile = back_office.get(1, store.load)
+
+        # Then
+        assert profile == store.profiles[1]
+        assert store.loads[1] == 1
+        assert back_office.get_stats()['l2_hits'] == 1
+
+    def test_missing_guest_is_not_cached(self, store):
+        cache = make_cache(FakeRedis())
+
+        assert cache.get(99, store.load) is None
+        assert cache.get(99, store.load) is None
+        assert store.loads[99] == 2
+
+    def test_invalidation_reaches_other_workstation(self, store):
+        # Given - هر دو ایستگاه پروفایل را در L1 دارند
+        redis = FakeRedis()
+        front_desk, back_office = make_cache(redis), make_cache(redis)
+        front_desk.get(1, store.load)
+        back_office.get(1, store.load)
+
+        # When - ایستگاه اول مهمان را ویرایش می‌کند و پیام ابطال به دومی می‌رسد
+        store.profiles[1]['full_name'] = 'علی رضایی‌نژاد'
+        front_desk.invalidate([1])
+        channel, message = redis.published[-1]
+        assert channel == GuestProfileCache.CHANNEL
+        back_office.handle_message({'type': 'message', 'data': message})
+
+        # Then
+        assert back_office.get(1, store.load)['full_name'] == 'علی رضایی‌نژاد'
+        assert front_desk.get(1, store.load)['full_name'] == 'علی رضایی‌نژاد'
+
+    def test_own_invalidation_message_is_ignored(self, store):
+        redis = FakeRedis()
+        cache = make_cache(redis)
+        cache.invalidate([1])
+        invalidations = cache.get_stats()['invalidations']
+
+        cache.handle_message({'type': 'message', 'data': redis.published[-1][1]})
+
+        assert cache.get_stats()['invalidations'] == invalidations
+
+    def test_load_racing_with_invalidation_is_not_served(self, store):
+        # Given - دیتابیس پس از خواندن و پیش از ذخیره کش تغییر می‌کند
+        redis = FakeRedis()
+        cache, other = make_cache(redis), make_cache(redis)
+
+        def racing_load(guest_id):
+            profile = store.load(guest_id)
+            store.profiles[guest_id]['full_name'] = 'نام جدید'
+            other.invalidate([guest_id])
+            cache.handle_message({'type': 'message', 'data': redis.published[-1][1]})
+            return profile
+
+        # When
+        stale = cache.get(1, racing_load)
+
+        # Then - نسخه قدیمی نه در L1 می‌ماند نه از L2 خوانده می‌شود
+        assert stale['full_name'] == 'علی رضایی'
+        assert cache.get(1, store.load)['full_name'] == 'نام جدید'
+        assert other.get(1, store.load)['full_name'] == 'نام جدید'
+
+    def test_l1_expires_and_is_bounded(self, store):
+        cache = make_cache(FakeRedis(), l1_ttl=0, l1_size=1)
+        cache.get(1, store.load)
+        cache.get(2, store.load)
+
+        # L1 با عمر صفر هر بار از L2 خوانده می‌شود
+        cache.get(1, store.load)
+        stats = cache.get_stats()
+        assert stats['l1_hits'] == 0 and stats['l2_hits'] == 1
+        assert stats['l1_size'] == 1
+
+    def test_redis_failure_falls_back_to_database(self, store):
+        redis = FakeRedis()
+        redis.fail = True
+        cache = make_cache(redis, l1_ttl=0)
+
+        assert cache.get(1, store.load) == store.profiles[1]
+        assert cache.get_stats()['errors'] == 1
+
+    def test_staleness_is_measured_by_sampling(self, store):
+        # Given - تغییر بدون ابطال (مثلاً دستور SQL مستقیم)
+        cache = make_cache(FakeRedis(), verify_rate=1.0)
+        cache.get(1, store.load)
+        store.profiles[1]['full_name'] = 'تغییر بدون ابطال'
+
+        # When
+        cache.get(1, store.load)
+        cache.get(2, store.load)
+        cache.get(2, store.load)
+
+        # Then
+        stats = cache.get_stats()
+        assert stats['verified'] == 2
+        assert stats['stale_hits'] == 1
+        assert stats['stale_ratio'] == 0.5
+        assert stats['max_age_seconds'] >= 0
+
+    def test_payload_is_versioned_json(self, store):
+        redis = FakeRedis()
+        cache = make_cache(redis)
+        cache.get(1, store.load)
+
+        payload = json.loads(redis.data['guest_profile:1'])
+        assert payload['v'] == 0
+        assert payload['profile']['balance'] == {'__dec__': '1500000'}
+
+
+class InvalidationRecorder:
+    """جایگزین کش که شناسه‌های ابطال شده پس از هر commit را ثبت می‌کند"""
+
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, guest_ids):
+        self.invalidated.append(set(guest_ids))
+
+
+@pytest.fixture
+def invalidation_session(tmp_path, monkeypatch):
+    """اقامت‌های مهمان 1 و 2 و یک صورت‌حساب روی اقامت 1؛ ابطال‌ها ثبت می‌شوند"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'invalidation.db'}")
+    Stay.metadata.create_all(engine, tables=[Stay.__table__, GuestFolio.__table__])
+    recorder = InvalidationRecorder()
+    monkeypatch.setattr(profile_cache_module, 'guest_profile_cache', recorder)
+
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add_all([
+            Stay(id=stay_id, guest_id=stay_id, status='checked_in',
+                 planned_check_in=datetime(2024, 5, 1), planned_check_out=datetime(2024, 5, 3))
+            for stay_id in (1, 2)
+        ])
+        session.add(GuestFolio(id=1, stay_id=1, total_charges=0, total_payments=0, current_balance=0))
+        session.commit()
+    recorder.invalidated.clear()
+
+    yield factory, recorder.invalidated
+    engine.dispose()
+
+
+class TestProfileInvalidationEvents:
+    """ابطال خودکار پس از commit بدون شروع سرویس کش"""
+
+    def test_moving_a_stay_invalidates_old_and_new_guest(self, invalidation_session):
+        factory, invalidated = invalidation_session
+
+        with factory() as session:
+            session.get(Stay, 1).guest_id = 3
+            session.commit()
+
+        assert invalidated == [{1, 3}]
+
+    def test_previous_owner_is_read_when_attribute_is_expired(self, invalidation_session):
+        factory, invalidated = invalidation_session
+
+        with factory() as session:
+            stay = session.get(Stay, 1)
+            session.expire(stay, ['guest_id'])
+            stay.guest_id = 3
+            session.commit()
+
+        assert invalidated == [{1, 3}]
+
+    def test_moving_a_folio_invalidates_both_stays_guests(self, invalidation_session):
+        factory, invalidated = invalidation_session
+
+        with factory() as session:
+            session.get(GuestFolio, 1).stay_id = 2
+            session.commit()
+
+        assert invalidated == [{1, 2}]
+
+    def test_folio_writes_resolve_guests_once_per_flush(self, invalidation_session):
+        """صورت‌حساب‌های یک flush با یک کوئری اقامت به مهمان تبدیل می‌شوند"""
+        # Given
+        factory, invalidated = invalidation_session
+        statements = []
+        event.listen(factory.kw['bind'], 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # When - یک صورت‌حساب جدید و ویرایش صورت‌حساب موجود
+        with factory() as session:
+            session.add(GuestFolio(id=2, stay_id=2, total_charges=0, total_payments=0, current_balance=0))
+            session.get(GuestFolio, 1).total_charges = 1000
+            statements.clear()
+            session.commit()
+
+        # Then
+        assert invalidated == [{1, 2}]
+        assert sum('FROM reception_stays' in statement for statement in statements) == 1
+
+    def test_rolled_back_changes_are_not_invalidated(self, invalidation_session):
+        factory, invalidated = invalidation_session
+
+        with factory() as session:
+            session.get(Stay, 1).guest_id = 3
+            session.flush()
+            session.rollback()
+
+        assert invalidated == []
+
+
+@pytest.fixture(scope='module')
+def profile_database(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('profiles') / 'profiles.db'}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(ProfileGuest.__table__.insert(), [
+            {'id': i, 'first_name': f"نام{i}", 'last_name': f"خانوادگی{i}", 'phone': f"09{i:09d}"}
+            for i in range(1, GUEST_COUNT + 1)
+        ])
+        conn.execute(ProfileStay.__table__.insert(), [
+            {'id': i, 'guest_id': i, 'status': 'checked_in', 'planned_check_in': datetime(2024, 5, 1)}
+            for i in range(1, GUEST_COUNT + 1)
+        ])
+        conn.execute(ProfileFolio.__table__.insert(), [
+            {'id': i, 'stay_id': i, 'current_balance': Decimal(rng.randrange(10 ** 7))}
+            for i in range(1, GUEST_COUNT + 1)
+        ])
+        conn.execute(ProfileCompanion.__table__.insert(), [
+            {'id': i, 'guest_id': (i % GUEST_COUNT) + 1, 'first_name': f"همراه{i}"}
+            for i in range(1, GUEST_COUNT + 1)
+        ])
+    yield engine
+    engine.dispose()
+
+
+def database_loader(engine):
+    """ساخت پروفایل با سه query (مانند GuestService._load_guest_profile)"""
+    guests, stays = ProfileGuest.__table__, ProfileStay.__table__
+    folios, companions = ProfileFolio.__table__, ProfileCompanion.__table__
+
+    def load(guest_id):
+        with engine.connect() as conn:
+            guest = conn.execute(select(guests).where(guests.c.id == guest_id)).first()
+            if guest is None:
+                return None
+            active = conn.execute(
+                select(stays.c.id, stays.c.status, stays.c.planned_check_in, folios.c.current_balance)
+                .outerjoin(folios, folios.c.stay_id == stays.c.id)
+                .where(stays.c.guest_id == guest_id, stays.c.status.in_(['confirmed', 'checked_in']))
+            ).all()
+            companion_rows = conn.execute(
+                select(companions.c.id, companions.c.first_name).where(companions.c.guest_id == guest_id)
+            ).all()
+        return {
+            'id': guest.id,
+            'full_name': f"{guest.first_name} {guest.last_name}",
+            'phone': guest.phone,
+            'active_stays': [
+                {'stay_id': row.id, 'status': row.status, 'planned_check_in': row.planned_check_in,
+                 'folio_balance': row.current_balance}
+                for row in active
+            ],
+            'companions': [{'id': row.id, 'full_name': row.first_name} for row in companion_rows]
+        }
+
+    return load
+
+
+def hot_keys(count: int, seed: int = 11):
+    """مراجعات پذیرش: 80٪ به 5٪ مهمانان (مقیم و در حال ورود/خروج)"""
+    rng = random.Random(seed)
+    hot = GUEST_COUNT // 20
+    for _ in range(count):
+        yield rng.randint(1, hot) if rng.random() < 0.8 else rng.randint(hot + 1, GUEST_COUNT)
+
+
+@pytest.mark.performance
+class TestGuestProfileCachePerformance:
+    """بنچمارک تأخیر پروفایل با و بدون کش"""
+
+    def test_cached_lookups_are_faster(self, profile_database):
+        # Given
+        load = database_loader(profile_database)
+        keys = list(hot_keys(LOOKUPS))
+        cache = make_cache(FakeRedis(), l1_size=500)
+
+        # When
+        started = time.perf_counter()
+        uncached = [load(guest_id) for guest_id in keys]
+        uncached_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cached = [cache.get(guest_id, load) for guest_id in keys]
+        cached_s = time.perf_counter() - started
+
+        # Then
+        stats = cache.get_stats()
+        print(f"\n👤 {LOOKUPS:,} دریافت پروفایل: بدون کش {uncached_s * 1e6 / LOOKUPS:.0f}µs، "
+              f"با کش {cached_s * 1e6 / LOOKUPS:.0f}µs")
+        print(f"   نرخ برخورد {stats['hit_ratio']:.1%} (L1 {stats['l1_hit_ratio']:.1%})، "
+              f"خواندن از دیتابیس {stats['misses']:,}")
+
+        assert cached == uncached
+        assert stats['hit_ratio'] > 0.7
+        assert cached_s < uncached_s / 2, "کش پروفایل تأخیر را به اندازه کافی کم نکرده است"
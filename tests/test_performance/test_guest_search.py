@@ -0,0 +1,188 @@
+"""
+تست و بنچمارک جستجوی سه‌حرفی مهمانان
+
+منطق رتبه‌بندی روی NGramIndex (پیاده‌سازی SQLite) با کلیدهای یکسان‌سازی
+شده بررسی می‌شود و بنچمارک تأخیر جستجوهای معمول پذیرش را روی یک میلیون مهمان اندازه می‌گیرد.
+"""
+
+import random
+import time
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.services.reception.guest_search import (
+    NGramIndex, SEARCH_FIELDS, EXACT, PREFIX, SIMILAR, TrigramSearchBackend, key_row, normalize_query,
+    similarity, trigrams
+)
+
+GUEST_COUNT = 1_000_000
+QUERY_ROUNDS = 20
+
+FIRST_NAMES = ['علی', 'محمد', 'رضا', 'حسین', 'مهدی', 'زهرا', 'فاطمه', 'مریم', 'سارا', 'نرگس',
+               'امیر', 'حمید', 'سعید', 'مجید', 'لیلا', 'شیرین', 'پریسا', 'نیما', 'کاوه', 'آرش']
+LAST_NAMES = ['رضایی', 'محمدی', 'حسینی', 'احمدی', 'کریمی', 'موسوی', 'جعفری', 'صادقی', 'رحیمی', 'نوری',
+              'قاسمی', 'کاظمی', 'اکبری', 'ابراهیمی', 'حیدری', 'شریفی', 'یوسفی', 'مرادی', 'عباسی', 'سلیمانی']
+
+
+def make_guests(count: int, seed: int = 42):
+    """سطرهای ایندکس (id و کلیدها) از مقادیر تصادفی مهمان"""
+    rng = random.Random(seed)
+    for guest_id in range(1, count + 1):
+        yield key_row(
+            guest_id,
+            rng.choice(FIRST_NAMES),
+            f"{rng.choice(LAST_NAMES)}{'' if guest_id % 7 else ' نژاد'}",
+            f"{rng.randrange(10 ** 10):010d}",
+            f"09{rng.randrange(10 ** 9):09d}",
+            f"P{rng.randrange(10 ** 8):08d}"
+        )
+
+
+def find(index: NGramIndex, term: str, search_type: str, limit: int = 10):
+    return index.search(normalize_query(term, SEARCH_FIELDS[search_type]), limit)
+
+
+@pytest.fixture
+def small_index():
+    """چهار مهمان با شناسه‌ها و نام‌های هم‌پوشان"""
+    index = NGramIndex()
+    index.load('test', [
+        key_row(1, 'علی', 'رضایی', '0012345678', '09121234567', 'P1000'),
+        key_row(2, 'رضا', 'محمدی', '0012345600', '09351112233', 'P2000'),
+        key_row(3, 'مریم', 'رضائی', '1234567890', '09120012345', None),
+        key_row(4, 'سارا', 'کریمی', '5550012345', '09129998877', 'P3000'),
+    ])
+    return index
+
+
+class TestTrigrams:
+    """تست سه‌حرفی‌ها به روش pg_trgm"""
+
+    def test_words_are_padded(self):
+        assert trigrams('Cat') == {'  c', ' ca', 'cat', 'at '}
+
+    def test_similarity_matches_pg_trgm(self):
+        # SELECT similarity('word', 'two words') = 0.36363637
+        assert round(similarity(trigrams('word'), trigrams('two words')), 4) == 0.3636
+
+
+class TestGuestSearchRanking:
+    """تست رتبه‌بندی NGramIndex"""
+
+    def test_exact_then_prefix_identifier_matches_first(self, small_index):
+        hits = find(small_index, '0012345678', 'all')
+        assert hits[0][:2] == (1, EXACT)
+
+        # زیررشته‌ها (کدملی مهمان 4 و تلفن مهمان 3) پس از پیشوندها
+        hits = find(small_index, '001234', 'all')
+        assert [(guest_id, rank) for guest_id, rank, _ in hits[:2]] == [(1, PREFIX), (2, PREFIX)]
+        assert {(guest_id, rank) for guest_id, rank, _ in hits[2:]} == {(3, SIMILAR), (4, SIMILAR)}
+
+    def test_identifier_substring_is_matched(self, small_index):
+        """زیررشته تلفن (مانند چهار رقم آخر) پیدا می‌شود"""
+        hits = find(small_index, '9998877', 'phone')
+        assert [guest_id for guest_id, _, _ in hits] == [4]
+
+    def test_names_are_ranked_by_similarity(self, small_index):
+        """غلط املایی رضایی/رضائی هم با شباهت پیدا می‌شود"""
+        hits = find(small_index, 'رضایی', 'name')
+        ids = [guest_id for guest_id, _, _ in hits]
+        assert ids[0] == 1
+        assert 3 in ids
+        assert all(rank == SIMILAR for _, rank, _ in hits)
+        assert [score for _, _, score in hits] == sorted((score for _, _, score in hits), reverse=True)
+
+    def test_full_name_ranks_best_match_first(self, small_index):
+        hits = find(small_index, 'رضا محمدی', 'name')
+        assert hits[0][0] == 2
+
+    def test_short_term_matches_word_prefix(self, small_index):
+        hits = find(small_index, 'سا', 'name')
+        assert [guest_id for guest_id, _, _ in hits] == [4]
+
+    def test_search_type_limits_fields(self, small_index):
+        assert find(small_index, 'رضا', 'phone') == []
+
+    def test_input_variants_match_normalized_keys(self, small_index):
+        """حروف عربی، نیم‌فاصله، ارقام فارسی و قالب بین‌المللی تلفن"""
+        assert find(small_index, 'كريمي', 'name')[0][0] == 4
+        assert find(small_index, 'ساراکریمی', 'name')[0][0] == 4
+        assert find(small_index, '+98 912 999 8877', 'phone')[0][:2] == (4, EXACT)
+        assert find(small_index, '۰۰۱-۲۳۴۵۶۷-۸', 'national_id')[0][:2] == (1, EXACT)
+
+    def test_updates_and_removals_are_reflected(self, small_index):
+        # When
+        small_index.add(4, key_row(4, 'سارا', 'رضایی', '5550012345', '09129998877', 'P3000')[1:])
+        small_index.remove(1)
+
+        # Then - نام قدیمی کریمی دیگر مهمان 4 را برنمی‌گرداند
+        assert 4 not in [guest_id for guest_id, _, _ in find(small_index, 'کریمی', 'name')]
+        ids = [guest_id for guest_id, _, _ in find(small_index, 'رضایی', 'name')]
+        assert 4 in ids and 1 not in ids
+        assert find(small_index, '0012345678', 'national_id') == []
+
+
+class TestTrigramSearchQuery:
+    """query PostgreSQL (بدون اتصال؛ فقط SQL کامپایل شده)"""
+
+    def test_guests_without_keys_are_searched_by_source_columns(self):
+        """مهمانانی که هنوز backfill نشده‌اند با ستون‌های منبع پیدا می‌شوند"""
+        keys = normalize_query('رضایی', SEARCH_FIELDS['name'])
+
+        sql = str(TrigramSearchBackend.query(Session(), keys).statement.compile(dialect=postgresql.dialect()))
+
+        assert 'reception_guests.full_name_key IS NULL' in sql
+        assert 'reception_guests.last_name ILIKE' in sql
+        assert 'coalesce(reception_guests.last_name_key, lower(reception_guests.last_name))' in sql
+
+
+@pytest.fixture(scope='module')
+def million_guests():
+    index = NGramIndex()
+    started = time.perf_counter()
+    index.load('benchmark', make_guests(GUEST_COUNT))
+    build_seconds = time.perf_counter() - started
+    print(f"\n🔎 ساخت ایندکس {GUEST_COUNT:,} مهمان: {build_seconds:.1f}s، {index.get_status()}")
+    return index
+
+
+@pytest.mark.performance
+class TestGuestSearchPerformance:
+    """بنچمارک جستجو روی یک میلیون مهمان"""
+
+    @pytest.mark.parametrize('label, term, search_type, target_ms', [
+        ('کدملی کامل', None, 'all', 25),
+        ('پیشوند تلفن', None, 'phone', 25),
+        ('چهار رقم آخر تلفن', None, 'phone', 50),
+        ('نام خانوادگی', 'رضایی', 'name', 200),
+        ('نام با غلط املایی', 'رضائی', 'name', 200),
+        ('نام کامل', 'علی کریمی', 'all', 200),
+        ('دو حرف اول نام', 'رض', 'name', 200),
+    ])
+    def test_typical_query_latency(self, million_guests, label, term, search_type, target_ms):
+        # Given - شناسه‌ها از یک مهمان واقعی ایندکس گرفته می‌شوند
+        sample = million_guests._rows[GUEST_COUNT // 2]
+        term = term or {
+            'کدملی کامل': sample[3],
+            'پیشوند تلفن': sample[4][:7],
+            'چهار رقم آخر تلفن': sample[4][-4:],
+        }[label]
+        keys = normalize_query(term, SEARCH_FIELDS[search_type])
+
+        # When
+        durations = []
+        for _ in range(QUERY_ROUNDS):
+            started = time.perf_counter()
+            hits = million_guests.search(keys, 50)
+            durations.append(time.perf_counter() - started)
+
+        # Then
+        durations.sort()
+        p95_ms = durations[int(len(durations) * 0.95) - 1] * 1000
+        print(f"\n  {label} «{term}»: {len(hits)} نتیجه، میانه {durations[len(durations) // 2] * 1000:.1f}ms، "
+              f"p95 {p95_ms:.1f}ms (هدف {target_ms}ms)")
+
+        assert hits
+        assert p95_ms < target_ms, f"جستجوی {label} کندتر از هدف است"
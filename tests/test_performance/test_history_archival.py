@@ -0,0 +1,334 @@
+"""
+تست و بنچمارک بایگانی سوابق قدیمی
+
+جداول اقامت، تخصیص اتاق، تغییر وضعیت، صورت‌حساب و پرداخت و جداول
+بایگانی آن‌ها در SQLite ساخته می‌شوند. هر اقامت یک تخصیص، دو تغییر
+وضعیت، یک صورت‌حساب با سه تراکنش، یک پرداخت و یک همراه دارد.
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.archival import HistoryArchiver, archive_cutoff, history_entity
+from app.core.database import Base
+from app.core.migrations import _history_archive
+from app.models.reception.archive_models import ARCHIVE_TABLES, history_view_name
+from app.models.reception.guest_models import Stay, CompanionStay
+from app.models.reception.payment_models import Payment, GuestFolio, FolioTransaction, CashierShift
+from app.models.reception.room_status_models import RoomAssignment, RoomStatusChange
+from app.services.reception.guest_service import GuestService
+from app.services.reception.report_service import ReportService
+from config import config
+
+HORIZON_DAYS = 365
+BENCHMARK_STAYS = 50_000
+BENCHMARK_OLD_RATIO = 0.9
+
+MODELS = [Stay, CompanionStay, RoomAssignment, RoomStatusChange, Payment, GuestFolio, FolioTransaction]
+
+
+@pytest.fixture
+def history_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(engine, tables=[
+        *[model.__table__ for model in MODELS], *ARCHIVE_TABLES.values(), CashierShift.__table__
+    ])
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(config.database, 'archive_horizon_days', HORIZON_DAYS)
+
+    yield engine
+    engine.dispose()
+
+
+def stay_rows(first_id: int, count: int, check_out: datetime, status: str = 'checked_out',
+              balance: Decimal = Decimal('0'), guest_id: int = None):
+    """سطرهای یک گروه اقامت با همه سوابق وابسته"""
+    rows = {model: [] for model in MODELS}
+    for stay_id in range(first_id, first_id + count):
+        check_in = check_out - timedelta(days=2)
+        rows[Stay].append({
+            'id': stay_id, 'guest_id': guest_id or stay_id, 'status': status,
+            'planned_check_in': check_in, 'planned_check_out': check_out,
+            'actual_check_in': check_in, 'actual_check_out': check_out if status == 'checked_out' else None,
+            'total_amount': Decimal('5000000')
+        })
+        rows[RoomAssignment].append({
+            'id': stay_id, 'stay_id': stay_id, 'room_id': 100 + stay_id % 200,
+            'assignment_date': check_in.date(), 'expected_check_out': check_out.date()
+        })
+        rows[RoomStatusChange].extend([
+            {'id': stay_id * 2 - 1, 'room_id': 100 + stay_id % 200, 'room_assignment_id': stay_id,
+             'new_status': 'occupied', 'changed_by': 1, 'created_at': check_in},
+            {'id': stay_id * 2, 'room_id': 100 + stay_id % 200, 'room_assignment_id': stay_id,
+             'new_status': 'cleaning', 'changed_by': 1, 'created_at': check_out}
+        ])
+        rows[GuestFolio].append({
+            'id': stay_id, 'stay_id': stay_id, 'total_charges': Decimal('5000000'),
+            'total_payments': Decimal('5000000') - balance, 'current_balance': balance,
+            'folio_status': 'settled' if not balance else 'open'
+        })
+        rows[FolioTransaction].extend([
+            {'id': stay_id * 3 - offset, 'folio_id': stay_id, 'transaction_type': 'charge',
+             'amount': Decimal('2500000'), 'description': 'اقامت', 'category': 'room_charge', 'created_at': check_in}
+            for offset in range(3)
+        ])
+        rows[Payment].append({
+            'id': stay_id, 'stay_id': stay_id, 'amount': Decimal('5000000'), 'payment_method': 'card',
+            'payment_type': 'settlement', 'status': 'completed', 'created_at': check_out
+        })
+        rows[CompanionStay].append({'id': stay_id, 'companion_id': stay_id, 'stay_id': stay_id})
+    return rows
+
+
+def seed(engine, *groups):
+    with engine.begin() as conn:
+        for rows in groups:
+            for model in MODELS:
+                if rows[model]:
+                    conn.execute(insert(model.__table__), rows[model])
+
+
+def orphan_changes(first_id: int, count: int, created_at: datetime):
+    """تغییرات وضعیت خانه‌داری بدون تخصیص اتاق"""
+    rows = {model: [] for model in MODELS}
+    rows[RoomStatusChange] = [
+        {'id': change_id, 'room_id': 100, 'new_status': 'cleaning', 'changed_by': 2, 'created_at': created_at}
+        for change_id in range(first_id, first_id + count)
+    ]
+    return rows
+
+
+def count(engine, table) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def sample_history(engine):
+    """10 اقامت قدیمی قابل بایگانی، 3 اقامت قدیمی ماندنی و 5 اقامت جدید"""
+    old = archive_cutoff(HORIZON_DAYS) - timedelta(days=30)
+    recent = datetime.now() - timedelta(days=10)
+    seed(
+        engine,
+        stay_rows(1, 10, old),
+        stay_rows(11, 1, old, balance=Decimal('750000')),          # مانده پرداخت نشده
+        stay_rows(12, 1, old, status='checked_in'),                 # هنوز در هتل
+        stay_rows(13, 1, old, status='no_show', balance=Decimal('0')),
+        stay_rows(14, 5, recent),
+        orphan_changes(1000, 4, old),
+        orphan_changes(2000, 2, recent)
+    )
+
+
+class TestHistoryArchiver:
+    """تست بایگانی"""
+
+    def test_archives_closed_settled_stays_with_dependents(self, history_database):
+        # Given
+        engine = history_database
+        sample_history(engine)
+
+        # When
+        status = HistoryArchiver(HORIZON_DAYS, batch_size=4, pause=0, window='').run()
+
+        # Then - 11 اقامت (10 خروج کرده و یک no_show) بایگانی می‌شوند
+        assert status['finished']
+        assert status['archived'] == {
+            'reception_room_status_changes': 11 * 2 + 4,
+            'reception_folio_transactions': 11 * 3,
+            'reception_guest_folios': 11,
+            'reception_payments': 11,
+            'reception_room_assignments': 11,
+            'reception_companion_stays': 11,
+            'reception_stays': 11
+        }
+        with engine.connect() as conn:
+            remaining = set(conn.execute(select(Stay.__table__.c.id)).scalars())
+            archived = set(conn.execute(select(ARCHIVE_TABLES[Stay].c.id)).scalars())
+        assert remaining == {11, 12, *range(14, 19)}
+        assert archived == {*range(1, 11), 13}
+        assert count(engine, RoomStatusChange.__table__) == 7 * 2 + 2
+        assert count(engine, ARCHIVE_TABLES[FolioTransaction]) == 33
+
+    def test_resumes_after_interruption_without_duplicates(self, history_database):
+        # Given - دور اول پس از دو دسته متوقف می‌شود
+        engine = history_database
+        sample_history(engine)
+        HistoryArchiver(HORIZON_DAYS, batch_size=3, pause=0, window='').run(max_batches=2)
+        assert count(engine, ARCHIVE_TABLES[Stay]) == 6
+
+        # When - نمونه جدید (مثلاً پس از راه‌اندازی مجدد) از ابتدا اجرا می‌شود
+        status = HistoryArchiver(HORIZON_DAYS, batch_size=3, pause=0, window='').run()
+
+        # Then
+        assert status['finished']
+        archive = ARCHIVE_TABLES[Stay]
+        with engine.connect() as conn:
+            ids = conn.execute(select(archive.c.id)).scalars().all()
+        assert sorted(ids) == [*range(1, 11), 13]
+
+    def test_failed_batch_moves_nothing(self, history_database, monkeypatch):
+        # Given - خطا پیش از حذف خود اقامت‌ها
+        engine = history_database
+        sample_history(engine)
+        archiver = HistoryArchiver(HORIZON_DAYS, pause=0, window='')
+        move = archiver._move
+
+        def failing_move(session, model, condition, archived_at):
+            if model is Stay:
+                raise RuntimeError("connection lost")
+            return move(session, model, condition, archived_at)
+
+        monkeypatch.setattr(archiver, '_move', failing_move)
+
+        # When
+        with pytest.raises(RuntimeError):
+            archiver.run_batch()
+
+        # Then
+        assert all(count(engine, table) == 0 for table in ARCHIVE_TABLES.values())
+        assert count(engine, Stay.__table__) == 18
+        assert count(engine, FolioTransaction.__table__) == 18 * 3
+
+    def test_runs_only_inside_window(self, history_database):
+        # Given - بازه شبانه و بازه‌ای که اکنون شروع نشده است
+        engine = history_database
+        sample_history(engine)
+        night = HistoryArchiver(HORIZON_DAYS, pause=0, window='23:00-05:00')
+        now = datetime.now()
+        later = HistoryArchiver(HORIZON_DAYS, pause=0,
+                                window=f"{now + timedelta(hours=1):%H:%M}-{now + timedelta(hours=2):%H:%M}")
+
+        # When
+        status = later.run()
+
+        # Then
+        assert night.in_window(datetime(2024, 1, 1, 23, 30))
+        assert night.in_window(datetime(2024, 1, 1, 4, 59))
+        assert not night.in_window(datetime(2024, 1, 1, 12, 0))
+        assert not status['finished'] and status['batches'] == 0
+        assert count(engine, ARCHIVE_TABLES[Stay]) == 0
+
+
+class TestUnifiedHistory:
+    """تست دسترسی یکپارچه به سوابق بایگانی شده"""
+
+    def test_guest_history_and_reports_include_archived_records(self, history_database):
+        # Given - دو اقامت قدیمی و یک اقامت جدید یک مهمان
+        engine = history_database
+        old = archive_cutoff(HORIZON_DAYS) - timedelta(days=30)
+        seed(engine, stay_rows(1, 2, old, guest_id=7), stay_rows(3, 1, datetime.now() - timedelta(days=3), guest_id=7))
+        HistoryArchiver(HORIZON_DAYS, pause=0, window='').run()
+        assert count(engine, Stay.__table__) == 1
+
+        # When
+        history = GuestService.get_guest_stay_history(7)
+        report = ReportService.generate_financial_report(old.date() - timedelta(days=5), date.today())
+
+        # Then
+        assert [stay['stay_id'] for stay in history['stays']] == [3, 2, 1]
+        assert history['stays'][-1]['total_payments'] == 5000000
+        assert report['report']['financial_summary']['total_revenue'] == 3 * 5000000
+
+    def test_recent_ranges_read_only_hot_tables(self, history_database):
+        # Given - بایگانی خالی، سپس اقامت‌هایی با پرداخت در زمان old
+        engine = history_database
+        old = archive_cutoff(HORIZON_DAYS) - timedelta(days=30)
+        with database.SessionLocal() as session:
+            assert history_entity(session, Payment, old - timedelta(days=1)) is Payment
+
+        seed(engine, stay_rows(1, 2, old))
+        HistoryArchiver(HORIZON_DAYS, pause=0, window='').run()
+
+        # Then - مرز، جدیدترین سطر بایگانی است نه افق تنظیمات
+        with database.SessionLocal() as session:
+            assert history_entity(session, Payment, old + timedelta(days=1)) is Payment
+            assert history_entity(session, Payment, old) is not Payment
+            assert history_entity(session, Payment, old - timedelta(days=1)) is not Payment
+
+    def test_reports_include_archives_newer_than_config_horizon(self, history_database):
+        # Given - بایگانی با افق کوتاه‌تر از تنظیمات؛ پرداخت بعد از افق تنظیمات است
+        engine = history_database
+        check_out = datetime.now() - timedelta(days=60)
+        seed(engine, stay_rows(1, 2, check_out))
+        HistoryArchiver(horizon_days=30, pause=0, window='').run()
+        assert count(engine, Payment.__table__) == 0
+
+        # When - شروع بازه بعد از archive_cutoff() تنظیمات
+        start = check_out.date() - timedelta(days=5)
+        assert datetime.combine(start, datetime.min.time()) > archive_cutoff()
+        report = ReportService.generate_financial_report(start, date.today())
+
+        # Then
+        assert report['report']['financial_summary']['total_revenue'] == 2 * 5000000
+
+    def test_migration_creates_queryable_views(self, history_database):
+        # Given
+        engine = history_database
+        old = archive_cutoff(HORIZON_DAYS) - timedelta(days=30)
+        seed(engine, stay_rows(1, 3, old), stay_rows(4, 2, datetime.now()))
+        HistoryArchiver(HORIZON_DAYS, pause=0, window='').run()
+
+        # When - اجرای دوباره مهاجرت بی‌خطر است
+        for _ in range(2):
+            with database.SessionLocal() as session:
+                _history_archive(session)
+                session.commit()
+
+        # Then
+        with engine.connect() as conn:
+            stays = conn.execute(text(f"SELECT COUNT(*) FROM {history_view_name(Stay)}")).scalar()
+            changes = conn.execute(text(f"SELECT COUNT(*) FROM {history_view_name(RoomStatusChange)}")).scalar()
+        assert stays == 5
+        assert changes == 10
+
+
+@pytest.mark.performance
+class TestHistoryArchivalPerformance:
+    """بنچمارک بایگانی و اثر آن بر queryهای پذیرش"""
+
+    def test_archival_shrinks_hot_tables(self, history_database):
+        # Given - 90% اقامت‌ها قدیمی‌تر از افق بایگانی
+        engine = history_database
+        old_stays = int(BENCHMARK_STAYS * BENCHMARK_OLD_RATIO)
+        old = archive_cutoff(HORIZON_DAYS) - timedelta(days=30)
+        seed(engine, stay_rows(1, old_stays, old),
+             stay_rows(old_stays + 1, BENCHMARK_STAYS - old_stays, datetime.now() - timedelta(days=1)))
+
+        def front_desk_queries():
+            # سوابق وضعیت یک اتاق و صورت‌حساب‌های باز (بدون ایندکس مخصوص)
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                for room_id in range(100, 120):
+                    conn.execute(select(func.count()).select_from(RoomStatusChange.__table__)
+                                 .where(RoomStatusChange.__table__.c.room_id == room_id)).scalar()
+                    conn.execute(select(func.sum(FolioTransaction.__table__.c.amount))
+                                 .where(FolioTransaction.__table__.c.category == 'minibar')).scalar()
+            return (time.perf_counter() - started) * 1000
+
+        before_ms = front_desk_queries()
+
+        # When
+        archiver = HistoryArchiver(HORIZON_DAYS, batch_size=500, pause=0, window='')
+        started = time.perf_counter()
+        status = archiver.run()
+        elapsed = time.perf_counter() - started
+        after_ms = front_desk_queries()
+
+        # Then
+        moved = sum(status['archived'].values())
+        print(f"\n🗄️ بایگانی {old_stays:,} اقامت ({moved:,} سطر) در {status['batches']} دسته: "
+              f"{elapsed:.1f}s ({moved / elapsed:,.0f} سطر در ثانیه)")
+        print(f"   queryهای پذیرش: قبل {before_ms:.0f}ms، بعد {after_ms:.0f}ms")
+
+        assert status['archived']['reception_stays'] == old_stays
+        assert count(engine, Stay.__table__) == BENCHMARK_STAYS - old_stays
+        assert status['batches'] == -(-old_stays // 500)
+        assert after_ms < before_ms / 3
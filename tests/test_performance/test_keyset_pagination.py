@@ -0,0 +1,207 @@
+"""
+تست و بنچمارک صفحه‌بندی keyset
+
+جدول رویدادها با ترتیب پرتکرار (زمان ثبت تکراری و اولویت nullable) در
+SQLite ساخته می‌شود. صحت پیمایش صفحه‌ها و تأخیر صفحه‌های عمیق در برابر
+OFFSET اندازه‌گیری می‌شود.
+"""
+
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import DECIMAL, Column, DateTime, Index, Integer, String, create_engine, func
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core.pagination import (
+    InvalidCursorError, Keyset, MAX_PAGE_SIZE, decode_cursor, encode_cursor, paginate
+)
+
+ROW_COUNT = 500_000
+PAGE_SIZE = 100
+QUERY_ROUNDS = 5
+
+Base = declarative_base()
+
+
+class Event(Base):
+    """رکورد نمونه هم‌شکل لاگ‌های Audit"""
+    __tablename__ = 'events'
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+    priority = Column(String(20))
+    amount = Column(DECIMAL(15, 0))
+
+
+Index('ix_events_created_at_id', Event.created_at, Event.id)
+Index('ix_events_priority_page', func.coalesce(Event.priority, '').desc(), Event.created_at, Event.id)
+
+NEWEST_FIRST = Keyset('events_newest', Event.created_at.desc(), Event.id.desc())
+BY_PRIORITY = Keyset('events_by_priority', Event.priority.desc(), Event.created_at, Event.id,
+                     nulls={'priority': ''})
+
+PRIORITIES = ['low', 'normal', 'high', 'urgent', None]
+
+
+def make_events(count: int):
+    """رویدادها با زمان ثبت تکراری (هر 10 رکورد در یک ثانیه)"""
+    start = datetime(2024, 1, 1)
+    for event_id in range(1, count + 1):
+        yield {
+            'id': event_id,
+            'created_at': start + timedelta(seconds=event_id // 10),
+            'priority': PRIORITIES[event_id % len(PRIORITIES)],
+            'amount': Decimal(event_id * 1000)
+        }
+
+
+def build_database(path, count: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Event.__table__.insert(), list(make_events(count)))
+    return engine
+
+
+@pytest.fixture
+def small_events(tmp_path):
+    engine = build_database(tmp_path / 'events.db', 253)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def walk(session, keyset, limit):
+    """پیمایش همه صفحه‌ها و برگرداندن idها به ترتیب"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = paginate(session.query(Event), keyset, cursor, limit)
+        ids.extend(event.id for event in page.items)
+        pages += 1
+        if not page.has_more:
+            return ids, pages
+        cursor = page.next_cursor
+
+
+class TestKeysetPagination:
+    """تست صحت صفحه‌بندی"""
+
+    def test_pages_cover_every_row_once_in_order(self, small_events):
+        with small_events() as session:
+            # When
+            ids, pages = walk(session, NEWEST_FIRST, 20)
+
+            # Then - همان ترتیب query کامل، بدون تکرار یا جا افتادن
+            expected = [event.id for event in NEWEST_FIRST.order(session.query(Event)).all()]
+            assert ids == expected
+            assert len(set(ids)) == 253
+            assert pages == 13
+
+    def test_mixed_directions_with_nulls(self, small_events):
+        with small_events() as session:
+            ids, _ = walk(session, BY_PRIORITY, 17)
+            expected = [event.id for event in BY_PRIORITY.order(session.query(Event)).all()]
+
+            assert ids == expected
+            # اولویت NULL با جایگزین '' در انتهای ترتیب نزولی
+            last = session.get(Event, ids[-1])
+            assert last.priority is None
+
+    def test_rows_inserted_before_cursor_do_not_shift_pages(self, small_events):
+        with small_events() as session:
+            # Given
+            first = paginate(session.query(Event), NEWEST_FIRST, None, 50)
+
+            # When - رکورد جدیدتر از همه پس از دریافت صفحه اول درج می‌شود
+            session.add(Event(id=1000, created_at=datetime(2030, 1, 1), priority='low'))
+            session.commit()
+            second = paginate(session.query(Event), NEWEST_FIRST, first.next_cursor, 50)
+
+            # Then - برخلاف OFFSET، سطر آخر صفحه اول تکرار نمی‌شود
+            assert first.items[-1].id not in [event.id for event in second.items]
+            assert second.items[0].id == first.items[-1].id - 1
+
+    def test_cursor_round_trips_typed_values(self):
+        values = [datetime(2024, 5, 1, 10, 30), Decimal('1500000'), 'علی', 42]
+        token = encode_cursor('sample', values)
+
+        assert decode_cursor(token, 'sample', 4) == values
+
+    @pytest.mark.parametrize('token', ['not-a-cursor', encode_cursor('other', [1, 2]), encode_cursor('events_newest', [1])])
+    def test_invalid_cursor_is_rejected(self, small_events, token):
+        with small_events() as session:
+            with pytest.raises(InvalidCursorError):
+                paginate(session.query(Event), NEWEST_FIRST, token, 10)
+
+    def test_limit_is_capped(self, small_events):
+        with small_events() as session:
+            page = paginate(session.query(Event), NEWEST_FIRST, None, 10_000)
+            assert len(page.items) == min(253, MAX_PAGE_SIZE)
+
+    @pytest.mark.parametrize('sort_by', ['check_in', 'check_out', 'status', 'room'])
+    def test_guest_list_rejects_sort_without_keyset(self, sort_by):
+        """ستون‌هایی که keyset ندارند به ترتیب id برنمی‌گردند بلکه خطا می‌دهند"""
+        from app.services.reception.guest_service import GuestService
+
+        for descending in (False, True):
+            result = GuestService.list_guests_page(sort_by=sort_by, descending=descending)
+            assert result['success'] is False
+            assert result['error_code'] == 'INVALID_SORT'
+
+
+@pytest.fixture(scope='module')
+def large_events(tmp_path_factory):
+    started = time.perf_counter()
+    engine = build_database(tmp_path_factory.mktemp('keyset') / 'events.db', ROW_COUNT)
+    print(f"\n📄 ساخت {ROW_COUNT:,} رویداد: {time.perf_counter() - started:.1f}s")
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def median_ms(fetch) -> float:
+    durations = []
+    for _ in range(QUERY_ROUNDS):
+        started = time.perf_counter()
+        rows = fetch()
+        durations.append(time.perf_counter() - started)
+        assert len(rows) == PAGE_SIZE
+    durations.sort()
+    return durations[len(durations) // 2] * 1000
+
+
+@pytest.mark.performance
+class TestKeysetPaginationPerformance:
+    """بنچمارک تأخیر صفحه در عمق‌های مختلف جدول"""
+
+    @pytest.mark.parametrize('keyset', [NEWEST_FIRST, BY_PRIORITY], ids=['newest_first', 'by_priority'])
+    def test_page_latency_is_constant_with_depth(self, large_events, keyset):
+        depths = [0, ROW_COUNT // 10, ROW_COUNT // 2, ROW_COUNT * 9 // 10]
+        keyset_ms, offset_ms = {}, {}
+
+        with large_events() as session:
+            ordered = keyset.order(session.query(Event))
+            for depth in depths:
+                # Given - cursor سطر قبل از صفحه در این عمق
+                cursor = None
+                if depth:
+                    previous = ordered.offset(depth - 1).limit(1).one()
+                    cursor = keyset.encode(keyset.values_of(previous))
+
+                # When
+                keyset_ms[depth] = median_ms(
+                    lambda: paginate(session.query(Event), keyset, cursor, PAGE_SIZE).items
+                )
+                offset_ms[depth] = median_ms(lambda: ordered.offset(depth).limit(PAGE_SIZE).all())
+
+                # Then - هر دو روش همان سطرها را برمی‌گردانند
+                page_ids = [event.id for event in paginate(session.query(Event), keyset, cursor, PAGE_SIZE).items]
+                assert page_ids == [event.id for event in ordered.offset(depth).limit(PAGE_SIZE).all()]
+
+        print(f"\n  {keyset.name} ({ROW_COUNT:,} سطر، صفحه {PAGE_SIZE}):")
+        for depth in depths:
+            print(f"    عمق {depth:>7,}: keyset {keyset_ms[depth]:6.2f}ms، offset {offset_ms[depth]:8.2f}ms")
+
+        deepest = depths[-1]
+        assert keyset_ms[deepest] < max(keyset_ms[0] * 3, 5), "تأخیر keyset با عمق صفحه افزایش یافته است"
+        assert offset_ms[deepest] > keyset_ms[deepest] * 10, "OFFSET در عمق باید بسیار کندتر باشد"
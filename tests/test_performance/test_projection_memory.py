@@ -0,0 +1,151 @@
+"""
+بنچمارک حافظه و زمان پروجکشن ستونی در برابر موجودیت کامل ORM
+
+جدول مهمانان با همان پهنای تقریبی مدل Guest در SQLite ساخته می‌شود و
+صفحه لیست به دو روش بارگذاری می‌شود: query روی موجودیت و تبدیل به dict
+(الگوی قبلی سرویس‌ها) و select ستونی با GuestListItem.
+"""
+
+import time
+import tracemalloc
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.services.reception.projections import GuestListItem, columns_of, fetch_projection
+
+ROW_COUNT = 10_000
+
+Base = declarative_base()
+
+
+class WideGuest(Base):
+    """موجودیت هم‌پهنای Guest برای بنچمارک"""
+    __tablename__ = 'guests'
+
+    id = Column(Integer, primary_key=True)
+    first_name = Column(String(100))
+    last_name = Column(String(100))
+    father_name = Column(String(100))
+    national_id = Column(String(20))
+    passport_number = Column(String(50))
+    nationality = Column(String(50))
+    phone = Column(String(15))
+    mobile = Column(String(15))
+    email = Column(String(100))
+    address = Column(Text)
+    city = Column(String(50))
+    company = Column(String(200))
+    notes = Column(Text)
+    preferences = Column(Text)
+    vip_status = Column(Boolean)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+
+
+@pytest.fixture(scope='module')
+def guest_session_factory(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('projection') / 'guests.db'}")
+    Base.metadata.create_all(engine)
+
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(WideGuest.__table__.insert(), [
+            {
+                'id': i, 'first_name': f'نام {i}', 'last_name': f'خانوادگی {i}',
+                'father_name': f'پدر {i}', 'national_id': f'{i:010d}',
+                'passport_number': f'P{i:08d}', 'nationality': 'ایرانی',
+                'phone': f'0912{i:07d}', 'mobile': f'0935{i:07d}',
+                'email': f'guest{i}@example.com', 'address': 'تهران، خیابان ولیعصر، ' * 4,
+                'city': 'تهران', 'company': 'شرکت نمونه', 'notes': 'یادداشت ' * 20,
+                'preferences': '{"floor": "high", "pillow": "soft"}',
+                'vip_status': i % 50 == 0, 'created_at': now, 'updated_at': now
+            }
+            for i in range(1, ROW_COUNT + 1)
+        ])
+
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def load_entities(session):
+    """الگوی قبلی: موجودیت کامل و تبدیل به dict"""
+    return [
+        {
+            'id': guest.id,
+            'full_name': f"{guest.first_name} {guest.last_name}",
+            'national_id': guest.national_id,
+            'phone': guest.phone,
+            'email': guest.email,
+            'vip_status': guest.vip_status
+        }
+        for guest in session.query(WideGuest).all()
+    ]
+
+
+def load_projection(session):
+    """الگوی جدید: select ستونی و named tuple"""
+    return fetch_projection(session.query(*columns_of(GuestListItem, WideGuest)), GuestListItem)
+
+
+def measure(session_factory, loader):
+    """زمان بارگذاری و اوج حافظه تا پایان نگهداری نتیجه"""
+    with session_factory() as session:
+        started = time.perf_counter()
+        loader(session)
+        elapsed = time.perf_counter() - started
+
+    with session_factory() as session:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        rows = loader(session)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return rows, elapsed, (peak - baseline) / 1024, (retained - baseline) / 1024
+
+
+class TestProjectionMapping:
+    """تست نگاشت پروجکشن"""
+
+    def test_columns_follow_projection_fields(self):
+        columns = columns_of(GuestListItem, WideGuest, vip_status=WideGuest.notes)
+        assert [c.key for c in columns] == [
+            'id', 'first_name', 'last_name', 'national_id', 'phone', 'email', 'notes'
+        ]
+
+    def test_projection_matches_entity_dicts(self, guest_session_factory):
+        with guest_session_factory() as session:
+            entities = load_entities(session)
+            projected = [guest.to_dict() for guest in load_projection(session)]
+
+        assert projected == entities
+
+
+@pytest.mark.performance
+class TestProjectionPerformance:
+    """بنچمارک حافظه و زمان برای 10000 سطر"""
+
+    def test_projection_vs_entities_per_10k_rows(self, guest_session_factory):
+        # Given - یک بار اجرای هر دو مسیر برای گرم شدن cache دستورات
+        with guest_session_factory() as session:
+            load_entities(session)
+            load_projection(session)
+
+        # When
+        entity_rows, entity_time, entity_peak_kb, _ = measure(guest_session_factory, load_entities)
+        projected_rows, projection_time, projection_peak_kb, retained_kb = measure(
+            guest_session_factory, load_projection
+        )
+
+        # Then
+        print(f"\n📋 {ROW_COUNT} سطر مهمان:"
+              f"\n  موجودیت ORM: {entity_time * 1000:.1f}ms، اوج حافظه {entity_peak_kb:,.0f}KB"
+              f"\n  پروجکشن: {projection_time * 1000:.1f}ms، اوج حافظه {projection_peak_kb:,.0f}KB"
+              f"، نگهداری شده {retained_kb:,.0f}KB")
+
+        assert len(entity_rows) == len(projected_rows) == ROW_COUNT
+        assert projection_peak_kb < entity_peak_kb / 2, "پروجکشن باید کمتر از نصف حافظه مصرف کند"
+        assert projection_time < entity_time, "پروجکشن باید سریع‌تر از بارگذاری موجودیت باشد"
@@ -0,0 +1,82 @@
+"""
+بنچمارک بروزرسانی گرید وضعیت اتاق‌ها
+"""
+
+import time
+import random
+import tracemalloc
+
+import pytest
+
+from app.views.widgets.dashboard.room_grid import RoomGridModel, RoomFilterProxyModel
+
+ROOM_COUNT = 450
+REFRESH_CYCLES = 1000
+STATUSES = ['vacant', 'occupied', 'cleaning', 'maintenance', 'inspection']
+
+
+def make_rooms(count: int):
+    """ساخت داده نمونه اتاق‌ها مشابه خروجی RoomService.get_room_status"""
+    return [
+        {
+            'room_id': room_id,
+            'room_number': f"{room_id // 50 + 1}{room_id % 50:02d}",
+            'room_type': 'دو تخته',
+            'floor': room_id // 50 + 1,
+            'current_status': random.choice(STATUSES),
+            'current_guest': None,
+            'is_active': True
+        }
+        for room_id in range(count)
+    ]
+
+
+@pytest.mark.performance
+class TestRoomStatusGridPerformance:
+    """بنچمارک زمان و حافظه بروزرسانی گرید اتاق‌ها"""
+
+    def test_refresh_cycles_time_and_memory(self, qapp):
+        """1000 چرخه بروزرسانی با تغییر چند وضعیت در هر چرخه"""
+        # Given
+        random.seed(42)
+        model = RoomGridModel()
+        proxy = RoomFilterProxyModel()
+        proxy.setSourceModel(model)
+        proxy.set_filters(None, 'vacant')
+
+        rooms = make_rooms(ROOM_COUNT)
+        model.update_rooms(rooms)
+
+        changed_rows = []
+        model.dataChanged.connect(lambda top_left, *_: changed_rows.append(top_left.row()))
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        durations = []
+
+        # When - هر چرخه مانند پاسخ جدید سرویس یک لیست تازه از dictها می‌سازد
+        for _ in range(REFRESH_CYCLES):
+            rooms = [dict(room) for room in rooms]
+            for room in random.sample(rooms, 5):
+                room['current_status'] = random.choice(STATUSES)
+
+            start = time.perf_counter()
+            model.update_rooms(rooms)
+            qapp.processEvents()
+            durations.append(time.perf_counter() - start)
+
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Then
+        average_ms = sum(durations) / len(durations) * 1000
+        worst_ms = max(durations) * 1000
+        growth_kb = (current - baseline) / 1024
+        print(f"\n🏨 {ROOM_COUNT} اتاق × {REFRESH_CYCLES} بروزرسانی: "
+              f"میانگین {average_ms:.2f}ms، بیشینه {worst_ms:.2f}ms، "
+              f"رشد حافظه {growth_kb:.1f}KB، اوج {peak / 1024:.1f}KB")
+
+        assert model.rowCount() == ROOM_COUNT
+        assert len(changed_rows) <= REFRESH_CYCLES * 5, "فقط اتاق‌های تغییر یافته باید بازنقاشی شوند"
+        assert average_ms < 16, "هر بروزرسانی باید در کمتر از یک فریم انجام شود"
+        assert growth_kb < 1024, "حافظه نباید با تعداد بروزرسانی‌ها رشد کند"
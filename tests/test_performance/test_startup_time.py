@@ -0,0 +1,58 @@
+"""
+بنچمارک زمان راه‌اندازی پنجره اصلی تا اولین تعامل
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+TIME_TO_INTERACTIVE_LIMIT_MS = 1500
+
+
+@pytest.mark.performance
+class TestMainWindowStartup:
+    """اندازه‌گیری زمان ساخت و نمایش پنجره اصلی با تب‌های تنبل"""
+
+    def test_time_to_first_interactive(self, qapp):
+        """فقط تب دشبورد هنگام نمایش ساخته شود و زمان تا اولین تعامل گزارش شود"""
+        # Given - سرویس‌ها بدون پایگاه داده پاسخ خالی می‌دهند
+        from PyQt5.QtWidgets import QMessageBox
+        from app.views.main_window import MainWindow
+
+        empty_rooms = {'success': True, 'rooms': []}
+        with patch('app.services.reception.room_service.RoomService.get_room_status', return_value=empty_rooms), \
+                patch('PyQt5.QtWidgets.QMessageBox.warning'), \
+                patch('PyQt5.QtWidgets.QMessageBox.critical'), \
+                patch('PyQt5.QtWidgets.QMessageBox.question', return_value=QMessageBox.Yes):
+
+            # When
+            started = time.perf_counter()
+            window = MainWindow()
+            window.show()
+            while 'time_to_first_interactive_ms' not in window.startup_metrics:
+                qapp.processEvents()
+                if (time.perf_counter() - started) * 1000 > TIME_TO_INTERACTIVE_LIMIT_MS * 4:
+                    break
+
+            metrics = window.startup_metrics
+
+            # Then
+            print(f"\n⏱️ ساخت پنجره: {metrics['construct_ms']:.0f}ms")
+            print(f"⏱️ زمان تا اولین تعامل: {metrics['time_to_first_interactive_ms']:.0f}ms")
+            for tab_name, build_ms in metrics['tab_build_ms'].items():
+                print(f"   تب {tab_name}: {build_ms:.0f}ms")
+
+            assert window.main_tabs.is_built(0)
+            assert not window.main_tabs.is_built(1)
+            assert not window.main_tabs.is_built(2)
+            assert not hasattr(window, 'guest_list_widget')
+            assert metrics['time_to_first_interactive_ms'] < TIME_TO_INTERACTIVE_LIMIT_MS
+
+            # تب مهمانان فقط با انتخاب ساخته می‌شود
+            window.main_tabs.setCurrentIndex(1)
+            assert window.main_tabs.is_built(1)
+            assert hasattr(window, 'guest_list_widget')
+
+            window.stop_all_timers()
+            window.close()
@@ -0,0 +1,371 @@
+"""
+تست پارتیشن‌بندی ماهانه تغییرات وضعیت اتاق و Audit
+
+تست‌های نام‌گذاری و انتخاب پارتیشن‌های منقضی بدون دیتابیس اجرا می‌شوند.
+تست‌های تبدیل، partition pruning و حجم WAL نگهداری به PostgreSQL نیاز
+دارند و فقط با تنظیم TEST_POSTGRES_URL (اتصال با دسترسی ایجاد دیتابیس)
+اجرا می‌شوند؛ برای هر تست یک دیتابیس موقت ساخته و سپس حذف می‌شود.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+from app.core import database, partitioning
+from app.core.audit_trail import AuditTrail, AuditManager
+from app.core.migrations import _time_partitioning
+from app.core.partitioning import (
+    PartitionManager, add_months, create_partition_sql, default_partition_name, expired_months,
+    is_partitioned, list_partitions, month_start, partition_month, partition_name, spec_for
+)
+from app.models.reception.archive_models import ARCHIVE_TABLES
+from app.models.reception.room_status_models import RoomStatusChange
+from config import config
+
+POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+HISTORY_MONTHS = 14
+ROWS_PER_MONTH = 5_000
+AUDIT_RETENTION_DAYS = 180
+
+requires_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL تنظیم نشده است")
+
+
+@pytest.mark.performance
+class TestPartitionNaming:
+    """نام‌گذاری و بازه پارتیشن‌ها"""
+
+    def test_month_arithmetic(self):
+        assert month_start(datetime(2025, 3, 17, 10, 30)) == date(2025, 3, 1)
+        assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+    def test_partition_names(self):
+        table = AuditTrail.__table__
+        assert partition_name(table, date(2025, 3, 1)) == 'system_audit_trail_p202503'
+        assert partition_month('system_audit_trail_p202503') == date(2025, 3, 1)
+        assert partition_month('system_audit_trail_default') is None
+
+    def test_partition_bounds(self):
+        sql = create_partition_sql(spec_for(AuditTrail.__table__), date(2025, 12, 1))
+        assert 'system.system_audit_trail_p202512 PARTITION OF system.system_audit_trail' in sql
+        assert "FROM ('2025-12-01') TO ('2026-01-01')" in sql
+
+    def test_expired_months_keep_partial_month(self):
+        """ماه شامل مرز نگهداری حذف نمی‌شود"""
+        months = [date(2025, month, 1) for month in range(1, 13)]
+
+        # Given: مرز نگهداری 2025-06-15
+        expired = expired_months(months, 30, today=date(2025, 7, 15))
+
+        # Then: فقط ماه‌هایی که پیش از مرز تمام شده‌اند
+        assert expired == [date(2025, month, 1) for month in range(1, 6)]
+
+
+@pytest.mark.performance
+class TestPartitionMaintenanceIsolation:
+    """خطای نگهداری یک جدول مانع نگهداری جدول‌های دیگر نمی‌شود"""
+
+    def test_failed_table_does_not_stop_others(self, monkeypatch):
+        specs = partitioning.partition_specs()
+        maintained = []
+
+        class FakeSession:
+            def connection(self):
+                return None
+
+            def commit(self):
+                pass
+
+        @contextmanager
+        def fake_session():
+            yield FakeSession()
+
+        def fake_ensure(connection, spec):
+            if spec is specs[0]:
+                raise RuntimeError("check constraint violated by some row")
+            maintained.append(spec.qualified_name)
+            return ['created']
+
+        monkeypatch.setattr(partitioning, 'partition_specs', lambda: specs)
+        monkeypatch.setattr(partitioning, 'db_session', fake_session)
+        monkeypatch.setattr(partitioning, 'is_partitioned', lambda connection, table: True)
+        monkeypatch.setattr(partitioning, 'ensure_partitions', fake_ensure)
+        monkeypatch.setattr(partitioning, 'drop_expired_partitions',
+                            lambda connection, spec: {'partitions': [], 'rows': 0, 'archived': 0})
+
+        # When
+        manager = PartitionManager(interval=0)
+        results = manager.run_maintenance()
+
+        # Then: جدول دوم نگهداری شده و خطای جدول اول ثبت شده است
+        assert maintained == [specs[1].qualified_name]
+        assert 'check constraint' in results[specs[0].qualified_name]['error']
+        assert results[specs[1].qualified_name]['created'] == ['created']
+        assert 'check constraint' in manager.last_error
+
+
+@pytest.fixture
+def postgres_database(monkeypatch):
+    admin = create_engine(POSTGRES_URL, isolation_level='AUTOCOMMIT')
+    name = f"hotel_partitioning_test_{os.getpid()}"
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {name}"))
+        conn.execute(text(f"CREATE DATABASE {name}"))
+
+    engine = create_engine(make_url(POSTGRES_URL).set(database=name))
+    status_changes = RoomStatusChange.__table__
+    room_fk = [fk.constraint for fk in status_changes.foreign_keys if fk.column.table.name == 'hotel_rooms']
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA system"))
+        conn.execute(text("CREATE TABLE hotel_rooms (id serial PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO hotel_rooms SELECT generate_series(1, 50)"))
+        conn.execute(CreateTable(status_changes, include_foreign_key_constraints=room_fk))
+        AuditTrail.__table__.create(bind=conn)
+        ARCHIVE_TABLES[RoomStatusChange].create(bind=conn)
+
+    monkeypatch.setattr(database, 'engine', engine)
+    monkeypatch.setattr(database, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(config.database, 'audit_retention_days', AUDIT_RETENTION_DAYS)
+
+    yield engine
+
+    engine.dispose()
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+    admin.dispose()
+
+
+def seed_history(engine):
+    """ROWS_PER_MONTH سطر Audit و تغییر وضعیت در هر یک از HISTORY_MONTHS ماه گذشته"""
+    now = datetime.now()
+    audit_rows, change_rows = [], []
+    for month_offset in range(HISTORY_MONTHS):
+        base = now - timedelta(days=30 * month_offset)
+        for index in range(ROWS_PER_MONTH):
+            moment = base - timedelta(minutes=index * 8)
+            audit_rows.append({
+                'timestamp': moment, 'action_type': 'guest_update', 'severity': 'low',
+                'user_id': index % 20, 'user_name': 'پذیرش', 'entity_type': 'guest',
+                'entity_id': index, 'description': 'ویرایش اطلاعات مهمان ' * 4
+            })
+            change_rows.append({
+                'room_id': index % 50 + 1, 'previous_status': 'occupied', 'new_status': 'cleaning',
+                'changed_by': 1, 'change_type': 'housekeeping', 'created_at': moment
+            })
+
+    with engine.begin() as conn:
+        conn.execute(insert(AuditTrail.__table__), audit_rows)
+        conn.execute(insert(RoomStatusChange.__table__), change_rows)
+
+
+def migrate(engine):
+    with database.SessionLocal() as session:
+        _time_partitioning(session)
+        session.commit()
+
+
+def scan_nodes(conn, sql: str, analyze: bool = False, **params) -> list:
+    """گره‌های خواندن جدول در plan اجرای query"""
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    plan = conn.execute(text(f"EXPLAIN ({options}) {sql}"), params).scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+
+    scans, nodes = [], [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if 'Relation Name' in node:
+            scans.append(node)
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+
+def wal_bytes(conn, action) -> int:
+    """حجم WAL تولید شده توسط action"""
+    start = conn.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+    action()
+    return conn.execute(text("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), :start)"), {'start': start}).scalar()
+
+
+@pytest.mark.performance
+@requires_postgres
+class TestTimePartitioning:
+    """تبدیل جداول، pruning و نگهداری با حذف پارتیشن"""
+
+    def test_migration_converts_tables(self, postgres_database):
+        """سطرها، sequence شناسه و کلید خارجی پس از تبدیل حفظ می‌شوند"""
+        seed_history(postgres_database)
+
+        # When: اجرای مهاجرت (دو بار؛ مهاجرت idempotent است)
+        started = time.perf_counter()
+        migrate(postgres_database)
+        elapsed = time.perf_counter() - started
+        migrate(postgres_database)
+
+        total = HISTORY_MONTHS * ROWS_PER_MONTH
+        with postgres_database.begin() as conn:
+            # Then: هر دو جدول پارتیشن‌بندی شده و سطرها منتقل شده‌اند
+            for table in (AuditTrail.__table__, RoomStatusChange.__table__):
+                assert is_partitioned(conn, table)
+                assert conn.execute(text(f"SELECT count(*) FROM {spec_for(table).qualified_name}")).scalar() == total
+
+                # پارتیشن ماه‌های گذشته تا سه ماه آینده
+                months = list_partitions(conn, table)
+                current = month_start(date.today())
+                assert add_months(current, config.database.partition_months_ahead) in months
+                assert min(months) <= add_months(current, -HISTORY_MONTHS + 1)
+
+            # شناسه سطرهای جدید از sequence قبلی ادامه می‌یابد
+            new_id = conn.execute(insert(AuditTrail.__table__).values(
+                action_type='login', user_id=1
+            ).returning(AuditTrail.__table__.c.id)).scalar()
+            assert new_id == total + 1
+
+            # کلید خارجی اتاق روی جدول جدید
+            foreign_keys = conn.execute(text(
+                "SELECT count(*) FROM pg_constraint "
+                "WHERE conrelid = 'reception_room_status_changes'::regclass AND contype = 'f'"
+            )).scalar()
+            assert foreign_keys == 1
+
+        print(f"\n🗂️ تبدیل {2 * total:,} سطر به جداول پارتیشن‌بندی شده: {elapsed:.2f}s")
+
+    def test_recent_queries_are_pruned(self, postgres_database):
+        """query بازه اخیر فقط پارتیشن‌های همان ماه‌ها را می‌خواند"""
+        seed_history(postgres_database)
+        migrate(postgres_database)
+        since, until = datetime.now() - timedelta(days=10), datetime.now()
+
+        with postgres_database.connect() as conn:
+            conn.execute(text("ANALYZE"))
+            recent_months = {month_start(since), month_start(until)}
+            expected = {partition_name(AuditTrail.__table__, month) for month in recent_months}
+
+            # When: لاگ‌های Audit ده روز اخیر
+            scanned = {node['Relation Name'] for node in scan_nodes(
+                conn, "SELECT id FROM system.system_audit_trail WHERE timestamp >= :since AND timestamp < :until",
+                since=since, until=until
+            )}
+
+            # Then: فقط پارتیشن‌های ماه جاری (و ماه قبل)
+            assert scanned <= expected
+            assert len(list_partitions(conn, AuditTrail.__table__)) > HISTORY_MONTHS
+
+            # آخرین وضعیت یک اتاق: از ایندکس هر پارتیشن حداکثر یک سطر خوانده می‌شود
+            latest = scan_nodes(
+                conn, "SELECT new_status FROM reception_room_status_changes "
+                      "WHERE room_id = 7 ORDER BY created_at DESC LIMIT 1", analyze=True
+            )
+            assert all(node['Node Type'] == 'Index Scan' and node['Actual Rows'] <= 1 for node in latest)
+
+        print(f"\n✂️ پارتیشن‌های خوانده شده برای بازه اخیر: {sorted(scanned)}")
+
+    def test_retention_drops_partitions_without_delete_wal(self, postgres_database):
+        """حذف پارتیشن‌های قدیمی WAL بسیار کمتری از DELETE سطر به سطر تولید می‌کند"""
+        seed_history(postgres_database)
+        migrate(postgres_database)
+        cutoff = datetime.now() - timedelta(days=AUDIT_RETENTION_DAYS)
+
+        with postgres_database.connect() as conn:
+            # Given: نسخه پارتیشن‌بندی نشده از همان داده‌ها برای مقایسه
+            conn.execute(text(
+                "CREATE TABLE system.audit_unpartitioned AS SELECT * FROM system.system_audit_trail"
+            ))
+            conn.execute(text("CREATE INDEX ON system.audit_unpartitioned (timestamp, id)"))
+            conn.commit()
+            expected_rows = conn.execute(text(
+                "SELECT count(*) FROM system.system_audit_trail WHERE timestamp < :cutoff"
+            ), {'cutoff': datetime.combine(month_start(cutoff), datetime.min.time())}).scalar()
+            conn.commit()
+
+            # When: نگهداری با حذف پارتیشن‌ها
+            removed = {}
+            partition_wal = wal_bytes(conn, lambda: removed.setdefault('rows', AuditManager().cleanup_old_records()))
+
+            def delete_rows():
+                conn.execute(text("DELETE FROM system.audit_unpartitioned WHERE timestamp < :cutoff"),
+                             {'cutoff': cutoff})
+                conn.commit()
+
+            delete_wal = wal_bytes(conn, delete_rows)
+
+            # Then: سطرهای ماه‌های کامل قدیمی حذف شده‌اند و ماه مرز باقی است
+            assert removed['rows'] == expected_rows > 0
+            oldest = conn.execute(text("SELECT min(timestamp) FROM system.system_audit_trail")).scalar()
+            assert month_start(oldest) == month_start(cutoff)
+            assert partition_name(AuditTrail.__table__, add_months(month_start(cutoff), -1)) not in \
+                list_partitions(conn, AuditTrail.__table__).values()
+
+            # حذف پارتیشن‌ها فقط تغییرات کاتالوگ را در WAL می‌نویسد
+            assert partition_wal * 10 < delete_wal
+
+        print(f"\n🧾 WAL نگهداری: حذف پارتیشن {partition_wal / 1024:.0f}KB، "
+              f"DELETE سطر به سطر {delete_wal / 1024:.0f}KB ({removed['rows']:,} سطر)")
+
+    def test_manager_creates_future_partitions(self, postgres_database, monkeypatch):
+        """PartitionManager پارتیشن‌های آینده را می‌سازد و پارتیشن‌های قدیمی را حذف می‌کند"""
+        seed_history(postgres_database)
+        migrate(postgres_database)
+        monkeypatch.setattr(config.database, 'partition_months_ahead', 5)
+        monkeypatch.setattr(config.database, 'room_status_retention_days', 200)
+
+        # When: یک دور نگهداری
+        results = PartitionManager(interval=0).run_maintenance()
+
+        # Then: دو ماه آینده اضافه و ماه‌های قدیمی‌تر از مدت نگهداری حذف شده‌اند
+        current = month_start(date.today())
+        changes = results['reception_room_status_changes']
+        assert changes['created'] == [
+            partition_name(RoomStatusChange.__table__, add_months(current, offset)) for offset in (4, 5)
+        ]
+        assert changes['partitions'] and changes['rows'] > 0
+
+        with postgres_database.connect() as conn:
+            months = list_partitions(conn, RoomStatusChange.__table__)
+            assert all(add_months(month, 1) > date.today() - timedelta(days=200) for month in months)
+
+            # سطرهای پارتیشن‌های حذف شده تغییرات وضعیت در بایگانی باقی‌اند
+            assert changes['archived'] == changes['rows']
+            assert conn.execute(text(
+                "SELECT count(*) FROM archive_reception_room_status_changes"
+            )).scalar() == changes['rows']
+
+    def test_maintenance_moves_rows_out_of_default_partition(self, postgres_database, monkeypatch):
+        """سطر ماهی که پارتیشن ندارد در پارتیشن پیش‌فرض می‌ماند و با ساخت پارتیشن منتقل می‌شود"""
+        migrate(postgres_database)
+        current = month_start(date.today())
+        future = add_months(current, config.database.partition_months_ahead + 2)
+        table = RoomStatusChange.__table__
+
+        # Given: سطری با تاریخ آینده پس از آخرین پارتیشن ساخته شده
+        with postgres_database.begin() as conn:
+            conn.execute(insert(table).values(
+                room_id=1, previous_status='vacant', new_status='out_of_order', changed_by=1,
+                change_type='maintenance', created_at=datetime.combine(future, datetime.min.time())
+            ))
+            default = default_partition_name(table)
+            assert conn.execute(text(f"SELECT count(*) FROM {default}")).scalar() == 1
+
+        # When: نگهداری با پارتیشن‌های آینده بیشتر
+        monkeypatch.setattr(config.database, 'partition_months_ahead', config.database.partition_months_ahead + 2)
+        manager = PartitionManager(interval=0)
+        results = manager.run_maintenance()
+
+        # Then: پارتیشن ماه ساخته و سطر از پارتیشن پیش‌فرض به آن منتقل شده است
+        assert 'error' not in results['reception_room_status_changes']
+        assert partition_name(table, future) in results['reception_room_status_changes']['created']
+        assert manager.last_error is None
+        with postgres_database.connect() as conn:
+            assert conn.execute(text(f"SELECT count(*) FROM {default}")).scalar() == 0
+            assert conn.execute(text(f"SELECT count(*) FROM {partition_name(table, future)}")).scalar() == 1
+            assert conn.execute(text(f"SELECT count(*) FROM {spec_for(table).qualified_name}")).scalar() == 1
+
+        # و اجرای بعدی هم بدون خطاست
+        assert 'error' not in manager.run_maintenance()['reception_room_status_changes']